@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""log_harvest.py — Harvest error signatures from a long run while it is still running.
+
+"One Run, All Errors" means letting a 40-minute E2E run finish and collecting
+every failure. Re-reading the whole, ever-growing log on each check scans the
+same gigabytes over and over. This script follows the run once instead:
+
+- sources: a command it starts (output kept in a log file), log files it
+  tails (truncation and rotation handled) and `docker logs -f` per container
+- every line is checked for error signals (ERROR/FATAL/panic, *Error and
+  *Exception, level=error, tracebacks) and reduced to a signature with
+  timestamps, ids, numbers and paths masked, so repeats of one error count
+  against one entry
+- a bounded summary (at most --max-signatures entries, each with a count,
+  first/last sighting, sources and the first occurrence's trace) is written
+  atomically to a small JSON file every --interval seconds
+
+Memory stays flat however long the run is: lines are never kept, only the
+bounded summary. Agents poll `digest` instead of re-scanning the logs.
+
+Usage:
+    log_harvest.py watch --name e2e [--file app.log] [--container api] [-- make e2e]   # follow until done
+    log_harvest.py digest --name e2e [--since CURSOR] [--markdown]                     # poll the summary
+    log_harvest.py stop --name e2e                                                      # end a file/container watch
+    log_harvest.py scan [--markdown] [FILE]                                             # one pass over a saved log
+
+State lives in <git-dir>/superpowers/harvest/<name>.json, with command and
+container output in <name>.<source>.log beside it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+MAX_SIGNATURES = 200
+MAX_LINE_BYTES = 8192
+SIGNATURE_CHARS = 160
+LINE_CHARS = 300
+TRACE_LINES = 12
+DIGEST_LIMIT = 20
+POLL_SECONDS = 0.2
+QUEUE_LINES = 10000
+
+ERROR_LINE = re.compile(
+    r"\b(?:ERROR|FATAL|CRITICAL|PANIC|SEVERE|FAIL(?:ED|URE)?)\b"
+    r"|\b\w+(?:Error|Exception)\b"
+    r"|^(?:panic|error(?:\[\w+\])?|fatal):"
+    r"|\blevel\W{0,3}(?:error|fatal|critical)\b"
+    r"|npm ERR!"
+)
+TRACEBACK = re.compile(r"^Traceback \(most recent call last\):")
+CONTINUATION = re.compile(r"^(?:\s+\S|\s*at\s|\s*Caused by:|goroutine \d+)")
+PREFIX = (
+    re.compile(r"^\S+\s+\|\s+"),  # docker compose "service  | "
+    re.compile(r"^\[?\d{4}-\d{2}-\d{2}[T ][\d:.,]+(?:Z|[+-]\d{2}:?\d{2})?\]?\s*"),  # ISO timestamp
+    re.compile(r"^[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}\s+"),  # syslog timestamp
+)
+VOLATILE = (
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ][\d:.,]+(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),
+    (re.compile(r"\b[0-9a-f]{12,}\b"), "<hex>"),
+    (re.compile(r"(?<![A-Za-z_])\d+(\.\d+)?|(?<=[A-Za-z_])\d+(?![A-Za-z_\d])"), "N"),
+    (re.compile(r"(/[\w.-]+)+/"), "…/"),
+)
+
+
+def signature(line: str) -> str:
+    """The error line with log prefixes stripped and run-specific values masked."""
+    for prefix in PREFIX:
+        line = prefix.sub("", line, count=1)
+    for pattern, replacement in VOLATILE:
+        line = pattern.sub(replacement, line)
+    return " ".join(line.split())[:SIGNATURE_CHARS]
+
+
+class Harvester:
+    """Bounded, incremental error summary: feed it lines, snapshot it any time."""
+
+    def __init__(self, max_signatures: int = MAX_SIGNATURES, patterns: list[str] = (), ignore: list[str] = ()):
+        self.max_signatures = max_signatures
+        self.patterns = [re.compile(p) for p in patterns]
+        self.ignore = [re.compile(p) for p in ignore]
+        self.signatures: dict[str, dict] = {}
+        self.sources: dict[str, dict] = {}
+        self.lines = 0
+        self.error_lines = 0
+        self.distinct = 0
+        self.evicted = 0
+        self.seq = 0
+        self._traces: dict[str, deque | None] = {}
+        self._open: dict[str, dict | None] = {}
+
+    def _is_error(self, line: str) -> bool:
+        if any(p.search(line) for p in self.ignore):
+            return False
+        return bool(ERROR_LINE.search(line)) or any(p.search(line) for p in self.patterns)
+
+    def _evict(self) -> None:
+        victim = min(self.signatures.values(), key=lambda entry: (entry["count"], entry["last_seen"]))
+        del self.signatures[victim["signature"]]
+        self.evicted += 1
+        for source, entry in self._open.items():
+            if entry is victim:
+                self._open[source] = None
+
+    def _record(self, source: str, line_no: int, line: str, trace: list[str], now: float) -> dict:
+        key = signature(line)
+        entry = self.signatures.get(key)
+        if entry is None:
+            if len(self.signatures) >= self.max_signatures:
+                self._evict()
+            self.seq += 1
+            self.distinct += 1
+            entry = self.signatures[key] = {
+                "seq": self.seq,
+                "signature": key,
+                "count": 0,
+                "first_seen": now,
+                "last_seen": now,
+                "sources": [],
+                "first": {"source": source, "line": line_no, "text": line[:LINE_CHARS]},
+                # The first occurrence in context: traceback lines before it, or stack frames after it
+                "trace": [text[:LINE_CHARS] for text in trace[-(TRACE_LINES - 1):]] + [line[:LINE_CHARS]] if trace else [],
+            }
+            self._open[source] = entry
+        else:
+            self._open[source] = None
+        entry["count"] += 1
+        entry["last_seen"] = now
+        if source not in entry["sources"]:
+            entry["sources"].append(source)
+        self.error_lines += 1
+        return entry
+
+    def feed(self, source: str, line: str, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        line = line.rstrip("\r\n")
+        stats = self.sources.setdefault(source, {"lines": 0, "bytes": 0, "last_output_at": now})
+        stats["lines"] += 1
+        stats["bytes"] += len(line) + 1
+        stats["last_output_at"] = now
+        self.lines += 1
+        line_no = stats["lines"]
+
+        trace = self._traces.get(source)
+        if trace is not None:
+            if CONTINUATION.match(line) or TRACEBACK.match(line) or not line.strip():
+                trace.append(line)
+                return
+            self._traces[source] = None  # the exception line that ends a Python traceback
+            self._record(source, line_no, line, list(trace), now)
+            return
+        if TRACEBACK.match(line):
+            self._traces[source] = deque([line], maxlen=TRACE_LINES)
+            return
+        if self._is_error(line):
+            self._record(source, line_no, line, [], now)
+            return
+        entry = self._open.get(source)
+        if entry is not None and CONTINUATION.match(line) and len(entry["trace"]) < TRACE_LINES:
+            entry["trace"] = (entry["trace"] or [entry["first"]["text"]]) + [line[:LINE_CHARS]]
+        else:
+            self._open[source] = None
+
+    def snapshot(self) -> dict:
+        return {
+            "lines": self.lines,
+            "error_lines": self.error_lines,
+            "distinct_signatures": self.distinct,
+            "evicted": self.evicted,
+            "cursor": self.seq,
+            "sources": self.sources,
+            "signatures": sorted(self.signatures.values(), key=lambda entry: entry["seq"]),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+
+def _decode(raw: bytes) -> str:
+    return raw[:MAX_LINE_BYTES].decode("utf-8", errors="replace")
+
+
+def _pump(stream, source: str, lines: queue.Queue, tee: Path | None) -> None:
+    """Read a pipe line by line into the queue (and the tee log) until EOF."""
+    try:
+        with open(tee, "ab") if tee else open(os.devnull, "wb") as log:
+            for raw in iter(lambda: stream.readline(MAX_LINE_BYTES), b""):
+                log.write(raw)
+                lines.put((source, _decode(raw)))
+    finally:
+        lines.put((source, None))
+
+
+def _follow(path: Path, source: str, lines: queue.Queue, stop: threading.Event, from_end: bool) -> None:
+    """tail -F: follow ``path`` across truncation and rotation until ``stop`` is set (then read what is left)."""
+    handle, inode, partial = None, None, b""
+    from_end = from_end and path.exists()  # a file created later is read from its start
+    while True:
+        stopping = stop.is_set()
+        if handle is None and path.exists():
+            handle = open(path, "rb")
+            inode = os.fstat(handle.fileno()).st_ino
+            if from_end:
+                handle.seek(0, os.SEEK_END)
+                from_end = False
+        if handle is not None:
+            while True:
+                raw = handle.readline(MAX_LINE_BYTES)
+                if not raw:
+                    break
+                partial += raw
+                if partial.endswith(b"\n") or len(partial) >= MAX_LINE_BYTES:
+                    lines.put((source, _decode(partial)))
+                    partial = b""
+            try:
+                current = os.stat(path)
+                rotated = current.st_ino != inode
+                truncated = current.st_size < handle.tell()
+            except FileNotFoundError:
+                rotated, truncated = True, False
+            if truncated:
+                handle.seek(0)
+            elif rotated:
+                handle.close()
+                handle = None
+                continue
+        if stopping:
+            break
+        stop.wait(POLL_SECONDS)
+    if partial:
+        lines.put((source, _decode(partial)))
+    if handle is not None:
+        handle.close()
+    lines.put((source, None))
+
+
+# ---------------------------------------------------------------------------
+# State
+# ---------------------------------------------------------------------------
+
+
+def state_dir(repo: Path) -> Path:
+    git_dir = Path(subprocess.run(
+        ["git", "-C", str(repo), "rev-parse", "--git-dir"], capture_output=True, text=True, check=True
+    ).stdout.strip())
+    if not git_dir.is_absolute():
+        git_dir = (repo / git_dir).resolve()
+    return git_dir / "superpowers" / "harvest"
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^\w.-]+", "-", text).strip("-") or "run"
+
+
+def _write(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(data, handle, indent=2)
+    os.replace(tmp, path)
+
+
+def watch(state: Path, command: list[str] | None = None, files: list[str] = (), containers: list[str] = (),
+          from_end: bool = False, interval: float = 1.0, idle: float = 0.0, harvester: Harvester | None = None,
+          cwd: Path | None = None) -> dict:
+    """Follow every source, rewriting ``state`` as the summary changes, until the run is over.
+
+    The run is over when the command exits, or — without a command — when every
+    container stream has ended, ``idle`` seconds pass without output, or SIGTERM
+    arrives. Files are read to the end before stopping.
+    """
+    harvester = harvester or Harvester()
+    name = state.stem
+    state.parent.mkdir(parents=True, exist_ok=True)
+    lines: queue.Queue = queue.Queue(maxsize=QUEUE_LINES)
+    stop = threading.Event()
+    threads, logs, pipes = [], {}, []
+    process = None
+    info = {"name": name, "pid": os.getpid(), "status": "running", "started_at": time.time(), "exit_code": None}
+
+    def start(target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    if command:
+        logs["command"] = state.with_name(f"{name}.command.log")
+        logs["command"].unlink(missing_ok=True)
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=cwd)
+        start(_pump, process.stdout, "command", lines, logs["command"])
+    for container in containers:
+        source = f"container:{container}"
+        logs[source] = state.with_name(f"{name}.{_slug(container)}.log")
+        logs[source].unlink(missing_ok=True)
+        docker = subprocess.Popen(["docker", "logs", "--follow", container], stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT)
+        pipes.append(docker)
+        start(_pump, docker.stdout, source, lines, logs[source])
+    for file in files:
+        start(_follow, Path(file), f"file:{file}", lines, stop, from_end)
+    info["logs"] = {source: str(path) for source, path in logs.items()}
+    info["sources"] = (["command"] if command else []) + [f"container:{c}" for c in containers] + [
+        f"file:{f}" for f in files
+    ]
+
+    terminated = threading.Event()
+    previous = signal.signal(signal.SIGTERM, lambda *_: terminated.set()) if threading.current_thread() is threading.main_thread() else None
+
+    def publish() -> None:
+        _write(state, {**info, "updated_at": time.time(), **harvester.snapshot()})
+
+    open_streams = len(threads) - len(files)
+    command_done = False
+    last_output = last_write = time.time()
+    publish()
+    try:
+        while True:
+            try:
+                source, line = lines.get(timeout=POLL_SECONDS)
+                if line is None:
+                    open_streams -= not source.startswith("file:")
+                    command_done = command_done or source == "command"
+                else:
+                    harvester.feed(source, line)
+                    last_output = time.time()
+            except queue.Empty:
+                pass
+            now = time.time()
+            if now - last_write >= interval:
+                publish()
+                last_write = now
+            if stop.is_set():
+                if all(not thread.is_alive() for thread in threads) and lines.empty():
+                    break
+                continue
+            finished = (
+                terminated.is_set()
+                or command_done
+                or (not command and containers and open_streams <= 0)
+                or (idle and now - last_output >= idle)
+            )
+            if finished:
+                # Files get one last read; container streams and an interrupted command are ended
+                stop.set()
+                for pipe in pipes + ([process] if process and terminated.is_set() else []):
+                    if pipe.poll() is None:
+                        pipe.terminate()
+    finally:
+        if previous is not None:
+            signal.signal(signal.SIGTERM, previous)
+        for pipe in pipes + ([process] if process else []):
+            if pipe.poll() is None:
+                pipe.terminate()
+        if process is not None:
+            info["exit_code"] = process.wait()
+        info["status"] = "finished"
+        publish()
+    return json.loads(state.read_text())
+
+
+# ---------------------------------------------------------------------------
+# Digest
+# ---------------------------------------------------------------------------
+
+
+def digest(summary: dict, since: int = 0, limit: int = DIGEST_LIMIT) -> dict:
+    """The summary cut to what a poll needs: totals plus signatures first seen after ``since``."""
+    fresh = [entry for entry in summary["signatures"] if entry["seq"] > since]
+    now = summary.get("updated_at", time.time())
+    last_output = max((s["last_output_at"] for s in summary["sources"].values()), default=None)
+    return {
+        **{key: summary.get(key) for key in ("name", "status", "exit_code", "pid", "logs")},
+        "running_seconds": round(now - summary.get("started_at", now)),
+        "last_output_seconds_ago": None if last_output is None else round(now - last_output),
+        "lines": summary["lines"],
+        "error_lines": summary["error_lines"],
+        "distinct_signatures": summary["distinct_signatures"],
+        "evicted": summary["evicted"],
+        "cursor": summary["cursor"],
+        "new_signatures": len(fresh),
+        "signatures": fresh[:limit],
+    }
+
+
+def render(result: dict) -> str:
+    status = result.get("status") or "scanned"
+    if status == "finished" and result.get("exit_code") is not None:
+        status += f", exit code {result['exit_code']}"
+    elif status == "running":
+        status += f" {result['running_seconds'] // 60}m, last output {result['last_output_seconds_ago']}s ago"
+    lines = [
+        f"### Log harvest: {result.get('name') or 'log'} ({status})",
+        "",
+        f"- {result['lines']} lines, {result['error_lines']} error lines, {result['distinct_signatures']} distinct "
+        f"signatures ({result['new_signatures']} new since cursor; next cursor {result['cursor']})",
+    ]
+    if result["evicted"]:
+        lines.append(f"- {result['evicted']} rare signatures dropped to keep the summary bounded")
+    for source, path in (result.get("logs") or {}).items():
+        lines.append(f"- Full {source} output: `{path}`")
+    if not result["signatures"]:
+        lines.append("- No new error signatures.")
+        return "\n".join(lines)
+    lines += ["", "| # | Count | Sources | Signature | First at |", "|---|------:|---------|-----------|----------|"]
+    for entry in result["signatures"]:
+        first = entry["first"]
+        lines.append(
+            f"| {entry['seq']} | {entry['count']} | {', '.join(entry['sources'])} | "
+            f"`{entry['signature'].replace('|', '¦')}` | {first['source']}:{first['line']} |"
+        )
+    for entry in result["signatures"][:5]:
+        if entry["trace"]:
+            lines += ["", f"**#{entry['seq']}** first occurrence:", "```", *entry["trace"], "```"]
+    if len(result["signatures"]) < result["new_signatures"]:
+        lines.append(f"\n…{result['new_signatures'] - len(result['signatures'])} more; poll with a later --since.")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Harvest error signatures from a long run while it runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("watch", "digest", "stop"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--name", required=True, help="Harvest name (one per run)")
+        cmd.add_argument("--repo", type=Path, default=Path("."), help="Repository whose git dir holds the state")
+        cmd.add_argument("--state", type=Path, help="State file (default: <git-dir>/superpowers/harvest/<name>.json)")
+    watch_cmd = sub.choices["watch"]
+    watch_cmd.add_argument("--file", action="append", default=[], help="Log file to follow (repeatable)")
+    watch_cmd.add_argument("--container", action="append", default=[], help="Container whose logs to follow (repeatable)")
+    watch_cmd.add_argument("--from-end", action="store_true", help="Skip what the files already hold")
+    watch_cmd.add_argument("--interval", type=float, default=1.0, help="Seconds between summary writes (default: 1)")
+    watch_cmd.add_argument("--idle", type=float, default=0.0, help="Stop after this many seconds without output (default: never)")
+    for cmd in (watch_cmd, sub.add_parser("scan")):
+        cmd.add_argument("--pattern", action="append", default=[], help="Extra regex that marks an error line")
+        cmd.add_argument("--ignore", action="append", default=[], help="Regex for lines that are never errors")
+        cmd.add_argument("--max-signatures", type=int, default=MAX_SIGNATURES)
+    watch_cmd.add_argument("run_command", nargs=argparse.REMAINDER, help="Command to run and follow, after --")
+    for cmd in (sub.choices["digest"], sub.choices["scan"]):
+        cmd.add_argument("--since", type=int, default=0, help="Only signatures first seen after this cursor")
+        cmd.add_argument("--limit", type=int, default=DIGEST_LIMIT)
+        cmd.add_argument("--markdown", action="store_true", help="Print a table instead of JSON")
+    sub.choices["scan"].add_argument("file", nargs="?", help="Saved log (default: stdin)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "scan":
+            harvester = Harvester(args.max_signatures, args.pattern, args.ignore)
+            with open(args.file, "rb") if args.file else sys.stdin.buffer as stream:
+                for raw in iter(lambda: stream.readline(MAX_LINE_BYTES), b""):
+                    harvester.feed(args.file or "stdin", _decode(raw))
+            result = digest(harvester.snapshot(), args.since, args.limit)
+        else:
+            state = args.state or state_dir(args.repo) / f"{_slug(args.name)}.json"
+            if args.command == "watch":
+                command = args.run_command[1:] if args.run_command[:1] == ["--"] else args.run_command
+                if not (command or args.file or args.container):
+                    print("Error: nothing to watch (give a command after --, --file or --container)", file=sys.stderr)
+                    return 1
+                harvester = Harvester(args.max_signatures, args.pattern, args.ignore)
+                summary = watch(state, command or None, args.file, args.container, args.from_end, args.interval,
+                                args.idle, harvester)
+                result = digest(summary, limit=DIGEST_LIMIT)
+            elif args.command == "digest":
+                result = digest(json.loads(state.read_text()), args.since, args.limit)
+            else:
+                summary = json.loads(state.read_text())
+                if summary["status"] == "running":
+                    os.kill(summary["pid"], signal.SIGTERM)
+                result = {"name": summary["name"], "stopped": summary["status"] == "running"}
+    except (OSError, ValueError, subprocess.CalledProcessError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    if getattr(args, "markdown", False):
+        print(render(result))
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
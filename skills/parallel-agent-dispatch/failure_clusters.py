@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""failure_clusters.py — Group a test run's failures into independent domains, one agent each.
+
+Reads a test run (pytest, jest, vitest, go test or JUnit XML — parsed by
+``recipe-tools/output_digest.py``) and clusters its failures. Two failures land
+in the same cluster when they share:
+
+- a normalized failure signature (same error, same likely root cause), when
+  it is specific: it names an exception type, or says more than "assert N == N"
+  once values are masked. Generic signatures join only with a shared origin.
+- a failing test module (one agent per test file, as in the manual pattern)
+- an origin — the innermost project file in their traceback
+
+Each cluster gets a proposed scope: the files its failures touch that no other
+cluster touches. Files touched by several clusters are reported as shared, with
+a warning — agents editing them concurrently will conflict.
+
+Usage:
+    pytest 2>&1 | failure_clusters.py [--markdown]
+    failure_clusters.py --max-agents 4 --markdown .git/superpowers/test-logs/20250115-101500-x.log
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import re
+import sys
+from pathlib import Path
+
+_DIGEST = Path(__file__).resolve().parents[1] / "recipe-tools" / "output_digest.py"
+_spec = importlib.util.spec_from_file_location("output_digest", _DIGEST)
+output_digest = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(output_digest)
+
+MAX_TESTS_LISTED = 20
+FRAMES = (
+    re.compile(r'File "([^"]+)", line \d+'),  # python traceback
+    re.compile(r"^\s*(?:E\s+)?([\w./-]+\.\w+):\d+"),  # pytest / go: path:line
+    re.compile(r"\(([\w./@-]+\.\w+):\d+:\d+\)"),  # js stack frame
+    re.compile(r"\bat (?:async )?([\w./@-]+\.\w+):\d+:\d+"),  # js anonymous frame
+    re.compile(r"❯ ([\w./-]+\.\w+):\d+"),  # vitest source location
+)
+MODULE_SPLIT = re.compile(r"::| › | > ")
+EXCEPTION_TYPE = re.compile(r"^(?:[\w.]+\.)?(\w*(?:Error|Exception|Failure))\b|^panic: ")
+# Exception types every failed assertion carries; they say nothing about the cause.
+GENERIC_EXCEPTIONS = {"AssertionError", "AssertionFailedError", "ComparisonFailure", "Error", "Exception", "Failure"}
+# Assertion vocabulary and masked values ("N", "…", "0x?") left once the specifics are gone.
+FILLER = re.compile(
+    r"\b(assert|not|in|is|and|or|None|True|False|N|expected|received|expect|got|want|to\w*|equal|equality|Object)\b"
+    r"|…/?|0x\?|[\W_]+",
+    re.IGNORECASE,
+)
+MIN_SPECIFIC_CHARS = 8
+
+
+def is_specific(signature: str) -> bool:
+    """Whether a signature identifies a cause (``KeyError: 'user-N'``) rather than just a failed check (``assert N == N``)."""
+    if signature == "no details":  # output_digest.signature() found nothing to go on
+        return False
+    named = EXCEPTION_TYPE.match(signature)
+    if named and (named.group(1) or "panic") not in GENERIC_EXCEPTIONS:
+        return True
+    rest = EXCEPTION_TYPE.sub("", signature) if named else signature
+    return len(FILLER.sub("", rest)) >= MIN_SPECIFIC_CHARS
+
+
+def touched_files(lines: list[str], root: Path) -> list[str]:
+    """Project files named in a traceback, ordered so the innermost frame comes last."""
+    files: list[str] = []
+    for line in lines:
+        if output_digest.LIBRARY_FRAME.search(line):
+            continue
+        for pattern in FRAMES:
+            for match in pattern.finditer(line):
+                path = Path(match.group(1))
+                if path.is_absolute():
+                    try:
+                        path = path.resolve().relative_to(root)
+                    except ValueError:
+                        continue
+                if (root / path).is_file():
+                    if str(path) in files:
+                        files.remove(str(path))  # keep the innermost occurrence last
+                    files.append(str(path))
+    return files
+
+
+def test_module(test: str, files: list[str]) -> str:
+    """The file (or class / package) a failing test belongs to."""
+    head = MODULE_SPLIT.split(test, maxsplit=1)[0]
+    if MODULE_SPLIT.search(test):
+        return head
+    tests = [f for f in files if re.search(r"(^|/)(test_[^/]*|[^/]*_test\.\w+|[^/]*\.(test|spec)\.\w+)$", f)]
+    return tests[0] if tests else head.split("/")[0]  # go: TestTable/small -> TestTable
+
+
+class _Union:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def join(self, a: int, b: int) -> None:
+        self.parent[self.find(a)] = self.find(b)
+
+
+def _merge_smallest(clusters: list[dict], limit: int) -> list[dict]:
+    """Fold the smallest cluster into the one it shares most files with until ``limit`` remain."""
+    clusters = sorted(clusters, key=lambda c: -len(c["failures"]))
+    while len(clusters) > max(limit, 1):
+        smallest = clusters.pop()
+        overlap = [len(smallest["files"] & other["files"]) for other in clusters]
+        target = clusters[overlap.index(max(overlap))] if max(overlap) else clusters[-1]
+        target["failures"] += smallest["failures"]
+        target["files"] |= smallest["files"]
+        clusters.sort(key=lambda c: -len(c["failures"]))
+    return clusters
+
+
+def cluster(text: str, root: Path = Path("."), fmt: str | None = None, max_agents: int | None = None) -> dict:
+    root = root.resolve()
+    fmt = fmt or output_digest.detect_format(text)
+    _, parsed = output_digest.PARSERS[fmt](text)
+    failures = []
+    for failure in parsed:
+        files = touched_files(failure["lines"], root)
+        failures.append({
+            "test": failure["test"],
+            "signature": output_digest.signature(failure["lines"]),
+            "module": test_module(failure["test"], files),
+            "origin": files[-1] if files else None,
+            "files": files,
+        })
+
+    union = _Union(len(failures))
+    first_seen: dict[tuple, int] = {}
+    for index, failure in enumerate(failures):
+        specific = is_specific(failure["signature"])
+        keys = [
+            ("module", failure["module"]),
+            ("origin", failure["origin"]),
+            # "assert N == N" in two unrelated modules is a coincidence, not a shared cause.
+            ("signature", failure["signature"]) if specific else ("signature", failure["signature"], failure["origin"]),
+        ]
+        for key in keys:
+            if key[-1] is None:
+                continue
+            other = first_seen.setdefault(key, index)
+            union.join(index, other)
+
+    groups: dict[int, dict] = {}
+    for index, failure in enumerate(failures):
+        group = groups.setdefault(union.find(index), {"failures": [], "files": set()})
+        group["failures"].append(failure)
+        group["files"] |= set(failure["files"])
+    clusters = _merge_smallest(list(groups.values()), max_agents) if max_agents else sorted(
+        groups.values(), key=lambda c: -len(c["failures"])
+    )
+
+    owners: dict[str, list[str]] = {}
+    for number, group in enumerate(clusters, start=1):
+        group["id"] = f"cluster-{number}"
+        for path in group["files"]:
+            owners.setdefault(path, []).append(group["id"])
+    shared = {path: ids for path, ids in sorted(owners.items()) if len(ids) > 1}
+
+    result_clusters = []
+    for group in clusters:
+        members = group["failures"]
+        modules = sorted({f["module"] for f in members})
+        result_clusters.append({
+            "id": group["id"],
+            "size": len(members),
+            "modules": modules,
+            "signatures": sorted({f["signature"] for f in members}),
+            "tests": [f["test"] for f in members][:MAX_TESTS_LISTED],
+            "scope": sorted(path for path in group["files"] if path not in shared),
+            "shared": sorted(path for path in group["files"] if path in shared),
+        })
+    return {
+        "format": fmt,
+        "failures": len(failures),
+        "clusters": result_clusters,
+        "shared_files": shared,
+        "warnings": [
+            f"{path} is touched by {', '.join(ids)} — assign it to one agent or dispatch those clusters sequentially"
+            for path, ids in shared.items()
+        ],
+        "parallel_safe": not shared,
+    }
+
+
+def instruction(group: dict) -> str:
+    """A self-contained delegate() instruction for one cluster."""
+    lines = [f"Fix the {group['size']} failing test(s) in {', '.join(group['modules'])}:", ""]
+    lines += [f"- {test}" for test in group["tests"]]
+    if group["size"] > len(group["tests"]):
+        lines.append(f"- ... and {group['size'] - len(group['tests'])} more")
+    lines += ["", "Failure signatures:"] + [f"- {signature}" for signature in group["signatures"]]
+    if group["scope"]:
+        lines += ["", f"Scope: you may edit {', '.join(group['scope'])}."]
+    if group["shared"]:
+        lines.append(
+            f"Do NOT edit {', '.join(group['shared'])} — other agents depend on it; report the change you need instead."
+        )
+    lines += ["", "Find the root cause before changing code. Return: root cause, files changed, tests now passing."]
+    return "\n".join(lines)
+
+
+def render(result: dict) -> str:
+    lines = [f"## Failure Clusters — {result['failures']} failures, {len(result['clusters'])} independent domains", ""]
+    for group in result["clusters"]:
+        lines.append(f"### {group['id']} ({group['size']} failures)")
+        lines += ["", "```", instruction(group), "```", ""]
+    if result["warnings"]:
+        lines.append("### Shared files")
+        lines += [f"- WARNING: {warning}" for warning in result["warnings"]]
+    else:
+        lines.append("No files are shared between clusters — safe to dispatch all clusters concurrently.")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Cluster test failures into independent agent domains")
+    parser.add_argument("--repo", default=".", help="Project root, for resolving traceback paths (default: .)")
+    parser.add_argument("--format", choices=sorted(output_digest.PARSERS), help="Runner format (default: detect)")
+    parser.add_argument("--max-agents", type=int, help="Merge the smallest clusters until at most N remain")
+    parser.add_argument("--markdown", action="store_true", help="Print ready-to-dispatch instructions")
+    parser.add_argument("file", nargs="?", help="Saved test output or JUnit XML (default: stdin)")
+    args = parser.parse_args(argv)
+
+    try:
+        text = Path(args.file).read_text() if args.file else sys.stdin.read()
+        result = cluster(text, Path(args.repo), args.format, args.max_agents)
+    except (OSError, output_digest.ET.ParseError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    if args.markdown:
+        print(render(result))
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""context_cache.py — Project-context survey cache keyed by commit and dirty tree.
+
+The brainstorming, writing-plans and full-cycle recipes all open with an agent
+surveying project structure, tech stack and conventions. The survey only
+changes when those things change, so its output is cached under the repository's
+git directory (shared by every worktree, never committed):
+
+    <git-common-dir>/superpowers/context-cache/<key>.json
+
+The key is HEAD plus a fingerprint of uncommitted changes. On a key miss the
+most recent entry is still reused when nothing *relevant* changed since it was
+written: no manifest/config/docs files touched and no files added or removed
+near the top of the tree. Only then does the survey need to run again.
+
+Usage:
+    context_cache.py get  [--repo PATH]          # {"hit": bool, "reason": str, "key": str}
+    context_cache.py show [--repo PATH]          # cached survey text (after a hit)
+    context_cache.py put  [--repo PATH] < survey.md
+    context_cache.py key  [--repo PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Paths whose changes invalidate a structure / tech-stack / conventions survey.
+RELEVANT_PATTERNS = (
+    "README*",
+    "CONTRIBUTING*",
+    "AGENTS.md",
+    "docs/*",
+    "pyproject.toml",
+    "setup.py",
+    "setup.cfg",
+    "requirements*.txt",
+    "package.json",
+    "tsconfig*.json",
+    "Cargo.toml",
+    "go.mod",
+    "Gemfile",
+    "pom.xml",
+    "build.gradle*",
+    "Makefile",
+    "Dockerfile*",
+    "docker-compose*",
+    ".github/*",
+    "*/pyproject.toml",
+    "*/package.json",
+    "*/Cargo.toml",
+    "*/go.mod",
+    ".editorconfig",
+    ".pre-commit-config.yaml",
+    "ruff.toml",
+    ".eslintrc*",
+    ".prettierrc*",
+)
+# Files added or removed at this depth or shallower change the project layout.
+STRUCTURE_DEPTH = 2
+MAX_ENTRIES = 20
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, text=True, check=True
+    ).stdout
+
+
+def cache_dir(repo: Path) -> Path:
+    common = Path(_git(repo, "rev-parse", "--git-common-dir").strip())
+    if not common.is_absolute():
+        common = (repo / common).resolve()
+    return common / "superpowers" / "context-cache"
+
+
+def _dirty(repo: Path) -> list[tuple[str, str]]:
+    """Return (status, path) for every uncommitted change, untracked files included."""
+    entries = []
+    for line in _git(repo, "status", "--porcelain", "--untracked-files=all").splitlines():
+        status, path = line[:2].strip(), line[3:]
+        if " -> " in path:
+            path = path.split(" -> ", 1)[1]
+        entries.append((status, path.strip('"')))
+    return sorted(entries)
+
+
+def current_key(repo: Path) -> dict:
+    """HEAD plus a fingerprint over the status and content of every dirty path."""
+    head = _git(repo, "rev-parse", "HEAD").strip()
+    digest = hashlib.sha256()
+    dirty = _dirty(repo)
+    for status, path in dirty:
+        digest.update(f"{status}\0{path}\0".encode())
+        file_path = repo / path
+        if file_path.is_file():
+            digest.update(hashlib.sha256(file_path.read_bytes()).digest())
+    fingerprint = digest.hexdigest()[:16] if dirty else "clean"
+    return {"head": head, "fingerprint": fingerprint, "key": f"{head[:12]}-{fingerprint}"}
+
+
+def _is_relevant(status: str, path: str, patterns: tuple[str, ...]) -> bool:
+    if any(fnmatch.fnmatch(path, pattern) for pattern in patterns):
+        return True
+    structural = status[:1] in ("A", "D", "R", "?")
+    return structural and path.count("/") < STRUCTURE_DEPTH
+
+
+def relevant_changes(repo: Path, since_head: str, patterns: tuple[str, ...] = RELEVANT_PATTERNS) -> list[str] | None:
+    """Relevant paths changed since ``since_head`` (committed or not); None if unknown."""
+    try:
+        _git(repo, "merge-base", "--is-ancestor", since_head, "HEAD")
+        committed = _git(repo, "diff", "--name-status", "--no-renames", since_head, "HEAD")
+    except subprocess.CalledProcessError:
+        return None
+    changes = [tuple(line.split("\t", 1)) for line in committed.splitlines() if "\t" in line]
+    changes += _dirty(repo)
+    return sorted({path for status, path in changes if _is_relevant(status, path, patterns)})
+
+
+def _entries(directory: Path) -> list[dict]:
+    if not directory.exists():
+        return []
+    entries = []
+    for path in directory.glob("*.json"):
+        try:
+            entries.append(json.loads(path.read_text()))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return sorted(entries, key=lambda entry: entry["created_at"], reverse=True)
+
+
+def get(repo: Path) -> dict:
+    """Look up a reusable survey for the current tree."""
+    key = current_key(repo)
+    entries = _entries(cache_dir(repo))
+    for entry in entries:
+        if entry["key"] == key["key"]:
+            return {"hit": True, "reason": "exact", "key": key["key"], "cached_key": entry["key"]}
+    for entry in entries:
+        changed = relevant_changes(repo, entry["head"])
+        if changed == []:
+            return {"hit": True, "reason": "no relevant changes", "key": key["key"], "cached_key": entry["key"]}
+        if changed:
+            return {"hit": False, "reason": f"relevant changes: {', '.join(changed[:10])}", "key": key["key"]}
+    return {"hit": False, "reason": "no cached survey", "key": key["key"]}
+
+
+def show(repo: Path) -> str | None:
+    """Return the survey text that ``get`` would reuse, or None on a miss."""
+    lookup = get(repo)
+    if not lookup["hit"]:
+        return None
+    path = cache_dir(repo) / f"{lookup['cached_key']}.json"
+    return json.loads(path.read_text())["context"]
+
+
+def put(repo: Path, context: str) -> dict:
+    """Store ``context`` for the current key and prune old entries."""
+    key = current_key(repo)
+    directory = cache_dir(repo)
+    directory.mkdir(parents=True, exist_ok=True)
+    entry = {**key, "created_at": time.time(), "context": context}
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(entry, handle)
+    os.replace(tmp, directory / f"{key['key']}.json")
+    for stale in _entries(directory)[MAX_ENTRIES:]:
+        (directory / f"{stale['key']}.json").unlink(missing_ok=True)
+    return {"stored": True, "key": key["key"]}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Project-context survey cache")
+    parser.add_argument("command", choices=("get", "show", "put", "key"))
+    parser.add_argument("--repo", default=".", help="Repository path (default: current directory)")
+    args = parser.parse_args(argv)
+    repo = Path(args.repo).resolve()
+
+    try:
+        if args.command == "show":
+            context = show(repo)
+            if context is None:
+                print("Error: no reusable cached survey", file=sys.stderr)
+                return 1
+            print(context)
+            return 0
+        if args.command == "put":
+            result = put(repo, sys.stdin.read().strip())
+        elif args.command == "key":
+            result = current_key(repo)
+        else:
+            result = get(repo)
+    except subprocess.CalledProcessError as exc:
+        # Not a git repository (or no commits yet): behave as a permanent miss.
+        if args.command == "get":
+            result = {"hit": False, "reason": f"git unavailable: {exc.stderr.strip()}", "key": ""}
+        elif args.command == "put":
+            # Nothing to key a survey on; skipping the store must not fail the recipe.
+            result = {"stored": False, "reason": f"git unavailable: {exc.stderr.strip()}"}
+        else:
+            print(f"Error: {exc.stderr.strip()}", file=sys.stderr)
+            return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
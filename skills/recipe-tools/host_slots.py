@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""host_slots.py — Host-wide slot scheduler for heavy commands across concurrent recipe sessions.
+
+Several recipe sessions on one build host each launch full test suites,
+dependency installs and builds. Run them at once and they thrash CPU and I/O
+until step timeouts cascade. ``run`` wraps a heavy command: it queues for a
+slot of the command's resource class, runs the command once the host has room,
+and prints how long it waited before the command's own output.
+
+Resource classes weigh differently against the host's capacity (CPU units
+default to the core count, I/O units to 4):
+
+    test-suite   half the cores, 1 I/O unit
+    build        half the cores, 2 I/O units
+    install      1 core, 2 I/O units
+    light        1 core (linters, type checkers, single tests)
+
+The queue is ordered by priority, then fairness, then arrival:
+
+    priority     critical (the session is blocked on it) > normal > background
+                 (prefetch and speculative work). A ticket that has waited
+                 AGING_SECONDS moves up one level, so nothing starves.
+    fairness     among equal priorities, the session holding the fewest units goes first
+    arrival      first come, first served
+
+The head of the queue is never overtaken, so big jobs aren't starved by
+small ones. ``$SUPERPOWERS_SLOT_PRIORITY`` can only lower a command's priority.
+Speculative and prefetched sessions set it to ``background``. ``lift`` removes
+that floor from one process group once a session starts waiting on it: its
+queued tickets, and any it enqueues later, get the priority they asked for.
+
+State is a locked JSON file in a host-wide directory
+(``$SUPERPOWERS_SLOTS_DIR``, default ``<tmp>/superpowers-slots``), rewritten in
+place under the lock. The directory and its files are group-shared (setgid
+directory, mode 0660 files), never world-writable. To queue the sessions of
+several users together, point ``$SUPERPOWERS_SLOTS_DIR`` at a directory owned
+by a group they all belong to. A user who can't open the state runs the
+command unqueued, with a warning, instead of failing it. Holders that die are
+reclaimed by pid. No daemon or external service is needed.
+
+Usage:
+    host_slots.py run --class test-suite [--priority critical] [--session S] -- pytest -q
+    host_slots.py status [--markdown]
+    host_slots.py configure [--cpu N] [--io N] [--weight CLASS=CPU:IO ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to no locking
+    fcntl = None
+
+PRIORITIES = ("critical", "normal", "background")
+AGING_SECONDS = 120
+POLL_SECONDS = 0.25
+HISTORY_LIMIT = 2000
+DEFAULT_IO = 4
+
+
+class Ticket(NamedTuple):
+    id: str
+    session: str
+    cls: str
+    cpu: int
+    io: int
+    priority: int
+    pid: int
+    enqueued: float
+    granted: float | None
+    label: str
+    requested: int = 1
+    group: int = 0
+
+
+def slots_dir() -> Path:
+    return Path(os.environ.get("SUPERPOWERS_SLOTS_DIR") or Path(tempfile.gettempdir()) / "superpowers-slots")
+
+
+def default_weights(cpus: int) -> dict[str, tuple[int, int]]:
+    half = max(1, cpus // 2)
+    return {"test-suite": (half, 1), "build": (half, 2), "install": (1, 2), "light": (1, 0)}
+
+
+def load_config(directory: Path) -> dict:
+    """Host capacity and class weights; ``configure`` overrides the defaults."""
+    path = directory / "config.json"
+    saved = json.loads(path.read_text()) if path.exists() else {}
+    cpus = int(saved.get("cpu") or os.cpu_count() or 1)
+    weights = default_weights(cpus)
+    weights.update({name: tuple(value) for name, value in saved.get("weights", {}).items()})
+    return {"cpu": cpus, "io": int(saved.get("io") or DEFAULT_IO), "weights": weights}
+
+
+def _shared(path: Path) -> None:
+    # Shared with the directory's group, never with everyone; only the owner can chmod.
+    if path.stat().st_uid == os.getuid():
+        os.chmod(path, 0o2770 if path.is_dir() else 0o660)
+
+
+@contextlib.contextmanager
+def _state(directory: Path) -> Iterator[dict]:
+    """Locked read-modify-write of the host's queue.
+
+    The file is rewritten in place: replacing it would need the right to
+    unlink another user's file, which a shared directory doesn't grant.
+    """
+    if not directory.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        _shared(directory)
+    path = directory / "state.json"
+    lock_path = directory / "state.lock"
+    with open(lock_path, "a") as lock:
+        _shared(lock_path)
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o660), "r+") as handle:
+                _shared(path)
+                try:
+                    state = json.loads(handle.read() or '{"tickets": {}}')
+                except json.JSONDecodeError:  # a writer died mid-write; live holders re-register on release
+                    state = {"tickets": {}}
+                yield state
+                handle.seek(0)
+                handle.truncate()
+                json.dump(state, handle, indent=2)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # another user's live process
+        return True
+    return True
+
+
+def _tickets(state: dict) -> list[Ticket]:
+    return [Ticket(**entry) for entry in state["tickets"].values()]
+
+
+def effective_priority(ticket: Ticket, now: float) -> int:
+    waited = now - ticket.enqueued if ticket.granted is None else 0.0
+    return max(0, ticket.priority - int(waited // AGING_SECONDS))
+
+
+def queue_order(tickets: list[Ticket], now: float) -> list[Ticket]:
+    """Waiting tickets in the order they will be granted."""
+    held: dict[str, int] = {}
+    for ticket in tickets:
+        if ticket.granted is not None:
+            held[ticket.session] = held.get(ticket.session, 0) + ticket.cpu + ticket.io
+    waiting = [t for t in tickets if t.granted is None]
+    return sorted(waiting, key=lambda t: (effective_priority(t, now), held.get(t.session, 0), t.enqueued))
+
+
+def _group_alive(group: int) -> bool:
+    try:
+        os.killpg(group, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _reap(state: dict) -> None:
+    for ticket_id, entry in list(state["tickets"].items()):
+        if not _alive(entry["pid"]):
+            del state["tickets"][ticket_id]
+    for group in list(state.get("lifted", [])):
+        if not _group_alive(group):
+            state["lifted"].remove(group)
+
+
+def try_grant(state: dict, ticket_id: str, config: dict, now: float | None = None) -> bool:
+    """Grant ``ticket_id`` if it is at the head of the queue and fits; mutates ``state``."""
+    now = time.time() if now is None else now
+    tickets = _tickets(state)
+    order = queue_order(tickets, now)
+    if not order or order[0].id != ticket_id:
+        return False
+    head = order[0]
+    used_cpu = sum(t.cpu for t in tickets if t.granted is not None)
+    used_io = sum(t.io for t in tickets if t.granted is not None)
+    if used_cpu + head.cpu > config["cpu"] or used_io + head.io > config["io"]:
+        return False
+    state["tickets"][ticket_id]["granted"] = now
+    return True
+
+
+def enqueue(state: dict, config: dict, cls: str, session: str, priority: str, pid: int, label: str = "",
+            now: float | None = None, requested: str | None = None, group: int = 0) -> Ticket:
+    """Queue a ticket at ``priority``, or at ``requested`` if its process group has been lifted."""
+    cpu, io = config["weights"][cls]
+    requested = requested or priority
+    if group and group in state.get("lifted", []):
+        priority = requested
+    ticket = Ticket(
+        id=uuid.uuid4().hex[:12],
+        session=session,
+        cls=cls,
+        # A class heavier than the whole host still runs, alone.
+        cpu=min(cpu, config["cpu"]),
+        io=min(io, config["io"]),
+        priority=PRIORITIES.index(priority),
+        pid=pid,
+        enqueued=time.time() if now is None else now,
+        granted=None,
+        label=label,
+        requested=PRIORITIES.index(requested),
+        group=group,
+    )
+    state["tickets"][ticket.id] = ticket._asdict()
+    return ticket
+
+
+def lift(group: int, directory: Path | None = None) -> int:
+    """Drop the ``$SUPERPOWERS_SLOT_PRIORITY`` floor for process ``group``; returns the queued tickets raised.
+
+    Prefetch calls this when a session starts waiting on a background run, so
+    the run stops queueing behind work nobody is waiting for.
+    """
+    directory = directory or slots_dir()
+    raised = 0
+    with _state(directory) as state:
+        _reap(state)
+        lifted = state.setdefault("lifted", [])
+        if group not in lifted:
+            lifted.append(group)
+        for entry in state["tickets"].values():
+            if entry.get("group") == group and entry["granted"] is None and entry["requested"] < entry["priority"]:
+                entry["priority"] = entry["requested"]
+                raised += 1
+    return raised
+
+
+def _record(directory: Path, entry: dict) -> None:
+    path = directory / "history.jsonl"
+    with contextlib.suppress(OSError):  # wait statistics are best effort; the command already ran
+        with open(path, "a") as handle:
+            handle.write(json.dumps(entry) + "\n")
+        _shared(path)
+        if path.stat().st_size > HISTORY_LIMIT * 400:
+            lines = path.read_text().splitlines()[-HISTORY_LIMIT:]
+            path.write_text("\n".join(lines) + "\n")
+
+
+@contextlib.contextmanager
+def slot(cls: str, session: str, priority: str = "normal", label: str = "",
+         directory: Path | None = None, requested: str | None = None) -> Iterator[dict]:
+    """Hold a slot of ``cls`` for the duration of the block; yields wait statistics."""
+    directory = directory or slots_dir()
+    config = load_config(directory)
+    if cls not in config["weights"]:
+        raise ValueError(f"unknown resource class {cls!r} (known: {', '.join(sorted(config['weights']))})")
+    with _state(directory) as state:
+        _reap(state)
+        ticket = enqueue(state, config, cls, session, priority, os.getpid(), label,
+                         requested=requested, group=os.getpgrp())
+        ahead = len(queue_order(_tickets(state), ticket.enqueued)) - 1
+        running = sum(1 for t in _tickets(state) if t.granted is not None)
+    try:
+        while True:
+            with _state(directory) as state:
+                _reap(state)
+                if try_grant(state, ticket.id, config):
+                    priority = PRIORITIES[state["tickets"][ticket.id]["priority"]]  # lift may have raised it
+                    break
+            time.sleep(POLL_SECONDS * random.uniform(0.8, 1.2))
+        waited = time.time() - ticket.enqueued
+        info = {"class": cls, "priority": priority, "waited": round(waited, 1), "ahead": ahead, "running": running}
+        yield info
+    finally:
+        with _state(directory) as state:
+            entry = state["tickets"].pop(ticket.id, None)
+        if entry and entry["granted"] is not None:
+            _record(directory, {
+                "class": cls, "session": session, "priority": priority, "label": label,
+                "waited": round(entry["granted"] - entry["enqueued"], 2),
+                "held": round(time.time() - entry["granted"], 2), "finished": time.time(),
+            })
+
+
+def default_session() -> str:
+    """The checkout the command runs in: each recipe session works in its own worktree."""
+    if os.environ.get("SUPERPOWERS_SESSION"):
+        return os.environ["SUPERPOWERS_SESSION"]
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True)
+    return f"{socket.gethostname()}:{top.stdout.strip() if top.returncode == 0 else os.getcwd()}"
+
+
+def resolve_priority(requested: str) -> str:
+    """``$SUPERPOWERS_SLOT_PRIORITY`` can lower a command's priority but never raise it."""
+    floor = os.environ.get("SUPERPOWERS_SLOT_PRIORITY", "critical")
+    if floor not in PRIORITIES:
+        floor = "critical"
+    return PRIORITIES[max(PRIORITIES.index(requested), PRIORITIES.index(floor))]
+
+
+def run(command: list[str], cls: str, priority: str = "normal", session: str | None = None,
+        directory: Path | None = None) -> int:
+    session = session or default_session()
+    requested, priority = priority, resolve_priority(priority)
+    with contextlib.ExitStack() as stack:
+        try:
+            info = stack.enter_context(slot(cls, session, priority, label=" ".join(command)[:120], directory=directory,
+                                            requested=requested))
+        except OSError as exc:
+            # A scheduler we can't use must not fail the command it was only meant to pace.
+            print(f"[host-slots] scheduler state unavailable ({exc}); running {cls} unqueued", flush=True)
+        else:
+            print(
+                f"[host-slots] {cls} slot after {info['waited']:.1f}s queued "
+                f"(priority {info['priority']}, {info['ahead']} ahead, {info['running']} running at enqueue)",
+                flush=True,
+            )
+        process = subprocess.Popen(command)
+        try:
+            return process.wait()
+        except KeyboardInterrupt:
+            process.send_signal(signal.SIGINT)
+            return process.wait()
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def status(directory: Path | None = None) -> dict:
+    directory = directory or slots_dir()
+    config = load_config(directory)
+    now = time.time()
+    with _state(directory) as state:
+        _reap(state)
+        tickets = _tickets(state)
+    holders = [t for t in tickets if t.granted is not None]
+    history_path = directory / "history.jsonl"
+    history = [json.loads(line) for line in history_path.read_text().splitlines() if line] if history_path.exists() else []
+    waits: dict[str, list[float]] = {}
+    for entry in history:
+        waits.setdefault(entry["class"], []).append(entry["waited"])
+    return {
+        "capacity": {"cpu": config["cpu"], "io": config["io"]},
+        "in_use": {"cpu": sum(t.cpu for t in holders), "io": sum(t.io for t in holders)},
+        "weights": {name: {"cpu": cpu, "io": io} for name, (cpu, io) in sorted(config["weights"].items())},
+        "running": [
+            {"class": t.cls, "session": t.session, "priority": PRIORITIES[t.priority], "label": t.label,
+             "seconds": round(now - t.granted, 1)}
+            for t in sorted(holders, key=lambda t: t.granted)
+        ],
+        "queued": [
+            {"class": t.cls, "session": t.session, "priority": PRIORITIES[effective_priority(t, now)],
+             "label": t.label, "waiting": round(now - t.enqueued, 1)}
+            for t in queue_order(tickets, now)
+        ],
+        "waits": {
+            name: {"runs": len(values), "p50": round(_percentile(values, 0.5), 1),
+                   "p90": round(_percentile(values, 0.9), 1), "max": round(max(values), 1)}
+            for name, values in sorted(waits.items())
+        },
+    }
+
+
+def configure(cpu: int | None = None, io: int | None = None, weights: dict | None = None,
+              directory: Path | None = None) -> dict:
+    directory = directory or slots_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / "config.json"
+    saved = json.loads(path.read_text()) if path.exists() else {}
+    if cpu is not None:
+        saved["cpu"] = cpu
+    if io is not None:
+        saved["io"] = io
+    if weights:
+        saved.setdefault("weights", {}).update(weights)
+    path.write_text(json.dumps(saved, indent=2) + "\n")
+    _shared(path)
+    config = load_config(directory)
+    return {"cpu": config["cpu"], "io": config["io"], "weights": {k: list(v) for k, v in config["weights"].items()}}
+
+
+def _markdown(result: dict) -> str:
+    lines = [
+        "## Host Slots",
+        f"- In use: {result['in_use']['cpu']}/{result['capacity']['cpu']} CPU, "
+        f"{result['in_use']['io']}/{result['capacity']['io']} I/O",
+        f"- Running: {len(result['running'])}, queued: {len(result['queued'])}",
+    ]
+    for entry in result["queued"]:
+        lines.append(f"  - waiting {entry['waiting']:.0f}s: {entry['class']} ({entry['priority']}) for {entry['session']}")
+    for name, waits in result["waits"].items():
+        lines.append(f"- {name}: {waits['runs']} runs, wait p50 {waits['p50']}s, p90 {waits['p90']}s, max {waits['max']}s")
+    return "\n".join(lines)
+
+
+def _weight(text: str) -> tuple[str, list[int]]:
+    name, _, value = text.partition("=")
+    cpu, _, io = value.partition(":")
+    if not name or not cpu.isdigit() or not io.isdigit():
+        raise argparse.ArgumentTypeError(f"expected CLASS=CPU:IO, got {text!r}")
+    return name, [int(cpu), int(io)]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Host-wide slots for heavy commands across recipe sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run")
+    run_cmd.add_argument("--class", dest="cls", required=True, help="Resource class (test-suite, build, install, light)")
+    run_cmd.add_argument("--priority", choices=PRIORITIES, default="normal")
+    run_cmd.add_argument("--session", help="Fair-queuing key (default: $SUPERPOWERS_SESSION or the git checkout)")
+    run_cmd.add_argument("run_command", nargs=argparse.REMAINDER, help="Command, after --")
+    status_cmd = sub.add_parser("status")
+    status_cmd.add_argument("--markdown", action="store_true")
+    config_cmd = sub.add_parser("configure")
+    config_cmd.add_argument("--cpu", type=int, help="CPU units on this host (default: core count)")
+    config_cmd.add_argument("--io", type=int, help=f"I/O units on this host (default: {DEFAULT_IO})")
+    config_cmd.add_argument("--weight", type=_weight, action="append", default=[], help="CLASS=CPU:IO")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        command = args.run_command[1:] if args.run_command[:1] == ["--"] else args.run_command
+        if not command:
+            print("Error: no command given after --", file=sys.stderr)
+            return 1
+        try:
+            return run(command, args.cls, args.priority, args.session)
+        except ValueError as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            return 1
+        except FileNotFoundError as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            return 127
+    if args.command == "status":
+        result = status()
+        if args.markdown:
+            print(_markdown(result))
+            return 0
+    else:
+        result = configure(args.cpu, args.io, dict(args.weight))
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""lint_prepass.py — Deterministic lint/format/type pre-pass before code-quality review.
+
+A code-quality review round trip (review, fix, re-review) is expensive, and
+reviewers spend part of it spotting what tools find mechanically: unused
+imports, formatting, import order, type errors, complexity. ``run`` runs the
+project's *configured* linters, formatters and type checkers on the files
+changed since ``--base``:
+
+1. Safe fixers rewrite the files: formatters, ``ruff check --fix`` (safe fixes
+   only), ``isort``, ``eslint --fix``. Fixers for the same language run in a
+   fixed order; Python and JS/TS chains run in parallel. ``--commit`` commits
+   what they changed. Fixers touch tracked (or staged) files only, never
+   untracked ones such as runtime state, and ``--commit`` refuses to fix
+   anything while a target has uncommitted changes the fixers didn't make.
+2. Checkers then run in parallel and their remaining findings are normalized
+   to ``{tool, path, line, column, code, message, severity}``.
+
+The reviewer receives only the remaining findings (``--markdown``), so its
+iterations go to judgment calls. A tool counts as configured only when the
+project configures it (``[tool.ruff]``, ``.prettierrc``, ``tsconfig.json``,
+...), and it runs only when installed (on PATH, in ``.venv/bin`` or in
+``node_modules/.bin``). Nothing is reformatted that the project does not
+already format.
+
+``savings`` replays recorded quality-review rounds (a session feed) and
+reports how many rounds the pre-pass would have removed: a NEEDS CHANGES
+round whose blocking issues are all auto-fixable disappears; rounds with
+type errors, complexity or judgment issues stay.
+
+Usage:
+    lint_prepass.py run [--base REF] [--no-fix] [--commit] [--markdown] [--enabled FLAG]
+    lint_prepass.py tools                       # configured tools and whether they are installed
+    lint_prepass.py savings --feed FEED.jsonl [--markdown]   # a session_feed.py feed
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+TOOL_TIMEOUT = 300
+MAX_MARKDOWN_FINDINGS = 40
+COMMIT_MESSAGE = "style: apply automatic lint and format fixes"
+
+PYTHON = (".py", ".pyi")
+SCRIPT = (".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx")
+PRETTIER = SCRIPT + (".css", ".scss", ".json", ".md", ".yaml", ".yml", ".html", ".vue")
+
+FLAKE8_FORMAT = "%(path)s:%(row)d:%(col)d: %(code)s %(text)s"
+LINE_FINDING = re.compile(r"^(?P<path>[^:\n]+):(?P<line>\d+):(?:(?P<column>\d+):)? (?P<rest>.+)$")
+MYPY_REST = re.compile(r"^(?P<severity>error|warning|note): (?P<message>.+?)(?:  \[(?P<code>[\w-]+)\])?$")
+TSC_LINE = re.compile(r"^(?P<path>.+?)\((?P<line>\d+),(?P<column>\d+)\): (?P<severity>error|warning) (?P<code>TS\d+): (?P<message>.+)$")
+
+
+class Finding(NamedTuple):
+    tool: str
+    path: str
+    line: int
+    column: int
+    code: str
+    message: str
+    severity: str  # "error" | "warning"
+
+
+class Tool(NamedTuple):
+    name: str
+    binary: str
+    extensions: tuple[str, ...]
+    configured: Callable[[Path], bool]
+    fix: Callable[[list[str]], list[str]] | None = None
+    check: Callable[[list[str]], list[str]] | None = None
+    parse: Callable[[str, Path], list[Finding]] | None = None
+    whole_project: bool = False  # checks the project (tsc -p); findings are filtered to the changed files
+
+
+# --- configuration detection ----------------------------------------------------
+
+
+def _text(root: Path, name: str) -> str:
+    path = root / name
+    return path.read_text(errors="replace") if path.is_file() else ""
+
+
+def _any_file(root: Path, *patterns: str) -> bool:
+    return any(next(root.glob(pattern), None) is not None for pattern in patterns)
+
+
+def _package_key(root: Path, key: str) -> bool:
+    try:
+        return key in json.loads(_text(root, "package.json") or "{}")
+    except ValueError:
+        return False
+
+
+def _ruff(root: Path) -> bool:
+    return "[tool.ruff" in _text(root, "pyproject.toml") or _any_file(root, "ruff.toml", ".ruff.toml")
+
+
+def _ruff_format(root: Path) -> bool:
+    if "[tool.ruff.format]" in _text(root, "pyproject.toml"):
+        return True
+    return any("[format]" in _text(root, name) for name in ("ruff.toml", ".ruff.toml"))
+
+
+def _section(root: Path, pyproject: str, *files: tuple[str, str]) -> bool:
+    """``[tool.X]`` in pyproject.toml, or a (file, section-or-empty) pair that exists."""
+    if pyproject and pyproject in _text(root, "pyproject.toml"):
+        return True
+    return any((root / name).is_file() and (not section or section in _text(root, name)) for name, section in files)
+
+
+# --- output parsers --------------------------------------------------------------
+
+
+def _relative(path: str, root: Path) -> str:
+    resolved = Path(path) if Path(path).is_absolute() else root / path
+    try:
+        return resolved.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        return path
+
+
+def _lint_severity(code: str) -> str:
+    # Syntax errors and undefined names break at runtime; the rest is style or hygiene.
+    return "error" if code.startswith(("E9", "F63", "F7", "F82")) else "warning"
+
+
+def parse_ruff(output: str, root: Path) -> list[Finding]:
+    return [
+        Finding("ruff", _relative(item["filename"], root), item["location"]["row"], item["location"]["column"],
+                item.get("code") or "", item["message"], _lint_severity(item.get("code") or "E9"))
+        for item in json.loads(output or "[]")
+    ]
+
+
+def parse_flake8(output: str, root: Path) -> list[Finding]:
+    findings = []
+    for line in output.splitlines():
+        match = LINE_FINDING.match(line)
+        if match:
+            code, _, message = match["rest"].partition(" ")
+            findings.append(Finding("flake8", _relative(match["path"], root), int(match["line"]),
+                                    int(match["column"] or 0), code, message, _lint_severity(code)))
+    return findings
+
+
+def parse_mypy(output: str, root: Path) -> list[Finding]:
+    findings = []
+    for line in output.splitlines():
+        match = LINE_FINDING.match(line)
+        rest = MYPY_REST.match(match["rest"]) if match else None
+        if rest and rest["severity"] != "note":
+            findings.append(Finding("mypy", _relative(match["path"], root), int(match["line"]), int(match["column"] or 0),
+                                    rest["code"] or "", rest["message"], rest["severity"]))
+    return findings
+
+
+def parse_pyright(output: str, root: Path) -> list[Finding]:
+    return [
+        Finding("pyright", _relative(item["file"], root), item["range"]["start"]["line"] + 1,
+                item["range"]["start"]["character"] + 1, item.get("rule", ""), item["message"],
+                "error" if item["severity"] == "error" else "warning")
+        for item in json.loads(output or "{}").get("generalDiagnostics", [])
+        if item["severity"] in ("error", "warning")
+    ]
+
+
+def parse_eslint(output: str, root: Path) -> list[Finding]:
+    return [
+        Finding("eslint", _relative(result["filePath"], root), message.get("line", 0), message.get("column", 0),
+                message.get("ruleId") or "", message["message"], "error" if message["severity"] == 2 else "warning")
+        for result in json.loads(output or "[]")
+        for message in result["messages"]
+    ]
+
+
+def parse_tsc(output: str, root: Path) -> list[Finding]:
+    findings = []
+    for line in output.splitlines():
+        match = TSC_LINE.match(line.strip())
+        if match:
+            findings.append(Finding("tsc", _relative(match["path"], root), int(match["line"]), int(match["column"]),
+                                    match["code"], match["message"], match["severity"]))
+    return findings
+
+
+# Fixers of one language run in this order (import sorting before formatting).
+TOOLS = (
+    Tool("isort", "isort", PYTHON, lambda r: _section(r, "[tool.isort]", (".isort.cfg", ""), ("setup.cfg", "[isort]")),
+         fix=lambda files: ["-q", *files]),
+    Tool("ruff", "ruff", PYTHON, _ruff,
+         fix=lambda files: ["check", "--fix", "--exit-zero", "--quiet", "--force-exclude", *files],
+         check=lambda files: ["check", "--output-format", "json", "--exit-zero", "--force-exclude", *files],
+         parse=parse_ruff),
+    Tool("ruff-format", "ruff", PYTHON, _ruff_format, fix=lambda files: ["format", "--quiet", "--force-exclude", *files]),
+    Tool("black", "black", PYTHON, lambda r: _section(r, "[tool.black]"), fix=lambda files: ["-q", *files]),
+    Tool("flake8", "flake8", PYTHON, lambda r: _section(r, "", (".flake8", ""), ("setup.cfg", "[flake8]"), ("tox.ini", "[flake8]")),
+         check=lambda files: [f"--format={FLAKE8_FORMAT}", *files], parse=parse_flake8),
+    Tool("mypy", "mypy", PYTHON, lambda r: _section(r, "[tool.mypy]", ("mypy.ini", ""), (".mypy.ini", ""), ("setup.cfg", "[mypy]")),
+         check=lambda files: ["--show-column-numbers", "--show-error-codes", "--no-error-summary", "--no-color-output",
+                              "--no-pretty", *files],
+         parse=parse_mypy),
+    Tool("pyright", "pyright", PYTHON, lambda r: _section(r, "[tool.pyright]", ("pyrightconfig.json", "")),
+         check=lambda files: ["--outputjson", *files], parse=parse_pyright),
+    Tool("eslint", "eslint", SCRIPT,
+         lambda r: _any_file(r, "eslint.config.*", ".eslintrc", ".eslintrc.*") or _package_key(r, "eslintConfig"),
+         fix=lambda files: ["--fix", *files], check=lambda files: ["--format", "json", *files], parse=parse_eslint),
+    Tool("prettier", "prettier", PRETTIER,
+         lambda r: _any_file(r, ".prettierrc", ".prettierrc.*", "prettier.config.*") or _package_key(r, "prettier"),
+         fix=lambda files: ["--write", "--log-level", "warn", *files]),
+    Tool("tsc", "tsc", (".ts", ".tsx"), lambda r: (r / "tsconfig.json").is_file(),
+         check=lambda files: ["--noEmit", "--pretty", "false", "-p", "tsconfig.json"], parse=parse_tsc, whole_project=True),
+)
+
+
+def _binary(tool: Tool, root: Path) -> str | None:
+    local = root / ("node_modules/.bin" if tool.extensions[0] in SCRIPT else ".venv/bin") / tool.binary
+    return str(local) if os.access(local, os.X_OK) else shutil.which(tool.binary)
+
+
+def available_tools(root: Path) -> list[dict]:
+    return [
+        {"name": tool.name, "configured": tool.configured(root), "installed": _binary(tool, root) is not None}
+        for tool in TOOLS
+    ]
+
+
+# --- the pre-pass ----------------------------------------------------------------
+
+
+def _git(root: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(root), *args], capture_output=True, text=True, check=True).stdout
+
+
+def changed_files(root: Path, base: str = "HEAD") -> list[str]:
+    """Files added or modified since BASE (committed or not), plus untracked files."""
+    unborn = base == "HEAD" and subprocess.run(["git", "-C", str(root), "rev-parse", "--verify", "-q", "HEAD"],
+                                               capture_output=True).returncode != 0
+    names = set(_git(root, *(["ls-files", "--cached"] if unborn else ["diff", "--name-only", "--diff-filter=d", base])).splitlines())
+    names |= set(_git(root, "ls-files", "--others", "--exclude-standard").splitlines())
+    return sorted(name for name in names if (root / name).is_file())
+
+
+def _digest(root: Path, files: list[str]) -> dict[str, str]:
+    return {name: hashlib.sha256((root / name).read_bytes()).hexdigest() for name in files if (root / name).is_file()}
+
+
+def _invoke(binary: str, args: list[str], root: Path) -> subprocess.CompletedProcess:
+    return subprocess.run([binary, *args], cwd=root, capture_output=True, text=True, errors="replace", timeout=TOOL_TIMEOUT)
+
+
+def _fix_chain(chain: list[tuple[Tool, str, list[str]]], root: Path, report: dict[str, dict]) -> dict[str, list[str]]:
+    fixed: dict[str, list[str]] = {}
+    for tool, binary, files in chain:
+        before = _digest(root, files)
+        began = time.perf_counter()
+        try:
+            result = _invoke(binary, tool.fix(files), root)
+            failed = result.returncode not in (0, 1) and not result.stdout
+        except subprocess.TimeoutExpired:
+            result, failed = None, True
+        report[tool.name]["seconds"] += time.perf_counter() - began
+        if failed:
+            report[tool.name].update(status="failed", reason=_failure(result))
+        after = _digest(root, files)
+        changed = [name for name in files if before.get(name) != after.get(name)]
+        if changed:
+            fixed[tool.name] = changed
+    return fixed
+
+
+def _failure(result: subprocess.CompletedProcess | None) -> str:
+    if result is None:
+        return f"timed out after {TOOL_TIMEOUT}s"
+    lines = (result.stderr or result.stdout).strip().splitlines()
+    return f"exit {result.returncode}: {lines[-1] if lines else 'no output'}"
+
+
+def _check(tool: Tool, binary: str, files: list[str], root: Path) -> tuple[list[Finding], str | None, float]:
+    began = time.perf_counter()
+    try:
+        result = _invoke(binary, tool.check(files), root)
+    except subprocess.TimeoutExpired:
+        return [], _failure(None), time.perf_counter() - began
+    try:
+        findings = tool.parse(result.stdout, root)
+    except (ValueError, KeyError, TypeError):
+        return [], _failure(result), time.perf_counter() - began
+    if not findings and result.returncode not in (0, 1):
+        return [], _failure(result), time.perf_counter() - began
+    if tool.whole_project:
+        findings = [f for f in findings if f.path in files]
+    return findings, None, time.perf_counter() - began
+
+
+def _tracked(root: Path, files: list[str]) -> set[str]:
+    """The FILES that are in the index: committed or staged."""
+    return set(_git(root, "ls-files", "--cached", "--", *files).splitlines()) if files else set()
+
+
+def _uncommitted(root: Path, files: list[str]) -> list[str]:
+    """The FILES with staged or unstaged changes."""
+    if not files:
+        return []
+    names = set(_git(root, "diff", "--name-only", "--", *files).splitlines())
+    names |= set(_git(root, "diff", "--cached", "--name-only", "--", *files).splitlines())
+    return sorted(names)
+
+
+def run(root: Path, base: str = "HEAD", fix: bool = True, commit: bool = False) -> dict:
+    began = time.perf_counter()
+    files = changed_files(root, base)
+    # Untracked files (generated output, scratch files) are checked but never rewritten.
+    fixable = _tracked(root, files)
+    # A commit of the fixes would sweep in edits the fixers didn't make, so don't fix at all.
+    refused = _uncommitted(root, sorted(fixable)) if fix and commit else []
+    if refused:
+        fix = False
+    report: dict[str, dict] = {}
+    fixers: dict[str, list[tuple[Tool, str, list[str]]]] = {}
+    checkers: list[tuple[Tool, str, list[str]]] = []
+    for tool in TOOLS:
+        targets = [name for name in files if name.endswith(tool.extensions)]
+        fix_targets = [name for name in targets if name in fixable] if fix and tool.fix else []
+        if not targets or not tool.configured(root) or not (tool.check or fix_targets):
+            continue
+        binary = _binary(tool, root)
+        if binary is None:
+            report[tool.name] = {"name": tool.name, "status": "skipped", "reason": "not installed", "seconds": 0.0}
+            continue
+        report[tool.name] = {"name": tool.name, "status": "ran", "seconds": 0.0}
+        if fix_targets:
+            fixers.setdefault("python" if tool.extensions[0] in PYTHON else "script", []).append((tool, binary, fix_targets))
+        if tool.check:
+            checkers.append((tool, binary, targets))
+
+    fixed: dict[str, list[str]] = {}
+    with ThreadPoolExecutor(max_workers=max(len(fixers), 1)) as pool:
+        for result in pool.map(lambda chain: _fix_chain(chain, root, report), fixers.values()):
+            fixed.update(result)
+    with ThreadPoolExecutor(max_workers=max(len(checkers), 1)) as pool:
+        checked = list(pool.map(lambda job: _check(*job, root), checkers))
+
+    findings: list[Finding] = []
+    for (tool, _, _), (tool_findings, failure, seconds) in zip(checkers, checked):
+        report[tool.name]["seconds"] += seconds
+        report[tool.name]["findings"] = len(tool_findings)
+        if failure:
+            report[tool.name].update(status="failed", reason=failure)
+        findings.extend(tool_findings)
+    findings.sort(key=lambda f: (f.severity != "error", f.path, f.line, f.column, f.tool))
+
+    fixed_files = sorted({name for names in fixed.values() for name in names})
+    committed = None
+    if commit and fixed_files:
+        _git(root, "commit", "-q", "-m", COMMIT_MESSAGE, "--only", "--", *fixed_files)
+        committed = _git(root, "rev-parse", "--short", "HEAD").strip()
+    for entry in report.values():
+        entry["seconds"] = round(entry["seconds"], 2)
+    return {
+        "files": len(files),
+        "tools": list(report.values()),
+        "fixed": fixed,
+        "fixed_files": fixed_files,
+        "committed": committed,
+        "commit_refused": refused,
+        "findings": [f._asdict() for f in findings],
+        "errors": sum(1 for f in findings if f.severity == "error"),
+        "warnings": sum(1 for f in findings if f.severity == "warning"),
+        "seconds": round(time.perf_counter() - began, 2),
+    }
+
+
+def _markdown_run(result: dict) -> str:
+    lines = ["## Lint/Type Pre-Pass"]
+    ran = [tool["name"] for tool in result["tools"] if tool["status"] == "ran"]
+    other = [f"{tool['name']} ({tool['reason']})" for tool in result["tools"] if tool["status"] != "ran"]
+    if not result["tools"]:
+        lines.append(f"- Changed files: {result['files']}. No linter, formatter or type checker is configured for them.")
+        return "\n".join(lines)
+    lines.append(f"- Changed files checked: {result['files']} with {', '.join(ran) or 'no tools'}"
+                 + (f"; not run: {', '.join(other)}" if other else ""))
+    if result.get("commit_refused"):
+        lines.append(f"- Auto-fix skipped: --commit refused, {', '.join(result['commit_refused'])} "
+                     "has uncommitted changes the fixers didn't make. Commit or stash them and rerun.")
+    elif result["fixed_files"]:
+        by_tool = "; ".join(f"{name}: {', '.join(files)}" for name, files in result["fixed"].items())
+        commit = f", committed {result['committed']}" if result["committed"] else ""
+        lines.append(f"- Auto-fixed {len(result['fixed_files'])} files ({by_tool}){commit}")
+    else:
+        lines.append("- Auto-fixed: nothing to fix")
+    if not result["findings"]:
+        lines.append("- Remaining findings: none")
+        return "\n".join(lines)
+    lines.append(f"- Remaining findings: {result['errors']} errors, {result['warnings']} warnings")
+    lines += ["", "| Severity | Location | Tool | Rule | Message |", "|----------|----------|------|------|---------|"]
+    for item in result["findings"][:MAX_MARKDOWN_FINDINGS]:
+        message = item["message"].replace("|", "\\|")
+        lines.append(f"| {item['severity']} | {item['path']}:{item['line']}:{item['column']} | {item['tool']} "
+                     f"| {item['code']} | {message} |")
+    if len(result["findings"]) > MAX_MARKDOWN_FINDINGS:
+        lines.append(f"\n...and {len(result['findings']) - MAX_MARKDOWN_FINDINGS} more (rerun `lint_prepass.py run` for all)")
+    return "\n".join(lines)
+
+
+# --- savings replay --------------------------------------------------------------
+
+AUTOFIX = re.compile(
+    r"unused imports?|import (?:order|sorting)|isort|\bformat(?:ted|ting|ter)?\b|\bblack\b|prettier|whitespace"
+    r"|indentation|line (?:too )?long|line length|quote style|blank lines?|semicolons?|f-string without", re.I)
+MECHANICAL = re.compile(
+    r"type (?:error|hint|annotation|check)|mypy|pyright|\btsc\b|incompatible type|missing (?:return )?type"
+    r"|complexity|cyclomatic|too many (?:branches|statements|arguments)|unused (?:variable|argument)"
+    r"|undefined name|\blint|ruff|flake8|eslint|\bTS\d{4}\b|\b[EFWC]\d{3}\b", re.I)
+NON_BLOCKING = re.compile(r"suggestion|strength|summary|nice to have|required action", re.I)
+BULLET = re.compile(r"^\s*(?:[-*]|\d+\.)\s+(.+)$")
+VERDICT_ISSUES = re.compile(r"NEEDS CHANGES\s*[—:-]+\s*(.+)")
+
+
+def classify(issue: str) -> str:
+    """autofix (a safe fixer removes it), mechanical (a checker reports it) or judgment."""
+    if AUTOFIX.search(issue):
+        return "autofix"
+    return "mechanical" if MECHANICAL.search(issue) else "judgment"
+
+
+def blocking_issues(review: str) -> list[str]:
+    """The blocking issues listed in a NEEDS CHANGES review (bullets outside suggestion sections)."""
+    issues, section = [], ""
+    for line in review.splitlines():
+        heading = re.match(r"^\s*#+\s*(.+)$", line)
+        if heading:
+            section = heading.group(1)
+            continue
+        bullet = BULLET.match(line)
+        if bullet and not NON_BLOCKING.search(section) and bullet.group(1).strip().lower().rstrip(".") != "none":
+            issues.append(bullet.group(1).strip())
+    if not issues:
+        verdict = VERDICT_ISSUES.search(review)
+        if verdict:
+            issues = [part.strip() for part in verdict.group(1).split(";") if part.strip()]
+    return issues
+
+
+def savings(feed: Path) -> dict:
+    """Replay recorded quality-review rounds: which would a pre-pass have made unnecessary?"""
+    rounds: dict[str, list[dict]] = {}
+    for line in feed.read_text().splitlines():
+        event = json.loads(line) if line.strip() else {}
+        if event.get("event") == "quality_review":
+            rounds.setdefault(event["task_id"], []).append(event)
+    counts = {"autofix": 0, "mechanical": 0, "judgment": 0}
+    per_task = []
+    for task_id, reviews in rounds.items():
+        kept = 0
+        for review in reviews:
+            if review.get("approved"):
+                continue
+            kinds = [classify(issue) for issue in blocking_issues(review.get("text", ""))] or ["judgment"]
+            for kind in kinds:
+                counts[kind] += 1
+            kept += any(kind != "autofix" for kind in kinds)
+        # Without its auto-fixable rounds the loop ends one review after the last round that still needs a fix.
+        with_prepass = min(len(reviews), kept + 1)
+        per_task.append({"task_id": task_id, "rounds": len(reviews), "with_prepass": with_prepass,
+                         "saved": len(reviews) - with_prepass})
+    total = sum(task["rounds"] for task in per_task)
+    remaining = sum(task["with_prepass"] for task in per_task)
+    return {
+        "tasks": len(per_task),
+        "review_rounds": total,
+        "rounds_with_prepass": remaining,
+        "rounds_saved": total - remaining,
+        "issues": counts,
+        "per_task": per_task,
+    }
+
+
+def _markdown_savings(result: dict) -> str:
+    issues = result["issues"]
+    saved_tasks = sum(1 for task in result["per_task"] if task["saved"])
+    return "\n".join([
+        "## Lint/Type Pre-Pass Savings",
+        f"- Tasks replayed: {result['tasks']}",
+        f"- Quality review rounds: {result['review_rounds']} recorded, {result['rounds_with_prepass']} with the pre-pass "
+        f"({result['rounds_saved']} saved across {saved_tasks} tasks)",
+        f"- Blocking issues: {issues['autofix']} auto-fixable, {issues['mechanical']} reported by checkers, "
+        f"{issues['judgment']} judgment calls",
+    ])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Deterministic lint/format/type pre-pass for code-quality review")
+    parser.add_argument("--repo", default=".", help="Worktree path (default: current directory)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run")
+    run_cmd.add_argument("--base", default="HEAD", help="Check files changed since this commit (default: HEAD)")
+    run_cmd.add_argument("--no-fix", action="store_true", help="Report only; apply no fixes")
+    run_cmd.add_argument("--commit", action="store_true", help="Commit the files the fixers changed")
+    run_cmd.add_argument("--markdown", action="store_true")
+    run_cmd.add_argument("--enabled", default="true", help="Pass the recipe flag; 'false' disables the pre-pass")
+    sub.add_parser("tools")
+    savings_cmd = sub.add_parser("savings")
+    savings_cmd.add_argument("--feed", required=True, help="Session feed with quality reviews (session_feed.py path --plan PLAN)")
+    savings_cmd.add_argument("--markdown", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "savings":
+            result = savings(Path(args.feed))
+            if args.markdown:
+                print(_markdown_savings(result))
+                return 0
+        else:
+            root = Path(_git(Path(args.repo).resolve(), "rev-parse", "--show-toplevel").strip())
+            if args.command == "tools":
+                result = {"tools": available_tools(root)}
+            elif args.enabled.strip().lower() != "true":
+                result = {"skipped": True, "reason": "disabled"}
+                if args.markdown:
+                    print("_Lint/type pre-pass disabled; check linting, formatting and types yourself._")
+                    return 0
+            else:
+                result = run(root, args.base, fix=not args.no_fix, commit=args.commit)
+                if args.markdown:
+                    print(_markdown_run(result))
+                    return 0
+    except subprocess.CalledProcessError as exc:
+        print(f"Error: {exc.stderr.strip()}", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""mode_policy.py — Compile mode frontmatter into one validated tool-policy table.
+
+Every file in modes/ declares, in its frontmatter, which tools are safe, which
+warn, what happens to everything else (default_action) and which modes it may
+hand over to. Gating a tool call by re-reading and re-parsing that markdown
+costs a file read and a YAML parse per call. This script compiles all of it
+once into modes/mode-policy.json:
+
+- per mode: the safe and warn sets, default_action, allow_clear, shortcut
+- transitions: the adjacency map mode -> modes it may switch to
+
+and validates the lot: unknown transition targets, a tool both safe and warn,
+duplicate names or shortcuts, bad default_action values. `Policy` loads the
+artifact once and answers allow / warn / block and may-transition with one
+dict or set lookup.
+
+The artifact is built for the mode hooks of the modes bundle (hooks-mode,
+tool-mode); nothing in this bundle reads it at runtime.
+
+Usage:
+    mode_policy.py build [--modes DIR] [--output FILE]      # compile and write the artifact
+    mode_policy.py check [--modes DIR] [--output FILE]      # exit 1 if the artifact is stale
+    mode_policy.py gate --mode MODE --tool TOOL             # allow | warn | block
+    mode_policy.py transition --from MODE --to MODE         # may MODE switch to MODE?
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+VERSION = 1
+BUNDLE_ROOT = Path(__file__).resolve().parents[2]
+MODES_DIR = BUNDLE_ROOT / "modes"
+ARTIFACT = "mode-policy.json"
+ACTIONS = ("allow", "warn", "block")
+# hooks-mode's infrastructure_tools default: these bypass the mode cascade entirely
+INFRASTRUCTURE_TOOLS = ("mode", "todo")
+
+FRONTMATTER = re.compile(r"^---\s*\n(.*?)\n---\s*\n", re.DOTALL)
+
+
+class PolicyError(ValueError):
+    """The mode files do not compile into a consistent policy."""
+
+    def __init__(self, problems: list[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+# ---------------------------------------------------------------------------
+# Frontmatter (the YAML subset mode files use: maps, "- item" lists, [a, b] lists, scalars)
+# ---------------------------------------------------------------------------
+
+
+def _scalar(text: str):
+    text = text.strip()
+    if text.startswith("[") and text.endswith("]"):
+        return [_scalar(item) for item in text[1:-1].split(",") if item.strip()]
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered in ("null", "~", ""):
+        return None
+    return int(text) if re.fullmatch(r"-?\d+", text) else text
+
+
+def _block(lines: list[tuple[int, str]], i: int, indent: int):
+    if lines[i][1].startswith("- "):
+        items = []
+        while i < len(lines) and lines[i][0] == indent and lines[i][1].startswith("- "):
+            items.append(_scalar(lines[i][1][2:]))
+            i += 1
+        return items, i
+    mapping = {}
+    while i < len(lines) and lines[i][0] == indent:
+        key, sep, rest = lines[i][1].partition(":")
+        if not sep:
+            raise ValueError(f"expected 'key: value', got {lines[i][1]!r}")
+        i += 1
+        if rest.strip():
+            mapping[key.strip()] = _scalar(rest)
+        elif i < len(lines) and lines[i][0] > indent:
+            mapping[key.strip()], i = _block(lines, i, lines[i][0])
+        else:
+            mapping[key.strip()] = None
+    return mapping, i
+
+
+def parse_frontmatter(text: str) -> dict:
+    """The frontmatter of a mode file as a dict."""
+    match = FRONTMATTER.match(text)
+    if not match:
+        raise ValueError("missing frontmatter")
+    lines = [
+        (len(line) - len(line.lstrip(" ")), line.strip())
+        for line in match.group(1).splitlines()
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+    if not lines:
+        return {}
+    data, end = _block(lines, 0, lines[0][0])
+    if end != len(lines):
+        raise ValueError(f"unexpected indentation at {lines[end][1]!r}")
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Compile
+# ---------------------------------------------------------------------------
+
+
+def _tool_list(value, where: str, problems: list[str]) -> list[str]:
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(tool, str) for tool in value):
+        problems.append(f"{where} must be a list of names")
+        return []
+    return value
+
+
+def compile_modes(modes_dir: Path = MODES_DIR) -> dict:
+    """Compile every modes/*.md into the policy artifact. Raises PolicyError listing every problem."""
+    problems: list[str] = []
+    modes: dict[str, dict] = {}
+    shortcuts: dict[str, str] = {}
+    digest = hashlib.sha256()
+    files = sorted(Path(modes_dir).glob("*.md"))
+    if not files:
+        raise PolicyError([f"no mode files in {modes_dir}"])
+
+    for path in files:
+        text = path.read_text(encoding="utf-8")
+        try:
+            frontmatter = parse_frontmatter(text)
+        except ValueError as exc:
+            problems.append(f"{path.name}: {exc}")
+            continue
+        digest.update(path.name.encode() + b"\0" + FRONTMATTER.match(text).group(1).encode() + b"\0")
+        mode = frontmatter.get("mode")
+        if not isinstance(mode, dict) or not mode.get("name"):
+            problems.append(f"{path.name}: frontmatter has no mode.name")
+            continue
+        name = str(mode["name"])
+        if name in modes:
+            problems.append(f"{path.name}: mode '{name}' is also defined in {modes[name]['source']}")
+            continue
+        tools = mode.get("tools") or {}
+        safe = _tool_list(tools.get("safe"), f"{path.name}: tools.safe", problems)
+        warn = _tool_list(tools.get("warn"), f"{path.name}: tools.warn", problems)
+        for tool in sorted(set(safe) & set(warn)):
+            problems.append(f"{path.name}: '{tool}' is in both tools.safe and tools.warn")
+        default = mode.get("default_action", "block")
+        if default not in ACTIONS:
+            problems.append(f"{path.name}: default_action {default!r} is not one of {', '.join(ACTIONS)}")
+        allow_clear = mode.get("allow_clear", False)
+        if not isinstance(allow_clear, bool):
+            problems.append(f"{path.name}: allow_clear must be true or false")
+        shortcut = mode.get("shortcut") or name
+        if shortcut in shortcuts:
+            problems.append(f"{path.name}: shortcut '{shortcut}' is also used by mode '{shortcuts[shortcut]}'")
+        shortcuts[shortcut] = name
+        modes[name] = {
+            "source": f"{Path(modes_dir).name}/{path.name}",
+            "shortcut": shortcut,
+            "safe": sorted(set(safe)),
+            "warn": sorted(set(warn)),
+            "default_action": default,
+            "allow_clear": allow_clear,
+            "allowed_transitions": _tool_list(
+                mode.get("allowed_transitions"), f"{path.name}: allowed_transitions", problems
+            ),
+        }
+
+    transitions = {}
+    for name, mode in modes.items():
+        targets = mode.pop("allowed_transitions")
+        for target in targets:
+            if target == name:
+                problems.append(f"{mode['source']}: mode '{name}' lists itself in allowed_transitions")
+            elif target not in modes:
+                problems.append(f"{mode['source']}: allowed_transitions names unknown mode '{target}'")
+        transitions[name] = sorted(set(targets))
+
+    if problems:
+        raise PolicyError(problems)
+    return {
+        "version": VERSION,
+        "source_digest": digest.hexdigest(),
+        "infrastructure_tools": list(INFRASTRUCTURE_TOOLS),
+        "modes": dict(sorted(modes.items())),
+        "transitions": dict(sorted(transitions.items())),
+        "shortcuts": dict(sorted(shortcuts.items())),
+    }
+
+
+def dumps(policy: dict) -> str:
+    return json.dumps(policy, indent=2, sort_keys=True) + "\n"
+
+
+def build(modes_dir: Path = MODES_DIR, output: Path | None = None) -> dict:
+    """Compile and atomically write the artifact (default: <modes_dir>/mode-policy.json)."""
+    policy = compile_modes(modes_dir)
+    output = Path(output or Path(modes_dir) / ARTIFACT)
+    fd, tmp = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(dumps(policy))
+        os.replace(tmp, output)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return {"output": str(output), "modes": sorted(policy["modes"]), "source_digest": policy["source_digest"]}
+
+
+def check(modes_dir: Path = MODES_DIR, output: Path | None = None) -> dict:
+    """Whether the artifact on disk is exactly what the mode files compile to now."""
+    output = Path(output or Path(modes_dir) / ARTIFACT)
+    fresh = compile_modes(modes_dir)
+    current = json.loads(output.read_text(encoding="utf-8")) if output.exists() else None
+    changed = [] if current is None else sorted(
+        name for name in set(fresh["modes"]) | set(current.get("modes", {}))
+        if fresh["modes"].get(name) != current["modes"].get(name)
+        or fresh["transitions"].get(name) != current.get("transitions", {}).get(name)
+    )
+    return {
+        "output": str(output),
+        "up_to_date": current == fresh,
+        "missing": current is None,
+        "changed_modes": changed,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Lookup
+# ---------------------------------------------------------------------------
+
+
+class Policy:
+    """The compiled table, ready for per-call gating: one dict lookup per tool call, one set lookup per transition."""
+
+    def __init__(self, policy: dict):
+        if policy.get("version") != VERSION:
+            raise PolicyError([f"unsupported mode-policy version {policy.get('version')!r}"])
+        self.modes = frozenset(policy["modes"])
+        self.infrastructure = frozenset(policy.get("infrastructure_tools", INFRASTRUCTURE_TOOLS))
+        self._defaults = {name: mode["default_action"] for name, mode in policy["modes"].items()}
+        self._actions = {
+            name: {
+                **{tool: "warn" for tool in mode["warn"]},
+                **{tool: "allow" for tool in mode["safe"]},
+                **{tool: "allow" for tool in self.infrastructure},
+            }
+            for name, mode in policy["modes"].items()
+        }
+        self._transitions = {name: frozenset(targets) for name, targets in policy["transitions"].items()}
+        self._clear = frozenset(name for name, mode in policy["modes"].items() if mode["allow_clear"])
+        self._shortcuts = dict(policy.get("shortcuts", {}))
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "Policy":
+        return cls(json.loads(Path(path or MODES_DIR / ARTIFACT).read_text(encoding="utf-8")))
+
+    def decide(self, mode: str | None, tool: str) -> str:
+        """allow, warn or block for ``tool`` in ``mode`` (no active mode allows everything)."""
+        if mode is None:
+            return "allow"
+        return self._actions[mode].get(tool) or self._defaults[mode]
+
+    def may_transition(self, source: str | None, target: str) -> bool:
+        """Whether ``source`` may hand over to ``target`` (any mode may be entered with no mode active)."""
+        if source is None:
+            return target in self.modes
+        return target in self._transitions[source]
+
+    def may_clear(self, mode: str) -> bool:
+        return mode in self._clear
+
+    def resolve(self, name: str) -> str | None:
+        """Mode name for a name or shortcut."""
+        return name if name in self.modes else self._shortcuts.get(name)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile mode frontmatter into a tool-policy table")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("build", "check"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--modes", type=Path, default=MODES_DIR, help="Directory of mode files (default: this bundle's modes/)")
+        cmd.add_argument("--output", type=Path, help=f"Artifact path (default: <modes>/{ARTIFACT})")
+    gate = sub.add_parser("gate")
+    gate.add_argument("--mode", required=True)
+    gate.add_argument("--tool", required=True)
+    gate.add_argument("--policy", type=Path, help=f"Artifact path (default: this bundle's modes/{ARTIFACT})")
+    transition = sub.add_parser("transition")
+    transition.add_argument("--from", dest="source", required=True)
+    transition.add_argument("--to", dest="target", required=True)
+    transition.add_argument("--policy", type=Path, help=f"Artifact path (default: this bundle's modes/{ARTIFACT})")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "build":
+            result = build(args.modes, args.output)
+        elif args.command == "check":
+            result = check(args.modes, args.output)
+        else:
+            policy = Policy.load(args.policy)
+            if args.command == "gate":
+                mode = policy.resolve(args.mode)
+                if mode is None:
+                    raise PolicyError([f"unknown mode '{args.mode}'"])
+                result = {"mode": mode, "tool": args.tool, "action": policy.decide(mode, args.tool)}
+            else:
+                source, target = policy.resolve(args.source), policy.resolve(args.target)
+                if source is None or target is None:
+                    raise PolicyError([f"unknown mode '{args.source if source is None else args.target}'"])
+                result = {"from": source, "to": target, "allowed": policy.may_transition(source, target)}
+    except PolicyError as exc:
+        for problem in exc.problems:
+            print(f"Error: {problem}", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0 if result.get("up_to_date", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""output_digest.py — Condense test-runner output into a compact failure digest for prompts.
+
+Raw runner output with a few hundred tests and long tracebacks is tens of KB
+per prompt. The digest keeps what a reviewer or fixer acts on:
+
+- pass / fail / skip / error counts
+- failures grouped by signature (the error line with volatile values masked),
+  each with its failing test ids and a trimmed traceback
+- the path of the full log on disk, and the line each failure starts on
+
+Formats: pytest, jest, vitest, go test (plain or -v) and JUnit XML. The format
+is detected from the output unless --format is given. ``run`` exits with the
+runner's exit code, and any non-zero exit makes the status "failed" even when
+no failure could be parsed (collection errors, crashes, an unknown runner). The
+digest then carries the last lines of the output instead.
+
+Baseline snapshots: ``--save-baseline`` stores the failing test ids and their
+signatures for the current commit (``git-worktree-setup`` does this for the
+worktree's base commit). Every later run in a repository is compared with the
+snapshot of its nearest ancestor commit that has one, and the digest reports:
+
+    new      failing now but not at baseline (or failing differently) — caused by this change
+    fixed    failing at baseline, passing now (only when the run covered the whole suite)
+    known    failing at baseline with the same signature — pre-existing, not this change's concern
+
+Snapshots live in ``<git-common-dir>/superpowers/baselines/<commit>.json``, so
+every worktree of the repository shares them.
+
+Usage:
+    output_digest.py run [--markdown] [--junit report.xml] [--save-baseline | --no-baseline] -- pytest -q   # exits with pytest's code
+    output_digest.py digest [--markdown] [--log FILE] [--save-baseline | --no-baseline] [FILE]
+    output_digest.py baseline [--ref REF]                                 # the snapshot later runs compare with
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+MAX_SIGNATURES = 10
+MAX_TESTS_PER_SIGNATURE = 5
+TRACE_LINES = 8
+TAIL_LINES = 20  # output kept verbatim when no failure could be parsed
+LINE_CHARS = 200
+SIGNATURE_CHARS = 160
+MAX_BASELINE_TESTS = 10
+BASELINE_DEPTH = 1000  # ancestor commits searched for a snapshot
+
+COUNT = re.compile(r"(\d+) (failed|passed|skipped|errors?|xfailed|xpassed|todo|total)\b")
+VOLATILE = (
+    (re.compile(r"\S*\.\.\.\S*"), "…"),  # pytest truncates reprs at a length-dependent point
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),
+    # Numbers and trailing digits (user42), but not digits inside identifiers (opentest4j)
+    (re.compile(r"(?<![A-Za-z_])\d+(\.\d+)?|(?<=[A-Za-z_])\d+(?![A-Za-z_\d])"), "N"),
+    (re.compile(r"(/[\w.-]+)+/"), "…/"),
+)
+
+# pytest
+PYTEST_SECTION = re.compile(r"^={3,} (.+?) ={3,}$")
+PYTEST_HEADER = re.compile(r"^_{3,} (.+?) _{3,}$")
+PYTEST_SUMMARY = re.compile(r"^(FAILED|ERROR) (\S+)(?: - (.*))?$")
+# jest
+JEST_FILE = re.compile(r"^\s*(PASS|FAIL)\s+(\S+)")
+JEST_FAILURE = re.compile(r"^\s*● (.+)$")
+JEST_TESTS = re.compile(r"^Tests:\s+(.*)$")
+# vitest
+VITEST_FAIL = re.compile(r"^\s*FAIL\s+(\S+)\s+>\s+(.+?)\s*$")
+VITEST_TESTS = re.compile(r"^\s*Tests\s{2,}(.*)$")
+VITEST_END = re.compile(r"^\s*(⎯{3,}|Test Files\s)")
+# go test
+GO_RUN = re.compile(r"^=== (?:RUN|PAUSE|CONT|NAME)\s+(\S+)")
+GO_RESULT = re.compile(r"^(\s*)--- (PASS|FAIL|SKIP): (\S+)")
+GO_PACKAGE = re.compile(r"^(ok|FAIL)\s+(\S+)\s+(\(cached\)|[\d.]+s|\[build failed\]|\[setup failed\])")
+GO_END = re.compile(r"^(PASS|FAIL|ok\s|FAIL\s|=== |\s*--- )")
+
+ERROR_LINE = re.compile(r"^((?:\w+\.)*\w*(?:Error|Exception|Failure)\b.*|panic: .*)$")
+GO_LOG_LINE = re.compile(r"^\S+\.go:\d+: (.*)$")
+TRACE_KEEP = re.compile(
+    r"^(E\s|>\s)"  # pytest failing line and assertion detail
+    r"|^\s*> \d+ \|"  # jest failing source line
+    r"|^\S+:\d+(:\d+)?:? "  # file:line: message (pytest, go)
+    r"|(Error|Exception|panic)\b"
+    r"|^\s*(Expected|Received|expected|received|[-+] )"  # jest / vitest diffs
+    r"|^\s*❯ "  # vitest source location
+    r"|^\s*at .+:\d+:\d+\)?$"  # js stack frame
+)
+LIBRARY_FRAME = re.compile(r"node_modules/|node:internal|site-packages/|/usr/lib/|<frozen ")
+
+
+def _failure(test: str, lines: list[str], line: int | None) -> dict:
+    return {"test": test, "lines": lines, "line": line}
+
+
+def _counts(text: str) -> dict:
+    counts = {"passed": 0, "failed": 0, "skipped": 0, "errors": 0}
+    for number, kind in COUNT.findall(text):
+        key = {"error": "errors", "xfailed": "skipped", "xpassed": "passed", "todo": "skipped"}.get(kind, kind)
+        if key in counts:
+            counts[key] += int(number)
+    return counts
+
+
+def parse_pytest(text: str) -> tuple[dict | None, list[dict]]:
+    section, blocks, summary = "", [], []
+    summary_line = None
+    for number, line in enumerate(text.splitlines(), start=1):
+        heading = PYTEST_SECTION.match(line)
+        if heading:
+            section = heading.group(1)
+            if re.search(r" in [\d.]+s", section) and COUNT.search(section):
+                summary_line = section
+            continue
+        if section in ("FAILURES", "ERRORS"):
+            header = PYTEST_HEADER.match(line)
+            if header:
+                blocks.append(_failure(header.group(1), [], number))
+            elif blocks:
+                blocks[-1]["lines"].append(line)
+        entry = PYTEST_SUMMARY.match(line)
+        if entry:
+            summary.append((entry.group(2), entry.group(3) or "", number))
+        elif COUNT.search(line) and re.search(r" in [\d.]+s", line):
+            summary_line = line  # `-q` runs end without the ===== banner
+
+    ids = [test for test, _, _ in summary]
+    failures = []
+    for block in blocks:
+        name = re.sub(r"^ERROR at (setup|teardown) of ", "", block["test"]).replace(".", "::")
+        block["test"] = next((test for test in ids if test.endswith(name)), block["test"])
+        failures.append(block)
+    if not failures:  # --tb=no / --tb=line: the short summary is all there is
+        failures = [_failure(test, [message], number) for test, message, number in summary]
+    return (_counts(summary_line) if summary_line else None), failures
+
+
+def parse_jest(text: str) -> tuple[dict | None, list[dict]]:
+    current_file, failures, seen, counts = "", [], set(), None
+    block = None
+    for number, line in enumerate(text.splitlines(), start=1):
+        tests = JEST_TESTS.match(line)
+        if tests:
+            counts = _counts(tests.group(1))
+        file_match = JEST_FILE.match(line)
+        if file_match:
+            current_file, block = file_match.group(2), None
+            continue
+        failure = JEST_FAILURE.match(line)
+        if failure:
+            name = failure.group(1).strip()
+            test = f"{current_file} › {name}" if current_file else name
+            block = None
+            if test not in seen:  # jest repeats failures in "Summary of all failing tests"
+                seen.add(test)
+                block = _failure(test, [], number)
+                failures.append(block)
+            continue
+        if line.startswith(("Test Suites:", "Tests:", "Snapshots:", "Summary of all failing tests")):
+            block = None
+        elif block is not None:
+            block["lines"].append(line)
+    for failure in failures:
+        if failure["test"].endswith("Test suite failed to run") and counts is not None:
+            counts["errors"] += 1
+    return counts, failures
+
+
+def parse_vitest(text: str) -> tuple[dict | None, list[dict]]:
+    failures, seen, counts, block = [], set(), None, None
+    for number, line in enumerate(text.splitlines(), start=1):
+        tests = VITEST_TESTS.match(line)
+        if tests:
+            counts = _counts(tests.group(1))
+        failure = VITEST_FAIL.match(line)
+        if failure:
+            test = f"{failure.group(1)} > {failure.group(2)}"
+            block = None
+            if test not in seen:
+                seen.add(test)
+                block = _failure(test, [], number)
+                failures.append(block)
+        elif VITEST_END.match(line):
+            block = None
+        elif block is not None:
+            block["lines"].append(line)
+    return counts, failures
+
+
+def parse_go(text: str) -> tuple[dict | None, list[dict]]:
+    lines = text.splitlines()
+    output: dict[str, list[str]] = {}
+    current = None
+    results: dict[str, str] = {}
+    failures = []
+    for index, line in enumerate(lines):
+        run = GO_RUN.match(line)
+        if run:
+            current = run.group(1)
+            output.setdefault(current, [])
+            continue
+        result = GO_RESULT.match(line)
+        if result:
+            _, status, name = result.groups()
+            results[name] = status
+            if status == "FAIL":
+                following = []
+                for later in lines[index + 1:]:
+                    if GO_END.match(later) or GO_PACKAGE.match(later):
+                        break
+                    following.append(later)
+                failures.append(_failure(name, following or output.get(name, []), index + 1))
+            continue
+        package = GO_PACKAGE.match(line)
+        if package and package.group(1) == "FAIL" and package.group(3).startswith("["):
+            failures.append(_failure(package.group(2), [line], index + 1))
+            results[package.group(2)] = "ERROR"
+        elif current and line.startswith((" ", "\t")):
+            output[current].append(line)
+
+    # A failing subtest also fails its parent; report the subtest only.
+    failed = {f["test"] for f in failures}
+    failures = [f for f in failures if not any(other.startswith(f["test"] + "/") for other in failed)]
+    kept = {f["test"] for f in failures}
+    statuses = [status for name, status in results.items() if status != "FAIL" or name in kept]
+    if not statuses:
+        return None, failures
+    return {
+        "passed": statuses.count("PASS"),
+        "failed": statuses.count("FAIL"),
+        "skipped": statuses.count("SKIP"),
+        "errors": statuses.count("ERROR"),
+    }, failures
+
+
+def parse_junit(text: str) -> tuple[dict | None, list[dict]]:
+    root = ET.fromstring(text)
+    counts = {"passed": 0, "failed": 0, "skipped": 0, "errors": 0}
+    raw_lines = text.splitlines()
+    failures = []
+    for case in root.iter("testcase"):
+        name = case.get("name", "?")
+        test = f"{case.get('classname')}::{name}" if case.get("classname") else name
+        problem = case.find("failure")
+        if problem is None:
+            problem = case.find("error")
+        if problem is not None:
+            counts["failed" if problem.tag == "failure" else "errors"] += 1
+            lines = [problem.get("message", "")] + (problem.text or "").splitlines()
+            line = next((i for i, raw in enumerate(raw_lines, start=1) if f'name="{name}"' in raw), None)
+            failures.append(_failure(test, [entry for entry in lines if entry.strip()], line))
+        elif case.find("skipped") is not None:
+            counts["skipped"] += 1
+        else:
+            counts["passed"] += 1
+    return counts, failures
+
+
+PARSERS = {
+    "pytest": parse_pytest,
+    "jest": parse_jest,
+    "vitest": parse_vitest,
+    "go": parse_go,
+    "junit": parse_junit,
+}
+
+
+def detect_format(text: str) -> str:
+    head = text.lstrip()[:200]
+    if head.startswith(("<?xml", "<testsuite")):
+        return "junit"
+    if re.search(r"^\s*Test Files\s{2,}", text, re.MULTILINE) or "⎯⎯⎯" in text:
+        return "vitest"
+    if re.search(r"^Test Suites:", text, re.MULTILINE) or re.search(r"^\s*● ", text, re.MULTILINE):
+        return "jest"
+    if re.search(r"^(=== RUN|\s*--- (FAIL|PASS|SKIP):|ok\s+\S+\s|FAIL\s+\S+\s)", text, re.MULTILINE):
+        return "go"
+    return "pytest"
+
+
+def normalize(line: str) -> str:
+    for pattern, replacement in VOLATILE:
+        line = pattern.sub(replacement, line)
+    return line.strip()[:SIGNATURE_CHARS]
+
+
+def signature(lines: list[str]) -> str:
+    """The line that says what went wrong, with run-specific values masked."""
+    stripped = [re.sub(r"^E\s+", "", line).strip() for line in lines]
+    for line in stripped:
+        if ERROR_LINE.match(line):
+            return normalize(line)
+    for raw, line in zip(lines, stripped):
+        if raw.startswith("E ") and line:
+            return normalize(line)
+    for line in stripped:
+        log = GO_LOG_LINE.match(line)
+        if log:
+            return normalize(log.group(1))
+    return normalize(next((line for line in stripped if line), "no details"))
+
+
+def trim(lines: list[str], limit: int = TRACE_LINES) -> list[str]:
+    """Keep the lines that locate and explain the failure; drop library frames and noise."""
+    kept: list[str] = []
+    for line in lines:
+        if line.strip() in ("E", ">") or line.strip() in kept:
+            continue
+        if TRACE_KEEP.search(line) and not LIBRARY_FRAME.search(line):
+            kept.append(line.strip())
+    if not kept:
+        kept = [line.strip() for line in lines if line.strip()][-limit:]
+    return [line[:LINE_CHARS] for line in kept[:limit]]
+
+
+def tail(text: str, limit: int = TAIL_LINES) -> list[str]:
+    return [line[:LINE_CHARS] for line in text.rstrip().splitlines()[-limit:]]
+
+
+def digest(text: str, fmt: str | None = None, log: str | None = None, trace_lines: int = TRACE_LINES,
+           exit_code: int | None = None) -> dict:
+    """Digest runner output; a non-zero EXIT_CODE is a failure whatever the output says."""
+    fmt = fmt or detect_format(text)
+    counts, failures = PARSERS[fmt](text)
+    if counts is None:
+        counts = {"passed": 0, "failed": len(failures), "skipped": 0, "errors": 0}
+    groups: dict[str, dict] = {}
+    for failure in failures:
+        key = signature(failure["lines"])
+        group = groups.setdefault(
+            key,
+            {"signature": key, "count": 0, "tests": [], "trace": trim(failure["lines"], trace_lines), "log_line": failure["line"]},
+        )
+        group["count"] += 1
+        if len(group["tests"]) < MAX_TESTS_PER_SIGNATURE:
+            group["tests"].append(failure["test"])
+    ranked = sorted(groups.values(), key=lambda group: -group["count"])
+    total = sum(counts.values())
+    broken = counts["failed"] + counts["errors"] or len(failures) or exit_code
+    result = {
+        "format": fmt,
+        "status": "failed" if broken else "no tests" if not total else "passed",
+        **counts,
+        "total": total,
+        "log": log,
+        "signatures": ranked[:MAX_SIGNATURES],
+        "more_signatures": max(0, len(ranked) - MAX_SIGNATURES),
+        "raw_bytes": len(text.encode()),
+    }
+    if exit_code is not None:
+        result["exit_code"] = exit_code
+    # Collection errors, crashes and unknown runners parse to nothing; the end of the output says why.
+    if not ranked and (broken or not total):
+        result["tail"] = tail(text)
+    return result
+
+
+def failing_tests(text: str, fmt: str | None = None) -> dict[str, str]:
+    """Every failing test id with its signature (the digest itself keeps only a few per signature)."""
+    _, failures = PARSERS[fmt or detect_format(text)](text)
+    return {failure["test"]: signature(failure["lines"]) for failure in failures}
+
+
+def _git(cwd: Path, *args: str) -> str | None:
+    proc = subprocess.run(["git", "-C", str(cwd), *args], capture_output=True, text=True)
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+
+def baseline_dir(cwd: Path) -> Path | None:
+    """``<git-common-dir>/superpowers/baselines``, shared by every worktree; None outside a repository."""
+    common = _git(cwd, "rev-parse", "--path-format=absolute", "--git-common-dir")
+    return Path(common) / "superpowers" / "baselines" if common else None
+
+
+def save_baseline(cwd: Path, result: dict, text: str, command: list[str] | None = None) -> dict:
+    """Snapshot the failing tests of a digested run as the baseline of the current commit."""
+    directory, commit = baseline_dir(cwd), _git(cwd, "rev-parse", "--verify", "-q", "HEAD")
+    if directory is None or commit is None:
+        raise OSError("a baseline needs a repository with at least one commit")
+    snapshot = {
+        "commit": commit,
+        "created": time.time(),
+        "command": command,
+        "format": result["format"],
+        "total": result["total"],
+        "dirty": bool(_git(cwd, "status", "--porcelain", "--untracked-files=no")),
+        "failures": failing_tests(text, result["format"]),
+    }
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=commit, suffix=".tmp")
+    with open(fd, "w") as handle:
+        json.dump(snapshot, handle, indent=2)
+    os.replace(tmp, directory / f"{commit}.json")
+    return snapshot
+
+
+def find_baseline(cwd: Path, ref: str = "HEAD") -> dict | None:
+    """The snapshot of REF's nearest ancestor (or REF itself) that has one."""
+    directory = baseline_dir(cwd)
+    stored = {path.stem for path in directory.glob("*.json")} if directory and directory.is_dir() else set()
+    if not stored:
+        return None
+    for commit in (_git(cwd, "rev-list", f"--max-count={BASELINE_DEPTH}", ref) or "").split():
+        if commit in stored:
+            return json.loads((directory / f"{commit}.json").read_text())
+    return None
+
+
+def compare(snapshot: dict, failing: dict[str, str], total: int) -> dict:
+    """Split this run's failures into new and known, and find baseline failures that were fixed."""
+    before = snapshot["failures"]
+    new = [
+        {"test": test, "signature": sig, **({"baseline_signature": before[test]} if test in before else {})}
+        for test, sig in failing.items() if before.get(test) != sig
+    ]
+    known = [test for test, sig in failing.items() if before.get(test) == sig]
+    gone = [test for test in before if test not in failing]
+    # A partial run (one file, one test) says nothing about the baseline failures it didn't run.
+    complete = total >= snapshot["total"]
+    return {
+        "commit": snapshot["commit"][:12],
+        "new": new,
+        "fixed": gone if complete else [],
+        "known": known,
+        "not_run": 0 if complete else len(gone),
+        "known_signatures": sorted({before[test] for test in known}),
+    }
+
+
+def _render_baseline(baseline: dict) -> list[str]:
+    if "unsaved" in baseline:
+        return [f"Baseline not saved: {baseline['unsaved']}"]
+    if "saved" in baseline:
+        return [f"Baseline saved for {baseline['saved'][:12]}: {baseline['failures']} failing test(s). "
+                "Later runs report only what changes against it."]
+    new, fixed, known = baseline["new"], baseline["fixed"], baseline["known"]
+    lines = [f"Baseline {baseline['commit']}: {len(new)} new, {len(fixed)} fixed, {len(known)} known failure(s)"
+             + (f", {baseline['not_run']} baseline failure(s) not run" if baseline["not_run"] else "")]
+    if new:
+        lines.append("New failures (not failing at baseline — caused by this change):")
+        for item in new[:MAX_BASELINE_TESTS]:
+            was = f" (failed at baseline with `{item['baseline_signature']}`)" if "baseline_signature" in item else ""
+            lines.append(f"- {item['test']} — `{item['signature']}`{was}")
+        if len(new) > MAX_BASELINE_TESTS:
+            lines.append(f"- ... and {len(new) - MAX_BASELINE_TESTS} more")
+    if fixed:
+        shown = ", ".join(fixed[:MAX_BASELINE_TESTS]) + (f", and {len(fixed) - MAX_BASELINE_TESTS} more" if len(fixed) > MAX_BASELINE_TESTS else "")
+        lines.append(f"Fixed since baseline: {shown}")
+    if known:
+        shown = ", ".join(known[:MAX_BASELINE_TESTS]) + (f", and {len(known) - MAX_BASELINE_TESTS} more" if len(known) > MAX_BASELINE_TESTS else "")
+        lines.append(f"Known failures (pre-existing at baseline; leave them alone unless the task is about them): {shown}")
+    return lines
+
+
+def render(result: dict) -> str:
+    labels = {"failed": "failed", "errors": "errored", "passed": "passed", "skipped": "skipped"}
+    counts = ", ".join(f"{result[key]} {label}" for key, label in labels.items() if result[key])
+    lines = [f"**Tests ({result['format']}): {result['status'].upper()}** — {counts or 'nothing ran'}"]
+    if result.get("exit_code") is not None:
+        lines[0] += f" (exit {result['exit_code']})"
+    if result["log"]:
+        lines.append(f"Full log: {result['log']}")
+    baseline = result.get("baseline")
+    if baseline:
+        lines += _render_baseline(baseline)
+    known = set(baseline.get("known_signatures", ())) - {item["signature"] for item in baseline.get("new", ())} if baseline else set()
+    if result["signatures"]:
+        lines.append("")
+        lines.append(f"Failures by signature ({len(result['signatures']) + result['more_signatures']} distinct):")
+        for number, group in enumerate(result["signatures"], start=1):
+            where = f" (log line {group['log_line']})" if group["log_line"] else ""
+            if group["signature"] in known:
+                lines.append(f"{number}. `{group['signature']}` — {group['count']} test(s), known at baseline{where}")
+                continue
+            lines.append(f"{number}. `{group['signature']}` — {group['count']} test(s){where}")
+            lines += [f"   - {test}" for test in group["tests"]]
+            if group["count"] > len(group["tests"]):
+                lines.append(f"   - ... and {group['count'] - len(group['tests'])} more")
+            if group["trace"]:
+                lines += ["   ```", *(f"   {line}" for line in group["trace"]), "   ```"]
+        if result["more_signatures"]:
+            lines.append(f"... {result['more_signatures']} more signatures in the full log")
+    if result.get("tail"):
+        lines += ["", "No failures could be parsed. End of the output:", "```", *result["tail"], "```"]
+    return "\n".join(lines)
+
+
+def log_dir(cwd: Path) -> Path:
+    """``<git-dir>/superpowers/test-logs`` inside a repository, the temp directory otherwise."""
+    proc = subprocess.run(["git", "-C", str(cwd), "rev-parse", "--absolute-git-dir"], capture_output=True, text=True)
+    if proc.returncode == 0:
+        return Path(proc.stdout.strip()) / "superpowers" / "test-logs"
+    return Path(tempfile.gettempdir()) / "superpowers-test-logs"
+
+
+def save_log(text: str, cwd: Path) -> str:
+    directory = log_dir(cwd)
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix=time.strftime("%Y%m%d-%H%M%S-"), suffix=".log")
+    with open(fd, "w") as handle:
+        handle.write(text)
+    return path
+
+
+def with_baseline(result: dict, text: str, cwd: Path, mode: str = "compare", command: list[str] | None = None) -> dict:
+    """Save this run as the baseline (mode "save"), or compare it with the baseline in effect ("compare")."""
+    if mode == "save":
+        try:
+            snapshot = save_baseline(cwd, result, text, command)
+        except OSError as exc:  # the test results still matter without a snapshot
+            return {**result, "baseline": {"unsaved": str(exc)}}
+        return {**result, "baseline": {"saved": snapshot["commit"], "failures": len(snapshot["failures"])}}
+    snapshot = find_baseline(cwd) if mode == "compare" else None
+    if snapshot is None:
+        return result
+    return {**result, "baseline": compare(snapshot, failing_tests(text, result["format"]), result["total"])}
+
+
+def run(command: list[str], fmt: str | None = None, junit: str | None = None, cwd: Path = Path("."),
+        baseline: str = "compare") -> dict:
+    """Run a test command, keep its full output on disk and digest it."""
+    proc = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    log = save_log(proc.stdout, cwd)
+    junit_path = cwd / junit if junit else None
+    text, fmt = (junit_path.read_text(), "junit") if junit_path and junit_path.exists() else (proc.stdout, fmt)
+    return with_baseline(digest(text, fmt, log, exit_code=proc.returncode), text, cwd, baseline, command)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Condense test-runner output into a failure digest")
+    sub = parser.add_subparsers(dest="command", required=True)
+    shown = sub.add_parser("baseline")
+    shown.add_argument("--ref", default="HEAD", help="Commit whose baseline to show (default: HEAD)")
+    for name in ("run", "digest"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--format", choices=sorted(PARSERS), help="Runner format (default: detect)")
+        cmd.add_argument("--markdown", action="store_true", help="Print the prompt-ready digest instead of JSON")
+        mode = cmd.add_mutually_exclusive_group()
+        mode.add_argument("--save-baseline", dest="baseline", action="store_const", const="save", default="compare",
+                          help="Store this run's failures as the baseline of the current commit")
+        mode.add_argument("--no-baseline", dest="baseline", action="store_const", const="off",
+                          help="Don't compare with the baseline")
+        if name == "run":
+            cmd.add_argument("--junit", help="JUnit XML report the command writes; digested instead of stdout")
+            cmd.add_argument("test_command", nargs=argparse.REMAINDER, help="Test command, after --")
+        else:
+            cmd.add_argument("--log", help="Where the full output lives (default: the input file, or a saved copy of stdin)")
+            cmd.add_argument("file", nargs="?", help="Saved output or JUnit XML (default: stdin)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "baseline":
+            snapshot = find_baseline(Path("."), args.ref)
+            if snapshot is None:
+                print(f"Error: no baseline snapshot for {args.ref} or its ancestors", file=sys.stderr)
+                return 1
+            json.dump(snapshot, sys.stdout, indent=2)
+            print()
+            return 0
+        if args.command == "run":
+            command = args.test_command[1:] if args.test_command[:1] == ["--"] else args.test_command
+            if not command:
+                print("Error: no test command given (put it after --)", file=sys.stderr)
+                return 1
+            result = run(command, args.format, args.junit, baseline=args.baseline)
+        else:
+            text = Path(args.file).read_text() if args.file else sys.stdin.read()
+            log = args.log or (str(Path(args.file).resolve()) if args.file else save_log(text, Path(".")))
+            result = with_baseline(digest(text, args.format, log), text, Path("."), args.baseline)
+    except (OSError, ET.ParseError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    if args.markdown:
+        print(render(result))
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    return result.get("exit_code") or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
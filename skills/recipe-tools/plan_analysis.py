@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""plan_analysis.py — File-overlap conflict graph and parallel-safe groups for a plan.
+
+Reads a plan (the markdown format written by writing-plans.yaml, or a
+``{"tasks": [...]}`` JSON object with ``task_id``, ``files`` and
+``dependencies``) and reports:
+
+- conflicts: files touched by more than one task
+- waves: dependency levels; every task in a wave has all its dependencies in
+  earlier waves
+- parallel_groups: per wave, a greedy colouring of the file-conflict graph —
+  tasks in the same group share no files and can run concurrently
+- critical_path / critical_path_length: the longest dependency chain
+- dependency_errors: dependencies on unknown tasks and dependency cycles. When
+  there are any, every task gets its own wave in plan order (sequential
+  execution) and the critical path is the whole plan
+
+Usage:
+    plan_analysis.py < plan.md
+    plan_analysis.py --plan docs/plans/2025-01-15-auth-plan.md
+    plan_analysis.py --feature-name auth < plan.md   # plan metadata for writing-plans.yaml
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+TASK_HEADING = re.compile(r"^#{2,3}\s+Task\s+([\w.-]+)\s*:\s*(.*)$", re.MULTILINE)
+FIELD = re.compile(r"^\*\*(?P<name>[^*]+?)\*\*\s*:?\s*(?P<value>.*)$")
+BACKTICK_PATH = re.compile(r"`([^`]+)`")
+LINE_RANGE = re.compile(r":\d+(?:-\d+)?$")
+TASK_REF = re.compile(r"\b(?:task[-\s]*)?(\d+(?:\.\d+)?)\b", re.IGNORECASE)
+MINUTES = re.compile(r"(\d+)(?:\s*-\s*(\d+))?\s*min", re.IGNORECASE)
+
+
+def _paths(text: str, first_only: bool = False) -> list[str]:
+    paths = [LINE_RANGE.sub("", path) for path in BACKTICK_PATH.findall(text)]
+    return paths[:1] if first_only else paths
+
+
+def _task_id(label: str) -> str:
+    label = label.strip()
+    return label if label.lower().startswith("task-") else f"task-{label}"
+
+
+def parse_markdown(text: str) -> list[dict]:
+    """Extract tasks (id, title, files, dependencies, minutes) from a markdown plan.
+
+    Expects ``### Task N: Name`` headings with ``**Files:**`` bullet lists (or
+    inline lists) of backticked paths and an optional ``**Depends on:** Task 1,
+    Task 2`` line. Line ranges such as ``file.py:123-145`` are dropped.
+    """
+    headings = list(TASK_HEADING.finditer(text))
+    tasks = []
+    for index, heading in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+        body = text[heading.end() : end]
+        task = {
+            "task_id": _task_id(heading.group(1)),
+            "title": heading.group(2).strip(),
+            "files": [],
+            "dependencies": [],
+        }
+        current = None
+        for line in body.splitlines():
+            stripped = line.strip()
+            field = FIELD.match(stripped)
+            if field:
+                current = field.group("name").strip().rstrip(":").lower()
+                value = field.group("value")
+                if current == "files":
+                    task["files"].extend(_paths(value))
+                elif current in ("depends on", "dependencies"):
+                    if value.strip().lower() not in ("", "none", "-", "n/a"):
+                        task["dependencies"] = [_task_id(ref) for ref in TASK_REF.findall(value)]
+                elif current == "time":
+                    minutes = MINUTES.search(value)
+                    if minutes:
+                        task["minutes"] = int(minutes.group(2) or minutes.group(1))
+                continue
+            if current == "files" and stripped.startswith(("-", "*")):
+                task["files"].extend(_paths(stripped, first_only=True))
+            elif stripped:
+                current = None if not stripped.startswith(("-", "*")) else current
+        tasks.append(task)
+    return tasks
+
+
+def _waves(tasks: list[dict]) -> list[list[str]]:
+    """Group tasks by longest-path depth; raises ValueError on cycles or unknown deps."""
+    ids = [task["task_id"] for task in tasks]
+    known = set(ids)
+    deps = {task["task_id"]: list(task.get("dependencies") or []) for task in tasks}
+    for task_id, task_deps in deps.items():
+        missing = [dep for dep in task_deps if dep not in known]
+        if missing:
+            raise ValueError(f"{task_id} depends on unknown task(s): {', '.join(missing)}")
+
+    indegree = {task_id: len(deps[task_id]) for task_id in ids}
+    dependents = defaultdict(list)
+    for task_id in ids:
+        for dep in deps[task_id]:
+            dependents[dep].append(task_id)
+
+    depth = {}
+    frontier = [task_id for task_id in ids if indegree[task_id] == 0]
+    for task_id in frontier:
+        depth[task_id] = 0
+    while frontier:
+        next_frontier = []
+        for task_id in frontier:
+            for child in dependents[task_id]:
+                depth[child] = max(depth.get(child, 0), depth[task_id] + 1)
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    next_frontier.append(child)
+        frontier = next_frontier
+
+    if len(depth) != len(ids) or any(indegree.values()):
+        cyclic = [task_id for task_id in ids if indegree[task_id] > 0]
+        raise ValueError(f"Dependency cycle among: {', '.join(cyclic)}")
+
+    levels: list[list[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for task_id in ids:
+        levels[depth[task_id]].append(task_id)
+    return levels
+
+
+def _dependency_errors(tasks: list[dict]) -> list[str]:
+    """Unknown dependencies per task, then any cycle among the known ones."""
+    known = {task["task_id"] for task in tasks}
+    errors = []
+    for task in tasks:
+        missing = [dep for dep in task.get("dependencies") or [] if dep not in known]
+        if missing:
+            errors.append(f"{task['task_id']} depends on unknown task(s): {', '.join(missing)}")
+    known_only = [
+        {**task, "dependencies": [dep for dep in task.get("dependencies") or [] if dep in known]}
+        for task in tasks
+    ]
+    try:
+        _waves(known_only)
+    except ValueError as exc:
+        errors.append(str(exc))
+    return errors
+
+
+def _colour(wave: list[str], neighbours: dict[str, set[str]]) -> list[list[str]]:
+    """Welsh-Powell greedy colouring: each group is a file-disjoint set of tasks."""
+    position = {task_id: index for index, task_id in enumerate(wave)}
+    members = set(wave)
+    order = sorted(wave, key=lambda t: (-len(neighbours[t] & members), position[t]))
+    groups: list[list[str]] = []
+    for task_id in order:
+        for group in groups:
+            if not neighbours[task_id].intersection(group):
+                group.append(task_id)
+                break
+        else:
+            groups.append([task_id])
+    return [sorted(group, key=position.__getitem__) for group in groups]
+
+
+def _critical_path(tasks: list[dict], waves: list[list[str]]) -> tuple[list[str], int]:
+    """Longest chain by estimated minutes (1 per task when no estimate is given)."""
+    by_id = {task["task_id"]: task for task in tasks}
+    cost = {}
+    best_parent: dict[str, str | None] = {}
+    for wave in waves:
+        for task_id in wave:
+            parent = max(by_id[task_id].get("dependencies") or [], key=lambda d: cost[d], default=None)
+            cost[task_id] = by_id[task_id].get("minutes", 1) + (cost[parent] if parent else 0)
+            best_parent[task_id] = parent
+    if not cost:
+        return [], 0
+    node: str | None = max(cost, key=cost.__getitem__)
+    total = cost[node]
+    path = []
+    while node is not None:
+        path.append(node)
+        node = best_parent[node]
+    return path[::-1], total
+
+
+def analyze(tasks: list[dict]) -> dict:
+    """Build the task x file conflict graph and derive parallel-safe groups."""
+    owners: dict[str, list[str]] = defaultdict(list)
+    for task in tasks:
+        for path in dict.fromkeys(task.get("files") or []):
+            owners[path].append(task["task_id"])
+
+    neighbours: dict[str, set[str]] = {task["task_id"]: set() for task in tasks}
+    for task_ids in owners.values():
+        for task_id in task_ids:
+            neighbours[task_id].update(t for t in task_ids if t != task_id)
+
+    errors = _dependency_errors(tasks)
+    if errors:
+        waves = [[task["task_id"]] for task in tasks]
+        path = [task["task_id"] for task in tasks]
+        minutes = sum(task.get("minutes", 1) for task in tasks)
+    else:
+        waves = _waves(tasks)
+        path, minutes = _critical_path(tasks, waves)
+    groups = [_colour(wave, neighbours) for wave in waves]
+    return {
+        "total_tasks": len(tasks),
+        "conflicts": [
+            {"file": path_, "tasks": task_ids}
+            for path_, task_ids in sorted(owners.items())
+            if len(task_ids) > 1
+        ],
+        "waves": waves,
+        "parallel_groups": groups,
+        "max_parallelism": max((len(group) for wave in groups for group in wave), default=0),
+        "critical_path": path,
+        "critical_path_length": len(path),
+        "critical_path_minutes": minutes,
+        "dependency_errors": errors,
+    }
+
+
+def load_tasks(text: str) -> list[dict]:
+    """Accept either a JSON ``{"tasks": [...]}`` payload or a markdown plan."""
+    stripped = text.lstrip()
+    if stripped.startswith(("{", "[")):
+        payload = json.loads(stripped)
+        return payload["tasks"] if isinstance(payload, dict) else payload
+    return parse_markdown(text)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Conflict graph and parallel-safe groups for a plan")
+    parser.add_argument("--plan", help="Plan file (markdown or JSON); reads stdin when omitted")
+    parser.add_argument("--feature-name", help="Include the feature name in the output (plan metadata)")
+    args = parser.parse_args(argv)
+
+    text = Path(args.plan).read_text() if args.plan else sys.stdin.read()
+    try:
+        result = analyze(load_tasks(text))
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    for error in result["dependency_errors"]:
+        print(f"Warning: {error}; falling back to sequential waves", file=sys.stderr)
+    if args.feature_name:
+        result = {"feature_name": args.feature_name.strip(), **result}
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
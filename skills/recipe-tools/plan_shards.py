@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""plan_shards.py — Sharded implementation plans: an index file plus one file per phase.
+
+A 150+ task plan does not fit in one generation, and loading it as one
+``{"tasks": [...]}`` reply copies every task's full spec into the recipe
+context. A sharded plan keeps the overview and a phase table in the index:
+
+    docs/plans/2025-01-15-migration-plan.md            index: overview + ## Phases table
+    docs/plans/2025-01-15-migration-plan/phase-01.md   ### Task 1 ... ### Task 40
+    docs/plans/2025-01-15-migration-plan/phase-02.md   ### Task 41 ...
+
+Shards use the ordinary task format, so each can be written by its own agent
+in parallel. Executing recipes load compact task refs (id, title, files,
+dependencies, shard) and expand each task from its shard only when it runs,
+reading one shard at a time.
+
+Usage:
+    plan_shards.py init   --plan INDEX [--max-tasks 40] < outline.json   # index + shard stubs
+    plan_shards.py split  --plan PLAN [--max-tasks 40]                   # shard an existing plan in place
+    plan_shards.py info   --plan PLAN                                    # sharded? counts, problems
+    plan_shards.py refs   --plan PLAN                                    # {"tasks": [compact refs]}
+    plan_shards.py expand --plan PLAN [--window TASK_ID] < tasks.json    # refs -> full tasks
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Iterator
+
+_ANALYSIS = Path(__file__).resolve().parent / "plan_analysis.py"
+_spec = importlib.util.spec_from_file_location("plan_analysis", _ANALYSIS)
+plan_analysis = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(plan_analysis)
+
+DEFAULT_MAX_TASKS = 40
+PHASE_HEADING = re.compile(r"^##\s+Phase\b\s*([\w.-]*)\s*:?\s*(.*)$", re.MULTILINE)
+SHARD_ROW = re.compile(r"^\|\s*(\d+)\.\s*([^|]*?)\s*\|\s*`([^`]+\.md)`\s*\|\s*(\d+)\s*\|", re.MULTILINE)
+SECTION = re.compile(r"^##\s", re.MULTILINE)  # a level-2 heading ends the task before it
+EXPECTED = re.compile(r"^\s*Expected:\s*(.+)$", re.MULTILINE)
+OBJECTIVE = re.compile(r"^\*\*Objective\*\*\s*:?\s*(.+)$", re.MULTILINE)
+
+
+def shard_dir(index: Path) -> Path:
+    return index.with_suffix("")
+
+
+def read_shard(path: Path) -> str:
+    """One shard's text. The only place shard files are read — callers hold one at a time."""
+    return path.read_text()
+
+
+def shards(index: Path) -> list[dict]:
+    """The index's phase table: phase number, name, shard file (relative to the index), path and task count."""
+    if not index.exists():
+        return []
+    return [
+        {"phase": int(number), "name": name, "file": path, "path": str(index.parent / path), "expected": int(count)}
+        for number, name, path, count in SHARD_ROW.findall(index.read_text())
+    ]
+
+
+def is_sharded(plan: Path) -> bool:
+    return bool(shards(plan))
+
+
+def parse_tasks(text: str, shard: str | None = None) -> list[dict]:
+    """Full tasks from markdown: plan_analysis metadata plus the task's body as its spec."""
+    tasks = plan_analysis.parse_markdown(text)
+    headings = list(plan_analysis.TASK_HEADING.finditer(text))
+    for task, heading, following in zip(tasks, headings, headings[1:] + [None]):
+        end = following.start() if following else len(text)
+        stop = SECTION.search(text, heading.end(), end)
+        body = re.sub(r"\n-{3,}\s*$", "", text[heading.end() : stop.start() if stop else end].rstrip()).strip()
+        objective = OBJECTIVE.search(body)
+        task.update(
+            description=objective.group(1).strip() if objective else task["title"],
+            spec=body,
+            acceptance_criteria="\n".join(match.strip() for match in EXPECTED.findall(body)),
+        )
+        if shard is not None:
+            task["shard"] = shard
+    return tasks
+
+
+def iter_tasks(plan: Path) -> Iterator[dict]:
+    """Every task in plan order, one shard in memory at a time (a plain plan is one shard)."""
+    table = shards(plan)
+    if not table:
+        yield from parse_tasks(plan.read_text())
+        return
+    for entry in table:
+        path = Path(entry["path"])
+        if path.exists():
+            yield from parse_tasks(read_shard(path), shard=entry["file"])
+
+
+def refs(plan: Path) -> dict:
+    compact = []
+    for task in iter_tasks(plan):
+        task.pop("spec")
+        task.pop("acceptance_criteria")
+        task.pop("description")
+        compact.append(task)
+    return {"sharded": is_sharded(plan), "tasks": compact, "total_tasks": len(compact)}
+
+
+def info(plan: Path) -> dict:
+    table = shards(plan)
+    if not table:
+        return {"sharded": False, "plan": str(plan), "total_tasks": len(plan_analysis.parse_markdown(plan.read_text()))}
+    problems, seen, total, largest = [], {}, 0, 0
+    for entry in table:
+        path = Path(entry["path"])
+        if not path.exists():
+            problems.append(f"phase {entry['phase']}: shard {path.name} is missing")
+            continue
+        ids = [task["task_id"] for task in plan_analysis.parse_markdown(read_shard(path))]
+        if len(ids) != entry["expected"]:
+            problems.append(f"phase {entry['phase']}: {path.name} has {len(ids)} tasks, index expects {entry['expected']}")
+        for task_id in ids:
+            if task_id in seen:
+                problems.append(f"{task_id} appears in both {seen[task_id]} and {path.name}")
+            seen[task_id] = path.name
+        total += len(ids)
+        largest = max(largest, len(ids))
+    return {
+        "sharded": True,
+        "plan": str(plan),
+        "shards": len(table),
+        "total_tasks": total,
+        "largest_shard": largest,
+        "problems": problems,
+        "complete": not problems,
+    }
+
+
+def expand(payload, plan: Path, window: str | None = None):
+    """Replace task refs (tasks carrying a ``shard``) with full tasks, parsing each shard once.
+
+    Accepts a task, a list of tasks or an object with a ``tasks`` list, and returns
+    the same shape. Tasks without a ``shard`` pass through unchanged, so a plain
+    plan's agent-parsed tasks are left alone. ``window`` keeps only that task and
+    the one after it (what speculation.py needs to launch the next task).
+    """
+    if isinstance(payload, dict) and "tasks" in payload:
+        return {**payload, "tasks": expand(payload["tasks"], plan, window)}
+    if isinstance(payload, dict):
+        return expand([payload], plan)[0]
+    tasks = list(payload)
+    if window is not None:
+        ids = [str(task.get("task_id")) for task in tasks]
+        start = ids.index(window) if window in ids else len(ids)
+        tasks = tasks[start : start + 2]
+    wanted: dict[str, set[str]] = {}
+    for task in tasks:
+        if task.get("shard"):
+            wanted.setdefault(task["shard"], set()).add(str(task["task_id"]))
+    full: dict[str, dict] = {}
+    for shard, ids in wanted.items():
+        for task in parse_tasks(read_shard(plan.parent / shard), shard=shard):
+            if task["task_id"] in ids:
+                full[task["task_id"]] = task
+    return [full.get(str(task.get("task_id")), task) if task.get("shard") else task for task in tasks]
+
+
+def _chunks(phases: list[dict], max_tasks: int) -> list[dict]:
+    """Split phases larger than ``max_tasks`` into consecutive parts."""
+    result = []
+    for phase in phases:
+        tasks = phase["tasks"]
+        parts = max(1, -(-len(tasks) // max_tasks))
+        for part in range(parts):
+            window = slice(part * max_tasks, (part + 1) * max_tasks)
+            name = phase["name"] if parts == 1 else f"{phase['name']} (part {part + 1} of {parts})"
+            result.append({**phase, "name": name, "tasks": tasks[window], "blocks": phase.get("blocks", [])[window]})
+    return result
+
+
+def _index_text(header: str, entries: list[dict], index: Path) -> str:
+    lines = [
+        header.rstrip(),
+        "",
+        "## Phases",
+        "",
+        "This plan is sharded: each phase's tasks are in their own file. Execute it by passing",
+        "this index as `plan_path`; tasks are loaded from their shard as they run.",
+        "",
+        "| Phase | Shard | Tasks | Range |",
+        "|-------|-------|-------|-------|",
+    ]
+    for number, entry in enumerate(entries, start=1):
+        ids = [task["task_id"] for task in entry["tasks"]]
+        span = f"{ids[0]} – {ids[-1]}" if ids else "-"
+        lines.append(f"| {number}. {entry['name']} | `{index.stem}/phase-{number:02d}.md` | {len(ids)} | {span} |")
+    return "\n".join(lines) + "\n"
+
+
+def _shard_header(number: int, entry: dict, index: Path) -> str:
+    lines = [f"# Phase {number}: {entry['name']}", "", f"**Plan**: `../{index.name}`"]
+    if entry.get("goal"):
+        lines.append(f"**Goal**: {entry['goal']}")
+    return "\n".join(lines) + "\n"
+
+
+def init(index: Path, outline: dict, max_tasks: int = DEFAULT_MAX_TASKS) -> dict:
+    """Write the index and one stub per shard from an outline; shard writers fill in the tasks.
+
+    The outline is ``{"title", "overview", "phases": [{"name", "goal", "tasks": [...]}]}``
+    where each outline task has ``task_id``, ``title``, ``files`` and ``dependencies``.
+    """
+    for phase in outline["phases"]:
+        for task in phase["tasks"]:
+            task["task_id"] = plan_analysis._task_id(str(task["task_id"]))
+    entries = _chunks(outline["phases"], max_tasks)
+    header = f"# Implementation Plan: {outline.get('title', index.stem)}\n\n{outline.get('overview', '').strip()}\n"
+    index.parent.mkdir(parents=True, exist_ok=True)
+    index.write_text(_index_text(header, entries, index))
+    shard_dir(index).mkdir(exist_ok=True)
+    result = []
+    for number, entry in enumerate(entries, start=1):
+        path = shard_dir(index) / f"phase-{number:02d}.md"
+        header = _shard_header(number, entry, index)
+        path.write_text(header)
+        result.append({
+            "phase": number,
+            "name": entry["name"],
+            "goal": entry.get("goal", ""),
+            "path": str(path),
+            "header": header,
+            "tasks": entry["tasks"],
+        })
+    return {"index": str(index), "shards": result, "total_tasks": sum(len(e["tasks"]) for e in entries)}
+
+
+def split(plan: Path, max_tasks: int = DEFAULT_MAX_TASKS) -> dict:
+    """Shard an existing monolithic plan in place; ``## Phase`` headings become shard boundaries."""
+    text = plan.read_text()
+    headings = list(plan_analysis.TASK_HEADING.finditer(text))
+    if not headings:
+        raise ValueError(f"{plan} has no '### Task N:' headings")
+    phase_marks = list(PHASE_HEADING.finditer(text))
+    header_end = min([headings[0].start()] + [mark.start() for mark in phase_marks])
+    header = re.sub(r"\n##\s+Tasks\s*$", "", text[:header_end].rstrip()).rstrip().rstrip("-").rstrip()
+
+    phases: list[dict] = []
+    trailer = ""
+    for index, heading in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+        stop = SECTION.search(text, heading.end(), end)
+        if stop and index + 1 == len(headings):
+            trailer = text[stop.start() :].strip()  # e.g. ## Summary, kept in the index
+        block = text[heading.start() : stop.start() if stop else end].rstrip()
+        block = re.sub(r"\n-{3,}\s*$", "", block)
+        owner = next((mark for mark in reversed(phase_marks) if mark.start() < heading.start()), None)
+        name = (owner.group(2).strip() or f"Phase {owner.group(1)}") if owner else "Tasks"
+        if not phases or phases[-1]["mark"] is not owner:
+            goal = text[owner.end() : heading.start()].strip().strip("-").strip() if owner else ""
+            phases.append({"mark": owner, "name": name, "goal": goal, "tasks": [], "blocks": []})
+        phases[-1]["tasks"].append({"task_id": plan_analysis._task_id(heading.group(1))})
+        phases[-1]["blocks"].append(block)
+
+    entries = _chunks(phases, max_tasks)
+    shard_dir(plan).mkdir(exist_ok=True)
+    for number, entry in enumerate(entries, start=1):
+        body = "\n\n---\n\n".join(entry["blocks"])
+        (shard_dir(plan) / f"phase-{number:02d}.md").write_text(f"{_shard_header(number, entry, plan)}\n{body}\n")
+    plan.write_text(_index_text(header + "\n", entries, plan) + (f"\n{trailer}\n" if trailer else ""))
+    return info(plan)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Sharded implementation plans: index plus per-phase files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("init", "split", "info", "refs", "expand"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--plan", required=True, help="Plan file (the index, for a sharded plan)")
+        if name in ("init", "split"):
+            cmd.add_argument("--max-tasks", type=int, default=DEFAULT_MAX_TASKS, help="Most tasks per shard (default: 40)")
+        if name == "expand":
+            cmd.add_argument("--window", help="Keep only this task and the next before expanding")
+    args = parser.parse_args(argv)
+    plan = Path(args.plan)
+
+    try:
+        if args.command == "init":
+            result = init(plan, json.load(sys.stdin), args.max_tasks)
+        elif args.command == "split":
+            result = split(plan, args.max_tasks)
+        elif args.command == "info":
+            result = info(plan)
+        elif args.command == "refs":
+            result = refs(plan)
+        else:
+            result = expand(json.load(sys.stdin), plan, args.window)
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
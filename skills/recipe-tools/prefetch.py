@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""prefetch.py — Run the next stage's read-only steps while a human approval gate is open.
+
+Approval gates block for as long as the human takes to review. The next
+stage usually starts with a long read-only step (the full test suite, a
+baseline run). ``start`` launches that step's command in the background at the
+end of the gated stage. ``take`` is called where the step would have run.
+It returns the prefetched output when the tree is unchanged since the prefetch
+started, and otherwise discards it and runs the command inline:
+
+    reused        the tree is unchanged — the prefetched result is returned (waiting for it if needed)
+    ran           no usable prefetch (stale, missing, failed to finish) — the command ran inline
+    stale         the tree changed and no command was given to rerun
+    missing       nothing was prefetched under that name and no command was given
+
+"Unchanged" means the same HEAD, tracked changes, untracked file contents and
+``--watch`` file contents, ignoring ``--exclude`` pathspecs (e.g. docs/plans,
+where approval-stage documents are written). Fingerprints use repo-relative
+paths, so a prefetch from the main checkout is reused by a fresh worktree of
+the same commit. State and output live under
+``<git-common-dir>/superpowers/prefetch/``, never in the tree.
+
+Only prefetch commands that write nothing outside ignored files: a command
+that edits the tree makes its own result stale.
+
+A prefetch queues for host slots at ``background`` priority (host_slots.py).
+When ``take`` has to wait for it, the prefetch is lifted: its slots get the
+priority its commands asked for.
+
+Usage:
+    prefetch.py start  --name NAME [--exclude PATHSPEC ...] [--watch FILE ...] -- COMMAND...
+    prefetch.py take   --name NAME [--wait SECONDS] [--markdown] [-- COMMAND...]   # COMMAND: run it if not reusable
+    prefetch.py drop   --name NAME
+    prefetch.py report [--markdown]
+    prefetch.py test-command                                                        # detect the project's test command
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to no locking
+    fcntl = None
+
+_SLOTS = Path(__file__).resolve().parent / "host_slots.py"
+_spec = importlib.util.spec_from_file_location("host_slots", _SLOTS)
+host_slots = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(host_slots)
+
+POLL_SECONDS = 0.2
+DEFAULT_WAIT = 1800
+FINGERPRINT_PARTS = ("head", "tracked", "untracked", "watched")
+# Runs the command with its output captured and records the exit status, so take can tell "done" from "running".
+WRAPPER = 'out=$1; code=$2; shift 2; "$@" > "$out" 2>&1; echo $? > "$code"'
+
+
+def _git(repo: Path, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, check=check)
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^\w.-]+", "-", value).strip("-") or "prefetch"
+
+
+def toplevel(repo: Path) -> Path:
+    return Path(_git(repo, "rev-parse", "--show-toplevel").stdout.decode().strip())
+
+
+def state_dir(repo: Path) -> Path:
+    common = Path(_git(repo, "rev-parse", "--git-common-dir").stdout.decode().strip())
+    if not common.is_absolute():
+        common = (repo / common).resolve()
+    return common / "superpowers" / "prefetch"
+
+
+@contextlib.contextmanager
+def _state(repo: Path) -> Iterator[dict]:
+    """Locked read-modify-write of the prefetch state."""
+    path = state_dir(repo) / "prefetch.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            state = json.loads(path.read_text()) if path.exists() else {"prefetches": {}}
+            yield state
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+            with os.fdopen(fd, "w") as handle:
+                json.dump(state, handle, indent=2)
+            os.replace(tmp, path)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def fingerprint(repo: Path, exclude: list[str] = (), watch: list[str] = ()) -> dict:
+    """Content fingerprint of everything a read-only step can see, by part."""
+    root = toplevel(repo)
+    pathspec = ["--", ".", *(f":(exclude){spec}" for spec in exclude)]
+    head = _git(root, "rev-parse", "--verify", "-q", "HEAD", check=False).stdout.decode().strip() or "unborn"
+    tracked = hashlib.sha256()
+    if head != "unborn":
+        tracked.update(_git(root, "diff", "HEAD", "--binary", "--no-ext-diff", *pathspec).stdout)
+    untracked = hashlib.sha256()
+    for name in sorted(filter(None, _git(root, "ls-files", "--others", "--exclude-standard", "-z", *pathspec).stdout.split(b"\0"))):
+        path = root / os.fsdecode(name)
+        untracked.update(name + b"\0" + (hashlib.sha256(path.read_bytes()).digest() if path.is_file() else b"-"))
+    watched = hashlib.sha256()
+    for name in sorted(watch):
+        path = Path(name) if Path(name).is_absolute() else root / name
+        watched.update(name.encode() + b"\0" + (hashlib.sha256(path.read_bytes()).digest() if path.is_file() else b"-"))
+    return {
+        "head": head,
+        "tracked": tracked.hexdigest()[:16],
+        "untracked": untracked.hexdigest()[:16],
+        "watched": watched.hexdigest()[:16],
+    }
+
+
+def _changed(old: dict, new: dict) -> list[str]:
+    return [part for part in FINGERPRINT_PARTS if old.get(part) != new.get(part)]
+
+
+def _running(entry: dict) -> bool:
+    return entry["outcome"] == "running" and not Path(entry["exit_file"]).exists()
+
+
+def _kill(entry: dict) -> None:
+    if _running(entry):
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(entry["pid"], signal.SIGTERM)
+
+
+def start(repo: Path, name: str, command: list[str], exclude: list[str] = (), watch: list[str] = ()) -> dict:
+    """Launch ``command`` in the background; a no-op if the same prefetch of the same tree exists."""
+    root = toplevel(repo)
+    current = fingerprint(root, exclude, watch)
+    directory = state_dir(root)
+    with _state(root) as state:
+        entry = state["prefetches"].get(name)
+        if (
+            entry is not None
+            and entry["command"] == command
+            and entry["outcome"] == "running"
+            and not _changed(entry["fingerprint"], current)
+        ):
+            return {"started": False, "name": name, "reason": "already prefetched for this tree"}
+        if entry is not None:
+            _kill(entry)
+        output, exit_file = directory / f"{_slug(name)}.out", directory / f"{_slug(name)}.exit"
+        exit_file.unlink(missing_ok=True)
+        process = subprocess.Popen(
+            ["sh", "-c", WRAPPER, "prefetch", str(output), str(exit_file), *command],
+            cwd=root,
+            # Nobody waits on a prefetch yet: its host slots queue behind foreground work until take lifts it.
+            env={**os.environ, "SUPERPOWERS_SLOT_PRIORITY": "background"},
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        state["prefetches"][name] = {
+            "name": name,
+            "command": command,
+            "exclude": list(exclude),
+            "watch": list(watch),
+            "fingerprint": current,
+            "output": str(output),
+            "exit_file": str(exit_file),
+            "pid": process.pid,
+            "started_at": time.time(),
+            "outcome": "running",
+        }
+    return {"started": True, "name": name, "pid": process.pid, "head": current["head"]}
+
+
+def _wait(entry: dict, wait: float) -> bool:
+    deadline = time.time() + wait
+    exit_file = Path(entry["exit_file"])
+    if not exit_file.exists():
+        # The session is blocked on the prefetch now: its slots get the priority its commands asked for.
+        with contextlib.suppress(OSError):
+            host_slots.lift(entry["pid"])
+    while not exit_file.exists():
+        if time.time() >= deadline:
+            return False
+        time.sleep(POLL_SECONDS)
+    return True
+
+
+def _run_inline(repo: Path, command: list[str]) -> tuple[int, str, float]:
+    began = time.time()
+    proc = subprocess.run(command, cwd=repo, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT, text=True, errors="replace")
+    return proc.returncode, proc.stdout, time.time() - began
+
+
+def take(repo: Path, name: str, command: list[str] | None = None, wait: float = DEFAULT_WAIT) -> dict:
+    """Return the prefetched result if the tree is unchanged, else run ``command`` inline (when given)."""
+    root = toplevel(repo)
+    arrived = time.time()
+    with _state(root) as state:
+        entry = state["prefetches"].get(name)
+    result = {"name": name, "status": "missing", "exit_code": None, "output": "", "changed": [], "seconds_saved": 0.0}
+    if entry is not None and entry["outcome"] != "taken":
+        changed = _changed(entry["fingerprint"], fingerprint(root, entry["exclude"], entry["watch"]))
+        finished = not changed and _wait(entry, wait)
+        # The command itself may have edited the tree while it ran; that result is stale too.
+        if finished:
+            changed = _changed(entry["fingerprint"], fingerprint(root, entry["exclude"], entry["watch"]))
+        if finished and not changed:
+            exit_file = Path(entry["exit_file"])
+            duration = exit_file.stat().st_mtime - entry["started_at"]
+            waited = time.time() - arrived
+            result.update(
+                status="reused",
+                exit_code=int(exit_file.read_text().strip() or 1),
+                output=Path(entry["output"]).read_text(errors="replace"),
+                seconds_saved=round(max(duration - waited, 0.0), 1),
+            )
+            entry.update(outcome="taken", reused=True, duration=duration, waited=waited)
+        else:
+            _kill(entry)
+            result.update(status="stale" if changed else "not_finished", changed=changed)
+            entry.update(outcome="taken", reused=False, changed=changed, waited=time.time() - arrived)
+        with _state(root) as state:
+            state["prefetches"][name] = entry
+        command = command or entry["command"]
+    if result["status"] != "reused" and command:
+        exit_code, output, _ = _run_inline(root, command)
+        result.update(status="ran", exit_code=exit_code, output=output)
+    return result
+
+
+def drop(repo: Path, name: str) -> dict:
+    """Stop and forget a prefetch that the next stage will not use."""
+    with _state(toplevel(repo)) as state:
+        entry = state["prefetches"].pop(name, None)
+    if entry is None:
+        return {"dropped": False, "name": name}
+    _kill(entry)
+    for key in ("output", "exit_file"):
+        Path(entry[key]).unlink(missing_ok=True)
+    return {"dropped": True, "name": name}
+
+
+def report(repo: Path) -> dict:
+    """Reuse rate and post-approval seconds saved across taken prefetches."""
+    path = state_dir(toplevel(repo)) / "prefetch.json"
+    entries = list(json.loads(path.read_text())["prefetches"].values()) if path.exists() else []
+    taken = [e for e in entries if e["outcome"] == "taken"]
+    reused = [e for e in taken if e.get("reused")]
+    saved = sum(max(e["duration"] - e["waited"], 0.0) for e in reused)
+    return {
+        "prefetches": len(taken),
+        "reused": len(reused),
+        "discarded": len(taken) - len(reused),
+        "reuse_rate": round(len(reused) / len(taken), 3) if taken else 0.0,
+        "seconds_saved": round(saved, 1),
+        "pending": sorted(e["name"] for e in entries if e["outcome"] != "taken"),
+    }
+
+
+def detect_test_command(repo: Path) -> str | None:
+    """The project's conventional full-suite command, from its build files."""
+    root = toplevel(repo)
+    makefile = root / "Makefile"
+    if makefile.is_file() and re.search(r"^test\s*:", makefile.read_text(errors="replace"), re.MULTILINE):
+        return "make test"
+    package = root / "package.json"
+    if package.is_file():
+        with contextlib.suppress(ValueError):
+            script = json.loads(package.read_text()).get("scripts", {}).get("test", "")
+            if script and "no test specified" not in script:
+                return "npm test"
+    if any((root / name).is_file() for name in ("pytest.ini", "conftest.py", "tox.ini")) or (
+        (root / "pyproject.toml").is_file() and "pytest" in (root / "pyproject.toml").read_text(errors="replace")
+    ) or any((root / "tests").glob("test_*.py")):
+        return "python3 -m pytest"
+    if (root / "Cargo.toml").is_file():
+        return "cargo test"
+    if (root / "go.mod").is_file():
+        return "go test ./..."
+    return None
+
+
+def _markdown_take(result: dict) -> str:
+    status = result["status"]
+    if status == "reused":
+        header = f"_Prefetched during the approval gate; tree unchanged, saved {result['seconds_saved']:.0f}s._"
+    elif status == "ran":
+        header = "_Ran after approval" + (f" (prefetch discarded: {', '.join(result['changed'])} changed)._" if result["changed"] else "._")
+    else:
+        header = f"_Not run: prefetch {status}" + (f" ({', '.join(result['changed'])} changed)" if result["changed"] else "") + "._"
+    return f"{header}\n\n{result['output'].rstrip()}".rstrip()
+
+
+def _markdown_report(result: dict) -> str:
+    if not result["prefetches"]:
+        return "## Approval-Gate Prefetch\n- No prefetched steps were taken."
+    return "\n".join(
+        [
+            "## Approval-Gate Prefetch",
+            f"- Prefetched steps taken: {result['prefetches']} (reused {result['reused']}, discarded {result['discarded']})",
+            f"- Post-approval time saved: {result['seconds_saved'] / 60:.1f} min",
+        ]
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Prefetch read-only next-stage steps during approval gates")
+    parser.add_argument("--repo", default=".", help="Repository path (default: current directory)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("start", "take", "drop", "report", "test-command"):
+        cmd = sub.add_parser(name)
+        if name in ("start", "take", "drop"):
+            cmd.add_argument("--name", required=True, help="Prefetch name, shared by start and take")
+        if name == "start":
+            cmd.add_argument("--exclude", action="append", default=[], help="Pathspec whose changes are irrelevant")
+            cmd.add_argument("--watch", action="append", default=[], help="Extra file the result depends on")
+        if name == "take":
+            cmd.add_argument("--wait", type=float, default=DEFAULT_WAIT, help="Longest wait for a running prefetch")
+        if name in ("take", "report"):
+            cmd.add_argument("--markdown", action="store_true")
+        if name in ("start", "take"):
+            cmd.add_argument("--enabled", default="true", help="Pass the recipe flag; 'false' disables prefetching")
+            cmd.add_argument("run_command", nargs=argparse.REMAINDER, help="Command, after --")
+    args = parser.parse_args(argv)
+    repo = Path(args.repo).resolve()
+    command = getattr(args, "run_command", [])
+    command = command[1:] if command[:1] == ["--"] else command
+    # A command given as one string (from a recipe variable) is split like a shell would.
+    if len(command) == 1:
+        command = shlex.split(command[0])
+    enabled = getattr(args, "enabled", "true").strip().lower() == "true"
+
+    try:
+        if args.command == "start":
+            if not command:
+                print("Error: no command given after --", file=sys.stderr)
+                return 1
+            result = start(repo, args.name, command, args.exclude, args.watch) if enabled else {
+                "started": False, "name": args.name, "reason": "disabled"}
+        elif args.command == "take":
+            if not enabled:
+                drop(repo, args.name)
+            result = take(repo, args.name, command or None, args.wait)
+            if args.markdown:
+                print(_markdown_take(result))
+                return 0
+        elif args.command == "drop":
+            result = drop(repo, args.name)
+        elif args.command == "report":
+            result = report(repo)
+            if args.markdown:
+                print(_markdown_report(result))
+                return 0
+        else:
+            detected = detect_test_command(repo)
+            if detected is None:
+                print("Error: no test command detected (pass one explicitly)", file=sys.stderr)
+                return 1
+            print(detected)
+            return 0
+    except subprocess.CalledProcessError as exc:
+        print(f"Error: {exc.stderr.decode(errors='replace').strip()}", file=sys.stderr)
+        return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""run_budget.py — Adaptive step timeouts and a session-wide run budget.
+
+Recipe steps carry fixed timeouts chosen once by hand. This script records how
+long each step id actually took (normalised by task size) and derives a
+per-task time budget from that history. Recipe ``timeout:`` values must be
+literals, so the engine still enforces the hand-written ceiling: the learned
+budget is handed to the agent in its prompt, and ``recommend`` turns the
+history into retuned literals for the recipe.
+
+Durations are shared by every worktree of the repository:
+
+    <git-common-dir>/superpowers/step-history.json
+
+A run (one recipe session, named by ``--run``, normally the plan path) can also
+carry a wall-clock and token budget, kept per worktree in
+``<git-dir>/superpowers/runs/`` and keyed by the plan's path in the repository
+(``docs/plans/x-plan.md`` -> ``docs-plans-x-plan.json``). ``start`` opens a new
+session: elapsed time and tokens count from zero again.
+As the budget runs down the run degrades gracefully: ``normal`` allows the
+full review loop, ``constrained`` and ``critical`` cap review iterations.
+Token usage is estimated from step output text (about four characters per token).
+
+Usage:
+    run_budget.py start   --run RUN [--wall-clock-minutes M] [--tokens T]
+    run_budget.py record  STEP --seconds S [--started-at EPOCH] [--size N] [--run RUN] < output.txt
+    run_budget.py timeout STEP --default D [--size N] [--run RUN]
+    run_budget.py plan    --run RUN --step implement=900 --step spec-review=600 < task.json
+    run_budget.py gate    --run RUN --iterations N --approved true|false
+    run_budget.py status  --run RUN
+    run_budget.py recommend                                      # suggested static timeouts per step
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to no locking
+    fcntl = None
+
+MIN_SAMPLES = 5
+MAX_SAMPLES = 50
+QUANTILE = 0.95
+MARGIN = 1.5
+MIN_TIMEOUT = 60
+# Learned timeouts may stretch the hand-written default this far, never further.
+MAX_FACTOR = 3
+CHARS_PER_TOKEN = 4
+SPEC_CHARS_PER_UNIT = 1500
+# Remaining-budget fraction thresholds and the review iterations each mode allows.
+MODES = (("normal", 0.35, 3), ("constrained", 0.15, 2), ("critical", 0.0, 1))
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, text=True, check=True
+    ).stdout
+
+
+def _git_path(repo: Path, flag: str) -> Path:
+    path = Path(_git(repo, "rev-parse", flag).strip())
+    return path if path.is_absolute() else (repo / path).resolve()
+
+
+def history_path(repo: Path) -> Path:
+    return _git_path(repo, "--git-common-dir") / "superpowers" / "step-history.json"
+
+
+def run_path(repo: Path, run: str) -> Path:
+    """Budget file for ``run``: the plan's repository-relative path as a slug, else the name itself."""
+    plan = (repo / run).resolve()
+    toplevel = Path(_git(repo, "rev-parse", "--show-toplevel").strip()).resolve()
+    key = plan.relative_to(toplevel).with_suffix("") if plan.is_relative_to(toplevel) else Path(run)
+    name = re.sub(r"[^\w.-]+", "-", str(key)).strip("-") or "run"
+    return _git_path(repo, "--git-dir") / "superpowers" / "runs" / f"{name}.json"
+
+
+@contextlib.contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _read(path: Path, default: dict) -> dict:
+    return json.loads(path.read_text()) if path.exists() else default
+
+
+def _write(path: Path, data: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(data, handle, indent=2)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Timeouts
+# ---------------------------------------------------------------------------
+
+
+def task_size(task: dict) -> int:
+    """Size units for a plan task: files touched plus spec length, at least 1."""
+    files = task.get("files") or []
+    spec = str(task.get("spec") or task.get("details") or "")
+    return max(1, len(files) + len(spec) // SPEC_CHARS_PER_UNIT)
+
+
+def _quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)
+    return ordered[max(index, 0)]
+
+
+def adaptive_timeout(samples: list[dict], size: int, default: int, remaining: float | None = None) -> dict:
+    """Timeout for a step of ``size`` units given its recorded samples."""
+    if len(samples) < MIN_SAMPLES:
+        timeout, source = default, "default"
+    else:
+        per_unit = [sample["seconds"] / max(sample.get("size", 1), 1) for sample in samples]
+        learned = _quantile(per_unit, QUANTILE) * max(size, 1) * MARGIN
+        timeout, source = int(min(max(learned, MIN_TIMEOUT), default * MAX_FACTOR)), "history"
+    if remaining is not None and remaining < timeout:
+        timeout, source = max(int(remaining), MIN_TIMEOUT), "budget"
+    return {"timeout": timeout, "source": source, "samples": len(samples)}
+
+
+def record(repo: Path, step: str, seconds: float, size: int = 1) -> dict:
+    path = history_path(repo)
+    with _locked(path):
+        history = _read(path, {})
+        samples = history.setdefault(step, [])
+        samples.append({"seconds": round(seconds, 1), "size": size, "at": time.time()})
+        del samples[:-MAX_SAMPLES]
+        _write(path, history)
+    return {"step": step, "samples": len(samples)}
+
+
+def samples_for(repo: Path, step: str) -> list[dict]:
+    return _read(history_path(repo), {}).get(step, [])
+
+
+def recommend(repo: Path, defaults: dict[str, int] | None = None) -> list[dict]:
+    """Suggested static timeout per recorded step (for a 1-unit task)."""
+    rows = []
+    for step, samples in sorted(_read(history_path(repo), {}).items()):
+        durations = [sample["seconds"] for sample in samples]
+        rows.append(
+            {
+                "step": step,
+                "samples": len(samples),
+                "p50_seconds": _quantile(durations, 0.5),
+                "p95_seconds": _quantile(durations, QUANTILE),
+                "suggested_timeout": int(max(_quantile(durations, QUANTILE) * MARGIN, MIN_TIMEOUT)),
+                "configured_timeout": (defaults or {}).get(step),
+            }
+        )
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Run budget
+# ---------------------------------------------------------------------------
+
+
+def start(repo: Path, run: str, wall_clock_minutes: float = 0, tokens: int = 0) -> dict:
+    """Open a new session's budget; an earlier session's time and tokens are discarded.
+
+    A resumed recipe does not re-run its start step, so it keeps its budget.
+    """
+    path = run_path(repo, run)
+    with _locked(path):
+        _write(path, {
+            "run": run,
+            "started_at": time.time(),
+            "tokens_used": 0,
+            "wall_clock_seconds": wall_clock_minutes * 60,
+            "token_budget": tokens,
+        })
+    return status(repo, run)
+
+
+def charge(repo: Path, run: str, text: str) -> None:
+    path = run_path(repo, run)
+    with _locked(path):
+        budget = _read(path, {})
+        if budget:
+            budget["tokens_used"] += len(text) // CHARS_PER_TOKEN
+            _write(path, budget)
+
+
+def status(repo: Path, run: str, now: float | None = None) -> dict:
+    budget = _read(run_path(repo, run), {})
+    now = time.time() if now is None else now
+    fractions, remaining_seconds = [], None
+    if budget.get("wall_clock_seconds"):
+        remaining_seconds = max(budget["started_at"] + budget["wall_clock_seconds"] - now, 0)
+        fractions.append(remaining_seconds / budget["wall_clock_seconds"])
+    if budget.get("token_budget"):
+        fractions.append(max(budget["token_budget"] - budget["tokens_used"], 0) / budget["token_budget"])
+    remaining = min(fractions) if fractions else 1.0
+    mode, _, iterations = next(entry for entry in MODES if remaining > entry[1] or entry[1] == 0.0)
+    return {
+        "run": run,
+        "mode": mode,
+        "remaining_fraction": round(remaining, 3),
+        "remaining_seconds": None if remaining_seconds is None else int(remaining_seconds),
+        "tokens_used": budget.get("tokens_used", 0),
+        "max_review_iterations": iterations,
+    }
+
+
+def plan_task(repo: Path, run: str, task: dict, defaults: dict[str, int]) -> dict:
+    """Everything a per-task pipeline needs up front: timeouts, mode, iteration cap."""
+    budget = status(repo, run)
+    size = task_size(task)
+    timeouts = {
+        step: adaptive_timeout(samples_for(repo, step), size, default, budget["remaining_seconds"])["timeout"]
+        for step, default in defaults.items()
+    }
+    return {**budget, "size": size, "timeouts": timeouts, "now": int(time.time())}
+
+
+def gate(repo: Path, run: str, iterations: int, approved: bool) -> bool:
+    """True when a review loop should stop: approved, or out of budgeted iterations."""
+    return approved or iterations >= status(repo, run)["max_review_iterations"]
+
+
+def _parse_steps(values: list[str]) -> dict[str, int]:
+    steps = {}
+    for value in values:
+        name, _, default = value.partition("=")
+        steps[name] = int(default)
+    return steps
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Adaptive step timeouts and run budget")
+    parser.add_argument("--repo", default=".", help="Repository path (default: current directory)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cmd = sub.add_parser("start")
+    cmd.add_argument("--run", required=True)
+    cmd.add_argument("--wall-clock-minutes", type=float, default=0, help="0 = unlimited")
+    cmd.add_argument("--tokens", type=int, default=0, help="0 = unlimited")
+
+    cmd = sub.add_parser("record")
+    cmd.add_argument("step")
+    cmd.add_argument("--seconds", type=float)
+    cmd.add_argument("--started-at", type=float, help="Epoch start; duration is measured to now")
+    cmd.add_argument("--size", type=int, default=1)
+    cmd.add_argument("--run", help="Charge the step output (stdin) to this run's token budget")
+
+    cmd = sub.add_parser("timeout")
+    cmd.add_argument("step")
+    cmd.add_argument("--default", type=int, required=True)
+    cmd.add_argument("--size", type=int, default=1)
+    cmd.add_argument("--run")
+
+    cmd = sub.add_parser("plan")
+    cmd.add_argument("--run", required=True)
+    cmd.add_argument("--step", action="append", default=[], help="STEP=DEFAULT_SECONDS (repeatable)")
+
+    cmd = sub.add_parser("gate")
+    cmd.add_argument("--run", required=True)
+    cmd.add_argument("--iterations", type=int, required=True)
+    cmd.add_argument("--approved", required=True)
+
+    cmd = sub.add_parser("status")
+    cmd.add_argument("--run", required=True)
+
+    cmd = sub.add_parser("recommend")
+    cmd.add_argument("--step", action="append", default=[], help="STEP=CONFIGURED_SECONDS (repeatable)")
+
+    args = parser.parse_args(argv)
+    repo = Path(args.repo).resolve()
+
+    try:
+        if args.command == "start":
+            result = start(repo, args.run, args.wall_clock_minutes, args.tokens)
+        elif args.command == "record":
+            if args.seconds is None and args.started_at is None:
+                print("Error: record needs --seconds or --started-at", file=sys.stderr)
+                return 1
+            seconds = args.seconds if args.seconds is not None else time.time() - args.started_at
+            if args.run and not sys.stdin.isatty():
+                charge(repo, args.run, sys.stdin.read())
+            result = record(repo, args.step, seconds, args.size)
+        elif args.command == "timeout":
+            remaining = status(repo, args.run)["remaining_seconds"] if args.run else None
+            result = {"step": args.step, **adaptive_timeout(samples_for(repo, args.step), args.size, args.default, remaining)}
+        elif args.command == "plan":
+            task = json.loads(sys.stdin.read() or "{}")
+            result = plan_task(repo, args.run, task, _parse_steps(args.step))
+        elif args.command == "gate":
+            # Plain true/false so the value can drive break_when/condition directly.
+            print("true" if gate(repo, args.run, args.iterations, args.approved.strip() == "true") else "false")
+            return 0
+        elif args.command == "status":
+            result = status(repo, args.run)
+        else:
+            result = recommend(repo, _parse_steps(args.step))
+    except subprocess.CalledProcessError as exc:
+        print(f"Error: {exc.stderr.strip()}", file=sys.stderr)
+        return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""session_feed.py — Live per-task result feed and incremental execution summary.
+
+Each per-task pipeline step appends an event to an append-only JSONL feed and
+folds it into a running state file. The execution summary is rendered from
+that state, so it is ready the moment the last task finishes instead of
+needing one large summarization call at the end.
+
+Both files are runtime state, kept out of the working tree in
+``<git-common-dir>/superpowers/session-feed/`` and keyed by the plan's path in
+the repository (``docs/plans/x-plan.md`` -> ``docs-plans-x-plan.feed.jsonl``
+and ``docs-plans-x-plan.state.json``), so every worktree of the repository
+sees the same feed. Outside a repository they sit next to the plan.
+
+``init`` opens a new session: every task of the plan goes back to pending and
+the feed is emptied, so a re-run of a plan never shows an earlier run's
+results or iterations.
+
+Events: started, implemented, spec_review, quality_review, completed.
+``started`` opens a new attempt at a task within the session: its review
+counters, verdicts and files reset (``attempts`` counts them).
+
+Usage:
+    session_feed.py init    --plan PLAN < tasks.json        # new session, every task pending
+    session_feed.py emit    --plan PLAN --task ID --event spec_review [--approved true] < report.txt
+    session_feed.py status  --plan PLAN [--json]            # per-task state mid-run
+    session_feed.py summary --plan PLAN                     # markdown execution summary
+    session_feed.py tail    --plan PLAN [--follow]          # stream events
+    session_feed.py path    --plan PLAN                     # where the feed and state live
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to no locking
+    fcntl = None
+
+EVENTS = ("started", "implemented", "spec_review", "quality_review", "completed")
+STATE_AFTER = {
+    "started": "implementing",
+    "implemented": "spec-review",
+    "spec_review": "spec-review",
+    "quality_review": "quality-review",
+    "completed": "completed",
+}
+EXCERPT_CHARS = 600
+# Review text is kept whole in the feed: lint_prepass.py savings replays every blocking issue.
+FULL_TEXT_EVENTS = ("spec_review", "quality_review")
+FILES_LINE = re.compile(r"files_changed\s*:\s*(.+)", re.IGNORECASE)
+PATH_TOKEN = re.compile(r"[\w./-]+\.\w+")
+
+
+def _runtime_path(plan_path: str | Path, suffix: str) -> Path:
+    """``<git-common-dir>/superpowers/session-feed/<plan path as a slug><suffix>``; next to the plan outside a repository."""
+    plan = Path(plan_path).resolve()
+    directory = next(parent for parent in plan.parents if parent.is_dir())
+    proc = subprocess.run(
+        ["git", "-C", str(directory), "rev-parse", "--path-format=absolute", "--git-common-dir", "--show-toplevel"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return plan.with_name(plan.stem + suffix)
+    common, toplevel = proc.stdout.splitlines()
+    key = re.sub(r"[^\w.-]+", "-", str(plan.relative_to(Path(toplevel).resolve()).with_suffix(""))).strip("-")
+    return Path(common) / "superpowers" / "session-feed" / f"{key}{suffix}"
+
+
+def feed_path(plan_path: str | Path) -> Path:
+    return _runtime_path(plan_path, ".feed.jsonl")
+
+
+def state_path(plan_path: str | Path) -> Path:
+    return _runtime_path(plan_path, ".state.json")
+
+
+@contextlib.contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def load_state(plan_path: str | Path) -> dict:
+    path = state_path(plan_path)
+    if not path.exists():
+        return {"order": [], "tasks": {}}
+    return json.loads(path.read_text())
+
+
+def _save_state(plan_path: str | Path, state: dict) -> None:
+    path = state_path(plan_path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(state, handle, indent=2)
+    os.replace(tmp, path)
+
+
+def _new_task(task_id: str, title: str = "") -> dict:
+    return {
+        "task_id": task_id,
+        "title": title,
+        "state": "pending",
+        "files": [],
+        "spec_iterations": 0,
+        "spec_approved": None,
+        "quality_iterations": 0,
+        "quality_approved": None,
+        "last_feedback": "",
+        "attempts": 0,
+    }
+
+
+def init(plan_path: str | Path, tasks: list[dict]) -> dict:
+    """Start a new session: every task pending, the previous session's feed and state discarded."""
+    with _locked(state_path(plan_path)):
+        state: dict = {"order": [], "tasks": {}}
+        for raw in tasks:
+            task_id = str(raw["task_id"])
+            if task_id not in state["tasks"]:
+                state["order"].append(task_id)
+                state["tasks"][task_id] = _new_task(task_id, raw.get("description") or raw.get("title") or "")
+        feed_path(plan_path).write_text("")
+        _save_state(plan_path, state)
+    return state
+
+
+def _files_from(text: str) -> list[str]:
+    match = FILES_LINE.search(text)
+    return PATH_TOKEN.findall(match.group(1)) if match else []
+
+
+def fold(state: dict, event: dict) -> dict:
+    """Apply one event to the running state (pure; used by emit and for replay)."""
+    task_id = event["task_id"]
+    if task_id not in state["tasks"]:
+        state["order"].append(task_id)
+        state["tasks"][task_id] = _new_task(task_id)
+    task = state["tasks"][task_id]
+    kind = event["event"]
+    task["state"] = STATE_AFTER[kind]
+    task["updated_at"] = event["ts"]
+    if kind == "started":
+        fresh = _new_task(task_id, task["title"])
+        task.update({key: fresh[key] for key in ("files", "spec_iterations", "spec_approved", "quality_iterations",
+                                                 "quality_approved", "last_feedback")})
+        task["attempts"] = task.get("attempts", 0) + 1
+        task.pop("finished_at", None)
+        task["started_at"] = event["ts"]
+    elif kind == "implemented":
+        task["files"] = sorted(set(task["files"]) | set(_files_from(event.get("text", ""))))
+    elif kind in ("spec_review", "quality_review"):
+        stage = "spec" if kind == "spec_review" else "quality"
+        task[f"{stage}_iterations"] += 1
+        task[f"{stage}_approved"] = event.get("approved")
+        if event.get("approved") is False:
+            task["last_feedback"] = event.get("text", "")[:EXCERPT_CHARS]
+    elif kind == "completed":
+        task["finished_at"] = event["ts"]
+    return state
+
+
+def emit(plan_path: str | Path, task_id: str, kind: str, text: str = "", approved: bool | None = None) -> dict:
+    """Append an event to the feed and fold it into the state, atomically."""
+    if kind not in EVENTS:
+        raise ValueError(f"Unknown event: {kind} (expected one of {', '.join(EVENTS)})")
+    event = {"ts": time.time(), "task_id": task_id, "event": kind,
+             "text": text if kind in FULL_TEXT_EVENTS else text[:EXCERPT_CHARS]}
+    if approved is not None:
+        event["approved"] = approved
+    with _locked(state_path(plan_path)):
+        with open(feed_path(plan_path), "a") as feed:
+            feed.write(json.dumps(event) + "\n")
+        state = fold(load_state(plan_path), event)
+        _save_state(plan_path, state)
+    return state["tasks"][task_id]
+
+
+def _unresolved(task: dict) -> list[str]:
+    issues = []
+    if task["spec_approved"] is False:
+        issues.append(f"unresolved spec issues after {task['spec_iterations']} iterations")
+    if task["quality_approved"] is False:
+        issues.append(f"unresolved quality issues after {task['quality_iterations']} iterations")
+    return issues
+
+
+def status_table(state: dict) -> str:
+    rows = ["| Task | State | Spec | Quality | Files |", "|------|-------|------|---------|-------|"]
+    for task_id in state["order"]:
+        task = state["tasks"][task_id]
+
+        def review(stage: str) -> str:
+            approved = task[f"{stage}_approved"]
+            mark = "-" if approved is None else ("approved" if approved else "needs changes")
+            iterations = task[f"{stage}_iterations"]
+            return f"{mark} ({iterations})" if iterations else mark
+
+        rows.append(
+            f"| {task_id} | {task['state']} | {review('spec')} | {review('quality')} | {len(task['files'])} |"
+        )
+    return "\n".join(rows)
+
+
+def summary(state: dict) -> str:
+    """Render the execution summary in the shape the final review expects."""
+    tasks = [state["tasks"][task_id] for task_id in state["order"]]
+    completed = [task for task in tasks if task["state"] == "completed"]
+    clean = [task for task in completed if not _unresolved(task)]
+    lines = [
+        "## Completion Status",
+        f"- Total tasks: {len(tasks)}",
+        f"- Successfully completed: {len(clean)}",
+    ]
+    if len(completed) != len(tasks):
+        lines.append(f"- Not finished: {', '.join(t['task_id'] for t in tasks if t['state'] != 'completed')}")
+
+    warnings = [(task["task_id"], issue) for task in tasks for issue in _unresolved(task)]
+    if warnings:
+        lines += ["", "## WARNINGS"]
+        lines += [f"- WARNING: {task_id}: {issue}" for task_id, issue in warnings]
+
+    lines += ["", "## Per-Task Summary"]
+    for task in tasks:
+        title = f" — {task['title']}" if task["title"] else ""
+        lines.append(f"### {task['task_id']}{title}")
+        for stage, label in (("spec", "Spec compliance"), ("quality", "Code quality")):
+            approved = task[f"{stage}_approved"]
+            verdict = "not reviewed" if approved is None else ("approved" if approved else "NOT approved")
+            iterations = task[f"{stage}_iterations"]
+            lines.append(f"- {label}: {verdict}" + (f" ({iterations} iterations)" if iterations > 1 else ""))
+        lines.append(f"- Files modified: {', '.join(task['files']) or 'see commits'}")
+
+    reworked = [task for task in tasks if task["spec_iterations"] > 1 or task["quality_iterations"] > 1]
+    lines += ["", "## Issues Resolved"]
+    if reworked:
+        lines += [
+            f"- {task['task_id']}: {task['spec_iterations']} spec / {task['quality_iterations']} quality review rounds"
+            for task in reworked
+        ]
+    else:
+        lines.append("- All tasks approved on the first review round.")
+    return "\n".join(lines)
+
+
+def tail(plan_path: str | Path, follow: bool = False, interval: float = 1.0) -> Iterator[dict]:
+    path = feed_path(plan_path)
+    position = 0
+    while True:
+        if path.exists():
+            with open(path) as feed:
+                feed.seek(position)
+                for line in feed:
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+                        position += len(line.encode())
+        if not follow:
+            return
+        time.sleep(interval)
+
+
+def _parse_bool(value: str | None) -> bool | None:
+    if value is None:
+        return None
+    return value.strip().lower() in ("true", "1", "yes")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Live per-task result feed and execution summary")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("init", "emit", "status", "summary", "tail", "path"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--plan", required=True, help="Path to the plan markdown file")
+        if name == "emit":
+            cmd.add_argument("--task", required=True)
+            cmd.add_argument("--event", required=True, choices=EVENTS)
+            cmd.add_argument("--approved", default=None, help="true/false for review events")
+        if name == "status":
+            cmd.add_argument("--json", action="store_true")
+        if name == "tail":
+            cmd.add_argument("--follow", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        payload = json.load(sys.stdin)
+        state = init(args.plan, payload["tasks"] if isinstance(payload, dict) else payload)
+        print(json.dumps({"tasks": len(state["order"])}))
+    elif args.command == "emit":
+        text = "" if sys.stdin.isatty() else sys.stdin.read()
+        task = emit(args.plan, args.task, args.event, text.strip(), _parse_bool(args.approved))
+        print(json.dumps(task))
+    elif args.command == "status":
+        state = load_state(args.plan)
+        print(json.dumps(state, indent=2) if args.json else status_table(state))
+    elif args.command == "summary":
+        print(summary(load_state(args.plan)))
+    elif args.command == "path":
+        print(json.dumps({"feed": str(feed_path(args.plan)), "state": str(state_path(args.plan))}))
+    else:
+        try:
+            for event in tail(args.plan, follow=args.follow):
+                print(json.dumps(event), flush=True)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
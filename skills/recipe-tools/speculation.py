@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""speculation.py — Pipelined task execution: implement task N+1 while task N is reviewed.
+
+After task N is implemented, ``launch`` starts task N+1's implementation in the
+background, on a throwaway worktree branched from N's implementation commit.
+When N's review loops finish, ``reconcile`` decides what the speculative work
+is worth:
+
+    reused      N's reviews changed nothing — the branch already sits on N's final commit
+    rebased     N's fixes touched other files — the branch was rebased onto N's final commit
+    discarded   N's fixes touched the same files, or the rebase conflicted — re-run N+1
+    failed      the speculative session exited non-zero or made no commits
+    not_finished the speculative session outlived the wait — killed and discarded
+
+At the start of task N+1, ``adopt`` fast-forwards the working branch to the
+speculative branch when it is reusable. Worktrees and state live under the
+git directory (``<git-common-dir>/superpowers/speculation/``), never in the tree,
+keyed by the plan's path in the repository (``docs/plans/x-plan.md`` ->
+``docs-plans-x-plan``). ``start`` opens a new session for a plan: it stops and
+removes what an earlier run left behind, so ``report`` covers this run only.
+
+Usage:
+    speculation.py start     --plan PLAN [--enabled true|false]
+    speculation.py launch    --plan PLAN --task ID --command "amplifier run" < plan_data.json
+    speculation.py reconcile --plan PLAN --task ID [--wait SECONDS]   # ID = the task just reviewed
+    speculation.py adopt     --plan PLAN --task ID [--enabled true|false]
+    speculation.py report    --plan PLAN [--markdown]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to no locking
+    fcntl = None
+
+REUSABLE = ("reused", "rebased")
+POLL_SECONDS = 2
+DEFAULT_WAIT = 900
+
+PROMPT = """SPECULATIVE IMPLEMENTATION TASK
+===============================
+Delegate to the superpowers:implementer agent. The previous task is still under
+review; this work is kept only if that review does not touch the same files.
+
+TASK TO IMPLEMENT:
+{task}
+
+Follow TDD, implement exactly the spec, run the tests and commit your changes.
+End your report with a line: files_changed: [list of files created/modified]
+"""
+
+
+def _git(repo: Path, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True, check=check)
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^\w.-]+", "-", value).strip("-") or "task"
+
+
+def state_dir(repo: Path) -> Path:
+    common = Path(_git(repo, "rev-parse", "--git-common-dir").stdout.strip())
+    if not common.is_absolute():
+        common = (repo / common).resolve()
+    return common / "superpowers" / "speculation"
+
+
+def plan_key(repo: Path, plan: str) -> str:
+    """The plan's repository-relative path without suffix, as a slug."""
+    path = (repo / plan).resolve()
+    toplevel = Path(_git(repo, "rev-parse", "--show-toplevel").stdout.strip()).resolve()
+    key = path.relative_to(toplevel) if path.is_relative_to(toplevel) else Path(plan)
+    return _slug(str(key.with_suffix("")))
+
+
+def state_path(repo: Path, plan: str) -> Path:
+    return state_dir(repo) / f"{plan_key(repo, plan)}.json"
+
+
+@contextlib.contextmanager
+def _state(repo: Path, plan: str) -> Iterator[dict]:
+    """Locked read-modify-write of a plan's speculation state."""
+    path = state_path(repo, plan)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            state = json.loads(path.read_text()) if path.exists() else {"speculations": {}}
+            yield state
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+            with os.fdopen(fd, "w") as handle:
+                json.dump(state, handle, indent=2)
+            os.replace(tmp, path)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def next_task(plan_data: dict, task_id: str) -> dict | None:
+    tasks = plan_data.get("tasks", [])
+    ids = [str(task.get("task_id")) for task in tasks]
+    if task_id not in ids or ids.index(task_id) + 1 >= len(tasks):
+        return None
+    return tasks[ids.index(task_id) + 1]
+
+
+def _cleanup(repo: Path, entry: dict) -> None:
+    _git(repo, "worktree", "remove", "--force", entry["worktree"], check=False)
+    _git(repo, "branch", "-D", entry["branch"], check=False)
+
+
+def _stop(entry: dict) -> None:
+    if entry["outcome"] == "running":
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(entry["pid"], signal.SIGTERM)
+
+
+def start(repo: Path, plan: str) -> dict:
+    """Open a new session: stop and remove an earlier run's speculations and forget them."""
+    with _state(repo, plan) as state:
+        entries = list(state["speculations"].values())
+        for entry in entries:
+            _stop(entry)
+            _cleanup(repo, entry)
+        state["speculations"] = {}
+    return {"cleared": len(entries)}
+
+
+def launch(repo: Path, plan: str, plan_data: dict, task_id: str, command: str) -> dict:
+    """Start the task after ``task_id`` in the background, branched from HEAD."""
+    task = next_task(plan_data, task_id)
+    if task is None:
+        return {"launched": False, "reason": "no next task"}
+    next_id = str(task["task_id"])
+    base = _git(repo, "rev-parse", "HEAD").stdout.strip()
+    key = plan_key(repo, plan)
+    root = state_dir(repo) / "worktrees" / key
+    worktree = root / _slug(next_id)
+    branch = f"speculative/{key}/{_slug(next_id)}"
+    if worktree.exists():
+        _cleanup(repo, {"worktree": str(worktree), "branch": branch})
+    root.mkdir(parents=True, exist_ok=True)
+    _git(repo, "worktree", "add", "-q", "-B", branch, str(worktree), base)
+
+    report, exit_file = root / f"{_slug(next_id)}.report", root / f"{_slug(next_id)}.exit"
+    exit_file.unlink(missing_ok=True)
+    # The wrapper records the exit status so reconcile can tell "done" from "still running".
+    wrapper = f'{command} "$0" > "$1" 2>&1; echo $? > "$2"'
+    process = subprocess.Popen(
+        ["sh", "-c", wrapper, PROMPT.format(task=json.dumps(task, indent=2)), str(report), str(exit_file)],
+        cwd=worktree,
+        # Speculative work yields host slots to sessions that are blocked (host_slots.py).
+        env={**os.environ, "SUPERPOWERS_SLOT_PRIORITY": "background"},
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    entry = {
+        "task_id": next_id,
+        "after_task": task_id,
+        "base": base,
+        "branch": branch,
+        "worktree": str(worktree),
+        "report": str(report),
+        "exit_file": str(exit_file),
+        "pid": process.pid,
+        "launched_at": time.time(),
+        "outcome": "running",
+    }
+    with _state(repo, plan) as state:
+        state["speculations"][next_id] = entry
+    return {"launched": True, "task_id": next_id, "branch": branch, "base": base}
+
+
+def _changed(repo: Path, old: str, new: str) -> set[str]:
+    return set(_git(repo, "diff", "--name-only", old, new).stdout.split())
+
+
+def _wait(entry: dict, wait: float) -> bool:
+    deadline = time.time() + wait
+    exit_file = Path(entry["exit_file"])
+    while not exit_file.exists():
+        if time.time() >= deadline:
+            _stop(entry)
+            return False
+        time.sleep(POLL_SECONDS)
+    return True
+
+
+def reconcile(repo: Path, plan: str, task_id: str, wait: float = DEFAULT_WAIT) -> dict:
+    """Decide whether the speculation launched after ``task_id`` survives its review."""
+    with _state(repo, plan) as state:
+        entry = next(
+            (e for e in state["speculations"].values() if e["after_task"] == task_id and e["outcome"] == "running"),
+            None,
+        )
+    if entry is None:
+        return {"speculated": False}
+
+    review_done = time.time()
+    finished = _wait(entry, wait)
+    final = _git(repo, "rev-parse", "HEAD").stdout.strip()
+    exit_file = Path(entry["exit_file"])
+    entry.update(
+        review_window=review_done - entry["launched_at"],
+        waited=time.time() - review_done,
+        duration=(exit_file.stat().st_mtime if finished else time.time()) - entry["launched_at"],
+    )
+    worktree = Path(entry["worktree"])
+    overlap: list[str] = []
+    if not finished:
+        outcome = "not_finished"
+    elif exit_file.read_text().strip() != "0" or not _git(
+        repo, "rev-list", f"{entry['base']}..{entry['branch']}"
+    ).stdout.strip():
+        outcome = "failed"
+    elif final == entry["base"]:
+        outcome = "reused"
+    else:
+        overlap = sorted(_changed(repo, entry["base"], final) & _changed(repo, entry["base"], entry["branch"]))
+        if overlap:
+            outcome = "discarded"
+        elif _git(worktree, "rebase", "-q", final, check=False).returncode == 0:
+            outcome = "rebased"
+        else:
+            _git(worktree, "rebase", "--abort", check=False)
+            outcome = "discarded"
+    entry.update(outcome=outcome, overlap=overlap, final_base=final)
+    if outcome not in REUSABLE:
+        _cleanup(repo, entry)
+    with _state(repo, plan) as state:
+        state["speculations"][entry["task_id"]] = entry
+    return {"speculated": True, "task_id": entry["task_id"], "outcome": outcome, "overlap": overlap}
+
+
+def adopt(repo: Path, plan: str, task_id: str) -> dict:
+    """Fast-forward onto a reusable speculative branch for ``task_id``."""
+    with _state(repo, plan) as state:
+        entry = state["speculations"].get(task_id)
+        if entry is None or entry["outcome"] not in REUSABLE:
+            return {"reuse": False, "report": ""}
+        merged = _git(repo, "merge", "-q", "--ff-only", entry["branch"], check=False).returncode == 0
+        if not merged:
+            # The working branch moved after reconcile; the speculation is stale.
+            entry["outcome"] = "discarded"
+        report = Path(entry["report"]).read_text() if merged else ""
+        entry["adopted"] = merged
+        _cleanup(repo, entry)
+    return {"reuse": merged, "report": report}
+
+
+def report(repo: Path, plan: str) -> dict:
+    """Waste rate and net wall-clock saving for the plan's speculations since ``start``."""
+    path = state_path(repo, plan)
+    entries = list(json.loads(path.read_text())["speculations"].values()) if path.exists() else []
+    settled = [e for e in entries if e["outcome"] != "running"]
+    used = [e for e in settled if e.get("adopted")]
+    wasted = [e for e in settled if not e.get("adopted")]
+    # Reused work saved the part of its run that overlapped the review; any time
+    # spent waiting for a speculation after its review finished is pure cost.
+    saved = sum(min(e["duration"], e["review_window"]) for e in used)
+    waited = sum(e.get("waited", 0) for e in settled)
+    outcomes: dict[str, int] = {}
+    for entry in settled:
+        outcomes[entry["outcome"]] = outcomes.get(entry["outcome"], 0) + 1
+    return {
+        "speculations": len(settled),
+        "adopted": len(used),
+        "wasted": len(wasted),
+        "waste_rate": round(len(wasted) / len(settled), 3) if settled else 0.0,
+        "outcomes": outcomes,
+        "seconds_saved": round(saved, 1),
+        "seconds_waited": round(waited, 1),
+        "net_seconds_saved": round(saved - waited, 1),
+    }
+
+
+def _markdown(result: dict) -> str:
+    if not result["speculations"]:
+        return "## Pipelined Execution\n- No speculative implementations ran."
+    outcomes = ", ".join(f"{name} {count}" for name, count in sorted(result["outcomes"].items()))
+    return "\n".join(
+        [
+            "## Pipelined Execution",
+            f"- Speculative implementations: {result['speculations']} ({outcomes})",
+            f"- Adopted: {result['adopted']}, wasted: {result['wasted']} ({result['waste_rate']:.0%})",
+            f"- Net wall-clock saving: {result['net_seconds_saved'] / 60:.1f} min "
+            f"(saved {result['seconds_saved'] / 60:.1f}, waited {result['seconds_waited'] / 60:.1f})",
+        ]
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Speculative next-task implementation during review")
+    parser.add_argument("--repo", default=".", help="Repository path (default: current directory)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("start", "launch", "reconcile", "adopt", "report"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--plan", required=True, help="Path to the plan (names the speculation state)")
+        if name in ("launch", "reconcile", "adopt"):
+            cmd.add_argument("--task", required=True)
+        if name == "launch":
+            cmd.add_argument("--command", default="amplifier run", help="Command that runs a prompt (appended)")
+        if name == "reconcile":
+            cmd.add_argument("--wait", type=float, default=DEFAULT_WAIT)
+        if name != "report":
+            cmd.add_argument("--enabled", default="true", help="Pass the recipe flag; 'false' makes this a no-op")
+        if name == "report":
+            cmd.add_argument("--markdown", action="store_true")
+    args = parser.parse_args(argv)
+    repo = Path(args.repo).resolve()
+
+    if getattr(args, "enabled", "true").strip().lower() != "true":
+        result = {"start": {"cleared": 0}, "launch": {"launched": False}, "reconcile": {"speculated": False}}.get(
+            args.command, {"reuse": False, "report": ""}
+        )
+        print(json.dumps(result))
+        return 0
+    try:
+        if args.command == "start":
+            result = start(repo, args.plan)
+        elif args.command == "launch":
+            result = launch(repo, args.plan, json.loads(sys.stdin.read()), args.task, shlex.join(shlex.split(args.command)))
+        elif args.command == "reconcile":
+            result = reconcile(repo, args.plan, args.task, args.wait)
+        elif args.command == "adopt":
+            result = adopt(repo, args.plan, args.task)
+        else:
+            result = report(repo, args.plan)
+            if args.markdown:
+                print(_markdown(result))
+                return 0
+    except subprocess.CalledProcessError as exc:
+        print(f"Error: {exc.stderr.strip()}", file=sys.stderr)
+        return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""symbol_index.py — Incrementally maintained symbol and reference index for a worktree.
+
+Implementers and reviewers repeatedly grep the whole repository for
+definitions and call sites. This script keeps an SQLite index of:
+
+- definitions: functions, methods, classes, module-level names
+- imports: which file imports which module/name
+- references: call sites (``name(``)
+
+The index lives in the worktree's git directory
+(``<git-dir>/superpowers/symbols.sqlite``) and every query first refreshes it
+from the files that changed since the last indexed commit plus any uncommitted
+changes, so lookups stay correct without ever re-scanning the whole tree.
+Python is parsed with ``ast``; other languages use lightweight patterns.
+
+Usage:
+    symbol_index.py build                 # full (re)build, e.g. at worktree setup
+    symbol_index.py update                # incremental refresh (queries do this too)
+    symbol_index.py def NAME              # where is NAME defined?
+    symbol_index.py refs NAME             # where is NAME called?
+    symbol_index.py importers NAME        # which files import NAME (module or symbol)?
+    symbol_index.py symbols PATH          # what does PATH define?
+    symbol_index.py stats
+
+Query output is grep-style ``path:line: kind name``; add ``--json`` for JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import re
+import sqlite3
+import subprocess
+import sys
+from bisect import bisect_right
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS defs (name TEXT, kind TEXT, path TEXT, line INTEGER);
+CREATE TABLE IF NOT EXISTS imports (name TEXT, module TEXT, path TEXT, line INTEGER);
+CREATE TABLE IF NOT EXISTS refs (name TEXT, path TEXT, line INTEGER);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE INDEX IF NOT EXISTS defs_name ON defs(name);
+CREATE INDEX IF NOT EXISTS defs_path ON defs(path);
+CREATE INDEX IF NOT EXISTS imports_name ON imports(name);
+CREATE INDEX IF NOT EXISTS imports_module ON imports(module);
+CREATE INDEX IF NOT EXISTS imports_path ON imports(path);
+CREATE INDEX IF NOT EXISTS refs_name ON refs(name);
+CREATE INDEX IF NOT EXISTS refs_path ON refs(path);
+"""
+
+MAX_FILE_BYTES = 1_000_000
+
+KEYWORDS = frozenset(
+    "if for while switch catch return function typeof sizeof elif print with and or not "
+    "in is new delete await yield assert super self this match case else try except".split()
+)
+
+CALL = re.compile(r"\b([A-Za-z_]\w*)\s*\(")
+
+# (pattern, kind) per extension family; group 1 is the defined name.
+DEF_PATTERNS: dict[str, list[tuple[re.Pattern, str]]] = {
+    "js": [
+        (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)", re.M), "function"),
+        (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(\w+)", re.M), "class"),
+        (re.compile(r"^\s*(?:export\s+)?(?:interface|type|enum)\s+(\w+)", re.M), "type"),
+        (re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>", re.M), "function"),
+    ],
+    "go": [
+        (re.compile(r"^func\s+(?:\([^)]*\)\s*)?(\w+)", re.M), "function"),
+        (re.compile(r"^type\s+(\w+)", re.M), "type"),
+    ],
+    "rust": [
+        (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?fn\s+(\w+)", re.M), "function"),
+        (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|type)\s+(\w+)", re.M), "type"),
+    ],
+    "jvm": [
+        (re.compile(r"^\s*(?:(?:public|private|protected|abstract|final|static|sealed|data|open)\s+)*(?:class|interface|enum|record|object)\s+(\w+)", re.M), "class"),
+        (re.compile(r"^\s*(?:(?:public|private|protected|static|final|abstract|override|suspend)\s+)+[\w<>\[\],\s]*?\s(\w+)\s*\(", re.M), "method"),
+        (re.compile(r"^\s*fun\s+(?:<[^>]*>\s*)?(?:\w+\.)?(\w+)", re.M), "function"),
+    ],
+}
+IMPORT_PATTERNS: dict[str, list[re.Pattern]] = {
+    "js": [
+        re.compile(r"^\s*import\s+(?:(?P<names>[\w{},\s*]+?)\s+from\s+)?['\"](?P<module>[^'\"]+)['\"]", re.M),
+        re.compile(r"require\(\s*['\"](?P<module>[^'\"]+)['\"]\s*\)"),
+    ],
+    "go": [re.compile(r"^\s*(?:import\s+)?(?:\w+\s+)?\"(?P<module>[\w./-]+)\"", re.M)],
+    "rust": [re.compile(r"^\s*(?:pub\s+)?use\s+(?P<module>[\w:]+)", re.M)],
+    "jvm": [re.compile(r"^\s*import\s+(?:static\s+)?(?P<module>[\w.]+)", re.M)],
+}
+EXTENSIONS = {
+    ".py": "python",
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".go": "go",
+    ".rs": "rust",
+    ".java": "jvm", ".kt": "jvm", ".scala": "jvm", ".cs": "jvm",
+}
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, text=True, check=True
+    ).stdout
+
+
+def index_path(repo: Path) -> Path:
+    git_dir = Path(_git(repo, "rev-parse", "--git-dir").strip())
+    if not git_dir.is_absolute():
+        git_dir = (repo / git_dir).resolve()
+    return git_dir / "superpowers" / "symbols.sqlite"
+
+
+def connect(repo: Path) -> sqlite3.Connection:
+    path = index_path(repo)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+
+def _extract_python(source: str) -> tuple[list, list, list]:
+    tree = ast.parse(source)
+    defs, imports, refs = [], [], []
+
+    def visit(node: ast.AST, in_class: bool) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                defs.append((child.name, "class", child.lineno))
+                visit(child, True)
+                continue
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                defs.append((child.name, "method" if in_class else "function", child.lineno))
+                visit(child, False)
+                continue
+            if isinstance(child, ast.Import):
+                for alias in child.names:
+                    imports.append((alias.asname or alias.name.split(".")[-1], alias.name, child.lineno))
+            elif isinstance(child, ast.ImportFrom):
+                module = "." * child.level + (child.module or "")
+                for alias in child.names:
+                    imports.append((alias.asname or alias.name, module, child.lineno))
+            elif isinstance(child, (ast.Assign, ast.AnnAssign)) and isinstance(node, ast.Module):
+                targets = child.targets if isinstance(child, ast.Assign) else [child.target]
+                defs.extend((t.id, "variable", child.lineno) for t in targets if isinstance(t, ast.Name))
+            elif isinstance(child, ast.Call):
+                func = child.func
+                name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+                if name:
+                    refs.append((name, child.lineno))
+            visit(child, in_class)
+
+    visit(tree, False)
+    return defs, imports, refs
+
+
+def _line_of(offset: int, newlines: list[int]) -> int:
+    return bisect_right(newlines, offset) + 1
+
+
+def _extract_patterns(source: str, family: str) -> tuple[list, list, list]:
+    newlines = [i for i, char in enumerate(source) if char == "\n"]
+    defs, imports, refs = [], [], []
+    for pattern, kind in DEF_PATTERNS.get(family, []):
+        for match in pattern.finditer(source):
+            defs.append((match.group(1), kind, _line_of(match.start(1), newlines)))
+    for pattern in IMPORT_PATTERNS.get(family, []):
+        for match in pattern.finditer(source):
+            module = match.group("module")
+            line = _line_of(match.start(), newlines)
+            names = match.groupdict().get("names")
+            symbols = re.findall(r"\w+", names or "") if names else []
+            symbols = [s for s in symbols if s != "as"] or [re.split(r"[/.:]+", module)[-1]]
+            imports.extend((symbol, module, line) for symbol in symbols)
+    for match in CALL.finditer(source):
+        name = match.group(1)
+        if name not in KEYWORDS:
+            refs.append((name, _line_of(match.start(1), newlines)))
+    return defs, imports, refs
+
+
+def extract(path: str, source: str) -> tuple[list, list, list] | None:
+    """Return (defs, imports, refs) for a file, or None if the language is unsupported."""
+    family = EXTENSIONS.get(Path(path).suffix)
+    if family is None:
+        return None
+    if family == "python":
+        try:
+            return _extract_python(source)
+        except (SyntaxError, ValueError):
+            return [], [], []
+    return _extract_patterns(source, family)
+
+
+# ---------------------------------------------------------------------------
+# Indexing
+# ---------------------------------------------------------------------------
+
+
+def _index_files(conn: sqlite3.Connection, repo: Path, paths: set[str]) -> int:
+    indexed = 0
+    for path in sorted(paths):
+        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        for table in ("defs", "imports", "refs"):
+            conn.execute(f"DELETE FROM {table} WHERE path = ?", (path,))
+        file_path = repo / path
+        if not file_path.is_file() or file_path.stat().st_size > MAX_FILE_BYTES:
+            continue
+        result = extract(path, file_path.read_text(errors="replace"))
+        if result is None:
+            continue
+        defs, imports, refs = result
+        conn.execute("INSERT INTO files VALUES (?)", (path,))
+        conn.executemany("INSERT INTO defs VALUES (?, ?, ?, ?)", [(n, k, path, l) for n, k, l in defs])
+        conn.executemany("INSERT INTO imports VALUES (?, ?, ?, ?)", [(n, m, path, l) for n, m, l in imports])
+        conn.executemany("INSERT INTO refs VALUES (?, ?, ?)", [(n, path, l) for n, l in refs])
+        indexed += 1
+    return indexed
+
+
+def _dirty_paths(repo: Path) -> set[str]:
+    paths = set()
+    for line in _git(repo, "status", "--porcelain", "--untracked-files=all").splitlines():
+        path = line[3:]
+        if " -> " in path:
+            old, path = path.split(" -> ", 1)
+            paths.add(old.strip('"'))
+        paths.add(path.strip('"'))
+    return paths
+
+
+def _set_meta(conn: sqlite3.Connection, **values: str) -> None:
+    conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", values.items())
+
+
+def _get_meta(conn: sqlite3.Connection, key: str) -> str | None:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def build(repo: Path) -> dict:
+    """Index every tracked and untracked-but-not-ignored file from scratch."""
+    conn = connect(repo)
+    with conn:
+        for table in ("files", "defs", "imports", "refs", "meta"):
+            conn.execute(f"DELETE FROM {table}")
+        files = _git(repo, "ls-files", "--cached", "--others", "--exclude-standard").splitlines()
+        dirty = _dirty_paths(repo)
+        indexed = _index_files(conn, repo, set(files))
+        _set_meta(conn, head=_git(repo, "rev-parse", "HEAD").strip(), dirty=json.dumps(sorted(dirty)))
+    return {"mode": "build", "indexed_files": indexed}
+
+
+def update(repo: Path) -> dict:
+    """Re-index only files changed since the last indexed commit or dirty now/before."""
+    conn = connect(repo)
+    last_head = _get_meta(conn, "head")
+    if last_head is None:
+        return build(repo)
+    head = _git(repo, "rev-parse", "HEAD").strip()
+    dirty = _dirty_paths(repo)
+    previously_dirty = set(json.loads(_get_meta(conn, "dirty") or "[]"))
+    changed = dirty | previously_dirty
+    if head != last_head:
+        try:
+            changed |= set(_git(repo, "diff", "--name-only", "--no-renames", last_head, head).splitlines())
+        except subprocess.CalledProcessError:
+            return build(repo)  # history rewritten past the indexed commit
+    if not changed and head == last_head:
+        return {"mode": "update", "indexed_files": 0}
+    with conn:
+        indexed = _index_files(conn, repo, changed)
+        _set_meta(conn, head=head, dirty=json.dumps(sorted(dirty)))
+    return {"mode": "update", "reindexed_paths": len(changed), "indexed_files": indexed}
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+
+def find_defs(conn: sqlite3.Connection, name: str) -> list[dict]:
+    rows = conn.execute(
+        "SELECT path, line, kind, name FROM defs WHERE name = ? ORDER BY path, line", (name,)
+    )
+    return [dict(zip(("path", "line", "kind", "name"), row)) for row in rows]
+
+
+def find_refs(conn: sqlite3.Connection, name: str) -> list[dict]:
+    rows = conn.execute(
+        "SELECT path, line, name FROM refs WHERE name = ? ORDER BY path, line", (name,)
+    )
+    return [{"path": p, "line": l, "kind": "call", "name": n} for p, l, n in rows]
+
+
+def find_importers(conn: sqlite3.Connection, name: str) -> list[dict]:
+    rows = conn.execute(
+        "SELECT path, line, name, module FROM imports "
+        "WHERE name = ? OR module = ? OR module LIKE ? OR module LIKE ? ORDER BY path, line",
+        (name, name, f"%.{name}", f"%/{name}"),
+    )
+    return [{"path": p, "line": l, "kind": f"import {m}", "name": n} for p, l, n, m in rows]
+
+
+def file_symbols(conn: sqlite3.Connection, path: str) -> list[dict]:
+    rows = conn.execute("SELECT path, line, kind, name FROM defs WHERE path = ? ORDER BY line", (path,))
+    return [dict(zip(("path", "line", "kind", "name"), row)) for row in rows]
+
+
+def stats(conn: sqlite3.Connection) -> dict:
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("files", "defs", "imports", "refs")}
+    return {**counts, "head": _get_meta(conn, "head")}
+
+
+QUERIES = {"def": find_defs, "refs": find_refs, "importers": find_importers, "symbols": file_symbols}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Symbol and reference index for a git worktree")
+    parser.add_argument("command", choices=("build", "update", "stats", *QUERIES))
+    parser.add_argument("name", nargs="?", help="Symbol name (or file path for 'symbols')")
+    parser.add_argument("--repo", default=".", help="Worktree path (default: current directory)")
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of grep-style lines")
+    parser.add_argument("--no-update", action="store_true", help="Skip the incremental refresh before a query")
+    args = parser.parse_args(argv)
+    repo = Path(_git(Path(args.repo), "rev-parse", "--show-toplevel").strip())
+
+    if args.command == "build":
+        result = build(repo)
+    elif args.command == "update":
+        result = update(repo)
+    else:
+        if args.command in QUERIES and not args.name:
+            parser.error(f"'{args.command}' needs a name")
+        if not args.no_update:
+            update(repo)
+        conn = connect(repo)
+        if args.command == "stats":
+            result = stats(conn)
+        else:
+            rows = QUERIES[args.command](conn, args.name)
+            if not args.json:
+                for row in rows:
+                    print(f"{row['path']}:{row['line']}: {row['kind']} {row['name']}")
+                return 0 if rows else 1
+            result = rows
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""task_ledger.py — Persistent task-state ledger for implementation plans.
+
+The ledger is a JSON file kept out of the working tree, in
+``<git-common-dir>/superpowers/task-ledger/`` and keyed by the plan's path in
+the repository (``docs/plans/x-plan.md`` -> ``docs-plans-x-plan.json``), so
+every worktree of the repository sees the same progress. Outside a repository
+it sits next to the plan (``x-plan.ledger.json``). It records status, commit
+and start/end time per task, so recipes can compute the next batch
+deterministically instead of re-deriving progress from markdown.
+
+Usage:
+    task_ledger.py init     --plan PLAN < tasks.json   # {"tasks": [...]} from load-plan
+    task_ledger.py ready    --plan PLAN [--limit N]    # next runnable batch (JSON)
+    task_ledger.py start    --plan PLAN TASK_ID
+    task_ledger.py complete --plan PLAN TASK_ID [--commit SHA]
+    task_ledger.py block    --plan PLAN TASK_ID --reason TEXT
+    task_ledger.py reset    --plan PLAN [TASK_ID ...] [--blocked]   # back to pending
+    task_ledger.py status   --plan PLAN [--requeue]    # counts + next_action (JSON)
+
+A task still ``in_progress`` when a run ends was interrupted: ``init`` (a resumed
+run) and ``status --requeue`` (the check after a batch) put it back to pending.
+``init`` also drops tasks the plan no longer contains.
+
+Every write goes through a lock file and an atomic rename, so concurrent
+updates never interleave and a crash never leaves a half-written ledger.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to no locking
+    fcntl = None
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+BLOCKED = "blocked"
+STATUSES = (PENDING, IN_PROGRESS, COMPLETED, BLOCKED)
+
+LEDGER_VERSION = 1
+
+
+def ledger_path(plan_path: str | Path) -> Path:
+    """Return the ledger file for ``plan_path``: in the git common dir, or next to the plan outside a repository."""
+    plan = Path(plan_path).resolve()
+    directory = next(parent for parent in plan.parents if parent.is_dir())
+    proc = subprocess.run(
+        ["git", "-C", str(directory), "rev-parse", "--path-format=absolute", "--git-common-dir", "--show-toplevel"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return plan.with_name(plan.stem + ".ledger.json")
+    common, toplevel = proc.stdout.splitlines()
+    key = re.sub(r"[^\w.-]+", "-", str(plan.relative_to(Path(toplevel).resolve()).with_suffix(""))).strip("-")
+    return Path(common) / "superpowers" / "task-ledger" / f"{key}.json"
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+@contextlib.contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on ``<path>.lock`` for the duration of the block."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = path.with_name(path.name + ".lock")
+    with open(lock_file, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def atomic_write_json(path: Path, data: dict) -> None:
+    """Write ``data`` to ``path`` via a temp file + rename in the same directory."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as handle:
+            json.dump(data, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def load(plan_path: str | Path) -> dict:
+    """Load the ledger for ``plan_path`` (an empty ledger if none exists yet)."""
+    path = ledger_path(plan_path)
+    if not path.exists():
+        return {"version": LEDGER_VERSION, "plan": str(plan_path), "order": [], "tasks": {}}
+    return json.loads(path.read_text())
+
+
+def _summarize(ledger: dict) -> dict:
+    counts = {status: 0 for status in STATUSES}
+    for task in ledger["tasks"].values():
+        counts[task["status"]] += 1
+    return counts
+
+
+def _save(plan_path: str | Path, ledger: dict) -> None:
+    ledger["counts"] = _summarize(ledger)
+    ledger["updated_at"] = _now()
+    atomic_write_json(ledger_path(plan_path), ledger)
+
+
+@contextlib.contextmanager
+def _transaction(plan_path: str | Path) -> Iterator[dict]:
+    """Load, mutate and atomically save the ledger under the lock."""
+    with _locked(ledger_path(plan_path)):
+        ledger = load(plan_path)
+        yield ledger
+        _save(plan_path, ledger)
+
+
+def init(plan_path: str | Path, tasks: list[dict]) -> dict:
+    """Seed the ledger from parsed plan tasks, preserving recorded progress.
+
+    Each task needs a ``task_id``; ``dependencies`` defaults to none. Any other
+    keys (description, spec, files, ...) are stored so batches carry full details.
+    Re-running ``init`` on a resumed plan refreshes task details and keeps the
+    status of completed, blocked and pending tasks. Tasks left in progress by an
+    interrupted run go back to pending, and tasks no longer in the plan are
+    dropped; both are listed under ``last_init``.
+    """
+    with _transaction(plan_path) as ledger:
+        order = []
+        for raw in tasks:
+            task_id = str(raw["task_id"])
+            order.append(task_id)
+            entry = ledger["tasks"].get(task_id, {"status": PENDING})
+            entry["details"] = raw
+            entry["dependencies"] = [str(dep) for dep in raw.get("dependencies") or []]
+            ledger["tasks"][task_id] = entry
+        dropped = [task_id for task_id in ledger["tasks"] if task_id not in order]
+        for task_id in dropped:
+            del ledger["tasks"][task_id]
+        ledger["order"] = order
+        ledger["last_init"] = {"requeued": _requeue(ledger), "dropped": dropped}
+    return ledger
+
+
+def _requeue(ledger: dict) -> list[str]:
+    """Put in-progress tasks back to pending; only called when no run is executing them."""
+    requeued = [tid for tid in ledger["order"] if ledger["tasks"][tid]["status"] == IN_PROGRESS]
+    for task_id in requeued:
+        ledger["tasks"][task_id].update(status=PENDING, requeued_at=_now())
+    return requeued
+
+
+def requeue(plan_path: str | Path) -> list[str]:
+    with _transaction(plan_path) as ledger:
+        return _requeue(ledger)
+
+
+def reset(plan_path: str | Path, task_ids: list[str] = (), blocked: bool = False) -> list[str]:
+    """Send tasks (and, with ``blocked``, every blocked task) back to pending, clearing their outcome."""
+    with _transaction(plan_path) as ledger:
+        unknown = [tid for tid in task_ids if tid not in ledger["tasks"]]
+        if unknown:
+            raise KeyError(f"Unknown task: {', '.join(unknown)}")
+        targets = list(dict.fromkeys([
+            *task_ids, *(tid for tid in ledger["order"] if blocked and ledger["tasks"][tid]["status"] == BLOCKED)
+        ]))
+        for task_id in targets:
+            task = ledger["tasks"][task_id]
+            for key in ("started_at", "finished_at", "commit", "reason"):
+                task.pop(key, None)
+            task["status"] = PENDING
+    return targets
+
+
+def ready(ledger: dict, limit: int | None = None) -> list[dict]:
+    """Return pending tasks whose dependencies are all completed, in plan order.
+
+    Unknown dependencies are treated as unsatisfied so a typo in the plan
+    blocks a task instead of silently running it early.
+    """
+    tasks = ledger["tasks"]
+    batch = []
+    for task_id in ledger["order"]:
+        task = tasks[task_id]
+        if task["status"] != PENDING:
+            continue
+        if all(tasks.get(dep, {}).get("status") == COMPLETED for dep in task["dependencies"]):
+            batch.append({"task_id": task_id, **task["details"]})
+            if limit is not None and len(batch) >= limit:
+                break
+    return batch
+
+
+def unreachable(ledger: dict) -> list[str]:
+    """Return unfinished tasks that can never become ready (cycles, missing or blocked deps)."""
+    tasks = ledger["tasks"]
+    runnable = {tid for tid, task in tasks.items() if task["status"] == COMPLETED}
+    open_tasks = [tid for tid in ledger["order"] if tasks[tid]["status"] in (PENDING, IN_PROGRESS)]
+    # Kahn-style fixpoint: a task becomes reachable once all its deps are.
+    changed = True
+    while changed:
+        changed = False
+        for task_id in open_tasks:
+            if task_id not in runnable and all(dep in runnable for dep in tasks[task_id]["dependencies"]):
+                runnable.add(task_id)
+                changed = True
+    return [tid for tid in open_tasks if tid not in runnable]
+
+
+def _transition(plan_path: str | Path, task_id: str, status: str, **fields: str) -> dict:
+    with _transaction(plan_path) as ledger:
+        if task_id not in ledger["tasks"]:
+            raise KeyError(f"Unknown task: {task_id}")
+        task = ledger["tasks"][task_id]
+        task["status"] = status
+        task.update({key: value for key, value in fields.items() if value is not None})
+    return task
+
+
+def start(plan_path: str | Path, task_id: str) -> dict:
+    return _transition(plan_path, task_id, IN_PROGRESS, started_at=_now())
+
+
+def complete(plan_path: str | Path, task_id: str, commit: str | None = None) -> dict:
+    return _transition(plan_path, task_id, COMPLETED, finished_at=_now(), commit=commit)
+
+
+def block(plan_path: str | Path, task_id: str, reason: str) -> dict:
+    return _transition(plan_path, task_id, BLOCKED, finished_at=_now(), reason=reason)
+
+
+def status(ledger: dict) -> dict:
+    """Summarize progress in the shape executing-plans.yaml expects for ``plan_status``."""
+    counts = ledger.get("counts") or _summarize(ledger)
+    blocked = [tid for tid in ledger["order"] if ledger["tasks"][tid]["status"] == BLOCKED]
+    stuck = unreachable(ledger)
+    remaining = counts[PENDING] + counts[IN_PROGRESS] + counts[BLOCKED]
+    if remaining == 0:
+        next_action = "proceed_to_finish"
+    elif blocked or (stuck and not ready(ledger, limit=1) and counts[IN_PROGRESS] == 0):
+        next_action = "resolve_blockers"
+    else:
+        next_action = "continue_batches"
+    return {
+        "total_tasks": len(ledger["order"]),
+        "counts": counts,
+        "remaining_task_count": remaining,
+        "blocked_tasks": blocked,
+        "unreachable_tasks": stuck,
+        "plan_complete": remaining == 0,
+        "next_action": next_action,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Persistent task-state ledger for implementation plans")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("init", "ready", "start", "complete", "block", "reset", "status"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--plan", required=True, help="Path to the plan markdown file")
+        if name in ("start", "complete", "block"):
+            cmd.add_argument("task_id")
+        if name == "reset":
+            cmd.add_argument("task_ids", nargs="*")
+            cmd.add_argument("--blocked", action="store_true", help="Reset every blocked task")
+        if name == "status":
+            cmd.add_argument("--requeue", action="store_true",
+                             help="First put in-progress tasks back to pending (no batch is running)")
+        if name == "ready":
+            cmd.add_argument("--limit", type=int, default=None)
+        if name == "complete":
+            cmd.add_argument("--commit", default=None)
+        if name == "block":
+            cmd.add_argument("--reason", required=True)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "init":
+            payload = json.load(sys.stdin)
+            tasks = payload["tasks"] if isinstance(payload, dict) else payload
+            ledger = init(args.plan, tasks)
+            result = {**status(ledger), **ledger["last_init"]}
+        elif args.command == "ready":
+            ledger = load(args.plan)
+            batch = ready(ledger, args.limit)
+            result = {
+                "tasks": batch,
+                "task_ids": [task["task_id"] for task in batch],
+                "all_tasks_complete": status(ledger)["plan_complete"],
+            }
+        elif args.command == "start":
+            result = start(args.plan, args.task_id)
+        elif args.command == "complete":
+            result = complete(args.plan, args.task_id, args.commit)
+        elif args.command == "block":
+            result = block(args.plan, args.task_id, args.reason)
+        elif args.command == "reset":
+            if not args.task_ids and not args.blocked:
+                print("Error: give task ids or --blocked", file=sys.stderr)
+                return 1
+            reset_ids = reset(args.plan, args.task_ids, args.blocked)
+            result = {"reset": reset_ids, **status(load(args.plan))}
+        else:
+            requeued = requeue(args.plan) if args.requeue else []
+            result = {**status(load(args.plan)), "requeued": requeued}
+    except KeyError as exc:
+        print(f"Error: {exc.args[0]}", file=sys.stderr)
+        return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
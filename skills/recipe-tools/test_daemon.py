@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""test_daemon.py — Warm, per-worktree pytest runner for fast RED/GREEN iterations.
+
+Every RED/GREEN step reruns one or two tests, and every cold run pays for the
+interpreter start, pytest's plugin loading, the project's heavy imports and
+collection before the first assertion. ``start`` launches a daemon for the
+worktree that imports all of that once (it collects the suite). ``run`` hands
+pytest arguments to the daemon, which forks its warm process and runs pytest in
+the fork, so:
+
+- third-party modules stay imported from the warm-up
+- project modules whose source changed since the warm-up are dropped in the
+  fork, together with every project module that imports them, and re-imported
+  fresh; nothing else is reloaded
+- one run's side effects (monkeypatching, module globals) die with its fork
+
+A run falls back to a cold ``python -m pytest`` subprocess whenever the warm
+state cannot be trusted, and the daemon then re-warms itself:
+
+    conftest.py or pytest config changed    fixtures and plugins are registered at import
+    non-project module changed              an installed package or C extension changed on disk
+    --cold                                  asked for explicitly (e.g. the final full-suite run)
+
+Session fixtures still run per run; fixtures are not shared across forks. The
+daemon runs under the project's interpreter (``.venv/bin/python`` when the
+worktree has one, else the interpreter running this script), serves one run at
+a time, keeps the environment it was started with, and exits after 30 idle
+minutes. When no daemon can warm up (pytest is missing from that interpreter,
+say), ``run`` runs a cold ``python -m pytest`` with the same interpreter. State and its log live under
+``<git-dir>/superpowers/test-daemon/`` of the worktree.
+
+Usage:
+    test_daemon.py start [--wait SECONDS]          # warm up; --wait 0 returns while it warms
+    test_daemon.py run [--cold] [--json] -- PYTEST_ARGS...
+    test_daemon.py status
+    test_daemon.py stop
+
+``run`` starts the daemon when none is running, prints pytest's output and a
+``[test-daemon]`` line saying how the run was served, and exits with pytest's
+exit code.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import contextlib
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+IDLE_SECONDS = 1800
+DEFAULT_WAIT = 600
+POLL_SECONDS = 0.1
+CONFIG_FILES = ("pytest.ini", "pyproject.toml", "setup.cfg", "tox.ini")
+THIRD_PARTY_DIRS = ("site-packages", "dist-packages")
+# Once a run reloads this many project modules (and this share of them), the daemon re-warms after responding.
+REWARM_MODULES = 10
+REWARM_FRACTION = 0.25
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def toplevel(repo: Path) -> Path:
+    return Path(_git(repo, "rev-parse", "--show-toplevel"))
+
+
+def state_dir(repo: Path) -> Path:
+    """Per-worktree (not shared) state: each worktree runs its own daemon."""
+    return Path(_git(repo, "rev-parse", "--absolute-git-dir")) / "superpowers" / "test-daemon"
+
+
+def socket_path(repo: Path) -> Path:
+    # AF_UNIX paths are limited to ~100 bytes, so the socket lives in the temp dir, named after the state dir.
+    digest = hashlib.sha1(str(state_dir(repo)).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"superpowers-test-daemon-{digest}.sock"
+
+
+def project_python(root: Path) -> str:
+    """The worktree's virtualenv interpreter, where its dependencies and pytest are installed."""
+    local = root / ".venv" / "bin" / "python"
+    return str(local) if os.access(local, os.X_OK) else sys.executable
+
+
+def is_pytest_project(root: Path) -> bool:
+    if any((root / name).is_file() for name in ("pytest.ini", "conftest.py", "tox.ini")):
+        return True
+    for name, marker in (("pyproject.toml", "[tool.pytest"), ("setup.cfg", "[tool:pytest]")):
+        if (root / name).is_file() and marker in (root / name).read_text(errors="replace"):
+            return True
+    files = _git(root, "ls-files", "--cached", "--others", "--exclude-standard").splitlines()
+    return any((Path(f).name.startswith("test_") and f.endswith(".py")) or f.endswith("_test.py") for f in files)
+
+
+# --- import graph --------------------------------------------------------------
+
+
+def module_imports(name: str, path: Path, is_package: bool) -> set[str]:
+    """Modules NAME's source imports, with their parent packages (a static over-approximation)."""
+    try:
+        tree = ast.parse(path.read_bytes())
+    except (OSError, SyntaxError, ValueError):
+        return set()
+    package = name if is_package else name.rpartition(".")[0]
+    found: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            found.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            try:
+                base = importlib.util.resolve_name("." * node.level + (node.module or ""), package) if node.level else node.module
+            except (ImportError, ValueError):
+                continue
+            if base:
+                found.add(base)
+                found.update(f"{base}.{alias.name}" for alias in node.names if alias.name != "*")
+    return {prefix for module in found for prefix in _prefixes(module)}
+
+
+def _prefixes(module: str) -> list[str]:
+    parts = module.split(".")
+    return [".".join(parts[: n + 1]) for n in range(len(parts))]
+
+
+def dependents(changed: set[str], graph: dict[str, set[str]]) -> set[str]:
+    """CHANGED plus every module that transitively imports one of them."""
+    importers: dict[str, set[str]] = {}
+    for module, imported in graph.items():
+        for target in imported:
+            importers.setdefault(target, set()).add(module)
+    result, pending = set(changed), list(changed)
+    while pending:
+        for importer in importers.get(pending.pop(), ()):
+            if importer not in result:
+                result.add(importer)
+                pending.append(importer)
+    return result
+
+
+# --- warm state ----------------------------------------------------------------
+
+
+def _signature(path: str) -> list[int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _is_project_file(path: str, root: Path) -> bool:
+    return path.startswith(str(root) + os.sep) and not any(f"{os.sep}{d}{os.sep}" in path for d in THIRD_PARTY_DIRS)
+
+
+class Warm:
+    """What the daemon imported while warming up, and how to tell what changed since."""
+
+    def __init__(self, root: Path, seconds: float):
+        self.root = root
+        self.seconds = seconds
+        self.files: dict[str, list[int] | None] = {}
+        self.modules_by_file: dict[str, list[str]] = {}
+        self.project: dict[str, str] = {}
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if not path or not os.path.isabs(path):
+                continue
+            self.files[path] = _signature(path)
+            self.modules_by_file.setdefault(path, []).append(name)
+            if path.endswith(".py") and _is_project_file(path, root):
+                self.project[name] = path
+        for name in CONFIG_FILES:
+            self.files.setdefault(str(root / name), _signature(str(root / name)))
+        self.graph = {
+            name: module_imports(name, Path(path), Path(path).name == "__init__.py") & self.project.keys()
+            for name, path in self.project.items()
+        }
+
+    def plan(self) -> tuple[set[str], str | None]:
+        """(project modules to reload, reason a warm run is unsafe or None)."""
+        changed: set[str] = set()
+        for path, signature in self.files.items():
+            if _signature(path) == signature:
+                continue
+            relative = os.path.relpath(path, self.root) if path.startswith(str(self.root)) else path
+            if os.path.basename(path) in CONFIG_FILES and os.path.dirname(path) == str(self.root):
+                return set(), f"{relative} changed"
+            if os.path.basename(path) == "conftest.py":
+                return set(), f"{relative} changed"
+            if not (path.endswith(".py") and _is_project_file(path, self.root)):
+                return set(), f"non-project module changed: {relative}"
+            changed.update(self.modules_by_file[path])
+        return dependents(changed, self.graph), None
+
+
+# --- daemon --------------------------------------------------------------------
+
+
+@contextlib.contextmanager
+def _output_to(path: Path):
+    """Point fds 1 and 2 (and so pytest's capture) at PATH."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+
+
+def _drop_bytecode(path: str) -> None:
+    """Bytecode caches validate by whole-second mtime and size, which an edit within the same second can fool."""
+    source = Path(path)
+    for cached in source.parent.joinpath("__pycache__").glob(f"{source.stem}.*.pyc"):
+        with contextlib.suppress(OSError):
+            cached.unlink()
+
+
+def _forget(name: str) -> None:
+    """Drop module NAME so the next import re-executes it."""
+    module = sys.modules.pop(name, None)
+    parent, _, child = name.rpartition(".")
+    # ``from pkg import mod`` reads the package attribute before sys.modules.
+    if parent in sys.modules and getattr(sys.modules[parent], child, None) is module:
+        delattr(sys.modules[parent], child)
+
+
+def warm_up(root: Path) -> Warm:
+    import pytest
+
+    began = time.perf_counter()
+    os.chdir(root)
+    # Like ``python -m pytest``: the working directory, not this script's, heads sys.path.
+    sys.path[0] = str(root)
+    pytest.main(["--collect-only", "-q"])
+    return Warm(root, time.perf_counter() - began)
+
+
+def run_cold(args: list[str], cwd: str, python: str | None = None) -> tuple[int, str]:
+    result = subprocess.run([python or sys.executable, "-m", "pytest", *args], cwd=cwd, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True, errors="replace")
+    return result.returncode, result.stdout
+
+
+def run_warm(warm: Warm, reload: set[str], args: list[str], cwd: str, closing: list[socket.socket]) -> tuple[int, str]:
+    output = Path(tempfile.mkstemp(prefix="test-daemon-", suffix=".log")[1])
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the fork
+        code = 3
+        try:
+            for sock in closing:
+                sock.close()
+            os.chdir(cwd)
+            sys.path[0] = cwd
+            for name in reload:
+                _forget(name)
+                _drop_bytecode(warm.project[name])
+            importlib.invalidate_caches()
+            with _output_to(output):
+                import pytest
+
+                code = int(pytest.main(args))
+        except BaseException:
+            with contextlib.suppress(BaseException), open(output, "a") as handle:
+                handle.write(traceback.format_exc())
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    try:
+        return os.waitstatus_to_exitcode(status), output.read_text(errors="replace")
+    finally:
+        output.unlink()
+
+
+def _release(root: Path, path: Path) -> None:
+    """Remove this daemon's socket and pid file, so clients see it gone before it has exited."""
+    with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+    pid_file = state_dir(root) / "daemon.pid"
+    with contextlib.suppress(OSError):
+        if pid_file.read_text().strip() == str(os.getpid()):
+            pid_file.unlink()
+
+
+def serve(repo: Path) -> int:
+    root = toplevel(repo)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # run the cleanup below
+    warm = warm_up(root)
+    path = socket_path(root)
+    with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen()
+    listener.settimeout(60)
+    runs = {"warm": 0, "cold": 0}
+    last_used = time.time()
+    print(f"[test-daemon] warm in {warm.seconds:.2f}s: {len(warm.files)} modules, {len(warm.project)} project modules",
+          flush=True)
+    try:
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                if time.time() - last_used > IDLE_SECONDS or not root.exists():
+                    return 0
+                continue
+            last_used = time.time()
+            with conn:
+                conn.settimeout(None)
+                request = json.loads(conn.makefile("rb").readline() or b"{}")
+                op = request.get("op")
+                if op == "stop":
+                    _release(root, path)
+                    conn.sendall(json.dumps({"stopped": True}).encode())
+                    return 0
+                if op != "run":
+                    conn.sendall(json.dumps({
+                        "running": True, "pid": os.getpid(), "root": str(root), "python": sys.executable,
+                        "warmup_seconds": round(warm.seconds, 2), "warm_modules": len(warm.files),
+                        "project_modules": len(warm.project), "runs": runs,
+                    }).encode())
+                    continue
+                reload, reason = warm.plan()
+                if request.get("cold"):
+                    reason = "--cold requested"
+                elif reason is None and not hasattr(os, "fork"):
+                    reason = "fork unavailable"
+                began = time.perf_counter()
+                if reason:
+                    code, output = run_cold(request["args"], request["cwd"])
+                else:
+                    code, output = run_warm(warm, reload, request["args"], request["cwd"], [listener, conn])
+                mode = "cold" if reason else "warm"
+                runs[mode] += 1
+                conn.sendall(json.dumps({
+                    "exit_code": code, "output": output, "mode": mode, "reason": reason,
+                    "reloaded": sorted(reload), "seconds": round(time.perf_counter() - began, 3),
+                }).encode())
+            stale = reason not in (None, "--cold requested", "fork unavailable")
+            if stale or len(reload) >= max(REWARM_MODULES, REWARM_FRACTION * len(warm.project)):
+                # Re-warm in a fresh interpreter: imported modules cannot be unloaded in place.
+                listener.close()
+                path.unlink()
+                print(f"[test-daemon] re-warming ({reason or f'{len(reload)} modules changed'})", flush=True)
+                python = project_python(root)
+                os.execv(python, [python, str(Path(__file__).resolve()), "--repo", str(root), "serve"])
+    finally:
+        listener.close()
+        _release(root, path)
+
+
+# --- client --------------------------------------------------------------------
+
+
+def _request(repo: Path, payload: dict) -> dict | None:
+    """Send PAYLOAD to the worktree's daemon; None when no daemon is listening."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path(repo)))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        reply = sock.makefile("rb").read()
+    return json.loads(reply) if reply else None
+
+
+def _daemon_pid(repo: Path) -> int | None:
+    with contextlib.suppress(OSError, ValueError):
+        pid = int((state_dir(repo) / "daemon.pid").read_text())
+        os.kill(pid, 0)
+        return pid
+    return None
+
+
+def _log_tail(repo: Path, lines: int = 15) -> str:
+    with contextlib.suppress(OSError):
+        return "\n".join((state_dir(repo) / "daemon.log").read_text(errors="replace").splitlines()[-lines:])
+    return ""
+
+
+def start(repo: Path, wait: float = DEFAULT_WAIT) -> dict:
+    """Start the worktree's daemon unless one is running; wait up to WAIT seconds for it to warm up."""
+    root = toplevel(repo)
+    status = _request(root, {"op": "status"})
+    if status:
+        return {"started": False, "reason": "already running", **status}
+    if not is_pytest_project(root):
+        return {"started": False, "reason": "not a pytest project"}
+    pid = _daemon_pid(root)  # alive but not listening yet: warming up or re-warming
+    started = pid is None
+    proc = None
+    if started:
+        directory = state_dir(root)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / "daemon.log", "w") as log:
+            proc = subprocess.Popen([project_python(root), str(Path(__file__).resolve()), "--repo", str(root), "serve"],
+                                    cwd=root, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                    start_new_session=True)
+        (directory / "daemon.pid").write_text(str(proc.pid))
+        pid = proc.pid
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        status = _request(root, {"op": "status"})
+        if status:
+            return {"started": started, **status}
+        # Our own child stays a zombie, alive to kill(0), until it is waited for.
+        if (proc is not None and proc.poll() is not None) or _daemon_pid(root) is None:
+            raise RuntimeError(f"test daemon exited during warm-up:\n{_log_tail(root)}")
+        time.sleep(POLL_SECONDS)
+    return {"started": started, "running": True, "pid": pid, "warming": True}
+
+
+def run(repo: Path, args: list[str], cold: bool = False, cwd: Path | None = None) -> dict:
+    root = toplevel(repo)
+    cwd = cwd or Path.cwd()
+    if cwd != root and root not in cwd.parents:
+        cwd = root
+    payload = {"op": "run", "args": args, "cold": cold, "cwd": str(cwd)}
+    result = _request(root, payload)
+    if result is None:
+        try:
+            started = start(root)
+        except RuntimeError:  # the daemon could not warm up; its log says why
+            started = {}
+        if started.get("reason") == "not a pytest project":
+            raise RuntimeError("not a pytest project (run the project's own test command)")
+        result = _request(root, payload)
+    if result is None:
+        began = time.perf_counter()
+        code, output = run_cold(args, str(cwd), project_python(root))
+        result = {"exit_code": code, "output": output, "mode": "cold",
+                  "reason": f"no warm daemon, see {state_dir(root) / 'daemon.log'}",
+                  "reloaded": [], "seconds": round(time.perf_counter() - began, 3)}
+    return result
+
+
+def status(repo: Path) -> dict:
+    root = toplevel(repo)
+    result = _request(root, {"op": "status"})
+    if result:
+        return result
+    pid = _daemon_pid(root)
+    return {"running": pid is not None, "pid": pid, "warming": pid is not None}
+
+
+def stop(repo: Path) -> dict:
+    root = toplevel(repo)
+    if _request(root, {"op": "stop"}):
+        return {"stopped": True}
+    pid = _daemon_pid(root)
+    if pid is not None:
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGTERM)
+    return {"stopped": pid is not None}
+
+
+def _summary(result: dict) -> str:
+    line = f"[test-daemon] {result['mode']} run in {result['seconds']:.2f}s"
+    if result["reason"]:
+        return f"{line} ({result['reason']})"
+    reloaded = result["reloaded"]
+    if not reloaded:
+        return f"{line}, nothing reloaded"
+    shown = ", ".join(reloaded[:5]) + (f", +{len(reloaded) - 5} more" if len(reloaded) > 5 else "")
+    return f"{line}, reloaded {len(reloaded)}: {shown}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Warm per-worktree pytest runner")
+    parser.add_argument("--repo", default=".", help="Worktree path (default: current directory)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    start_cmd = sub.add_parser("start")
+    start_cmd.add_argument("--wait", type=float, default=DEFAULT_WAIT, help="Longest wait for the warm-up (0: don't wait)")
+    run_cmd = sub.add_parser("run")
+    run_cmd.add_argument("--cold", action="store_true", help="Run in a fresh interpreter")
+    run_cmd.add_argument("--json", action="store_true", help="Print the result as JSON")
+    run_cmd.add_argument("pytest_args", nargs=argparse.REMAINDER, help="pytest arguments, after --")
+    sub.add_parser("status")
+    sub.add_parser("stop")
+    sub.add_parser("serve", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    repo = Path(args.repo).resolve()
+
+    try:
+        if args.command == "serve":
+            return serve(repo)
+        if args.command == "run":
+            pytest_args = args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+            result = run(repo, pytest_args, args.cold)
+            if not args.json:
+                output = result["output"]
+                print(output, end="" if not output or output.endswith("\n") else "\n")
+                print(_summary(result))
+                return result["exit_code"]
+        elif args.command == "start":
+            result = start(repo, args.wait)
+        elif args.command == "status":
+            result = status(repo)
+        else:
+            result = stop(repo)
+    except subprocess.CalledProcessError as exc:
+        print(f"Error: {exc.stderr.strip()}", file=sys.stderr)
+        return 1
+    except RuntimeError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return result.get("exit_code", 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
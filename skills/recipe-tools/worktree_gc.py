@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""worktree_gc.py — Reclaim disk from merged, abandoned and orphaned worktrees.
+
+Inventories every worktree ``git worktree list`` knows about, plus worktree
+directories (ones with a ``.git`` file) left in ``.worktrees/`` that git no
+longer tracks, and sorts each into one state:
+
+    merged      branch made commits of its own, all of them are in the base branch,
+                and it has been unused for --stale-days
+    scratch     a throwaway worktree the bundle's tools made under ``<git-common-dir>/superpowers/``
+    abandoned   unused for --stale-days, and not merged
+    orphaned    registered but its directory is gone
+    leftover    a worktree directory git no longer tracks, unused for --stale-days
+    active      recently used (including freshly created worktrees with no commits yet)
+    protected   main or current worktree, locked, has uncommitted changes, or is
+                tracked by the main worktree — never touched
+
+Merged, scratch and orphaned worktrees are always collected. Abandoned ones are
+collected least-recently-used first, and only while the worktrees' total disk
+usage (main excluded) exceeds --budget. Leftovers are only reported: git cannot
+see uncommitted or unpushed work inside them, so they are deleted only with
+--force-orphans. Removing a worktree never deletes its branch, so
+unmerged commits stay reachable. Test logs older than --stale-days are pruned
+from the worktrees that remain.
+
+Usage:
+    worktree_gc.py [--budget 20G] [--stale-days 14] [--force-orphans] [--dry-run] [--markdown]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to no locking
+    fcntl = None
+
+DEFAULT_STALE_DAYS = 14
+SCRATCH_GRACE = 3600  # don't pull a scratch worktree out from under a running bisect or perf gate
+BASE_CANDIDATES = ("main", "master", "origin/main", "origin/master")
+WORKTREE_DIRS = (".worktrees",)  # only hidden dirs: a visible ``worktrees/`` may be project content
+CACHE_DIRS = {
+    "node_modules", ".venv", "venv", "target", "build", "dist", ".tox", ".nox",
+    ".pytest_cache", ".mypy_cache", ".ruff_cache", ".next", ".gradle", "__pycache__",
+}
+COLLECT_ALWAYS = ("merged", "scratch", "orphaned")
+UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def _git(repo: Path, *args: str, check: bool = True) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, text=True, check=check
+    ).stdout.strip()
+
+
+def parse_size(text: str) -> int:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text!r} (use e.g. 500M, 20G)")
+    return int(float(match.group(1)) * UNITS[match.group(2)])
+
+
+def human(size: int) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}T"
+
+
+def disk_usage(path: Path) -> tuple[int, dict[str, int]]:
+    """Allocated bytes under ``path`` (symlinks not followed) and the share in known cache dirs."""
+    total, caches = 0, {}
+    stack = [(path, None)]
+    while stack:
+        current, cache = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                info = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            size = getattr(info, "st_blocks", 0) * 512 or info.st_size
+            total += size
+            owner = cache or (entry.name if entry.name in CACHE_DIRS and entry.is_dir(follow_symlinks=False) else None)
+            if owner:
+                caches[owner] = caches.get(owner, 0) + size
+            if entry.is_dir(follow_symlinks=False) and entry.name != ".git":
+                stack.append((entry.path, owner))
+    return total, caches
+
+
+def list_worktrees(repo: Path) -> list[dict]:
+    worktrees, current = [], None
+    for line in _git(repo, "worktree", "list", "--porcelain").splitlines() + [""]:
+        if not line:
+            if current:
+                worktrees.append(current)
+            current = None
+            continue
+        key, _, value = line.partition(" ")
+        if key == "worktree":
+            current = {"path": value, "head": None, "branch": None, "locked": False, "prunable": False}
+        elif current is not None and key == "HEAD":
+            current["head"] = value
+        elif current is not None and key == "branch":
+            current["branch"] = value.removeprefix("refs/heads/")
+        elif current is not None and key in ("locked", "prunable"):
+            current[key] = True
+    return worktrees
+
+
+def _base_ref(repo: Path, base: str | None) -> str:
+    for ref in [base] if base else BASE_CANDIDATES:
+        if _git(repo, "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}", check=False):
+            return ref
+    raise ValueError(f"No base branch found (tried {', '.join([base] if base else BASE_CANDIDATES)}); pass --base")
+
+
+def last_used(path: Path) -> float:
+    """Most recent of the HEAD commit time and the worktree's HEAD/index/reflog mtimes."""
+    stamps = []
+    commit_time = _git(path, "log", "-1", "--format=%ct", check=False)
+    if commit_time.isdigit():
+        stamps.append(float(commit_time))
+    git_dir = Path(_git(path, "rev-parse", "--absolute-git-dir", check=False) or path / ".git")
+    for name in ("HEAD", "index", "logs/HEAD"):
+        try:
+            stamps.append((git_dir / name).stat().st_mtime)
+        except OSError:
+            pass
+    return max(stamps, default=path.stat().st_mtime if path.exists() else 0.0)
+
+
+def branch_start(repo: Path, branch: str) -> str | None:
+    """The commit a branch was created at: the oldest entry of its reflog (None without a reflog)."""
+    entries = _git(repo, "log", "-g", "--format=%H", f"refs/heads/{branch}", "--", check=False).splitlines()
+    return entries[-1] if entries else None
+
+
+def is_merged(repo: Path, worktree: dict, base_ref: str) -> bool:
+    """True when the branch has commits beyond where it started and all of them are in ``base_ref``.
+
+    A freshly created branch points at a commit already in the base too, so
+    "HEAD is an ancestor of the base" alone would call brand-new work merged.
+    """
+    if not worktree["branch"] or not worktree["head"]:
+        return False
+    start = branch_start(repo, worktree["branch"])
+    if start is None or start == worktree["head"]:
+        return False
+    return subprocess.run(
+        ["git", "-C", str(repo), "merge-base", "--is-ancestor", worktree["head"], base_ref], capture_output=True
+    ).returncode == 0
+
+
+def is_tracked(main: Path, path: Path) -> bool:
+    """True when the main worktree tracks anything under ``path`` — project content, never a leftover."""
+    try:
+        relative = path.resolve().relative_to(main.resolve())
+    except ValueError:
+        return False
+    return bool(_git(main, "ls-files", "--", str(relative), check=False))
+
+
+def _newest_mtime(path: Path) -> float:
+    newest = path.stat().st_mtime
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d not in CACHE_DIRS]
+        for name in files + dirs:
+            try:
+                newest = max(newest, os.lstat(os.path.join(root, name)).st_mtime)
+            except OSError:
+                pass
+    return newest
+
+
+def inventory(repo: Path, base: str | None = None, stale_days: float = DEFAULT_STALE_DAYS) -> list[dict]:
+    common = Path(_git(repo, "rev-parse", "--path-format=absolute", "--git-common-dir"))
+    main = common.parent
+    scratch_root = common / "superpowers"
+    base_ref = _base_ref(repo, base)
+    current = Path(_git(repo, "rev-parse", "--show-toplevel")).resolve()
+    now = time.time()
+    entries = []
+
+    registered = list_worktrees(repo)
+    for worktree in registered:
+        path = Path(worktree["path"])
+        entry = {
+            "path": str(path),
+            "branch": worktree["branch"],
+            "state": None,
+            "reason": "",
+            "size": 0,
+            "caches": {},
+            "last_used": None,
+        }
+        entries.append(entry)
+        if worktree["prunable"] or not path.exists():
+            entry.update(state="orphaned", reason="directory is gone")
+            continue
+        entry["last_used"] = last_used(path)
+        if path.resolve() == main.resolve():
+            entry.update(state="protected", reason="main worktree")  # not measured: it holds .worktrees/
+            continue
+        entry["size"], entry["caches"] = disk_usage(path)
+        if path.resolve() == current:
+            entry.update(state="protected", reason="current worktree")
+        elif worktree["locked"]:
+            entry.update(state="protected", reason="locked")
+        elif _git(path, "--no-optional-locks", "status", "--porcelain", check=False):
+            entry.update(state="protected", reason="uncommitted changes")
+        elif path.resolve().is_relative_to(scratch_root.resolve()):
+            idle = now - entry["last_used"] > SCRATCH_GRACE
+            entry.update(state="scratch" if idle else "active", reason="bundle scratch worktree")
+        elif now - entry["last_used"] <= stale_days * 86400:
+            entry.update(state="active", reason="recently used")
+        elif is_merged(repo, worktree, base_ref):
+            entry.update(state="merged", reason=f"merged into {base_ref}, unused for {(now - entry['last_used']) / 86400:.0f} days")
+        else:
+            entry.update(state="abandoned", reason=f"unmerged, unused for {(now - entry['last_used']) / 86400:.0f} days")
+
+    known = {Path(worktree["path"]).resolve() for worktree in registered}
+    for parent in WORKTREE_DIRS:
+        for path in sorted((main / parent).glob("*")) if (main / parent).is_dir() else []:
+            if not path.is_dir() or path.resolve() in known or not (path / ".git").is_file():
+                continue
+            newest = _newest_mtime(path)
+            size, caches = disk_usage(path)
+            stale = now - newest > stale_days * 86400
+            tracked = is_tracked(main, path)
+            entries.append({
+                "path": str(path),
+                "branch": None,
+                "state": "leftover" if stale and not tracked else "protected",
+                "reason": ("tracked by the main worktree" if tracked else
+                           "not a registered worktree" if stale else "unregistered, but modified recently"),
+                "size": size,
+                "caches": caches,
+                "last_used": newest,
+            })
+    return entries
+
+
+def plan(entries: list[dict], budget: int | None, force_orphans: bool = False) -> list[dict]:
+    """Mark each entry's action: remove (always-collected states, then LRU abandoned over budget) or keep."""
+    collected = COLLECT_ALWAYS + (("leftover",) if force_orphans else ())
+    total = sum(entry["size"] for entry in entries)
+    for entry in entries:
+        entry["action"] = "remove" if entry["state"] in collected else "keep"
+        if entry["action"] == "remove":
+            total -= entry["size"]
+    abandoned = sorted((e for e in entries if e["state"] == "abandoned"), key=lambda e: e["last_used"])
+    for entry in abandoned:
+        if budget is None or total <= budget:
+            break
+        entry["action"] = "remove"
+        total -= entry["size"]
+    return entries
+
+
+def _prune_logs(entry: dict, stale_days: float) -> int:
+    git_dir = _git(Path(entry["path"]), "rev-parse", "--absolute-git-dir", check=False)
+    log_dir = Path(git_dir) / "superpowers" / "test-logs" if git_dir else None
+    freed, cutoff = 0, time.time() - stale_days * 86400
+    for log in sorted(log_dir.glob("*.log")) if log_dir and log_dir.is_dir() else []:
+        info = log.stat()
+        if info.st_mtime < cutoff:
+            freed += info.st_size
+            log.unlink()
+    return freed
+
+
+def collect(
+    repo: Path,
+    base: str | None = None,
+    budget: int | None = None,
+    stale_days: float = DEFAULT_STALE_DAYS,
+    dry_run: bool = False,
+    force_orphans: bool = False,
+) -> dict:
+    common = Path(_git(repo, "rev-parse", "--path-format=absolute", "--git-common-dir"))
+    lock_path = common / "superpowers" / "gc.lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            entries = plan(inventory(repo, base, stale_days), budget, force_orphans)
+            before = sum(entry["size"] for entry in entries)
+            reclaimed = logs_freed = 0
+            for entry in entries:
+                entry["removed"] = False
+                if entry["action"] != "remove" or dry_run:
+                    continue
+                path = Path(entry["path"])
+                if entry["state"] == "leftover":
+                    main = common.parent
+                    if not (path / ".git").is_file() or is_tracked(main, path):  # re-checked right before deleting
+                        entry.update(action="keep", reason="no longer a leftover worktree")
+                        continue
+                    shutil.rmtree(path, ignore_errors=True)
+                    entry["removed"] = not path.exists()
+                elif path.exists():
+                    # No --force: git refuses a worktree with untracked or modified files — a second guard.
+                    proc = subprocess.run(["git", "-C", str(repo), "worktree", "remove", str(path)], capture_output=True, text=True)
+                    entry["removed"] = proc.returncode == 0
+                    if not entry["removed"]:
+                        entry.update(action="keep", reason=f"git refused: {proc.stderr.strip()}")
+                else:
+                    entry["removed"] = True
+                if entry["removed"]:
+                    reclaimed += entry["size"]
+            if not dry_run:
+                _git(repo, "worktree", "prune", check=False)
+                logs_freed = sum(
+                    _prune_logs(entry, stale_days) for entry in entries if entry["action"] == "keep" and Path(entry["path"]).exists()
+                )
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    planned = sum(entry["size"] for entry in entries if entry["action"] == "remove")
+    after = before - (planned if dry_run else reclaimed)
+    return {
+        "dry_run": dry_run,
+        "budget": budget,
+        "stale_days": stale_days,
+        "worktrees": entries,
+        "before": before,
+        "reclaimed": planned if dry_run else reclaimed,
+        "logs_freed": logs_freed,
+        "after": after,
+        "over_budget": budget is not None and after > budget,
+    }
+
+
+def render(result: dict) -> str:
+    verb = "Would reclaim" if result["dry_run"] else "Reclaimed"
+    lines = [
+        f"### Worktree GC{' (dry run)' if result['dry_run'] else ''}",
+        f"- {verb} {human(result['reclaimed'])} of {human(result['before'])}"
+        + (f"; budget {human(result['budget'])}" if result["budget"] is not None else "")
+        + (f"; {human(result['logs_freed'])} of old test logs" if result["logs_freed"] else ""),
+        "",
+        "| Worktree | Branch | State | Size | Caches | Last used | Action |",
+        "|----------|--------|-------|------|--------|-----------|--------|",
+    ]
+    for entry in sorted(result["worktrees"], key=lambda e: (e["action"] != "remove", -e["size"])):
+        caches = ", ".join(f"{name} {human(size)}" for name, size in sorted(entry["caches"].items(), key=lambda i: -i[1])[:3])
+        used = time.strftime("%Y-%m-%d", time.localtime(entry["last_used"])) if entry["last_used"] else "-"
+        action = entry["action"] if result["dry_run"] or entry["action"] == "keep" else "removed" if entry["removed"] else "failed"
+        lines.append(
+            f"| {entry['path']} | {entry['branch'] or '-'} | {entry['state']} ({entry['reason']}) | "
+            f"{human(entry['size'])} | {caches or '-'} | {used} | {action} |"
+        )
+    leftovers = [e for e in result["worktrees"] if e["state"] == "leftover" and e["action"] == "keep"]
+    if leftovers:
+        lines += ["", f"- {len(leftovers)} leftover worktree director{'y' if len(leftovers) == 1 else 'ies'} "
+                      f"({human(sum(e['size'] for e in leftovers))}) kept: git cannot check them for uncommitted work. "
+                      "Inspect them, then re-run with --force-orphans to delete them."]
+    if result["over_budget"]:
+        lines += ["", f"- WARNING: still {human(result['after'] - result['budget'])} over budget; the rest is active or protected"]
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Reclaim disk from merged, abandoned and orphaned worktrees")
+    parser.add_argument("--repo", default=".", help="Any worktree of the repository (default: current directory)")
+    parser.add_argument("--base", help="Base branch for the merged check (default: main or master)")
+    parser.add_argument("--budget", help="Disk budget for all worktrees, e.g. 20G (default: git config superpowers.worktreeBudget)")
+    parser.add_argument("--stale-days", type=float, default=DEFAULT_STALE_DAYS, help="Idle days before unmerged work is abandoned")
+    parser.add_argument("--force-orphans", action="store_true", help="Also delete leftover worktree directories git no longer tracks")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be removed; remove nothing")
+    parser.add_argument("--markdown", action="store_true", help="Print a markdown report")
+    args = parser.parse_args(argv)
+
+    repo = Path(args.repo)
+    try:
+        budget_text = args.budget or _git(repo, "config", "--get", "superpowers.worktreeBudget", check=False)
+        result = collect(
+            repo, args.base, parse_size(budget_text) if budget_text else None, args.stale_days, args.dry_run, args.force_orphans
+        )
+    except (ValueError, subprocess.CalledProcessError) as exc:
+        print(f"Error: {getattr(exc, 'stderr', None) or exc}", file=sys.stderr)
+        return 1
+
+    print(render(result) if args.markdown else json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+// Type declarations for condition-wait.mjs — copy both files into the project's test helpers.
+
+import type { ChildProcess } from 'node:child_process';
+
+export interface WaitOptions {
+  /** What is being awaited; appears in the timeout error. */
+  description?: string;
+  /** Give up after this long (default 5000). */
+  timeoutMs?: number;
+  /** First delay between checks (default 10). */
+  intervalMs?: number;
+  /** Backoff ceiling (default 250). */
+  maxIntervalMs?: number;
+  /** Delay multiplier per check (default 1.5). */
+  backoff?: number;
+  /** ± fraction of random jitter per delay (default 0.2). */
+  jitter?: number;
+  /** Errors that mean "not yet": a predicate or Error classes. Others reject immediately. */
+  ignore?: ((error: unknown) => boolean) | (abstract new (...args: any[]) => Error) | Array<abstract new (...args: any[]) => Error>;
+  /** Random source for jitter, in [0, 1) (default Math.random). */
+  random?: () => number;
+}
+
+export declare const DEFAULTS: Readonly<Required<Pick<WaitOptions, 'timeoutMs' | 'intervalMs' | 'maxIntervalMs' | 'backoff' | 'jitter'>>>;
+
+export declare class WaitTimeoutError extends Error {
+  readonly description: string;
+  readonly timeoutMs: number;
+  readonly elapsedMs: number;
+  readonly attempts: number;
+  readonly lastValue: unknown;
+  readonly lastError: unknown;
+}
+
+type Falsy = false | 0 | '' | null | undefined;
+
+export declare function waitFor<T>(
+  condition: () => T | Promise<T>,
+  options?: WaitOptions | string,
+): Promise<Exclude<T, Falsy>>;
+
+export declare function fileExists(path: string, options?: { contains?: string }): () => string | undefined;
+export declare function portOpen(port: number, host?: string): () => Promise<boolean>;
+export declare function httpOk(url: string, options?: { status?: number; contains?: string }): () => Promise<string | undefined>;
+export declare function processExited(processOrPid: ChildProcess | number): () => boolean;
+
+export declare function waitForFile(path: string, options?: WaitOptions & { contains?: string }): Promise<string>;
+export declare function waitForPort(port: number, options?: WaitOptions & { host?: string }): Promise<true>;
+export declare function waitForHttp(url: string, options?: WaitOptions & { status?: number; contains?: string }): Promise<string>;
+export declare function waitForProcess(processOrPid: ChildProcess | number, options?: WaitOptions): Promise<true>;
@@ -0,0 +1,180 @@
+// condition-wait.mjs — Condition-based waiting for JS/TS test suites (Node 18+, no dependencies).
+//
+// Replaces guessed `setTimeout` delays with polling for the condition a test
+// actually needs. Polling starts at 10 ms and backs off exponentially with
+// jitter; on timeout the error says what was awaited, for how long, how many
+// checks ran, and the last value or error seen. Works with jest, vitest,
+// mocha and node:test. Copy it (and condition-wait.d.ts for TypeScript) into
+// the project's test helpers and import from there:
+//
+//   import { waitFor, waitForFile, waitForPort, waitForHttp, waitForProcess } from './helpers/condition-wait.mjs';
+//
+//   const result = await waitFor(() => job.result, { description: 'job result', timeoutMs: 5000 });
+//   await waitForPort(8080);                                  // stub server is listening
+//   await waitForHttp('http://127.0.0.1:8080/health');        // ...and answering 200
+//   await waitForFile(path.join(dir, 'out.json'), { contains: '"done"' });
+//   await waitForProcess(child);                              // child exited
+//
+// Each condition (fileExists, portOpen, httpOk, processExited) is a plain
+// function usable with waitFor directly; conditions may be async.
+
+import { existsSync, readFileSync } from 'node:fs';
+import net from 'node:net';
+
+export const DEFAULTS = Object.freeze({
+  timeoutMs: 5000,
+  intervalMs: 10,
+  maxIntervalMs: 250,
+  backoff: 1.5,
+  jitter: 0.2,
+});
+const REPR_CHARS = 200;
+
+export class WaitTimeoutError extends Error {
+  constructor({ description, timeoutMs, elapsedMs, attempts, lastValue, lastError }) {
+    const detail = lastError
+      ? `last error: ${lastError.name || 'Error'}: ${lastError.message}`
+      : `last value: ${short(lastValue)}`;
+    super(
+      `Timed out after ${elapsedMs}ms (timeout ${timeoutMs}ms) waiting for ${description}; ${attempts} checks, ${detail}`,
+    );
+    this.name = 'WaitTimeoutError';
+    Object.assign(this, { description, timeoutMs, elapsedMs, attempts, lastValue, lastError });
+  }
+}
+
+function short(value) {
+  let text;
+  try {
+    text = value === undefined ? 'undefined' : JSON.stringify(value) ?? String(value);
+  } catch {
+    text = String(value);
+  }
+  return text.length <= REPR_CHARS ? text : `${text.slice(0, REPR_CHARS - 1)}…`;
+}
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+const isErrorClass = (type) => typeof type === 'function' && (type === Error || type.prototype instanceof Error);
+
+function classifier(ignore) {
+  if (Array.isArray(ignore) || isErrorClass(ignore)) {
+    return (error) => [].concat(ignore).some((type) => error instanceof type);
+  }
+  return typeof ignore === 'function' ? ignore : () => false;
+}
+
+/**
+ * Poll `condition` until it returns (or resolves to) a truthy value, and return that value.
+ * Errors matching `options.ignore` (a predicate or a list of Error classes) count as "not yet";
+ * anything else rejects immediately. The condition is always checked once more at the deadline.
+ */
+export async function waitFor(condition, options = {}) {
+  const opts = { ...DEFAULTS, ...(typeof options === 'string' ? { description: options } : options) };
+  const description = opts.description || `condition ${condition.name || condition.toString().slice(0, 60)}`;
+  const ignored = classifier(opts.ignore);
+  const random = opts.random || Math.random;
+  const start = Date.now();
+  const deadline = start + opts.timeoutMs;
+  let delay = opts.intervalMs;
+  let attempts = 0;
+  let lastValue;
+  let lastError;
+
+  for (;;) {
+    attempts += 1;
+    try {
+      lastValue = await condition();
+      lastError = undefined;
+      if (lastValue) return lastValue;
+    } catch (error) {
+      if (!ignored(error)) throw error;
+      lastError = error;
+    }
+    const remaining = deadline - Date.now();
+    if (remaining <= 0) {
+      throw new WaitTimeoutError({
+        description, timeoutMs: opts.timeoutMs, elapsedMs: Date.now() - start, attempts, lastValue, lastError,
+      });
+    }
+    await sleep(Math.min(delay * (1 + (random() * 2 - 1) * opts.jitter), remaining));
+    delay = Math.min(delay * opts.backoff, opts.maxIntervalMs);
+  }
+}
+
+// ---------------------------------------------------------------------------
+// Conditions
+// ---------------------------------------------------------------------------
+
+/** The path exists (and, with `contains`, its text includes it); returns the path. */
+export function fileExists(path, { contains } = {}) {
+  return () => {
+    if (!existsSync(path)) return undefined;
+    if (contains !== undefined && !readFileSync(path, 'utf8').includes(contains)) return undefined;
+    return path;
+  };
+}
+
+/** Something accepts TCP connections on host:port. */
+export function portOpen(port, host = '127.0.0.1') {
+  return () => new Promise((resolve) => {
+    const socket = net.connect({ port, host });
+    const done = (open) => {
+      socket.destroy();
+      resolve(open);
+    };
+    socket.setTimeout(200, () => done(false));
+    socket.once('connect', () => done(true));
+    socket.once('error', () => done(false));
+  });
+}
+
+/** A GET returns `status` (and a body including `contains`); returns the body. Meant for local stubs. */
+export function httpOk(url, { status = 200, contains } = {}) {
+  return async () => {
+    const response = await fetch(url, { signal: AbortSignal.timeout(1000) });
+    const body = await response.text();
+    if (response.status !== status || (contains !== undefined && !body.includes(contains))) return undefined;
+    return body;
+  };
+}
+
+/** A ChildProcess has exited, or a pid no longer exists. */
+export function processExited(processOrPid) {
+  if (typeof processOrPid === 'object') {
+    return () => processOrPid.exitCode !== null || processOrPid.signalCode !== null;
+  }
+  return () => {
+    try {
+      process.kill(processOrPid, 0);
+      return false;
+    } catch (error) {
+      return error.code === 'ESRCH';
+    }
+  };
+}
+
+// ---------------------------------------------------------------------------
+// Shortcuts
+// ---------------------------------------------------------------------------
+
+export function waitForFile(path, { contains, ...options } = {}) {
+  const description = `file ${path}${contains !== undefined ? ` to contain ${JSON.stringify(contains)}` : ''}`;
+  return waitFor(fileExists(path, { contains }), { description, ...options });
+}
+
+export function waitForPort(port, { host = '127.0.0.1', ...options } = {}) {
+  return waitFor(portOpen(port, host), { description: `${host}:${port} to accept connections`, ...options });
+}
+
+export function waitForHttp(url, { status = 200, contains, ...options } = {}) {
+  return waitFor(httpOk(url, { status, contains }), {
+    description: `GET ${url} to return ${status}`,
+    ignore: () => true, // connection refused / reset while the stub starts
+    ...options,
+  });
+}
+
+export function waitForProcess(processOrPid, options = {}) {
+  const pid = typeof processOrPid === 'object' ? processOrPid.pid : processOrPid;
+  return waitFor(processExited(processOrPid), { description: `process ${pid} to exit`, ...options });
+}
@@ -0,0 +1,258 @@
+"""condition_wait.py — Condition-based waiting for Python test suites (sync and asyncio).
+
+Replaces guessed sleeps with polling for the condition a test actually needs.
+Polling starts fast and backs off exponentially with jitter, so a condition
+that is ready in 20 ms costs ~20 ms and a slow one doesn't spin the CPU. On
+timeout the error says what was awaited, for how long, how many checks ran,
+and the last value or exception seen.
+
+Standard library only. Copy this file into the project's test helpers
+(e.g. tests/helpers/condition_wait.py) and import it from there:
+
+    from condition_wait import wait_for, wait_for_file, wait_for_port, wait_for_http
+
+    job.start()
+    result = wait_for(lambda: job.result, "job result", timeout=5)
+    wait_for_port(8080)                                   # stub server is listening
+    wait_for_http("http://127.0.0.1:8080/health")         # ...and answering 200
+    wait_for_file(tmp_path / "out.json", contains='"done"')
+    wait_for_process(proc)                                # child exited
+
+    await async_wait_for(lambda: queue.qsize() >= 3, "3 queued messages")
+
+Every wait_for_* helper has an async_ twin, and each condition (file_exists,
+port_open, http_ok, process_exited) is a plain callable usable with either.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+import random
+import socket
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Awaitable, Callable, TypeVar, Union
+
+T = TypeVar("T")
+Condition = Callable[[], Union[T, Awaitable[T]]]
+
+TIMEOUT = 5.0
+INTERVAL = 0.01  # first poll delay; 10 ms, as the debugging guidance recommends
+MAX_INTERVAL = 0.25
+BACKOFF = 1.5
+JITTER = 0.2
+REPR_CHARS = 200
+
+
+class WaitTimeout(TimeoutError):
+    """The condition did not hold before the deadline."""
+
+    def __init__(self, description: str, timeout: float, elapsed: float, attempts: int,
+                 last_value: Any = None, last_error: BaseException | None = None):
+        self.description = description
+        self.timeout = timeout
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.last_value = last_value
+        self.last_error = last_error
+        detail = f"last error: {type(last_error).__name__}: {last_error}" if last_error else (
+            f"last value: {_short(last_value)}"
+        )
+        super().__init__(
+            f"Timed out after {elapsed:.2f}s (timeout {timeout:g}s) waiting for {description}; "
+            f"{attempts} checks, {detail}"
+        )
+
+
+def _short(value: Any) -> str:
+    text = repr(value)
+    return text if len(text) <= REPR_CHARS else text[: REPR_CHARS - 1] + "…"
+
+
+def _describe(condition: Callable, description: str | None) -> str:
+    if description:
+        return description
+    name = getattr(condition, "__qualname__", None) or repr(condition)
+    return f"condition {name}"
+
+
+def _delays(interval: float, max_interval: float, backoff: float, jitter: float, rng: random.Random):
+    delay = interval
+    while True:
+        yield delay * (1 + rng.uniform(-jitter, jitter))
+        delay = min(delay * backoff, max_interval)
+
+
+def wait_for(condition: Callable[[], T], description: str | None = None, timeout: float = TIMEOUT, *,
+             interval: float = INTERVAL, max_interval: float = MAX_INTERVAL, backoff: float = BACKOFF,
+             jitter: float = JITTER, ignore: tuple[type[BaseException], ...] = (),
+             clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+             rng: random.Random | None = None) -> T:
+    """Poll ``condition`` until it returns a truthy value, and return that value.
+
+    Exceptions of the types in ``ignore`` count as "not yet" (the last one is
+    reported on timeout); anything else propagates immediately. The condition
+    is always checked once more at the deadline.
+    """
+    description = _describe(condition, description)
+    start = clock()
+    deadline = start + timeout
+    attempts, last_value, last_error = 0, None, None
+    for delay in _delays(interval, max_interval, backoff, jitter, rng or random.Random()):
+        attempts += 1
+        try:
+            last_value, last_error = condition(), None
+            if last_value:
+                return last_value
+        except ignore as exc:
+            last_error = exc
+        remaining = deadline - clock()
+        if remaining <= 0:
+            raise WaitTimeout(description, timeout, clock() - start, attempts, last_value, last_error)
+        sleep(min(delay, remaining))
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+async def async_wait_for(condition: Condition, description: str | None = None, timeout: float = TIMEOUT, *,
+                         interval: float = INTERVAL, max_interval: float = MAX_INTERVAL, backoff: float = BACKOFF,
+                         jitter: float = JITTER, ignore: tuple[type[BaseException], ...] = (),
+                         rng: random.Random | None = None) -> T:
+    """``wait_for`` for asyncio: yields to the event loop between checks; ``condition`` may be async."""
+    loop = asyncio.get_running_loop()
+    description = _describe(condition, description)
+    start = loop.time()
+    deadline = start + timeout
+    attempts, last_value, last_error = 0, None, None
+    for delay in _delays(interval, max_interval, backoff, jitter, rng or random.Random()):
+        attempts += 1
+        try:
+            result = condition()
+            last_value, last_error = (await result if inspect.isawaitable(result) else result), None
+            if last_value:
+                return last_value
+        except ignore as exc:
+            last_error = exc
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise WaitTimeout(description, timeout, loop.time() - start, attempts, last_value, last_error)
+        await asyncio.sleep(min(delay, remaining))
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+# ---------------------------------------------------------------------------
+# Conditions
+# ---------------------------------------------------------------------------
+
+
+def file_exists(path: str | os.PathLike, contains: str | None = None) -> Callable[[], Path | None]:
+    """The path exists (and, with ``contains``, its text includes it)."""
+    path = Path(path)
+
+    def check() -> Path | None:
+        if not path.exists():
+            return None
+        if contains is not None and contains not in path.read_text(errors="replace"):
+            return None
+        return path
+
+    return check
+
+
+def port_open(port: int, host: str = "127.0.0.1") -> Callable[[], bool]:
+    """Something accepts TCP connections on host:port."""
+
+    def check() -> bool:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.2)
+            return sock.connect_ex((host, port)) == 0
+
+    return check
+
+
+def http_ok(url: str, status: int = 200, contains: str | None = None) -> Callable[[], str | None]:
+    """A GET returns ``status`` (and a body including ``contains``); returns the body.
+
+    Meant for local stubs and services under test: connection errors mean
+    "not yet", and the last one is reported on timeout.
+    """
+
+    def check() -> str | None:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                code, body = response.status, response.read().decode(errors="replace")
+        except urllib.error.HTTPError as exc:
+            code, body = exc.code, exc.read().decode(errors="replace")
+        if code != status or (contains is not None and contains not in body):
+            return None
+        return body
+
+    return check
+
+
+def process_exited(process) -> Callable[[], bool]:
+    """A ``subprocess.Popen`` (or anything with ``poll()``) has exited, or a pid no longer exists."""
+    if hasattr(process, "poll"):
+        return lambda: process.poll() is not None
+
+    def check() -> bool:
+        try:
+            os.kill(process, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    return check
+
+
+# ---------------------------------------------------------------------------
+# Shortcuts
+# ---------------------------------------------------------------------------
+
+_NETWORK_ERRORS = (OSError, urllib.error.URLError)
+
+
+def wait_for_file(path, contains: str | None = None, timeout: float = TIMEOUT, **options) -> Path:
+    what = f"file {path}" + (f" to contain {contains!r}" if contains is not None else "")
+    return wait_for(file_exists(path, contains), what, timeout, **options)
+
+
+def wait_for_port(port: int, host: str = "127.0.0.1", timeout: float = TIMEOUT, **options) -> bool:
+    return wait_for(port_open(port, host), f"{host}:{port} to accept connections", timeout, **options)
+
+
+def wait_for_http(url: str, status: int = 200, contains: str | None = None, timeout: float = TIMEOUT,
+                  **options) -> str:
+    options.setdefault("ignore", _NETWORK_ERRORS)
+    return wait_for(http_ok(url, status, contains), f"GET {url} to return {status}", timeout, **options)
+
+
+def wait_for_process(process, timeout: float = TIMEOUT, **options) -> bool:
+    pid = getattr(process, "pid", process)
+    return wait_for(process_exited(process), f"process {pid} to exit", timeout, **options)
+
+
+async def async_wait_for_file(path, contains: str | None = None, timeout: float = TIMEOUT, **options) -> Path:
+    what = f"file {path}" + (f" to contain {contains!r}" if contains is not None else "")
+    return await async_wait_for(file_exists(path, contains), what, timeout, **options)
+
+
+async def async_wait_for_port(port: int, host: str = "127.0.0.1", timeout: float = TIMEOUT, **options) -> bool:
+    return await async_wait_for(port_open(port, host), f"{host}:{port} to accept connections", timeout, **options)
+
+
+async def async_wait_for_http(url: str, status: int = 200, contains: str | None = None, timeout: float = TIMEOUT,
+                              **options) -> str:
+    options.setdefault("ignore", _NETWORK_ERRORS)
+    check = http_ok(url, status, contains)
+    return await async_wait_for(lambda: asyncio.to_thread(check), f"GET {url} to return {status}", timeout, **options)
+
+
+async def async_wait_for_process(process, timeout: float = TIMEOUT, **options) -> bool:
+    pid = getattr(process, "pid", process)
+    return await async_wait_for(process_exited(process), f"process {pid} to exit", timeout, **options)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""flake_detect.py — Classify a failing test as deterministic, flaky or order-dependent.
+
+Reruns a test command K times across a pool of workers. Each run gets its own
+seed (PYTHONHASHSEED, FLAKE_SEED) and, when several test ids are given, its own
+test order. One parallel pass reports the pass/fail ratio, the distribution of
+failure signatures and the timing variance, then classifies the failure:
+
+    deterministic    every run fails
+    flaky            runs disagree and no ordering explains it
+    order-dependent  runs disagree and "X ran before Y" separates failures from passes
+    passing          no run failed — the failure did not reproduce
+
+Usage:
+    flake_detect.py [--runs 20] [--jobs N] [--timeout 300] [--json] -- pytest tests/test_api.py::test_login
+    flake_detect.py --runs 30 -- pytest tests/test_a.py tests/test_b.py tests/test_c.py   # order is shuffled
+
+Runs share the working directory. Tests that collide on shared files or ports
+under --jobs > 1 show up as flaky — confirm with --jobs 1 before blaming the test.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import permutations
+
+SIGNATURE_CHARS = 160
+FAILURE_LINES = (
+    re.compile(r"^FAILED (\S+)(?: - (.*))?$"),  # pytest -rf summary
+    re.compile(r"^\s*--- FAIL: (\S+)"),  # go test
+    re.compile(r"^\s*● (.+)$"),  # jest / vitest
+    re.compile(r"^E\s+(\w+(?:\.\w+)*(?:Error|Exception|Failure)\b.*)$"),  # pytest assertion detail
+    re.compile(r"^(\w+(?:\.\w+)*(?:Error|Exception)\b:.*)$"),  # bare traceback tail
+)
+VOLATILE = (
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),
+    (re.compile(r"\d+(\.\d+)?"), "N"),
+    (re.compile(r"(/[\w.-]+)+/"), "…/"),
+)
+TEST_SUFFIXES = (".py", ".ts", ".tsx", ".js", ".jsx", ".go")
+
+
+def normalize(line: str) -> str:
+    for pattern, replacement in VOLATILE:
+        line = pattern.sub(replacement, line)
+    return line.strip()[:SIGNATURE_CHARS]
+
+
+def failure_signature(output: str) -> str:
+    """First recognisable failure line with run-specific values masked."""
+    for line in output.splitlines():
+        for pattern in FAILURE_LINES:
+            match = pattern.match(line)
+            if match:
+                return normalize(" - ".join(group for group in match.groups() if group))
+    tail = [line for line in output.splitlines() if line.strip()][-1:]
+    return normalize(tail[0]) if tail else "no output"
+
+
+def test_args(command: list[str]) -> list[int]:
+    """Indexes of arguments naming existing test files or test ids (shuffled between runs)."""
+    indexes = []
+    for index, arg in enumerate(command[1:], start=1):
+        path = arg.split("::")[0]
+        if not arg.startswith("-") and path.endswith(TEST_SUFFIXES) and os.path.exists(path):
+            indexes.append(index)
+    return indexes
+
+
+def plan_runs(command: list[str], runs: int, seed: int) -> list[dict]:
+    positions = test_args(command)
+    plans = []
+    for index in range(runs):
+        run_seed = seed + index
+        argv = list(command)
+        order = [command[i] for i in positions]
+        if len(order) > 1 and index > 0:  # run 0 keeps the original order as the baseline
+            random.Random(run_seed).shuffle(order)
+            for position, arg in zip(positions, order):
+                argv[position] = arg
+        plans.append({"run": index, "seed": run_seed, "argv": argv, "order": order})
+    return plans
+
+
+def execute(plan: dict, timeout: float) -> dict:
+    env = {**os.environ, "PYTHONHASHSEED": str(plan["seed"]), "FLAKE_SEED": str(plan["seed"])}
+    started = time.perf_counter()
+    try:
+        proc = subprocess.run(plan["argv"], capture_output=True, text=True, env=env, timeout=timeout)
+        passed, output = proc.returncode == 0, proc.stdout + proc.stderr
+        signature = None if passed else failure_signature(output)
+    except subprocess.TimeoutExpired:
+        passed, signature = False, f"TIMEOUT after {timeout:g}s"
+    return {**plan, "passed": passed, "signature": signature, "seconds": time.perf_counter() - started}
+
+
+def order_explanation(results: list[dict]) -> dict | None:
+    """Find "X before Y" that holds in every failing run and in no passing run."""
+    failing = [r["order"] for r in results if not r["passed"]]
+    passing = [r["order"] for r in results if r["passed"]]
+    if not failing or not passing or len(results[0]["order"]) < 2:
+        return None
+
+    def before(order: list[str], first: str, second: str) -> bool:
+        return order.index(first) < order.index(second)
+
+    for first, second in permutations(results[0]["order"], 2):
+        if all(before(o, first, second) for o in failing) and not any(before(o, first, second) for o in passing):
+            return {"runs_first": first, "then": second}
+    return None
+
+
+def _timing(seconds: list[float]) -> dict:
+    if not seconds:
+        return {}
+    return {
+        "mean": round(statistics.mean(seconds), 3),
+        "stdev": round(statistics.pstdev(seconds), 3),
+        "min": round(min(seconds), 3),
+        "max": round(max(seconds), 3),
+    }
+
+
+def classify(results: list[dict]) -> dict:
+    failures = [r for r in results if not r["passed"]]
+    ordering = order_explanation(results)
+    if not failures:
+        verdict = "passing"
+    elif len(failures) == len(results):
+        verdict = "deterministic"
+    elif ordering:
+        verdict = "order-dependent"
+    else:
+        verdict = "flaky"
+    return {
+        "classification": verdict,
+        "runs": len(results),
+        "passed": len(results) - len(failures),
+        "failed": len(failures),
+        "pass_ratio": round((len(results) - len(failures)) / len(results), 3) if results else 0.0,
+        "signatures": dict(Counter(r["signature"] for r in failures).most_common()),
+        "order": ordering,
+        "timing": {
+            "all": _timing([r["seconds"] for r in results]),
+            "passed": _timing([r["seconds"] for r in results if r["passed"]]),
+            "failed": _timing([r["seconds"] for r in failures]),
+        },
+        "failing_seeds": [r["seed"] for r in failures][:10],
+    }
+
+
+def detect(command: list[str], runs: int = 20, jobs: int | None = None, timeout: float = 300, seed: int = 1) -> dict:
+    plans = plan_runs(command, runs, seed)
+    with ThreadPoolExecutor(max_workers=jobs or min(runs, os.cpu_count() or 1)) as pool:
+        results = list(pool.map(lambda plan: execute(plan, timeout), plans))
+    return {"command": command, **classify(results)}
+
+
+def render(report: dict) -> str:
+    lines = [
+        f"Classification: {report['classification'].upper()}",
+        f"Runs: {report['runs']}  passed: {report['passed']}  failed: {report['failed']}  "
+        f"(pass ratio {report['pass_ratio']:.0%})",
+    ]
+    timing = report["timing"]["all"]
+    if timing:
+        lines.append(
+            f"Timing: mean {timing['mean']:.2f}s  stdev {timing['stdev']:.2f}s  "
+            f"range {timing['min']:.2f}–{timing['max']:.2f}s"
+        )
+    if report["signatures"]:
+        lines.append("Failure signatures:")
+        lines += [f"  {count:>3}x  {signature}" for signature, count in report["signatures"].items()]
+    if report["order"]:
+        lines.append(f"Fails only when {report['order']['runs_first']} runs before {report['order']['then']}")
+    if report["failing_seeds"]:
+        lines.append(f"Reproduce with FLAKE_SEED / PYTHONHASHSEED = {report['failing_seeds'][0]}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel flaky-test detector")
+    parser.add_argument("--runs", type=int, default=20, help="Number of reruns (default: 20)")
+    parser.add_argument("--jobs", type=int, default=None, help="Concurrent runs (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-run timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the first run")
+    parser.add_argument("--json", action="store_true", help="Print the full JSON report")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Test command, after --")
+    args = parser.parse_args(argv)
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        print("Error: no test command given (put it after --)", file=sys.stderr)
+        return 1
+    report = detect(command, args.runs, args.jobs, args.timeout, args.seed)
+    print(json.dumps(report, indent=2) if args.json else render(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""parallel_bisect.py — Find the commit that introduced a regression, testing K commits at once.
+
+``git bisect run`` tests one commit per round. This tool splits the remaining
+range into K+1 segments and tests the K boundary commits concurrently, each in
+its own throwaway worktree, so a range of N commits takes about log_(K+1)(N)
+rounds instead of log_2(N).
+
+The test command follows the ``git bisect run`` convention: exit 0 = good,
+125 = skip (cannot test this commit), anything else = bad.
+
+- Worktrees are created once under ``<git-common-dir>/superpowers/bisect/`` and
+  reused across rounds (checkout + clean), then removed at the end.
+- ``--shared PATH`` symlinks a dependency directory (``node_modules``, ``.venv``)
+  from the main worktree into every bisect worktree instead of reinstalling.
+- ``--setup CMD --setup-key FILE`` re-runs setup in a worktree only when FILE
+  (e.g. a lockfile) differs from the last setup there.
+- Outcomes are cached per (command, commit) for the hunt. The command key
+  includes the contents of any file the command names (``/tmp/repro.sh``), so
+  editing a repro script never reuses old outcomes. ``--reuse-outcomes`` keeps
+  them across hunts under the git directory (re-running or widening ``--good``
+  then only tests new commits); ``--no-cache`` turns caching off. Timed-out
+  probes are never cached.
+
+Commits are bisected along the first-parent history of ``good..bad``.
+
+Usage:
+    parallel_bisect.py --good v1.4.0 --bad HEAD [--jobs 4] -- pytest -x tests/test_api.py
+    parallel_bisect.py --good abc123 --bad main --shared node_modules -- npm test
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+GOOD, BAD, SKIP = "good", "bad", "skip"
+
+
+def _git(repo: Path, *args: str, check: bool = True) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, text=True, check=check
+    ).stdout
+
+
+def bisect_dir(repo: Path) -> Path:
+    common = Path(_git(repo, "rev-parse", "--git-common-dir").strip())
+    if not common.is_absolute():
+        common = (repo / common).resolve()
+    return common / "superpowers" / "bisect"
+
+
+def candidates(repo: Path, good: str, bad: str) -> list[str]:
+    """Commits after ``good`` up to and including ``bad``, oldest first."""
+    commits = _git(repo, "rev-list", "--first-parent", "--reverse", f"{good}..{bad}").split()
+    if not commits:
+        raise ValueError(f"No commits between {good} and {bad}")
+    return commits
+
+
+def probe_points(lo: int, hi: int, k: int) -> list[int]:
+    """Up to k indexes strictly between lo and hi, splitting the range evenly."""
+    inner = hi - lo - 1
+    if inner <= k:
+        return list(range(lo + 1, hi))
+    return sorted({lo + round((i + 1) * (hi - lo) / (k + 1)) for i in range(k)} - {lo, hi})
+
+
+def command_key(command: list[str], cwd: Path) -> str:
+    """Hash of the command and the contents of every existing file it names."""
+    digest = hashlib.sha256(json.dumps(command).encode())
+    for arg in command:
+        path = Path(arg) if os.path.isabs(arg) else cwd / arg
+        with contextlib.suppress(OSError):
+            if path.is_file():
+                digest.update(arg.encode() + b"\0" + path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class OutcomeCache:
+    """Per (command, commit) outcomes; persisted as JSON under the git directory only when ``path`` is set."""
+
+    def __init__(self, path: Path | None, command: list[str], cwd: Path, enabled: bool = True):
+        self.path, self.enabled = path, enabled
+        self.command_key = command_key(command, cwd)
+        self.data = json.loads(path.read_text()) if path and path.exists() else {}
+
+    def get(self, commit: str) -> str | None:
+        return self.data.get(self.command_key, {}).get(commit) if self.enabled else None
+
+    def put(self, commit: str, outcome: str) -> None:
+        if self.enabled:
+            self.data.setdefault(self.command_key, {})[commit] = outcome
+
+    def save(self) -> None:
+        if self.path is None or not self.enabled:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as handle:
+            json.dump(self.data, handle)
+        os.replace(tmp, self.path)
+
+
+class WorktreePool:
+    """K reusable detached worktrees with shared dependency directories."""
+
+    def __init__(self, repo: Path, size: int, shared: list[str], setup: str | None, setup_key: str | None):
+        self.repo, self.shared, self.setup, self.setup_key = repo, shared, setup, setup_key
+        self.root = bisect_dir(repo) / f"run-{os.getpid()}"
+        self.paths: list[Path] = []
+        self.free: queue.Queue[Path] = queue.Queue()
+        self.setups = 0
+        for index in range(size):
+            path = self.root / f"wt-{index}"
+            _git(repo, "worktree", "add", "-q", "--detach", str(path), "HEAD")
+            for name in shared:
+                source = repo / name
+                if source.exists():
+                    (path / name).parent.mkdir(parents=True, exist_ok=True)
+                    (path / name).symlink_to(source.resolve(), target_is_directory=source.is_dir())
+            self.paths.append(path)
+            self.free.put(path)
+
+    def checkout(self, path: Path, commit: str) -> None:
+        _git(path, "checkout", "-q", "--detach", "--force", commit)
+        excludes = [arg for name in self.shared for arg in ("-e", name)]
+        _git(path, "clean", "-q", "-fdx", *excludes)
+        if self.setup:
+            key_file = path / self.setup_key if self.setup_key else None
+            key = hashlib.sha256(key_file.read_bytes()).hexdigest() if key_file and key_file.exists() else commit
+            stamp = self.root / f"{path.name}.setup"
+            if not stamp.exists() or stamp.read_text() != key:
+                subprocess.run(self.setup, shell=True, cwd=path, capture_output=True, check=False)
+                stamp.write_text(key)
+                self.setups += 1
+
+    @contextlib.contextmanager
+    def lease(self):
+        path = self.free.get()
+        try:
+            yield path
+        finally:
+            self.free.put(path)
+
+    def close(self) -> None:
+        for path in self.paths:
+            _git(self.repo, "worktree", "remove", "--force", str(path), check=False)
+        _git(self.repo, "worktree", "prune", check=False)
+        for stamp in self.root.glob("*.setup"):
+            stamp.unlink()
+        with contextlib.suppress(OSError):
+            self.root.rmdir()
+
+
+def run_test(path: Path, command: list[str], timeout: float) -> tuple[str, bool]:
+    """The probe's outcome, and whether it timed out (a hang may be load, not the commit)."""
+    try:
+        code = subprocess.run(command, cwd=path, capture_output=True, timeout=timeout).returncode
+    except subprocess.TimeoutExpired:
+        return BAD, True
+    return (GOOD if code == 0 else SKIP if code == 125 else BAD), False
+
+
+def bisect(
+    repo: Path,
+    good: str,
+    bad: str,
+    command: list[str],
+    jobs: int = 4,
+    shared: list[str] | None = None,
+    setup: str | None = None,
+    setup_key: str | None = None,
+    timeout: float = 600,
+    cache: str = "hunt",
+) -> dict:
+    """``cache`` is "hunt" (outcomes live for this run), "reuse" (persisted across runs) or "off"."""
+    started = time.perf_counter()
+    commits = candidates(repo, good, bad)
+    outcome_cache = OutcomeCache(
+        bisect_dir(repo) / "outcomes.json" if cache == "reuse" else None, command, repo, enabled=cache != "off"
+    )
+    outcomes: dict[int, str] = {len(commits) - 1: BAD}  # bad is bad by definition
+    lo, hi = -1, len(commits) - 1  # commits[lo] is good (-1 = the good ref), commits[hi] is bad
+    rounds = tested = cached = timeouts = 0
+    probe_seconds: list[float] = []
+    pool = WorktreePool(repo, min(jobs, max(len(commits) - 1, 1)), shared or [], setup, setup_key)
+
+    def probe(index: int) -> tuple[str, bool]:
+        with pool.lease() as path:
+            t0 = time.perf_counter()
+            pool.checkout(path, commits[index])
+            result = run_test(path, command, timeout)
+            probe_seconds.append(time.perf_counter() - t0)
+            return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(pool.paths)) as executor:
+            while True:
+                pending = [i for i in range(lo + 1, hi) if outcomes.get(i) != SKIP]
+                points = probe_points(lo, hi, jobs) if pending else []
+                points = [i for i in points if outcomes.get(i) != SKIP] or pending[:jobs]
+                if not points:
+                    break
+                rounds += 1
+                to_run = []
+                for index in points:
+                    hit = outcome_cache.get(commits[index])
+                    if hit:
+                        outcomes[index] = hit
+                        cached += 1
+                    else:
+                        to_run.append(index)
+                for index, (outcome, timed_out) in zip(to_run, executor.map(probe, to_run)):
+                    outcomes[index] = outcome
+                    if timed_out:
+                        timeouts += 1
+                    else:
+                        outcome_cache.put(commits[index], outcome)
+                    tested += 1
+                bad_points = [i for i in points if outcomes[i] == BAD]
+                if bad_points:
+                    hi = min(bad_points)
+                good_points = [i for i in points if outcomes[i] == GOOD and i < hi]
+                if good_points:
+                    lo = max(good_points)
+    finally:
+        outcome_cache.save()
+        pool.close()
+
+    skipped = [commits[i] for i in range(lo + 1, hi) if outcomes.get(i) == SKIP]
+    first_bad = commits[hi]
+    mean_probe = sum(probe_seconds) / len(probe_seconds) if probe_seconds else 0.0
+    serial_rounds = max(1, (len(commits)).bit_length())
+    elapsed = time.perf_counter() - started
+    return {
+        "first_bad_commit": first_bad,
+        "subject": _git(repo, "log", "-1", "--format=%s", first_bad).strip(),
+        # Skipped commits between the last good and first bad make the answer a range.
+        "possible_first_bad": skipped + [first_bad] if skipped else [first_bad],
+        "candidates": len(commits),
+        "rounds": rounds,
+        "tested": tested,
+        "cached": cached,
+        "timeouts": timeouts,
+        "setups": pool.setups,
+        "seconds": round(elapsed, 2),
+        "serial_estimate_seconds": round(serial_rounds * mean_probe, 2),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="K-ary git bisect over parallel worktrees")
+    parser.add_argument("--repo", default=".", help="Repository path (default: current directory)")
+    parser.add_argument("--good", required=True, help="Known-good commit")
+    parser.add_argument("--bad", default="HEAD", help="Known-bad commit (default: HEAD)")
+    parser.add_argument("--jobs", type=int, default=min(4, os.cpu_count() or 1), help="Commits tested per round")
+    parser.add_argument("--shared", action="append", default=[], help="Dependency dir to share (repeatable)")
+    parser.add_argument("--setup", help="Setup command run in a worktree before testing")
+    parser.add_argument("--setup-key", help="File whose content decides when setup must re-run")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-commit test timeout (timeout = bad, never cached)")
+    caching = parser.add_mutually_exclusive_group()
+    caching.add_argument("--reuse-outcomes", dest="cache", action="store_const", const="reuse", default="hunt",
+                         help="Reuse outcomes from earlier hunts with the same command and files")
+    caching.add_argument("--no-cache", dest="cache", action="store_const", const="off", help="Test every probe")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Test command, after --")
+    args = parser.parse_args(argv)
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        print("Error: no test command given (put it after --)", file=sys.stderr)
+        return 1
+    repo = Path(_git(Path(args.repo), "rev-parse", "--show-toplevel").strip())
+    try:
+        result = bisect(repo, args.good, args.bad, command, args.jobs, args.shared, args.setup, args.setup_key, args.timeout,
+                        args.cache)
+    except (ValueError, subprocess.CalledProcessError) as exc:
+        print(f"Error: {getattr(exc, 'stderr', '') or exc}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"First bad commit: {result['first_bad_commit'][:12]} {result['subject']}")
+        if len(result["possible_first_bad"]) > 1:
+            print(f"  (untestable commits before it: {', '.join(c[:12] for c in result['possible_first_bad'][:-1])})")
+        print(
+            f"{result['candidates']} candidates, {result['rounds']} rounds, {result['tested']} tested, "
+            f"{result['cached']} cached, {result['timeouts']} timed out, {result['seconds']:.1f}s "
+            f"(serial bisect estimate {result['serial_estimate_seconds']:.1f}s)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""perf_gate.py — Performance regression gate: benchmark the merge base against the branch.
+
+Correctness evidence alone lets a branch that doubles a hot path's latency pass
+verification. This gate runs the project's benchmarks on both the merge base
+(in a throwaway worktree) and the current working tree, interleaving the runs
+(base, branch, branch, base, ...) so machine drift hits both sides equally.
+Each benchmark's samples are then compared with a one-sided Mann-Whitney U test:
+
+    regression   median slower by more than --threshold and p < --alpha
+    improvement  median faster by more than --threshold and p < --alpha
+    unchanged    anything else (noise)
+
+Benchmarks are discovered in this order:
+
+    --command CMD / git config superpowers.perfCommand   configured command
+    asv.conf.json                                         asv continuous (asv does its own statistics)
+    tests using the pytest-benchmark ``benchmark`` fixture  pytest --benchmark-only
+    package.json "bench" script                           npm run bench
+
+A configured command may print a JSON object ``{"name": seconds, ...}`` as its
+last line; otherwise its wall-clock time is the single benchmark.
+
+Samples are cached per (command, commit) under ``<git-common-dir>/superpowers/perf/``.
+A dirty tree is keyed by its tracked diff and the contents of its untracked
+files. Every gate run still measures at least --fresh rounds of each side,
+interleaved, and compares the newest --rounds samples of each, so cached
+samples top up a comparison but never decide it alone.
+
+Exits 1 when a benchmark regresses (or on an error), 0 otherwise.
+
+Usage:
+    perf_gate.py [--base main] [--rounds 5] [--fresh 2] [--threshold 0.10] [--markdown]
+    perf_gate.py --command "python bench.py" --shared .venv
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DEFAULT_ROUNDS = 5
+DEFAULT_FRESH = 2  # rounds of each side measured on every run, whatever the cache holds
+MAX_CACHED = 20  # samples kept per benchmark and commit
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_ALPHA = 0.05
+BASE_CANDIDATES = ("main", "master", "origin/main", "origin/master")
+ASV_LINE = re.compile(r"^\s*([+-])?\s+(\S+)\s+(\S+)\s+([\d.]+|n/a)\s+(\S+)\s*$")
+
+
+def _git(repo: Path, *args: str, check: bool = True) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, text=True, check=check
+    ).stdout.strip()
+
+
+def perf_dir(repo: Path) -> Path:
+    common = Path(_git(repo, "rev-parse", "--git-common-dir"))
+    if not common.is_absolute():
+        common = (repo / common).resolve()
+    return common / "superpowers" / "perf"
+
+
+def merge_base(repo: Path, base: str | None) -> str:
+    refs = [base] if base else BASE_CANDIDATES
+    for ref in refs:
+        if _git(repo, "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}", check=False):
+            return _git(repo, "merge-base", "HEAD", ref)
+    raise ValueError(f"No base branch found (tried {', '.join(refs)}); pass --base")
+
+
+def branch_key(repo: Path) -> str:
+    """HEAD, plus a hash of uncommitted changes and untracked files so a dirty tree gets its own cache entry."""
+    head = _git(repo, "rev-parse", "HEAD")
+    digest = hashlib.sha256()
+    dirty = False
+    diff = subprocess.run(["git", "-C", str(repo), "diff", "HEAD", "--binary", "--no-ext-diff"], capture_output=True, check=True).stdout
+    if diff:
+        digest.update(diff)
+        dirty = True
+    untracked = subprocess.run(
+        ["git", "-C", str(repo), "ls-files", "--others", "--exclude-standard", "-z"], capture_output=True, check=True
+    ).stdout
+    for name in sorted(filter(None, untracked.split(b"\0"))):
+        path = repo / os.fsdecode(name)
+        digest.update(name + b"\0" + (hashlib.sha256(path.read_bytes()).digest() if path.is_file() else b"-"))
+        dirty = True
+    return f"{head}+{digest.hexdigest()[:12]}" if dirty else head
+
+
+def discover(repo: Path, command: str | None = None) -> dict | None:
+    configured = command or _git(repo, "config", "--get", "superpowers.perfCommand", check=False)
+    if configured:
+        return {"kind": "command", "command": shlex.split(configured)}
+    if (repo / "asv.conf.json").exists():
+        return {"kind": "asv", "command": ["asv"]}
+    for test_file in sorted(repo.rglob("test_*.py")):
+        if ".venv" in test_file.parts or "site-packages" in test_file.parts:
+            continue
+        if re.search(r"def test_\w*\([^)]*\bbenchmark\b", test_file.read_text(errors="ignore")):
+            return {"kind": "pytest-benchmark", "command": [sys.executable, "-m", "pytest", "--benchmark-only", "-q"]}
+    package = repo / "package.json"
+    if package.exists() and "bench" in json.loads(package.read_text()).get("scripts", {}):
+        return {"kind": "command", "command": ["npm", "run", "--silent", "bench"]}
+    return None
+
+
+def parse_pytest_benchmark(report: dict) -> dict[str, float]:
+    return {bench["fullname"]: bench["stats"]["median"] for bench in report.get("benchmarks", [])}
+
+
+def measure(suite: dict, cwd: Path, timeout: float) -> dict[str, float]:
+    """One run of the suite: benchmark name -> seconds (lower is better)."""
+    if suite["kind"] == "pytest-benchmark":
+        fd, report = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            subprocess.run([*suite["command"], f"--benchmark-json={report}"], cwd=cwd, capture_output=True, timeout=timeout)
+            return parse_pytest_benchmark(json.loads(Path(report).read_text() or "{}"))
+        finally:
+            os.unlink(report)
+    started = time.perf_counter()
+    proc = subprocess.run(suite["command"], cwd=cwd, capture_output=True, text=True, timeout=timeout)
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark command failed in {cwd}: {proc.stderr.strip()[-500:]}")
+    lines = proc.stdout.strip().splitlines()
+    try:
+        values = json.loads(lines[-1]) if lines else None
+    except json.JSONDecodeError:
+        values = None
+    if isinstance(values, dict) and values and all(isinstance(v, (int, float)) for v in values.values()):
+        return {str(name): float(value) for name, value in values.items()}
+    return {"command": elapsed}
+
+
+def mann_whitney_greater(slower: list[float], faster: list[float]) -> float:
+    """One-sided p-value that ``slower`` is stochastically greater than ``faster`` (normal approximation)."""
+    n1, n2 = len(slower), len(faster)
+    if not n1 or not n2:
+        return 1.0
+    ranked = sorted([(value, 0) for value in slower] + [(value, 1) for value in faster])
+    ranks = [0.0] * len(ranked)
+    ties = 0.0
+    index = 0
+    while index < len(ranked):
+        end = index
+        while end + 1 < len(ranked) and ranked[end + 1][0] == ranked[index][0]:
+            end += 1
+        for position in range(index, end + 1):
+            ranks[position] = (index + end) / 2 + 1
+        size = end - index + 1
+        ties += size**3 - size
+        index = end + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    total = n1 + n2
+    variance = n1 * n2 / 12 * ((total + 1) - ties / (total * (total - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)  # continuity correction
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(base: dict[str, list[float]], branch: dict[str, list[float]], threshold: float, alpha: float) -> list[dict]:
+    rows = []
+    for name in sorted(set(base) & set(branch)):
+        before, after = statistics.median(base[name]), statistics.median(branch[name])
+        ratio = after / before if before else float("inf")
+        if ratio > 1 + threshold and mann_whitney_greater(branch[name], base[name]) < alpha:
+            verdict, p_value = "regression", mann_whitney_greater(branch[name], base[name])
+        elif ratio < 1 / (1 + threshold) and mann_whitney_greater(base[name], branch[name]) < alpha:
+            verdict, p_value = "improvement", mann_whitney_greater(base[name], branch[name])
+        else:
+            verdict = "unchanged"
+            p_value = min(mann_whitney_greater(branch[name], base[name]), mann_whitney_greater(base[name], branch[name]))
+        rows.append({
+            "benchmark": name,
+            "base_median": before,
+            "branch_median": after,
+            "change": round(ratio - 1, 4),
+            "p_value": round(p_value, 4),
+            "samples": [len(base[name]), len(branch[name])],
+            "verdict": verdict,
+        })
+    return rows
+
+
+class SampleCache:
+    """Per (command, commit) benchmark samples, persisted as JSON under the git directory."""
+
+    def __init__(self, path: Path, command: list[str]):
+        self.path = path
+        self.command_key = hashlib.sha256(json.dumps(command).encode()).hexdigest()[:16]
+        self.data = json.loads(path.read_text()) if path.exists() else {}
+
+    def samples(self, commit: str, newest: int | None = None) -> dict[str, list[float]]:
+        stored = self.data.get(self.command_key, {}).get(commit, {})
+        return {name: values[-newest:] for name, values in stored.items()} if newest else stored
+
+    def add(self, commit: str, run: dict[str, float]) -> None:
+        entry = self.data.setdefault(self.command_key, {}).setdefault(commit, {})
+        for name, value in run.items():
+            entry[name] = [*entry.get(name, []), value][-MAX_CACHED:]
+
+    def rounds(self, commit: str) -> int:
+        return min((len(values) for values in self.samples(commit).values()), default=0)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as handle:
+            json.dump(self.data, handle)
+        os.replace(tmp, self.path)
+
+
+def _base_worktree(repo: Path, commit: str, shared: list[str], setup: str | None) -> Path:
+    path = perf_dir(repo) / "worktrees" / commit[:12]
+    if not path.exists():
+        _git(repo, "worktree", "add", "-q", "--detach", str(path), commit)
+        for name in shared:
+            source = repo / name
+            if source.exists() and not (path / name).exists():
+                (path / name).parent.mkdir(parents=True, exist_ok=True)
+                (path / name).symlink_to(source.resolve(), target_is_directory=source.is_dir())
+        if setup:
+            subprocess.run(setup, shell=True, cwd=path, capture_output=True, check=False)
+    return path
+
+
+def asv_gate(repo: Path, base: str, threshold: float) -> dict:
+    proc = subprocess.run(
+        ["asv", "continuous", "--factor", str(1 + threshold), "--split", base, "HEAD"],
+        cwd=repo, capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stdout.splitlines():
+        match = ASV_LINE.match(line)
+        if match and match.group(4) != "n/a":
+            sign, before, after, ratio, name = match.groups()
+            verdict = {"+": "regression", "-": "improvement"}.get(sign or "", "unchanged")
+            rows.append({
+                "benchmark": name, "base_median": before, "branch_median": after,
+                "change": round(float(ratio) - 1, 4), "p_value": None, "samples": None, "verdict": verdict,
+            })
+    return {"rows": rows, "measured": {"base": None, "branch": None}}
+
+
+def gate(
+    repo: Path,
+    base: str | None = None,
+    command: str | None = None,
+    rounds: int = DEFAULT_ROUNDS,
+    fresh: int = DEFAULT_FRESH,
+    threshold: float = DEFAULT_THRESHOLD,
+    alpha: float = DEFAULT_ALPHA,
+    shared: list[str] | None = None,
+    setup: str | None = None,
+    timeout: float = 900,
+) -> dict:
+    started = time.perf_counter()
+    suite = discover(repo, command)
+    if suite is None:
+        return {"status": "no benchmarks", "suite": None, "rows": []}
+    base_commit = merge_base(repo, base)
+    if suite["kind"] == "asv":
+        result = asv_gate(repo, base_commit, threshold)
+    else:
+        head = branch_key(repo)
+        cache = SampleCache(perf_dir(repo) / "samples.json", suite["command"])
+        # Cached rounds fill up the sample, but both sides are always re-measured side by side,
+        # so drift since the cache was written (another load, a cooler machine) shows up in both.
+        fresh = min(fresh, rounds)
+        need = {side: max(rounds - cache.rounds(commit), fresh) for side, commit in (("base", base_commit), ("branch", head))}
+        if base_commit == head:
+            need["base"] = 0  # nothing to compare against; the branch run is the baseline
+        worktree = _base_worktree(repo, base_commit, shared or [], setup) if need["base"] > 0 else None
+        measured = {"base": 0, "branch": 0}
+        try:
+            for index in range(max(need.values(), default=0)):
+                order = ("base", "branch") if index % 2 == 0 else ("branch", "base")  # ABBA interleaving
+                for side in order:
+                    if measured[side] < need[side]:
+                        cwd, commit = (worktree, base_commit) if side == "base" else (repo, head)
+                        cache.add(commit, measure(suite, cwd, timeout))
+                        measured[side] += 1
+                cache.save()
+        finally:
+            if worktree is not None:
+                _git(repo, "worktree", "remove", "--force", str(worktree), check=False)
+        result = {
+            "rows": compare(cache.samples(base_commit, rounds), cache.samples(head, rounds), threshold, alpha),
+            "measured": measured,
+        }
+    regressions = [row for row in result["rows"] if row["verdict"] == "regression"]
+    return {
+        "status": "failed" if regressions else "passed" if result["rows"] else "no benchmarks",
+        "suite": suite["kind"],
+        "command": shlex.join(suite["command"]),
+        "base": base_commit,
+        "threshold": threshold,
+        "alpha": alpha,
+        "rows": result["rows"],
+        "regressions": [row["benchmark"] for row in regressions],
+        "measured_runs": result["measured"],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def _fmt(value) -> str:
+    return f"{value * 1000:.3f}ms" if isinstance(value, float) else str(value)
+
+
+def render(result: dict) -> str:
+    if result["status"] == "no benchmarks":
+        return "### Performance\n- No benchmarks found (configure one with `git config superpowers.perfCommand \"<cmd>\"`)"
+    lines = [
+        "### Performance",
+        f"- Suite: {result['suite']} (`{result['command']}`) vs merge base {result['base'][:12]}",
+        f"- Threshold: {result['threshold']:.0%} slower at p < {result['alpha']}",
+        f"- Fresh runs: base {result['measured_runs']['base']}, branch {result['measured_runs']['branch']} "
+        "(the rest came from the per-commit cache)" if result["measured_runs"]["base"] is not None else "- asv continuous",
+        "",
+        "| Benchmark | Base | Branch | Change | p | Verdict |",
+        "|-----------|------|--------|--------|---|---------|",
+    ]
+    for row in result["rows"]:
+        mark = {"regression": "❌ regression", "improvement": "✅ improvement"}.get(row["verdict"], "unchanged")
+        lines.append(
+            f"| {row['benchmark']} | {_fmt(row['base_median'])} | {_fmt(row['branch_median'])} | "
+            f"{row['change']:+.1%} | {row['p_value'] if row['p_value'] is not None else '-'} | {mark} |"
+        )
+    lines.append("")
+    lines.append(f"- Result: {'FAILED — ' + ', '.join(result['regressions']) if result['regressions'] else 'PASSED'}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the merge base against the branch")
+    parser.add_argument("--repo", default=".", help="Repository path (default: current directory)")
+    parser.add_argument("--base", help="Base branch (default: main or master)")
+    parser.add_argument("--command", help="Benchmark command (default: discover)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Samples per side (default: 5)")
+    parser.add_argument("--fresh", type=int, default=DEFAULT_FRESH, help="Rounds per side measured on every run (default: 2)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown that counts (default: 0.10)")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="Significance level (default: 0.05)")
+    parser.add_argument("--shared", action="append", default=[], help="Dependency dir to share with the base worktree")
+    parser.add_argument("--setup", help="Setup command run once in the base worktree")
+    parser.add_argument("--timeout", type=float, default=900, help="Per-run timeout in seconds")
+    parser.add_argument("--markdown", action="store_true", help="Print the verification-report section")
+    args = parser.parse_args(argv)
+
+    repo = Path(_git(Path(args.repo), "rev-parse", "--show-toplevel"))
+    try:
+        result = gate(
+            repo, args.base, args.command, args.rounds, args.fresh, args.threshold, args.alpha, args.shared, args.setup,
+            args.timeout,
+        )
+    except (ValueError, RuntimeError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as exc:
+        print(f"Error: {getattr(exc, 'stderr', None) or exc}", file=sys.stderr)
+        return 1
+
+    print(render(result) if args.markdown else json.dumps(result, indent=2))
+    return 1 if result["status"] == "failed" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Test the concurrent multi-approach mode (fan_out) of brainstorming.yaml."""
+
+from pathlib import Path
+
+import yaml
+
+RECIPE = Path(__file__).parent.parent / "recipes" / "brainstorming.yaml"
+
+
+def _steps() -> dict:
+    recipe = yaml.safe_load(RECIPE.read_text())
+    return {step["id"]: step for stage in recipe["stages"] for step in stage["steps"]}
+
+
+def test_fan_out_is_opt_in():
+    assert yaml.safe_load(RECIPE.read_text())["context"]["fan_out"] == "false"
+
+
+def test_sequential_and_fan_out_paths_are_exclusive():
+    steps = _steps()
+    assert steps["explore-approaches"]["condition"] == "{{fan_out}} != 'true'"
+    for step_id in ("list-approaches", "develop-approaches", "judge-approaches"):
+        assert steps[step_id]["condition"] == "{{fan_out}} == 'true'"
+
+
+def test_one_concurrent_brainstormer_per_candidate():
+    steps = _steps()
+    assert steps["list-approaches"]["parse_json"] is True
+    develop = steps["develop-approaches"]
+    assert develop["foreach"] == "{{candidates.approaches}}"
+    assert develop["parallel"] is True
+    assert develop["collect"] == "approach_results"
+    assert develop["parse_json"] is True
+    assert develop["timeout"] < steps["explore-approaches"]["timeout"]
+
+
+def test_judge_feeds_the_design_like_the_sequential_step():
+    steps = _steps()
+    assert "{{approach_results}}" in steps["judge-approaches"]["prompt"]
+    assert steps["judge-approaches"]["output"] == steps["explore-approaches"]["output"] == "approaches"
+    assert "{{approaches}}" in steps["present-design"]["prompt"]
+
+
+def test_step_order():
+    ids = list(_steps())
+    order = ["explore-requirements", "list-approaches", "develop-approaches", "judge-approaches", "present-design"]
+    assert [ids.index(step_id) for step_id in order] == sorted(ids.index(step_id) for step_id in order)
@@ -0,0 +1,331 @@
+"""Tests for the condition-based waiting helpers (skills/systematic-debugging/condition_wait.py and
+condition-wait.mjs), with a benchmark against fixed sleeps on a flaky-by-timing sample suite."""
+
+import asyncio
+import http.server
+import importlib.util
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+SKILL_DIR = REPO_ROOT / "skills" / "systematic-debugging"
+
+_spec = importlib.util.spec_from_file_location("condition_wait", SKILL_DIR / "condition_wait.py")
+condition_wait = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(condition_wait)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _later(delay: float, action) -> threading.Thread:
+    thread = threading.Thread(target=lambda: (time.sleep(delay), action()), daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def stub_server():
+    """A local HTTP stub on a free port that starts listening after a delay and answers 503 until ready."""
+    port = _free_port()
+    state = {"ready": False}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b'{"status": "ok"}' if state["ready"] else b"warming up"
+            self.send_response(200 if state["ready"] else 503)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    servers = []
+
+    def start():
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        servers.append(server)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield port, start, state
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class TestWaitFor:
+    def test_returns_the_truthy_value(self):
+        values = iter([None, 0, "", {"id": 7}])
+        assert condition_wait.wait_for(lambda: next(values), "record", interval=0.001) == {"id": 7}
+
+    def test_backs_off_exponentially_with_bounded_jitter(self):
+        fake = FakeClock()
+        with pytest.raises(condition_wait.WaitTimeout):
+            condition_wait.wait_for(lambda: False, "never", timeout=2, clock=fake.clock, sleep=fake.sleep,
+                                    rng=random.Random(1))
+        base = [min(0.01 * 1.5 ** n, 0.25) for n in range(len(fake.sleeps))]
+        for slept, expected in zip(fake.sleeps[:-1], base):
+            assert expected * 0.8 <= slept <= expected * 1.2
+        assert max(fake.sleeps) <= 0.25 * 1.2
+        assert fake.now == pytest.approx(2.0)
+        assert len(fake.sleeps) < 20  # a fixed 10 ms poll would have made 200 checks
+
+    def test_timeout_diagnostics(self):
+        fake = FakeClock()
+        with pytest.raises(condition_wait.WaitTimeout) as error:
+            condition_wait.wait_for(lambda: [], "queue to fill", timeout=1, clock=fake.clock, sleep=fake.sleep)
+        message = str(error.value)
+        assert message.startswith("Timed out after 1.00s (timeout 1s) waiting for queue to fill;")
+        assert f"{error.value.attempts} checks, last value: []" in message
+        assert isinstance(error.value, TimeoutError)
+
+    def test_ignored_errors_are_reported_others_propagate(self):
+        fake = FakeClock()
+
+        def flaky():
+            raise ConnectionRefusedError("[Errno 111] Connection refused")
+
+        with pytest.raises(condition_wait.WaitTimeout, match="last error: ConnectionRefusedError: .*refused"):
+            condition_wait.wait_for(flaky, "api", timeout=0.5, ignore=(OSError,), clock=fake.clock, sleep=fake.sleep)
+        with pytest.raises(ConnectionRefusedError):
+            condition_wait.wait_for(flaky, "api", timeout=0.5, clock=fake.clock, sleep=fake.sleep)
+
+    def test_checks_once_more_at_the_deadline(self):
+        fake = FakeClock()
+        assert condition_wait.wait_for(lambda: fake.now >= 1.0 and "late", timeout=1, clock=fake.clock,
+                                       sleep=fake.sleep) == "late"
+
+    def test_default_description_names_the_condition(self):
+        def cache_warm():
+            return False
+
+        with pytest.raises(condition_wait.WaitTimeout, match="waiting for condition .*cache_warm"):
+            condition_wait.wait_for(cache_warm, timeout=0.05)
+
+
+class TestConditions:
+    def test_file_with_content(self, tmp_path):
+        target = tmp_path / "out.json"
+        _later(0.05, lambda: target.write_text('{"state": "pending"}'))
+        _later(0.15, lambda: target.write_text('{"state": "done"}'))
+        assert condition_wait.wait_for_file(target, contains='"done"', timeout=5) == target
+
+    def test_port_and_http_stub(self, stub_server):
+        port, start, state = stub_server
+        _later(0.1, start)
+        _later(0.3, lambda: state.update(ready=True))
+        assert condition_wait.wait_for_port(port, timeout=5) is True
+        assert condition_wait.wait_for_http(f"http://127.0.0.1:{port}/health", contains="ok", timeout=5) == '{"status": "ok"}'
+
+    def test_http_timeout_reports_the_last_status(self, stub_server):
+        port, start, _ = stub_server
+        start()
+        with pytest.raises(condition_wait.WaitTimeout, match=r"GET .*/health to return 200.*last value: None"):
+            condition_wait.wait_for_http(f"http://127.0.0.1:{port}/health", timeout=0.2)
+
+    def test_refused_connection_is_not_yet(self):
+        port = _free_port()
+        with pytest.raises(condition_wait.WaitTimeout, match="last error: URLError"):
+            condition_wait.wait_for_http(f"http://127.0.0.1:{port}/", timeout=0.2)
+
+    def test_process_exit(self):
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.2)"])
+        assert condition_wait.wait_for_process(child, timeout=5) is True
+        assert condition_wait.process_exited(child.pid)()
+
+
+class TestAsync:
+    def test_async_condition_and_shortcuts(self, stub_server, tmp_path):
+        port, start, state = stub_server
+
+        async def scenario():
+            queue: asyncio.Queue = asyncio.Queue()
+
+            async def producer():
+                for n in range(3):
+                    await asyncio.sleep(0.02)
+                    await queue.put(n)
+
+            task = asyncio.create_task(producer())
+            await condition_wait.async_wait_for(lambda: queue.qsize() >= 3, "3 queued items")
+
+            async def drained():
+                return queue.empty() or (await queue.get()) is None
+
+            await condition_wait.async_wait_for(drained, "queue drained")
+            _later(0.05, start)
+            _later(0.1, lambda: state.update(ready=True))
+            await condition_wait.async_wait_for_port(port)
+            body = await condition_wait.async_wait_for_http(f"http://127.0.0.1:{port}/")
+            await task
+            return body
+
+        assert asyncio.run(scenario()) == '{"status": "ok"}'
+
+    def test_async_timeout(self):
+        with pytest.raises(condition_wait.WaitTimeout, match="waiting for never"):
+            asyncio.run(condition_wait.async_wait_for(lambda: False, "never", timeout=0.05))
+
+
+NODE_SCENARIO = """
+import { spawn } from 'node:child_process';
+import { writeFileSync } from 'node:fs';
+import http from 'node:http';
+import {
+  waitFor, waitForFile, waitForPort, waitForHttp, waitForProcess, WaitTimeoutError,
+} from '%(module)s';
+
+const results = {};
+let n = 0;
+results.value = await waitFor(async () => (++n >= 3 ? { n } : null), 'third check');
+
+const sleeps = [];
+const realSetTimeout = globalThis.setTimeout;
+globalThis.setTimeout = (fn, ms) => { sleeps.push(ms); return realSetTimeout(fn, 0); };
+try {
+  await waitFor(() => false, { description: 'never', timeoutMs: 60, random: () => 0.5 });
+} catch (error) {
+  results.timeout = { name: error.name, isClass: error instanceof WaitTimeoutError, message: error.message };
+}
+globalThis.setTimeout = realSetTimeout;
+results.firstSleeps = sleeps.slice(0, 4).map((ms) => Math.round(ms * 10) / 10);
+
+try {
+  await waitFor(() => { throw new TypeError('boom'); }, { timeoutMs: 50 });
+} catch (error) {
+  results.propagated = error.name;
+}
+try {
+  await waitFor(() => { throw new RangeError('not yet'); }, { timeoutMs: 50, ignore: [RangeError] });
+} catch (error) {
+  results.ignored = error.message;
+}
+
+const file = '%(dir)s/out.json';
+setTimeout(() => writeFileSync(file, '{"state":"done"}'), 50);
+results.file = await waitForFile(file, { contains: 'done' });
+
+let ready = false;
+const server = http.createServer((req, res) => { res.writeHead(ready ? 200 : 503); res.end(ready ? 'ok' : 'warming'); });
+setTimeout(() => server.listen(%(port)d, '127.0.0.1'), 50);
+setTimeout(() => { ready = true; }, 150);
+results.port = await waitForPort(%(port)d);
+results.http = await waitForHttp('http://127.0.0.1:%(port)d/health');
+server.close();
+
+const child = spawn(process.execPath, ['-e', 'setTimeout(() => {}, 100)']);
+results.process = await waitForProcess(child);
+console.log(JSON.stringify(results));
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_js_helpers(tmp_path):
+    script = tmp_path / "scenario.mjs"
+    script.write_text(NODE_SCENARIO % {
+        "module": (SKILL_DIR / "condition-wait.mjs").as_posix(), "dir": tmp_path.as_posix(), "port": _free_port(),
+    })
+    proc = subprocess.run(["node", str(script)], capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    results = json.loads(proc.stdout)
+    assert results["value"] == {"n": 3}
+    assert results["timeout"]["name"] == "WaitTimeoutError" and results["timeout"]["isClass"]
+    assert results["timeout"]["message"].startswith("Timed out after")
+    assert "waiting for never;" in results["timeout"]["message"]
+    assert results["firstSleeps"] == [10, 15, 22.5, 33.8]
+    assert results["propagated"] == "TypeError"
+    assert results["ignored"].endswith("last error: RangeError: not yet")
+    assert results["file"].endswith("out.json")
+    assert (results["port"], results["http"], results["process"]) == (True, "ok", True)
+
+
+SAMPLE_SUITE = '''
+"""A flaky-by-timing suite: each test starts background work and waits for it."""
+import os
+import threading
+import time
+
+import pytest
+
+from condition_wait import wait_for
+
+# How long each background job takes. The slow tail is what a loaded CI machine looks like.
+LATENCIES = [0.01, 0.02, 0.02, 0.03, 0.04, 0.05, 0.05, 0.06, 0.08, 0.1, 0.12, 0.2, 0.25, 0.03, 0.04, 0.05]
+GUESS = 0.15  # the fixed sleep someone chose because it "usually works"
+
+
+class Job:
+    def __init__(self, latency):
+        self.result = None
+        threading.Timer(latency, lambda: setattr(self, "result", "done")).start()
+
+
+@pytest.mark.parametrize("latency", LATENCIES)
+def test_job_completes(latency):
+    job = Job(latency)
+    if os.environ["WAIT_STYLE"] == "sleep":
+        time.sleep(GUESS)
+    else:
+        wait_for(lambda: job.result, "job result", timeout=5)
+    assert job.result == "done"
+'''
+
+
+def test_benchmark_against_fixed_sleeps(tmp_path, capsys):
+    suite = tmp_path / "suite"
+    suite.mkdir()
+    shutil.copy(SKILL_DIR / "condition_wait.py", suite / "condition_wait.py")
+    (suite / "test_jobs.py").write_text(SAMPLE_SUITE)
+
+    def run(style: str) -> tuple[float, subprocess.CompletedProcess]:
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", str(suite)],
+            capture_output=True, text=True, cwd=suite, env={**os.environ, "WAIT_STYLE": style},
+        )
+        return time.perf_counter() - start, proc
+
+    sleep_time, sleep_run = run("sleep")
+    wait_time, wait_run = run("wait")
+    summary = lambda proc: proc.stdout.strip().splitlines()[-1]  # noqa: E731
+    with capsys.disabled():
+        print(
+            f"\n[condition-wait] 16-test flaky-by-timing suite: fixed sleep(0.15) {sleep_time:.2f}s ({summary(sleep_run)}), "
+            f"wait_for {wait_time:.2f}s ({summary(wait_run)})"
+        )
+    assert sleep_run.returncode == 1 and "2 failed, 14 passed" in sleep_run.stdout
+    assert wait_run.returncode == 0, wait_run.stdout
+    assert wait_time < sleep_time
+
+
+def test_guidance_points_at_the_helpers():
+    techniques = (REPO_ROOT / "context" / "debugging-techniques.md").read_text()
+    skill = (SKILL_DIR / "SKILL.md").read_text()
+    for name in ("condition_wait.py", "condition-wait.mjs"):
+        assert name in techniques and name in skill
@@ -0,0 +1,154 @@
+"""Tests for the project-context survey cache (skills/recipe-tools/context_cache.py)
+and its wiring into the brainstorming, writing-plans and full-cycle recipes."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+CACHE_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "context_cache.py"
+RECIPES_DIR = REPO_ROOT / "recipes"
+
+_spec = importlib.util.spec_from_file_location("context_cache", CACHE_SCRIPT)
+context_cache = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(context_cache)
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def _commit(repo: Path, path: str, content: str) -> None:
+    file_path = repo / path
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_text(content)
+    _git(repo, "add", path)
+    _git(repo, "commit", "-q", "-m", f"update {path}")
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "dev@example.com")
+    _git(tmp_path, "config", "user.name", "Dev")
+    _commit(tmp_path, "pyproject.toml", "[project]\nname = 'demo'\n")
+    _commit(tmp_path, "src/demo/core.py", "def run():\n    return 1\n")
+    return tmp_path
+
+
+class TestCacheLookup:
+    def test_empty_cache_misses(self, repo):
+        assert context_cache.get(repo)["hit"] is False
+
+    def test_exact_hit_after_put(self, repo):
+        context_cache.put(repo, "Python project using pytest")
+        lookup = context_cache.get(repo)
+        assert lookup == {**lookup, "hit": True, "reason": "exact"}
+        assert context_cache.show(repo) == "Python project using pytest"
+
+    def test_cache_lives_in_git_dir(self, repo):
+        context_cache.put(repo, "survey")
+        assert list((repo / ".git" / "superpowers" / "context-cache").glob("*.json"))
+        status = subprocess.run(
+            ["git", "-C", str(repo), "status", "--porcelain"], capture_output=True, text=True
+        )
+        assert status.stdout == ""
+
+    def test_source_only_commit_reuses_survey(self, repo):
+        context_cache.put(repo, "survey")
+        _commit(repo, "src/demo/core.py", "def run():\n    return 2\n")
+        lookup = context_cache.get(repo)
+        assert lookup["hit"] is True
+        assert lookup["reason"] == "no relevant changes"
+
+    def test_manifest_change_invalidates(self, repo):
+        context_cache.put(repo, "survey")
+        _commit(repo, "pyproject.toml", "[project]\nname = 'demo'\ndependencies = ['django']\n")
+        lookup = context_cache.get(repo)
+        assert lookup["hit"] is False
+        assert "pyproject.toml" in lookup["reason"]
+
+    def test_new_top_level_directory_invalidates(self, repo):
+        context_cache.put(repo, "survey")
+        _commit(repo, "web/app.ts", "export {}\n")
+        assert context_cache.get(repo)["hit"] is False
+
+    def test_deep_new_file_is_not_structural(self, repo):
+        context_cache.put(repo, "survey")
+        _commit(repo, "src/demo/extra/helpers.py", "X = 1\n")
+        assert context_cache.get(repo)["hit"] is True
+
+    def test_dirty_tree_changes_key(self, repo):
+        clean = context_cache.current_key(repo)["key"]
+        (repo / "src" / "demo" / "core.py").write_text("def run():\n    return 3\n")
+        dirty = context_cache.current_key(repo)["key"]
+        assert clean != dirty
+        assert context_cache.current_key(repo)["key"] == dirty
+
+    def test_dirty_relevant_file_invalidates(self, repo):
+        context_cache.put(repo, "survey")
+        (repo / "package.json").write_text("{}\n")
+        assert context_cache.get(repo)["hit"] is False
+
+    def test_unrelated_history_misses(self, repo):
+        context_cache.put(repo, "survey")
+        _git(repo, "checkout", "-q", "--orphan", "fresh")
+        _git(repo, "rm", "-rfq", ".")
+        _commit(repo, "main.go", "package main\n")
+        assert context_cache.get(repo)["hit"] is False
+
+    def test_old_entries_are_pruned(self, repo, monkeypatch):
+        monkeypatch.setattr(context_cache, "MAX_ENTRIES", 3)
+        for i in range(5):
+            _commit(repo, "pyproject.toml", f"[project]\nname = 'demo{i}'\n")
+            context_cache.put(repo, f"survey {i}")
+        assert len(list(context_cache.cache_dir(repo).glob("*.json"))) == 3
+        assert context_cache.show(repo) == "survey 4"
+
+
+class TestCli:
+    def test_get_outside_git_is_a_miss(self, tmp_path):
+        result = subprocess.run(
+            [sys.executable, str(CACHE_SCRIPT), "get", "--repo", str(tmp_path)],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        assert '"hit": false' in result.stdout
+
+    @pytest.mark.parametrize("init", [False, True], ids=["outside-git", "no-commits"])
+    def test_put_without_a_commit_is_a_no_op(self, tmp_path, init):
+        if init:
+            subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+        result = subprocess.run(
+            [sys.executable, str(CACHE_SCRIPT), "put", "--repo", str(tmp_path)],
+            input="survey", capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout)["stored"] is False
+
+
+class TestRecipeWiring:
+    @pytest.mark.parametrize(
+        "recipe_file",
+        ["brainstorming.yaml", "writing-plans.yaml", "superpowers-full-development-cycle.yaml"],
+    )
+    def test_survey_only_runs_on_cache_miss(self, recipe_file):
+        recipe = yaml.safe_load((RECIPES_DIR / recipe_file).read_text())
+        steps = {step["id"]: step for stage in recipe["stages"] for step in stage["steps"]}
+        assert "get" in steps["check-context-cache"]["command"]
+        assert steps["understand-context"]["condition"] == "{{context_cache.hit}} == false"
+        assert steps["load-cached-context"]["condition"] == "{{context_cache.hit}} == true"
+        assert steps["load-cached-context"]["output"] == "project_context"
+        assert "put" in steps["store-context"]["command"]
+        assert steps["store-context"]["on_error"] == "continue"
+
+    def test_analyze_requirements_receives_cached_context(self):
+        recipe = yaml.safe_load((RECIPES_DIR / "writing-plans.yaml").read_text())
+        steps = {step["id"]: step for stage in recipe["stages"] for step in stage["steps"]}
+        assert "{{project_context}}" in steps["analyze-requirements"]["prompt"]
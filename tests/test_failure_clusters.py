@@ -0,0 +1,168 @@
+"""Tests for failure clustering (skills/parallel-agent-dispatch/failure_clusters.py)."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+CLUSTER_SCRIPT = REPO_ROOT / "skills" / "parallel-agent-dispatch" / "failure_clusters.py"
+RECORDED = Path(__file__).parent / "fixtures" / "test-output"
+
+_spec = importlib.util.spec_from_file_location("failure_clusters", CLUSTER_SCRIPT)
+failure_clusters = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(failure_clusters)
+
+# A project after a bad dependency bump: three unrelated breakages, 80 failing tests.
+PROJECT = {
+    "app/__init__.py": "",
+    "app/runner.py": "def call(fn, *args):\n    return fn(*args)\n",
+    "app/auth.py": (
+        "from app.runner import call\n\n"
+        "def _check(user):\n    return {'admin': 1}[user]\n\n"
+        "def login(user):\n    return call(_check, user)\n"
+    ),
+    "app/billing.py": "def total(items):\n    return sum(item.price for item in items)\n",
+    "app/fmt.py": (
+        "from app.runner import call\n\n"
+        "def _money(value):\n    return '{:.2f} {}'.format(value)\n\n"
+        "def money(value):\n    return call(_money, value)\n"
+    ),
+    "tests/__init__.py": "",
+    "tests/test_auth.py": (
+        "import pytest\nfrom app.auth import login\n\n"
+        "@pytest.mark.parametrize('n', range(30))\n"
+        "def test_login(n):\n    assert login(f'user{n}')\n"
+    ),
+    "tests/test_billing.py": (
+        "import pytest\nfrom app.billing import total\n\n"
+        "@pytest.mark.parametrize('n', range(20))\n"
+        "def test_total(n):\n    assert total([n]) == n\n"
+    ),
+    "tests/test_invoice.py": (
+        "import pytest\nfrom app.billing import total\n\n"
+        "@pytest.mark.parametrize('n', range(10))\n"
+        "def test_invoice_total(n):\n    assert total([n, n]) == 2 * n\n"
+    ),
+    "tests/test_fmt.py": (
+        "import pytest\nfrom app.fmt import money\n\n"
+        "@pytest.mark.parametrize('n', range(20))\n"
+        "def test_money(n):\n    assert money(n) == f'€{n}.00'\n"
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def run(tmp_path_factory) -> tuple[Path, str]:
+    root = tmp_path_factory.mktemp("project")
+    for path, content in PROJECT.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(content)
+    proc = subprocess.run(
+        [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "tests"], cwd=root, capture_output=True, text=True
+    )
+    return root, proc.stdout
+
+
+@pytest.fixture(scope="module")
+def result(run) -> dict:
+    root, output = run
+    return failure_clusters.cluster(output, root)
+
+
+def _by_module(result: dict) -> dict:
+    return {tuple(group["modules"]): group for group in result["clusters"]}
+
+
+class TestClustering:
+    def test_eighty_failures_become_three_domains(self, result):
+        assert result["failures"] == 80
+        assert sorted(group["size"] for group in result["clusters"]) == [20, 30, 30]
+
+    def test_shared_origin_joins_test_modules(self, result):
+        billing = _by_module(result)[("tests/test_billing.py", "tests/test_invoice.py")]
+        assert billing["signatures"] == ["AttributeError: 'int' object has no attribute 'price'"]
+        assert billing["scope"] == ["app/billing.py", "tests/test_billing.py", "tests/test_invoice.py"]
+
+    def test_files_touched_by_two_clusters_are_shared(self, result):
+        assert result["shared_files"] == {"app/runner.py": ["cluster-1", "cluster-3"]}
+        assert result["parallel_safe"] is False
+        assert "app/runner.py is touched by cluster-1, cluster-3" in result["warnings"][0]
+        auth = _by_module(result)[("tests/test_auth.py",)]
+        assert auth["scope"] == ["app/auth.py", "tests/test_auth.py"]
+        assert auth["shared"] == ["app/runner.py"]
+
+    def test_max_agents_merges_the_smallest_cluster(self, run):
+        root, output = run
+        merged = failure_clusters.cluster(output, root, max_agents=2)
+        assert sorted(group["size"] for group in merged["clusters"]) == [30, 50]
+        # fmt shared app/runner.py with auth, so it folds into auth's cluster.
+        assert _by_module(merged)[("tests/test_auth.py", "tests/test_fmt.py")]["size"] == 50
+        assert merged["parallel_safe"] is True
+
+    def test_instruction_is_self_contained(self, result):
+        text = failure_clusters.instruction(_by_module(result)[("tests/test_auth.py",)])
+        assert text.startswith("Fix the 30 failing test(s) in tests/test_auth.py:")
+        assert "KeyError: 'userN'" in text
+        assert "Scope: you may edit app/auth.py, tests/test_auth.py." in text
+        assert "Do NOT edit app/runner.py" in text
+
+
+def test_generic_assertions_do_not_join_unrelated_modules(tmp_path):
+    for name, values in (("parser", (2, 3)), ("cache", (0, 1))):
+        (tmp_path / f"test_{name}.py").write_text(
+            "def test_{}():\n    got, want = {}, {}\n    assert got == want\n".format(name, *values)
+        )
+    output = subprocess.run(
+        [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "."], cwd=tmp_path, capture_output=True, text=True
+    ).stdout
+    result = failure_clusters.cluster(output, tmp_path)
+    assert {group["signatures"][0] for group in result["clusters"]} == {"assert N == N"}
+    assert sorted(group["modules"] for group in result["clusters"]) == [["test_cache.py"], ["test_parser.py"]]
+
+
+@pytest.mark.parametrize(
+    "signature, specific",
+    [
+        ("KeyError: 'user-N'", True),
+        ("AttributeError: 'int' object has no attribute 'price'", True),
+        ("AssertionError: assert {'status': N} == {'status': N, 'body': 'ok'}", True),
+        ("assert N == N", False),
+        ("AssertionError: assert N is None", False),
+        ("got N, want N", False),
+        ("expect(received).toBe(expected) // Object.is equality", False),
+    ],
+)
+def test_signature_specificity(signature, specific):
+    assert failure_clusters.is_specific(signature) is specific
+
+
+def test_recorded_jest_run_clusters_by_test_file():
+    result = failure_clusters.cluster((RECORDED / "jest.txt").read_text())
+    assert [group["modules"] for group in result["clusters"]] == [["src/api/login.test.js"], ["src/api/session.test.js"]]
+
+
+def test_cli_markdown(run):
+    root, output = run
+    proc = subprocess.run(
+        [sys.executable, str(CLUSTER_SCRIPT), "--repo", str(root), "--markdown"],
+        input=output, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.startswith("## Failure Clusters — 80 failures, 3 independent domains")
+    assert "WARNING: app/runner.py" in proc.stdout
+
+
+def test_cli_json(run):
+    root, output = run
+    proc = subprocess.run(
+        [sys.executable, str(CLUSTER_SCRIPT), "--repo", str(root)], input=output, capture_output=True, text=True
+    )
+    assert json.loads(proc.stdout)["failures"] == 80
+
+
+def test_skill_points_to_the_tool():
+    assert "failure_clusters.py" in (REPO_ROOT / "skills" / "parallel-agent-dispatch" / "SKILL.md").read_text()
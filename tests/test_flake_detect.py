@@ -0,0 +1,124 @@
+"""Tests for the parallel flaky-test detector (skills/systematic-debugging/flake_detect.py)."""
+
+import importlib.util
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+DETECT_SCRIPT = REPO_ROOT / "skills" / "systematic-debugging" / "flake_detect.py"
+
+_spec = importlib.util.spec_from_file_location("flake_detect", DETECT_SCRIPT)
+flake_detect = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(flake_detect)
+
+# A stand-in test runner: "runs" the test files it is given, in order.
+FAKE_RUNNER = '''\
+import os, sys, time
+mode = os.environ["FAKE_MODE"]
+tests = sys.argv[1:]
+time.sleep(float(os.environ.get("FAKE_SLEEP", "0")))
+if mode == "broken":
+    print("FAILED test_a.py::test_login - AssertionError: assert 401 == 200")
+    sys.exit(1)
+if mode == "flaky" and int(os.environ["FLAKE_SEED"]) % 3 == 0:
+    print(f"FAILED test_a.py::test_login - TimeoutError: waited 0x{id(tests):x} for 5.{os.getpid()}s")
+    sys.exit(1)
+if mode == "polluter" and tests.index("test_b.py") < tests.index("test_a.py"):
+    print("FAILED test_a.py::test_count - AssertionError: assert 2 == 1")
+    sys.exit(1)
+print(f"{len(tests)} passed")
+'''
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch) -> Path:
+    (tmp_path / "fake_runner.py").write_text(FAKE_RUNNER)
+    for name in ("test_a.py", "test_b.py", "test_c.py"):
+        (tmp_path / name).write_text("")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _detect(monkeypatch, mode: str, tests=("test_a.py",), runs: int = 12, **kwargs) -> dict:
+    monkeypatch.setenv("FAKE_MODE", mode)
+    return flake_detect.detect([sys.executable, "-m", "fake_runner", *tests], runs=runs, **kwargs)
+
+
+class TestClassification:
+    def test_every_run_failing_is_deterministic(self, project, monkeypatch):
+        report = _detect(monkeypatch, "broken")
+        assert report["classification"] == "deterministic"
+        assert report["signatures"] == {"test_a.py::test_login - AssertionError: assert N == N": 12}
+
+    def test_mixed_outcomes_are_flaky(self, project, monkeypatch):
+        report = _detect(monkeypatch, "flaky")
+        assert report["classification"] == "flaky"
+        assert (report["passed"], report["failed"]) == (8, 4)
+        assert report["failing_seeds"] == [3, 6, 9, 12]
+        # Addresses, pids and durations are masked, so every failure shares one signature.
+        assert len(report["signatures"]) == 1
+
+    def test_ordering_that_explains_failures_is_order_dependent(self, project, monkeypatch):
+        report = _detect(monkeypatch, "polluter", tests=("test_a.py", "test_b.py", "test_c.py"), runs=16)
+        assert report["classification"] == "order-dependent"
+        assert report["order"] == {"runs_first": "test_b.py", "then": "test_a.py"}
+
+    def test_no_failures_is_passing(self, project, monkeypatch):
+        assert _detect(monkeypatch, "passing", runs=4)["classification"] == "passing"
+
+    def test_timeouts_are_failures(self, project, monkeypatch):
+        monkeypatch.setenv("FAKE_SLEEP", "5")
+        report = _detect(monkeypatch, "passing", runs=2, timeout=0.5)
+        assert report["signatures"] == {"TIMEOUT after 0.5s": 2}
+
+
+class TestRunPlanning:
+    def test_only_existing_test_files_are_shuffled(self, project):
+        command = ["pytest", "-k", "login", "test_a.py", "test_b.py::test_x", "missing_test.py"]
+        assert flake_detect.test_args(command) == [3, 4]
+
+    def test_first_run_keeps_original_order(self, project):
+        plans = flake_detect.plan_runs(["pytest", "test_a.py", "test_b.py", "test_c.py"], 10, seed=1)
+        assert plans[0]["order"] == ["test_a.py", "test_b.py", "test_c.py"]
+        assert len({tuple(plan["order"]) for plan in plans}) > 1
+        assert [plan["seed"] for plan in plans] == list(range(1, 11))
+
+
+class TestCli:
+    def test_human_readable_report(self, project, monkeypatch):
+        monkeypatch.setenv("FAKE_MODE", "flaky")
+        result = subprocess.run(
+            [sys.executable, str(DETECT_SCRIPT), "--runs", "6", "--", sys.executable, "-m", "fake_runner", "test_a.py"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "Classification: FLAKY" in result.stdout
+        assert "Reproduce with FLAKE_SEED / PYTHONHASHSEED = 3" in result.stdout
+
+    def test_missing_command_is_an_error(self):
+        result = subprocess.run([sys.executable, str(DETECT_SCRIPT)], capture_output=True, text=True)
+        assert result.returncode == 1
+
+
+@pytest.mark.parametrize("mode_file", ["debug.md", "verify.md"])
+def test_modes_point_to_the_detector(mode_file):
+    assert "flake_detect.py" in (REPO_ROOT / "modes" / mode_file).read_text()
+
+
+def test_benchmark_parallel_pass_vs_serial_reruns(project, monkeypatch, capsys):
+    """One parallel pass of K reruns must beat rerunning K times in serial."""
+    monkeypatch.setenv("FAKE_SLEEP", "0.3")
+    started = time.perf_counter()
+    _detect(monkeypatch, "flaky", runs=8, jobs=1)
+    serial = time.perf_counter() - started
+    started = time.perf_counter()
+    _detect(monkeypatch, "flaky", runs=8, jobs=8)
+    parallel = time.perf_counter() - started
+    with capsys.disabled():
+        print(f"\n[flake-detect benchmark] 8 reruns: serial {serial:.2f}s, parallel {parallel:.2f}s ({serial / parallel:.1f}x)")
+    assert parallel < serial / 2
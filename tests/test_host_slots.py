@@ -0,0 +1,254 @@
+"""Tests for the host-wide slot scheduler (skills/recipe-tools/host_slots.py) and its recipe wiring."""
+
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+TOOLS = REPO_ROOT / "skills" / "recipe-tools"
+SLOTS_SCRIPT = TOOLS / "host_slots.py"
+RECIPES = REPO_ROOT / "recipes"
+
+
+def _load(name: str):
+    spec = importlib.util.spec_from_file_location(name, TOOLS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+host_slots = _load("host_slots")
+prefetch = _load("prefetch")
+
+CONFIG = {"cpu": 8, "io": 4, "weights": host_slots.default_weights(8)}
+
+
+def _queue(*tickets):
+    """Build a state from (session, class, priority, granted) tuples, enqueued one second apart."""
+    state = {"tickets": {}}
+    ids = []
+    for n, (session, cls, priority, granted) in enumerate(tickets):
+        ticket = host_slots.enqueue(state, CONFIG, cls, session, priority, os.getpid(), now=1000.0 + n)
+        if granted:
+            state["tickets"][ticket.id]["granted"] = 1000.0 + n
+        ids.append(ticket.id)
+    return state, ids
+
+
+def _order(state, now=1010.0):
+    return [t.id for t in host_slots.queue_order(host_slots._tickets(state), now)]
+
+
+@pytest.fixture
+def slots_dir(tmp_path, monkeypatch) -> Path:
+    directory = tmp_path / "slots"
+    monkeypatch.setenv("SUPERPOWERS_SLOTS_DIR", str(directory))
+    monkeypatch.delenv("SUPERPOWERS_SLOT_PRIORITY", raising=False)
+    return directory
+
+
+class TestQueue:
+    def test_weights_scale_with_the_host(self):
+        assert CONFIG["weights"]["test-suite"] == (4, 1)
+        assert host_slots.default_weights(1)["build"] == (1, 2)
+
+    def test_session_holding_less_goes_first(self):
+        state, (_, a2, b1) = _queue(("a", "test-suite", "normal", True), ("a", "test-suite", "normal", False),
+                                    ("b", "test-suite", "normal", False))
+        assert _order(state) == [b1, a2]
+
+    def test_critical_path_beats_fairness_and_arrival(self):
+        state, (background, normal, critical) = _queue(("a", "light", "background", False), ("b", "light", "normal", False),
+                                                       ("a", "light", "critical", False))
+        assert _order(state) == [critical, normal, background]
+
+    def test_waiting_ages_into_higher_priority(self):
+        state, (background, normal) = _queue(("a", "light", "background", False), ("b", "light", "normal", False))
+        assert _order(state, now=1010.0) == [normal, background]
+        assert _order(state, now=1000.0 + 2 * host_slots.AGING_SECONDS) == [background, normal]
+
+    def test_grants_only_the_head_and_only_if_it_fits(self):
+        state, (_, _, suite, light) = _queue(("a", "test-suite", "normal", True), ("b", "build", "normal", True),
+                                             ("c", "test-suite", "normal", False), ("d", "light", "normal", False))
+        # The light job would fit in the I/O left, but the queued suite is not overtaken.
+        assert host_slots.try_grant(state, light, CONFIG) is False
+        assert host_slots.try_grant(state, suite, CONFIG) is False
+        del state["tickets"][next(iter(state["tickets"]))]
+        assert host_slots.try_grant(state, suite, CONFIG) is True
+        assert host_slots.try_grant(state, light, CONFIG) is False  # 8 CPU in use now
+
+    def test_oversized_class_runs_alone(self):
+        state = {"tickets": {}}
+        ticket = host_slots.enqueue(state, {**CONFIG, "weights": {"huge": (64, 9)}}, "huge", "a", "normal", os.getpid())
+        assert (ticket.cpu, ticket.io) == (8, 4)
+        assert host_slots.try_grant(state, ticket.id, CONFIG) is True
+
+    def test_dead_holders_are_reclaimed(self):
+        child = subprocess.Popen([sys.executable, "-c", "pass"])
+        child.wait()
+        state = {"tickets": {}}
+        host_slots.enqueue(state, CONFIG, "build", "a", "normal", child.pid)
+        host_slots._reap(state)
+        assert state["tickets"] == {}
+
+    @pytest.mark.parametrize("requested, floor, expected", [
+        ("critical", None, "critical"), ("critical", "background", "background"), ("background", "critical", "background"),
+    ])
+    def test_environment_only_lowers_priority(self, monkeypatch, requested, floor, expected):
+        if floor:
+            monkeypatch.setenv("SUPERPOWERS_SLOT_PRIORITY", floor)
+        else:
+            monkeypatch.delenv("SUPERPOWERS_SLOT_PRIORITY", raising=False)
+        assert host_slots.resolve_priority(requested) == expected
+
+    def test_lifted_group_gets_the_priority_it_asked_for(self, slots_dir):
+        group = os.getpgrp()
+        with host_slots._state(slots_dir) as state:
+            waiting = host_slots.enqueue(state, CONFIG, "light", "a", "background", os.getpid(), requested="critical", group=group)
+            other = host_slots.enqueue(state, CONFIG, "light", "b", "background", os.getpid(), requested="critical")
+        assert host_slots.lift(group, slots_dir) == 1
+        with host_slots._state(slots_dir) as state:
+            later = host_slots.enqueue(state, CONFIG, "light", "a", "background", os.getpid(), requested="normal", group=group)
+            priorities = {ticket.id: ticket.priority for ticket in host_slots._tickets(state)}
+        assert [priorities[t.id] for t in (waiting, other, later)] == [0, 2, 1]
+
+
+class TestRun:
+    def _launch(self, tmp_path, session, cls="test-suite"):
+        log = tmp_path / "spans.log"
+        body = f"import time; s = time.time(); time.sleep(0.4); open({str(log)!r}, 'a').write(f'{{s}} {{time.time()}}\\n')"
+        return subprocess.Popen(
+            [sys.executable, str(SLOTS_SCRIPT), "run", "--class", cls, "--session", session, "--", sys.executable, "-c", body],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+
+    def test_concurrent_sessions_share_the_host(self, slots_dir, tmp_path):
+        host_slots.configure(cpu=2, io=4)  # test-suite weighs 1 CPU: two at a time
+        procs = [self._launch(tmp_path, f"session-{n % 3}") for n in range(5)]
+        outputs = [proc.communicate(timeout=60) for proc in procs]
+        assert all(proc.returncode == 0 for proc in procs), outputs
+        spans = [tuple(map(float, line.split())) for line in (tmp_path / "spans.log").read_text().splitlines()]
+        peak = max(sum(1 for s, e in spans if s <= start < e) for start, _ in spans)
+        assert len(spans) == 5 and peak <= 2
+        waits = [float(re.search(r"slot after ([\d.]+)s queued", out).group(1)) for out, _ in outputs]
+        assert max(waits) >= 0.3 and all(out.startswith("[host-slots] test-suite slot after") for out, _ in outputs)
+
+        status = host_slots.status()
+        assert status["running"] == [] and status["queued"] == []
+        assert status["waits"]["test-suite"]["runs"] == 5
+
+    def test_exit_code_and_state_cleanup(self, slots_dir):
+        result = subprocess.run([sys.executable, str(SLOTS_SCRIPT), "run", "--class", "light", "--", sys.executable, "-c",
+                                 "raise SystemExit(4)"], capture_output=True, text=True)
+        assert result.returncode == 4
+        assert json.loads((slots_dir / "state.json").read_text()) == {"tickets": {}}
+
+    def test_state_is_group_shared_and_rewritten_in_place(self, slots_dir):
+        with host_slots._state(slots_dir) as state:
+            state["tickets"] = {}
+        inode = (slots_dir / "state.json").stat().st_ino
+        with host_slots._state(slots_dir) as state:
+            state["marker"] = True
+        path = slots_dir / "state.json"
+        # Replacing the file would need the right to unlink another user's file
+        assert path.stat().st_ino == inode and json.loads(path.read_text())["marker"] is True
+        assert path.stat().st_mode & 0o777 == 0o660
+        assert slots_dir.stat().st_mode & 0o7777 == 0o2770
+
+    def test_unusable_state_runs_the_command_unqueued(self, tmp_path, monkeypatch):
+        blocker = tmp_path / "not-a-dir"
+        blocker.write_text("")
+        monkeypatch.setenv("SUPERPOWERS_SLOTS_DIR", str(blocker / "slots"))
+        result = subprocess.run([sys.executable, str(SLOTS_SCRIPT), "run", "--class", "light", "--", sys.executable, "-c",
+                                 "print('ran'); raise SystemExit(3)"], capture_output=True, text=True)
+        assert result.returncode == 3
+        assert result.stdout.startswith("[host-slots] scheduler state unavailable") and "ran" in result.stdout
+
+    def test_half_written_state_is_recovered(self, slots_dir):
+        slots_dir.mkdir()
+        (slots_dir / "state.json").write_text('{"tickets": {"ab')
+        assert host_slots.status(slots_dir)["running"] == []
+
+    def test_errors(self, slots_dir):
+        unknown = subprocess.run([sys.executable, str(SLOTS_SCRIPT), "run", "--class", "gpu", "--", "true"],
+                                 capture_output=True, text=True)
+        assert unknown.returncode == 1 and "unknown resource class 'gpu'" in unknown.stderr
+        empty = subprocess.run([sys.executable, str(SLOTS_SCRIPT), "run", "--class", "light"], capture_output=True, text=True)
+        assert empty.returncode == 1 and empty.stderr.startswith("Error:")
+
+    def test_configure_and_markdown_status(self, slots_dir):
+        configured = subprocess.run([sys.executable, str(SLOTS_SCRIPT), "configure", "--cpu", "16", "--weight",
+                                     "test-suite=6:1"], capture_output=True, text=True)
+        assert json.loads(configured.stdout)["weights"]["test-suite"] == [6, 1]
+        status = subprocess.run([sys.executable, str(SLOTS_SCRIPT), "status", "--markdown"], capture_output=True, text=True)
+        assert status.stdout.startswith("## Host Slots\n- In use: 0/16 CPU, 0/4 I/O")
+
+    def test_prefetched_commands_queue_as_background(self, slots_dir, tmp_path):
+        repo = tmp_path / "repo"
+        subprocess.run(["git", "init", "-q", str(repo)], check=True)
+        probe = [sys.executable, "-c", "import os; print(os.environ['SUPERPOWERS_SLOT_PRIORITY'])"]
+        prefetch.start(repo, "probe", probe)
+        assert prefetch.take(repo, "probe")["output"].strip() == "background"
+
+    def test_awaited_prefetch_is_lifted(self, slots_dir, tmp_path):
+        repo = tmp_path / "repo"
+        subprocess.run(["git", "init", "-q", str(repo)], check=True)
+        host_slots.configure(cpu=1)
+        holder = subprocess.Popen([sys.executable, str(SLOTS_SCRIPT), "run", "--class", "light", "--", sys.executable, "-c",
+                                   "import time; time.sleep(1)"], stdout=subprocess.DEVNULL)
+        while not host_slots.status()["running"]:
+            time.sleep(0.05)
+        prefetch.start(repo, "suite", [sys.executable, str(SLOTS_SCRIPT), "run", "--class", "light", "--priority",
+                                       "critical", "--", "true"])
+        output = prefetch.take(repo, "suite")["output"]
+        holder.wait()
+        assert "(priority critical," in output
+
+
+@pytest.mark.parametrize("path", sorted(RECIPES.glob("*.yaml")), ids=lambda p: p.name)
+def test_recipe_test_runs_take_a_host_slot(path):
+    text = path.read_text()
+    assert not re.search(r'(?<!-- )python3 "\{\{tools\.output_digest\}\}" run', text)
+    if "tools.host_slots" in text:
+        stages = yaml.safe_load(text)["stages"]
+        (locate,) = [step for stage in stages for step in stage["steps"] if step["id"] == "locate-tools"]
+        assert "recipe-tools/host_slots.py" in locate["command"]
+
+
+def test_worktree_setup_queues_installs_builds_and_tests():
+    text = (RECIPES / "git-worktree-setup.yaml").read_text()
+    for cls in ("install", "build", "test-suite"):
+        assert f'"{{{{tools.host_slots}}}}" run --class {cls}' in text
+
+
+# Steps a human approval or verification gate waits on; every other heavy step runs at normal priority.
+GATE_STEPS = {
+    "executing-plans.yaml": {"prefetch-tests", "full-suite", "verify-completion"},
+    "finish-branch.yaml": {"run-tests"},
+    "subagent-driven-development.yaml": {"prepare-approval", "prefetch-final-tests", "final-tests", "verify-tests"},
+}
+
+
+def _steps(steps):
+    for step in steps:
+        yield step
+        yield from _steps(step.get("steps", []))
+
+
+@pytest.mark.parametrize("path", sorted(RECIPES.glob("*.yaml")), ids=lambda p: p.name)
+def test_only_gate_steps_run_at_critical_priority(path):
+    stages = yaml.safe_load(path.read_text()).get("stages", [])
+    steps = [step for stage in stages for step in _steps(stage["steps"]) if "steps" not in step]
+    critical = {step["id"] for step in steps if "--priority critical" in json.dumps(step)}
+    assert critical == GATE_STEPS.get(path.name, set())
+    for step in steps:
+        for call in re.findall(r'host_slots\}\}" run [^\n]*', json.dumps(step)):
+            assert "--priority " in call, step["id"]
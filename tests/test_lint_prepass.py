@@ -0,0 +1,328 @@
+"""Tests for the lint/type pre-pass (skills/recipe-tools/lint_prepass.py) and its recipe wiring.
+
+The linters themselves are stood in for by small scripts on PATH that speak the
+real tools' command lines and output formats.
+"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+PREPASS_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "lint_prepass.py"
+FEED_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "session_feed.py"
+RECORDED_FEED = Path(__file__).parent / "fixtures" / "quality-loop" / "recorded.feed.jsonl"
+
+_spec = importlib.util.spec_from_file_location("lint_prepass", PREPASS_SCRIPT)
+lint_prepass = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(lint_prepass)
+
+_spec = importlib.util.spec_from_file_location("session_feed", FEED_SCRIPT)
+session_feed = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(session_feed)
+
+# A review in the code-quality-reviewer.md format; its only judgment issue comes last.
+LONG_REVIEW = """## Code Quality Review
+
+### Summary
+The coupon flow is in place and the new tests cover the happy path, the expired-coupon case and the
+stacking rule. Most of what is left is hygiene, but one change alters behaviour on bad input.
+
+### Strengths
+- `Coupon` is a frozen dataclass, so discounts cannot be mutated after validation
+- Tests use the real pricing table instead of mocks
+- Commit history follows the plan's task boundaries
+
+### Issues
+
+#### Critical (must fix)
+- None
+
+#### Important (should fix)
+- src/cart.py:3 - unused import `os`
+- src/pricing.py:1 - file is not black-formatted
+- src/pricing.py:88 - `apply_discount` swallows the KeyError from the coupon table and returns the
+  undiscounted total; raise `InvalidCoupon` so the checkout can tell the user
+
+#### Suggestions (nice to have)
+- Consider a docstring on `Cart.total`
+
+### Verdict: NEEDS CHANGES"""
+
+# ruff: `check --fix` drops `import os` lines; `check --output-format json` reports eval() calls.
+FAKE_RUFF = """
+import json, os, sys, time
+args = sys.argv[1:]
+files = [a for a in args if a.endswith(".py")]
+if "--fix" in args:
+    for name in files:
+        lines = open(name).read().splitlines(keepends=True)
+        open(name, "w").write("".join(l for l in lines if l.strip() != "import os"))
+else:
+    time.sleep(0.5)
+    found = [{"code": "S307", "message": "Use of possibly insecure function", "filename": os.path.abspath(name),
+              "location": {"row": n, "column": line.index("eval(") + 1}}
+             for name in files for n, line in enumerate(open(name), 1) if "eval(" in line]
+    print(json.dumps(found))
+"""
+# black: strips trailing whitespace.
+FAKE_BLACK = """
+import sys
+for name in sys.argv[1:]:
+    if name.endswith(".py"):
+        text = open(name).read()
+        open(name, "w").write("".join(l.rstrip() + "\\n" for l in text.splitlines()))
+"""
+# mypy: a string returned from a function annotated -> int.
+FAKE_MYPY = """
+import sys, time
+time.sleep(0.5)
+for name in [a for a in sys.argv[1:] if a.endswith(".py")]:
+    for n, line in enumerate(open(name), 1):
+        if 'return "' in line:
+            print(f'{name}:{n}:{line.index("return") + 8}: error: Incompatible return value type (got "str", expected "int")  [return-value]')
+            print(f'{name}:{n}:1: note: see https://mypy.readthedocs.io')
+sys.exit(1)
+"""
+FAKE_FLAKE8 = "import sys\nprint('should not run')\nsys.exit(1)\n"
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True, check=True).stdout
+
+
+def _install(bin_dir: Path, name: str, body: str) -> None:
+    path = bin_dir / name
+    path.write_text(f"#!{sys.executable}\n{body}")
+    path.chmod(0o755)
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, body in (("ruff", FAKE_RUFF), ("black", FAKE_BLACK), ("mypy", FAKE_MYPY), ("flake8", FAKE_FLAKE8)):
+        _install(bin_dir, name, body)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return bin_dir
+
+
+@pytest.fixture
+def repo(tmp_path) -> Path:
+    """ruff, black and mypy configured; flake8 installed but not configured."""
+    repo = tmp_path / "repo"
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "Dev")
+    (repo / "pyproject.toml").write_text("[tool.ruff]\nline-length = 100\n\n[tool.black]\n\n[tool.mypy]\nstrict = true\n")
+    (repo / "src").mkdir()
+    (repo / "src" / "legacy.py").write_text("def old(expr):\n    return eval(expr)\n")
+    (repo / "README.md").write_text("# Demo\n")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "init")
+    return repo
+
+
+def _task(repo: Path) -> str:
+    """Commit a task's work: one auto-fixable file, one with real findings. Returns the base commit."""
+    base = _git(repo, "rev-parse", "HEAD").strip()
+    (repo / "src" / "cart.py").write_text("import os\n\n\ndef total(items):   \n    return sum(items)\n")
+    (repo / "src" / "parse.py").write_text('def parse(text) -> int:\n    if text:\n        return eval(text)\n    return "0"\n')
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "feat: cart")
+    return base
+
+
+class TestRun:
+    def test_fixes_changed_files_and_reports_the_rest(self, tools, repo):
+        base = _task(repo)
+        result = lint_prepass.run(repo, base, commit=True)
+        assert result["files"] == 2
+        assert result["fixed"] == {"ruff": ["src/cart.py"], "black": ["src/cart.py"]}
+        assert (repo / "src" / "cart.py").read_text() == "\n\ndef total(items):\n    return sum(items)\n"
+        assert _git(repo, "log", "-1", "--format=%s").strip() == lint_prepass.COMMIT_MESSAGE
+        assert result["committed"] == _git(repo, "rev-parse", "--short", "HEAD").strip()
+
+        found = [(f["tool"], f["path"], f["line"], f["code"], f["severity"]) for f in result["findings"]]
+        assert found == [("mypy", "src/parse.py", 4, "return-value", "error"), ("ruff", "src/parse.py", 3, "S307", "warning")]
+        assert {tool["name"] for tool in result["tools"]} == {"ruff", "black", "mypy"}  # flake8 is not configured
+
+    def test_checkers_run_in_parallel(self, tools, repo):
+        base = _task(repo)
+        began = time.perf_counter()
+        lint_prepass.run(repo, base, fix=False)
+        assert time.perf_counter() - began < 0.95  # ruff and mypy each take 0.5s
+
+    def test_uncommitted_and_untracked_changes_count(self, tools, repo):
+        (repo / "src" / "new.py").write_text("x = eval('1')\n")
+        result = lint_prepass.run(repo, fix=False)
+        assert result["files"] == 1 and [f["path"] for f in result["findings"]] == ["src/new.py"]
+
+    def test_untracked_files_are_checked_but_not_fixed(self, tools, repo):
+        base = _task(repo)
+        (repo / "src" / "scratch.py").write_text("import os   \nx = eval('1')\n")
+        result = lint_prepass.run(repo, base, commit=True)
+        assert result["fixed_files"] == ["src/cart.py"]
+        assert (repo / "src" / "scratch.py").read_text() == "import os   \nx = eval('1')\n"
+        assert "src/scratch.py" in {f["path"] for f in result["findings"]}
+        assert "src/scratch.py" not in _git(repo, "show", "--name-only", "--format=", "HEAD")
+
+    def test_commit_is_refused_over_uncommitted_edits(self, tools, repo):
+        base = _task(repo)
+        head = _git(repo, "rev-parse", "HEAD")
+        with open(repo / "src" / "cart.py", "a") as handle:
+            handle.write("# work in progress\n")
+        result = lint_prepass.run(repo, base, commit=True)
+        assert (result["commit_refused"], result["fixed"], result["committed"]) == (["src/cart.py"], {}, None)
+        assert _git(repo, "rev-parse", "HEAD") == head
+        assert (repo / "src" / "cart.py").read_text().startswith("import os")
+        assert [f["tool"] for f in result["findings"]] == ["mypy", "ruff"]  # still checked
+        assert "--commit refused, src/cart.py has uncommitted changes" in lint_prepass._markdown_run(result)
+
+    def test_no_fix_leaves_files_alone(self, tools, repo):
+        base = _task(repo)
+        result = lint_prepass.run(repo, base, fix=False)
+        assert result["fixed"] == {} and (repo / "src" / "cart.py").read_text().startswith("import os")
+        assert {tool["name"] for tool in result["tools"]} == {"ruff", "mypy"}
+
+    def test_configured_but_missing_tools_are_skipped(self, monkeypatch, repo):
+        monkeypatch.setattr(lint_prepass.shutil, "which", lambda name: None)
+        result = lint_prepass.run(repo, _task(repo))
+        assert {(t["name"], t["status"], t.get("reason")) for t in result["tools"]} == {
+            ("ruff", "skipped", "not installed"), ("black", "skipped", "not installed"), ("mypy", "skipped", "not installed")}
+
+    def test_crashing_tool_is_reported_not_fatal(self, tools, repo):
+        _install(tools, "mypy", "import sys\nprint('mypy: error: cannot read config', file=sys.stderr)\nsys.exit(2)\n")
+        result = lint_prepass.run(repo, _task(repo))
+        (mypy,) = [tool for tool in result["tools"] if tool["name"] == "mypy"]
+        assert (mypy["status"], mypy["reason"]) == ("failed", "exit 2: mypy: error: cannot read config")
+        assert [f["tool"] for f in result["findings"]] == ["ruff"]
+
+    def test_nothing_configured(self, tools, tmp_path):
+        repo = tmp_path / "bare"
+        subprocess.run(["git", "init", "-q", str(repo)], check=True)
+        (repo / "app.py").write_text("import os\n")
+        result = lint_prepass.run(repo)
+        assert (result["tools"], result["findings"]) == ([], [])
+        assert "No linter, formatter or type checker is configured" in lint_prepass._markdown_run(result)
+
+
+class TestParsers:
+    def test_flake8(self, tmp_path):
+        findings = lint_prepass.parse_flake8("src/a.py:3:1: F401 'os' imported but unused\nsrc/a.py:9:5: E999 SyntaxError\n", tmp_path)
+        assert [(f.code, f.line, f.severity) for f in findings] == [("F401", 3, "warning"), ("E999", 9, "error")]
+
+    def test_pyright(self, tmp_path):
+        output = json.dumps({"generalDiagnostics": [
+            {"file": str(tmp_path / "src" / "a.py"), "severity": "error", "message": "Cannot access member",
+             "rule": "reportAttributeAccessIssue", "range": {"start": {"line": 4, "character": 2}}},
+            {"file": str(tmp_path / "src" / "a.py"), "severity": "information", "message": "fyi",
+             "range": {"start": {"line": 0, "character": 0}}},
+        ]})
+        assert lint_prepass.parse_pyright(output, tmp_path) == [
+            lint_prepass.Finding("pyright", "src/a.py", 5, 3, "reportAttributeAccessIssue", "Cannot access member", "error")]
+
+    def test_eslint(self, tmp_path):
+        output = json.dumps([{"filePath": str(tmp_path / "web" / "Form.tsx"), "messages": [
+            {"line": 7, "column": 3, "ruleId": "no-unused-vars", "message": "'x' is defined but never used", "severity": 1}]}])
+        (finding,) = lint_prepass.parse_eslint(output, tmp_path)
+        assert (finding.path, finding.code, finding.severity) == ("web/Form.tsx", "no-unused-vars", "warning")
+
+    def test_tsc(self, tmp_path):
+        output = "web/api.ts(12,5): error TS2322: Type 'string' is not assignable to type 'number'.\n"
+        (finding,) = lint_prepass.parse_tsc(output, tmp_path)
+        assert (finding.path, finding.line, finding.code, finding.severity) == ("web/api.ts", 12, "TS2322", "error")
+
+
+class TestCli:
+    def _cli(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, str(PREPASS_SCRIPT), *args], capture_output=True, text=True)
+
+    def test_markdown_for_the_reviewer(self, tools, repo):
+        base = _task(repo)
+        out = self._cli("--repo", str(repo), "run", "--base", base, "--commit", "--markdown").stdout
+        assert out.startswith("## Lint/Type Pre-Pass\n- Changed files checked: 2 with ruff, black, mypy\n")
+        assert "- Auto-fixed 1 files (ruff: src/cart.py; black: src/cart.py), committed " in out
+        assert "- Remaining findings: 1 errors, 1 warnings" in out
+        assert "| error | src/parse.py:4:12 | mypy | return-value | Incompatible return value type" in out
+
+    def test_disabled(self, tools, repo):
+        result = self._cli("--repo", str(repo), "run", "--enabled", "false", "--markdown")
+        assert result.stdout.startswith("_Lint/type pre-pass disabled")
+
+    def test_tools_listing(self, tools, repo):
+        listed = {t["name"]: t for t in json.loads(self._cli("--repo", str(repo), "tools").stdout)["tools"]}
+        assert listed["ruff"] == {"name": "ruff", "configured": True, "installed": True}
+        assert listed["flake8"]["configured"] is False and listed["eslint"]["installed"] is False
+
+    def test_bad_base(self, repo):
+        result = self._cli("--repo", str(repo), "run", "--base", "no-such-ref")
+        assert result.returncode == 1 and result.stderr.startswith("Error:")
+
+
+class TestSavings:
+    @pytest.mark.parametrize("issue, kind", [
+        ("Unused import `os` in src/cart.py", "autofix"),
+        ("src/pricing.py is not black-formatted", "autofix"),
+        ("mypy: incompatible type for `user_id`", "mechanical"),
+        ("Cyclomatic complexity of `route()` is 14", "mechanical"),
+        ("SQL is built by string concatenation; use bound parameters", "judgment"),
+    ])
+    def test_classify(self, issue, kind):
+        assert lint_prepass.classify(issue) == kind
+
+    def test_blocking_issues_skip_suggestions(self):
+        review = ("### Issues\n#### Critical (must fix)\n- None\n#### Important (should fix)\n- Unused import `re`\n"
+                  "#### Suggestions (nice to have)\n- Rename `x`\n\nVERDICT: NEEDS CHANGES")
+        assert lint_prepass.blocking_issues(review) == ["Unused import `re`"]
+        assert lint_prepass.blocking_issues("VERDICT: NEEDS CHANGES — line too long in a.py; magic number") == [
+            "line too long in a.py", "magic number"]
+
+    def test_recorded_tasks(self, capsys):
+        result = lint_prepass.savings(RECORDED_FEED)
+        rounds = {task["task_id"]: (task["rounds"], task["with_prepass"]) for task in result["per_task"]}
+        assert rounds["1"] == (2, 1)   # only hygiene issues: approved on the first review
+        assert rounds["4"] == (3, 2)   # the type error still needs a fix round
+        assert rounds["11"] == (3, 1)  # exhausted the loop on formatting alone
+        assert rounds["12"] == (2, 2)  # judgment call: unchanged
+        assert (result["tasks"], result["review_rounds"], result["rounds_saved"]) == (12, 27, 8)
+        with capsys.disabled():
+            print(f"\n[lint-prepass] recorded quality loops: {result['review_rounds']} review rounds -> "
+                  f"{result['rounds_with_prepass']} with the pre-pass ({result['rounds_saved']} saved)")
+
+    def test_long_reviews_are_replayed_in_full(self, tmp_path):
+        assert LONG_REVIEW.index("apply_discount") > session_feed.EXCERPT_CHARS
+        plan = tmp_path / "x-plan.md"
+        session_feed.emit(plan, "1", "quality_review", LONG_REVIEW, approved=False)
+        session_feed.emit(plan, "1", "quality_review", "VERDICT: APPROVED", approved=True)
+        result = lint_prepass.savings(session_feed.feed_path(plan))
+        assert result["issues"] == {"autofix": 2, "mechanical": 0, "judgment": 1}
+        assert (result["review_rounds"], result["rounds_saved"]) == (2, 0)
+
+    def test_markdown_savings(self):
+        out = subprocess.run([sys.executable, str(PREPASS_SCRIPT), "savings", "--feed", str(RECORDED_FEED), "--markdown"],
+                             capture_output=True, text=True).stdout
+        assert "- Quality review rounds: 27 recorded, 19 with the pre-pass (8 saved across 6 tasks)" in out
+
+
+def test_sdd_quality_loop_starts_with_the_prepass():
+    recipe = yaml.safe_load((REPO_ROOT / "recipes" / "subagent-driven-development.yaml").read_text())
+    assert recipe["context"]["lint_prepass"] == "true"
+    stages = recipe["stages"]
+    steps = {step["id"]: step for step in stages[0]["steps"]}
+    assert "recipe-tools/lint_prepass.py" in steps["locate-tools"]["command"]
+    pipeline = {step["id"]: step for step in steps["per-task-pipeline"]["steps"]}
+    assert pipeline["task-base"]["command"].strip() == "git rev-parse HEAD"
+    loop = pipeline["quality-review-loop"]["steps"]
+    prepass = loop[0]
+    assert prepass["id"] == "lint-prepass" and prepass["output"] == "lint_findings"
+    assert '--base "{{task_base}}" --commit --markdown --enabled "{{lint_prepass}}"' in prepass["command"]
+    review = next(step for step in loop if step["id"] == "quality-review")
+    assert "{{lint_findings}}" in review["prompt"]
@@ -0,0 +1,216 @@
+"""Tests for the streaming error harvester (skills/integration-testing-discipline/log_harvest.py)."""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+HARVEST_SCRIPT = REPO_ROOT / "skills" / "integration-testing-discipline" / "log_harvest.py"
+
+_spec = importlib.util.spec_from_file_location("log_harvest", HARVEST_SCRIPT)
+log_harvest = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(log_harvest)
+
+PYTHON_TRACEBACK = """\
+Traceback (most recent call last):
+  File "/srv/app/api.py", line 42, in handler
+    user = users[uid]
+KeyError: 'user-1234'"""
+JAVA_TRACE = """\
+Exception in thread "main" java.lang.IllegalStateException: pool closed
+\tat com.acme.Pool.get(Pool.java:88)
+\tat com.acme.Main.main(Main.java:12)
+INFO shutting down"""
+
+
+def _feed(harvester, text: str, source: str = "log") -> None:
+    for line in text.splitlines():
+        harvester.feed(source, line)
+
+
+def _cli(*args: str, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, str(HARVEST_SCRIPT), *args], capture_output=True, text=True, **kwargs)
+
+
+def _wait_for(predicate, timeout: float = 15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.1)
+    raise AssertionError("condition not met in time")
+
+
+@pytest.fixture
+def repo(tmp_path) -> Path:
+    subprocess.run(["git", "init", "-q", str(tmp_path / "repo")], check=True)
+    return tmp_path / "repo"
+
+
+class TestHarvester:
+    def test_repeats_with_different_values_are_one_signature(self):
+        harvester = log_harvest.Harvester()
+        for attempt in range(3):
+            harvester.feed("log", f"2025-01-15T10:00:0{attempt}Z ERROR db: connection to 10.0.0.5:5432 refused (attempt {attempt})")
+        harvester.feed("log", "2025-01-15T10:00:09Z INFO retrying")
+        (entry,) = harvester.snapshot()["signatures"]
+        assert entry["signature"] == "ERROR db: connection to N.N:N refused (attempt N)"
+        assert entry["count"] == 3 and entry["first"]["line"] == 1
+
+    def test_python_traceback_is_keyed_by_its_exception_line(self):
+        harvester = log_harvest.Harvester()
+        _feed(harvester, PYTHON_TRACEBACK)
+        (entry,) = harvester.snapshot()["signatures"]
+        assert entry["signature"] == "KeyError: 'user-N'"
+        assert entry["trace"] == PYTHON_TRACEBACK.splitlines()
+
+    def test_stack_frames_attach_to_the_first_occurrence_only(self):
+        harvester = log_harvest.Harvester()
+        _feed(harvester, JAVA_TRACE + "\n" + JAVA_TRACE)
+        (entry,) = harvester.snapshot()["signatures"]
+        assert entry["count"] == 2
+        assert entry["trace"] == JAVA_TRACE.splitlines()[:3]
+
+    @pytest.mark.parametrize("line", [
+        "panic: runtime error: index out of range [3] with length 3",
+        'time=2025-01-15 level=error msg="upload failed"',
+        '{"level":"error","msg":"upload failed"}',
+        "npm ERR! code ELIFECYCLE",
+        "error[E0308]: mismatched types",
+        "FAILED tests/test_api.py::test_login - AssertionError",
+    ])
+    def test_error_signals(self, line):
+        harvester = log_harvest.Harvester()
+        harvester.feed("log", line)
+        assert harvester.snapshot()["error_lines"] == 1
+
+    @pytest.mark.parametrize("line", ["INFO 0 errors, 12 passed", "GET /health 200", "warning: deprecated flag"])
+    def test_ordinary_lines(self, line):
+        harvester = log_harvest.Harvester()
+        harvester.feed("log", line)
+        assert harvester.snapshot()["error_lines"] == 0
+
+    def test_custom_pattern_and_ignore(self):
+        harvester = log_harvest.Harvester(patterns=[r"\bdegraded\b"], ignore=[r"ExpectedError"])
+        _feed(harvester, "status degraded\nExpectedError: raised on purpose by the fixture")
+        assert [e["signature"] for e in harvester.snapshot()["signatures"]] == ["status degraded"]
+
+    def test_summary_is_bounded_and_keeps_frequent_signatures(self):
+        harvester = log_harvest.Harvester(max_signatures=10)
+        for _ in range(5):
+            harvester.feed("log", "ERROR the recurring one")
+        for n in range(100):
+            harvester.feed("log", f"ERROR unique failure {chr(65 + n % 26)}{chr(65 + n // 26)}")
+        snapshot = harvester.snapshot()
+        assert len(snapshot["signatures"]) == 10
+        assert snapshot["distinct_signatures"] == 101 and snapshot["evicted"] == 91
+        assert snapshot["signatures"][0]["signature"] == "ERROR the recurring one"
+
+    def test_memory_stays_flat_with_run_length(self):
+        def peak(lines: int) -> int:
+            harvester = log_harvest.Harvester(max_signatures=50)
+            tracemalloc.start()
+            for n in range(lines):
+                harvester.feed("log", f"2025-01-15T10:00:00Z INFO request {n} served in {n % 97} ms")
+                if n % 10 == 0:
+                    harvester.feed("log", f"ERROR worker {n}: timeout talking to shard-{chr(65 + n % 7)}{chr(65 + n % 11)}")
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak
+
+        short, long = peak(20_000), peak(200_000)
+        assert long < short * 1.5
+
+
+class TestWatch:
+    def test_command_errors_are_queryable_mid_run(self, repo, tmp_path):
+        gate = tmp_path / "go"
+        script = (
+            "import sys, time, pathlib\n"
+            "print('ERROR first failure id=101', flush=True)\n"
+            f"while not pathlib.Path({str(gate)!r}).exists(): time.sleep(0.05)\n"
+            "print('ERROR first failure id=202')\n"
+            "print('FATAL second failure')\n"
+            "sys.exit(3)\n"
+        )
+        watcher = subprocess.Popen(
+            [sys.executable, str(HARVEST_SCRIPT), "watch", "--name", "e2e", "--repo", str(repo), "--interval", "0.1",
+             "--", sys.executable, "-c", script],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        try:
+            mid = _wait_for(lambda: (r := _cli("digest", "--name", "e2e", "--repo", str(repo))).returncode == 0
+                            and json.loads(r.stdout)["signatures"] and json.loads(r.stdout))
+            assert mid["status"] == "running"
+            assert [e["signature"] for e in mid["signatures"]] == ["ERROR first failure id=N"]
+            gate.touch()
+            assert watcher.wait(timeout=30) == 0, watcher.stderr.read()
+        finally:
+            watcher.kill()
+        final = json.loads(_cli("digest", "--name", "e2e", "--repo", str(repo), "--since", str(mid["cursor"])).stdout)
+        assert (final["status"], final["exit_code"], final["new_signatures"]) == ("finished", 3, 1)
+        assert final["distinct_signatures"] == 2 and final["error_lines"] == 3
+        assert Path(final["logs"]["command"]).read_text().count("ERROR first failure") == 2
+
+    def test_follows_a_growing_file_across_truncation(self, repo, tmp_path):
+        log = tmp_path / "app.log"
+        log.write_text("INFO boot\nERROR cache miss storm\n")
+        watcher = subprocess.Popen(
+            [sys.executable, str(HARVEST_SCRIPT), "watch", "--name", "tail", "--repo", str(repo), "--interval", "0.1",
+             "--file", str(log)],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        digest = lambda: json.loads(_cli("digest", "--name", "tail", "--repo", str(repo)).stdout)  # noqa: E731
+        try:
+            _wait_for(lambda: (repo / ".git" / "superpowers" / "harvest" / "tail.json").exists() and digest()["error_lines"] == 1)
+            with log.open("a") as handle:
+                handle.write("ERROR cache miss storm\n")
+            _wait_for(lambda: digest()["error_lines"] == 2)
+            log.write_text("ERROR disk full on /var/lib/data\n")  # truncated and rewritten (copytruncate)
+            _wait_for(lambda: digest()["distinct_signatures"] == 2)
+            assert json.loads(_cli("stop", "--name", "tail", "--repo", str(repo)).stdout)["stopped"] is True
+            assert watcher.wait(timeout=30) == 0, watcher.stderr.read()
+        finally:
+            watcher.kill()
+        final = digest()
+        assert final["status"] == "finished"
+        assert [e["signature"] for e in final["signatures"]] == ["ERROR cache miss storm", "ERROR disk full on …/data"]
+
+    def test_container_logs(self, repo, tmp_path, monkeypatch):
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        docker = bin_dir / "docker"
+        docker.write_text("#!/bin/sh\necho \"api-1  | ERROR upstream 502 from $3\"\necho 'api-1  | INFO ok'\n")
+        docker.chmod(0o755)
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        summary = log_harvest.watch(tmp_path / "stack.json", containers=["api"], interval=0.1)
+        (entry,) = summary["signatures"]
+        assert entry["signature"] == "ERROR upstream N from api"
+        assert entry["sources"] == ["container:api"]
+        assert "INFO ok" in Path(summary["logs"]["container:api"]).read_text()
+
+    def test_nothing_to_watch(self, repo):
+        result = _cli("watch", "--name", "empty", "--repo", str(repo))
+        assert result.returncode == 1 and "nothing to watch" in result.stderr
+
+
+def test_scan_markdown(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("INFO start\n" + PYTHON_TRACEBACK + "\n" + JAVA_TRACE + "\n")
+    result = _cli("scan", "--markdown", str(log))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("### Log harvest: log (scanned)")
+    assert "| 1 | 1 | " in result.stdout and "`KeyError: 'user-N'`" in result.stdout
+    assert "\tat com.acme.Pool.get(Pool.java:88)" in result.stdout
+
+
+def test_skill_points_at_the_harvester():
+    assert "log_harvest.py" in (REPO_ROOT / "skills" / "integration-testing-discipline" / "SKILL.md").read_text()
@@ -0,0 +1,217 @@
+"""Tests for the compiled mode tool-policy table (skills/recipe-tools/mode_policy.py)."""
+
+import importlib.util
+import json
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+MODES_DIR = REPO_ROOT / "modes"
+POLICY_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "mode_policy.py"
+
+_spec = importlib.util.spec_from_file_location("mode_policy", POLICY_SCRIPT)
+mode_policy = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mode_policy)
+
+MODE = """---
+mode:
+  name: {name}
+  description: Test mode
+  shortcut: {shortcut}
+
+  tools:
+    safe:
+      - read_file
+      - grep
+    warn:
+      - {warn}
+
+  default_action: {default}
+  allowed_transitions: [{transitions}]
+  allow_clear: false
+---
+
+Body text is not part of the policy.
+"""
+
+
+def _mode(directory: Path, name: str, transitions: str = "", warn: str = "bash", default: str = "block",
+          shortcut: str | None = None) -> Path:
+    path = directory / f"{name}.md"
+    path.write_text(MODE.format(name=name, shortcut=shortcut or name, warn=warn, default=default, transitions=transitions))
+    return path
+
+
+@pytest.fixture
+def modes(tmp_path) -> Path:
+    directory = tmp_path / "modes"
+    directory.mkdir()
+    _mode(directory, "plan", "build")
+    _mode(directory, "build", "plan, review")
+    _mode(directory, "review", "build")
+    return directory
+
+
+@pytest.fixture
+def policy() -> "mode_policy.Policy":
+    return mode_policy.Policy(mode_policy.compile_modes(MODES_DIR))
+
+
+@pytest.mark.parametrize("path", sorted(MODES_DIR.glob("*.md")), ids=lambda p: p.name)
+def test_frontmatter_parser_agrees_with_yaml(path):
+    text = path.read_text()
+    expected = yaml.safe_load(re.match(r"^---\s*\n(.*?)\n---\s*\n", text, re.DOTALL).group(1))
+    assert mode_policy.parse_frontmatter(text) == expected
+
+
+class TestCompile:
+    def test_adjacency_and_tool_sets(self, modes):
+        compiled = mode_policy.compile_modes(modes)
+        assert compiled["transitions"] == {"build": ["plan", "review"], "plan": ["build"], "review": ["build"]}
+        assert compiled["modes"]["plan"]["safe"] == ["grep", "read_file"]
+        assert compiled["modes"]["plan"]["source"] == "modes/plan.md"
+
+    def test_every_problem_is_reported(self, modes):
+        _mode(modes, "review", "build, deploy, review", warn="grep", default="maybe", shortcut="plan")
+        with pytest.raises(mode_policy.PolicyError) as error:
+            mode_policy.compile_modes(modes)
+        assert sorted(error.value.problems) == [
+            "modes/review.md: allowed_transitions names unknown mode 'deploy'",
+            "modes/review.md: mode 'review' lists itself in allowed_transitions",
+            "review.md: 'grep' is in both tools.safe and tools.warn",
+            "review.md: default_action 'maybe' is not one of allow, warn, block",
+            "review.md: shortcut 'plan' is also used by mode 'plan'",
+        ]
+
+    def test_duplicate_mode_name(self, modes):
+        (modes / "copy.md").write_text((modes / "plan.md").read_text())
+        with pytest.raises(mode_policy.PolicyError, match="mode 'plan' is also defined in modes/copy.md"):
+            mode_policy.compile_modes(modes)
+
+    def test_body_edits_do_not_change_the_policy(self, modes):
+        before = mode_policy.compile_modes(modes)
+        path = modes / "plan.md"
+        path.write_text(path.read_text() + "\nMore guidance.\n")
+        assert mode_policy.compile_modes(modes) == before
+
+
+class TestBuildAndCheck:
+    def test_build_then_check(self, modes):
+        result = mode_policy.build(modes)
+        assert Path(result["output"]) == modes / "mode-policy.json"
+        assert mode_policy.check(modes)["up_to_date"] is True
+        assert [p.name for p in modes.iterdir() if p.name.startswith(".")] == []
+
+    def test_frontmatter_edit_makes_it_stale(self, modes):
+        mode_policy.build(modes)
+        _mode(modes, "review", "build, plan")
+        assert mode_policy.check(modes) == {
+            "output": str(modes / "mode-policy.json"),
+            "up_to_date": False,
+            "missing": False,
+            "changed_modes": ["review"],
+        }
+
+    def test_missing_artifact(self, modes):
+        assert mode_policy.check(modes)["missing"] is True
+
+    def test_shipped_artifact_is_current(self):
+        """Fails whenever modes/mode-policy.json differs from a fresh build, byte for byte."""
+        expected = mode_policy.dumps(mode_policy.compile_modes(MODES_DIR))
+        assert (MODES_DIR / "mode-policy.json").read_text(encoding="utf-8") == expected, (
+            "modes/mode-policy.json is stale: run python skills/recipe-tools/mode_policy.py build"
+        )
+        proc = subprocess.run([sys.executable, str(POLICY_SCRIPT), "check"], capture_output=True, text=True)
+        assert proc.returncode == 0, proc.stdout + proc.stderr
+
+    def test_stale_shipped_artifact_fails_the_check(self, tmp_path):
+        modes = tmp_path / "modes"
+        shutil.copytree(MODES_DIR, modes)
+        verify = modes / "verify.md"
+        verify.write_text(verify.read_text().replace("allow_clear: false", "allow_clear: true", 1))
+        proc = subprocess.run([sys.executable, str(POLICY_SCRIPT), "check", "--modes", str(modes)],
+                              capture_output=True, text=True)
+        assert proc.returncode == 1
+        assert json.loads(proc.stdout)["changed_modes"] == ["verify"]
+
+
+class TestPolicy:
+    def test_cascade(self, policy):
+        assert policy.decide("verify", "read_file") == "allow"
+        assert policy.decide("verify", "write_file") == "warn"
+        assert policy.decide("brainstorm", "write_file") == "block"
+        assert policy.decide("debug", "bash") == "allow"
+
+    def test_infrastructure_tools_bypass_the_cascade(self, policy):
+        assert {policy.decide(mode, "todo") for mode in policy.modes} == {"allow"}
+
+    def test_no_active_mode_allows_everything(self, policy):
+        assert policy.decide(None, "write_file") == "allow"
+        assert policy.may_transition(None, "debug") is True
+
+    def test_transitions_are_directed(self, policy):
+        assert policy.may_transition("verify", "finish") is True
+        assert policy.may_transition("finish", "verify") is False
+        assert policy.may_clear("finish") and not policy.may_clear("verify")
+
+    def test_shipped_artifact_loads(self):
+        assert mode_policy.Policy.load().modes == {p.stem for p in MODES_DIR.glob("*.md")}
+
+    def test_rejects_unknown_version(self):
+        with pytest.raises(mode_policy.PolicyError, match="unsupported mode-policy version"):
+            mode_policy.Policy({"version": 99, "modes": {}, "transitions": {}})
+
+
+def test_gating_cost_per_tool_call(policy, capsys):
+    """One compiled lookup per tool call versus re-reading the mode file each time."""
+    calls = [(mode, tool) for mode in sorted(policy.modes) for tool in ("read_file", "bash", "write_file", "todo")]
+
+    def per_call(fn, rounds: int) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for mode, tool in calls:
+                fn(mode, tool)
+        return (time.perf_counter() - start) / (rounds * len(calls))
+
+    def reparse(mode, tool):
+        fm = yaml.safe_load(re.match(r"^---\s*\n(.*?)\n---\s*\n", (MODES_DIR / f"{mode}.md").read_text(), re.DOTALL).group(1))
+        tools = fm["mode"]["tools"]
+        if tool in ("mode", "todo") or tool in tools.get("safe", []):
+            return "allow"
+        return "warn" if tool in tools.get("warn", []) else fm["mode"]["default_action"]
+
+    assert all(reparse(mode, tool) == policy.decide(mode, tool) for mode, tool in calls)
+    compiled = per_call(policy.decide, 5000)
+    markdown = per_call(reparse, 5)
+    with capsys.disabled():
+        print(
+            f"\n[mode-policy] gating cost per tool call: compiled {compiled * 1e9:.0f} ns, "
+            f"re-parsing frontmatter {markdown * 1e6:.0f} µs ({markdown / compiled:.0f}x)"
+        )
+    assert compiled * 100 < markdown
+
+
+def _cli(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, str(POLICY_SCRIPT), *args], capture_output=True, text=True)
+
+
+def test_cli_gate_and_transition():
+    assert json.loads(_cli("gate", "--mode", "verify", "--tool", "edit_file").stdout)["action"] == "warn"
+    assert json.loads(_cli("transition", "--from", "debug", "--to", "verify").stdout)["allowed"] is True
+    unknown = _cli("gate", "--mode", "deploy", "--tool", "bash")
+    assert unknown.returncode == 1 and "unknown mode 'deploy'" in unknown.stderr
+
+
+def test_cli_check_fails_on_stale_artifact(modes):
+    assert _cli("build", "--modes", str(modes)).returncode == 0
+    _mode(modes, "plan", "review")
+    stale = _cli("check", "--modes", str(modes))
+    assert stale.returncode == 1
+    assert json.loads(stale.stdout)["changed_modes"] == ["plan"]
@@ -1,5 +1,6 @@
 """Tests for modes adherence — validates frontmatter config, guidance content, and agent inclusions."""
 
+import importlib.util
 import re
 from pathlib import Path
 
@@ -41,6 +42,12 @@ EXECUTION_AGENTS = [
     "code-quality-reviewer.md",
 ]
 
+_spec = importlib.util.spec_from_file_location(
+    "mode_policy", REPO_ROOT / "skills" / "recipe-tools" / "mode_policy.py"
+)
+mode_policy = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mode_policy)
+
 # Expected transition map from design
 TRANSITION_MAP = {
     "brainstorm": {
@@ -143,6 +150,20 @@ class TestModeTransitionMap:
             "finish.md: expected allow_clear=true"
         )
 
+    def test_compiled_policy_matches(self) -> None:
+        """The shipped modes/mode-policy.json is current and agrees with the expected transition map."""
+        assert mode_policy.check(MODES_DIR)["up_to_date"], (
+            "modes/mode-policy.json is stale: run python skills/recipe-tools/mode_policy.py build"
+        )
+        policy = mode_policy.Policy.load(MODES_DIR / "mode-policy.json")
+        assert policy.modes == set(TRANSITION_MAP)
+        for source, expected in TRANSITION_MAP.items():
+            for target in TRANSITION_MAP:
+                assert policy.may_transition(source, target) == (target in expected["allowed_transitions"]), (
+                    f"compiled policy: {source} -> {target}"
+                )
+            assert policy.may_clear(source) == expected["allow_clear"], f"compiled policy: {source} allow_clear"
+
 
 # ---------------------------------------------------------------------------
 # 2. TestDoNotProhibitions
@@ -0,0 +1,255 @@
+"""Tests for the test-output condenser (skills/recipe-tools/output_digest.py),
+run against recorded runner output in tests/fixtures/test-output/."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+DIGEST_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "output_digest.py"
+RECORDED = Path(__file__).parent / "fixtures" / "test-output"
+
+_spec = importlib.util.spec_from_file_location("output_digest", DIGEST_SCRIPT)
+output_digest = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(output_digest)
+
+
+def _digest(name: str) -> dict:
+    path = RECORDED / name
+    return output_digest.digest(path.read_text(), log=str(path))
+
+
+@pytest.mark.parametrize(
+    "name, fmt, counts, signatures",
+    [
+        ("pytest.txt", "pytest", (260, 36, 4, 1), 3),
+        ("jest.txt", "jest", (14, 2, 1, 1), 2),
+        ("vitest.txt", "vitest", (8, 2, 3, 0), 1),
+        ("go.txt", "go", (0, 3, 0, 0), 1),
+        ("go-verbose.txt", "go", (1, 3, 1, 0), 1),
+        ("junit.xml", "junit", (1, 2, 1, 1), 2),
+    ],
+)
+def test_recorded_output_is_parsed(name, fmt, counts, signatures):
+    result = _digest(name)
+    assert result["format"] == fmt
+    assert (result["passed"], result["failed"], result["skipped"], result["errors"]) == counts
+    assert len(result["signatures"]) == signatures
+    assert result["status"] == "failed"
+
+
+class TestPytest:
+    def test_same_failure_in_many_tests_is_one_signature(self):
+        top = _digest("pytest.txt")["signatures"][0]
+        assert top["count"] == 30
+        assert top["signature"] == "AssertionError: assert {'status': … ', 'id': N} == {'status': N, 'body': 'ok'}"
+        assert len(top["tests"]) == output_digest.MAX_TESTS_PER_SIGNATURE
+
+    def test_blocks_map_to_full_test_ids(self):
+        tests = {test for group in _digest("pytest.txt")["signatures"] for test in group["tests"]}
+        assert "test_big.py::test_api[7]" in tests
+        assert "test_big.py::test_with_database" in tests  # "ERROR at setup of ..."
+
+    def test_trace_is_trimmed_and_points_at_the_log(self):
+        group = _digest("pytest.txt")["signatures"][1]
+        assert group["signature"] == "KeyError: 'user-N'"
+        assert len(group["trace"]) <= output_digest.TRACE_LINES
+        log_lines = (RECORDED / "pytest.txt").read_text().splitlines()
+        assert "test_api[7]" in log_lines[group["log_line"] - 1]
+
+    def test_short_summary_alone_still_lists_failures(self):
+        text = "FAILED tests/test_a.py::test_x - ValueError: bad input 42\n1 failed, 3 passed in 0.10s\n"
+        result = output_digest.digest(text)
+        assert (result["failed"], result["passed"]) == (1, 3)
+        assert result["signatures"][0]["signature"] == "ValueError: bad input N"
+
+    def test_unparsed_output_with_non_zero_exit_is_failed_with_tail(self):
+        text = "ImportError while loading conftest '/src/conftest.py'.\nconftest.py:1: in <module>\n    import missing\nE   ModuleNotFoundError: No module named 'missing'\n"
+        result = output_digest.digest(text, exit_code=4)
+        assert (result["status"], result["total"], result["exit_code"]) == ("failed", 0, 4)
+        assert result["tail"][-1] == "E   ModuleNotFoundError: No module named 'missing'"
+        assert "No failures could be parsed" in output_digest.render(result)
+
+    def test_parsed_run_has_no_tail(self):
+        assert "tail" not in output_digest.digest("3 passed in 0.10s\n", exit_code=0)
+
+
+class TestOtherRunners:
+    def test_jest_summary_repeat_is_not_double_counted(self):
+        result = _digest("jest.txt")
+        assert result["signatures"][0]["count"] == 2
+        assert not any("node:internal" in line for line in result["signatures"][0]["trace"])
+
+    def test_go_parent_of_failing_subtests_is_dropped(self):
+        tests = _digest("go-verbose.txt")["signatures"][0]["tests"]
+        assert tests == ["TestAdd", "TestTable/small", "TestTable/large"]
+
+    def test_junit_keeps_digits_inside_identifiers(self):
+        signature = _digest("junit.xml")["signatures"][0]["signature"]
+        assert signature == "org.opentest4j.AssertionFailedError: expected: <N> but was: <N>"
+
+    def test_passing_run(self):
+        result = output_digest.digest("ok  \texample.com/calc\t0.002s\n--- PASS: TestOK (0.00s)\n")
+        assert (result["status"], result["signatures"]) == ("passed", [])
+
+
+@pytest.mark.parametrize("name", sorted(path.name for path in RECORDED.iterdir()))
+def test_size_reduction_on_recorded_output(name, capsys):
+    result = _digest(name)
+    digest_bytes = len(output_digest.render(result).encode())
+    with capsys.disabled():
+        print(
+            f"\n[output-digest] {name}: raw {result['raw_bytes']} bytes -> digest {digest_bytes} bytes "
+            f"({1 - digest_bytes / result['raw_bytes']:.0%} smaller)"
+        )
+    if result["raw_bytes"] > 10_000:
+        assert digest_bytes < result["raw_bytes"] / 10
+
+
+class TestCli:
+    def test_run_keeps_full_log_under_git_dir(self, tmp_path):
+        subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+        (tmp_path / "test_sample.py").write_text("def test_ok():\n    pass\n\ndef test_bad():\n    assert 1 == 2\n")
+        result = subprocess.run(
+            [sys.executable, str(DIGEST_SCRIPT), "run", "--", sys.executable, "-m", "pytest", "-p", "no:cacheprovider"],
+            cwd=tmp_path, capture_output=True, text=True,
+        )
+        assert result.returncode == 1, result.stderr
+        report = json.loads(result.stdout)
+        assert (report["passed"], report["failed"], report["exit_code"]) == (1, 1, 1)
+        log = Path(report["log"])
+        assert log.is_relative_to(tmp_path / ".git" / "superpowers" / "test-logs")
+        assert "def test_bad" in log.read_text()
+
+    def test_markdown_digest_from_stdin(self):
+        result = subprocess.run(
+            [sys.executable, str(DIGEST_SCRIPT), "digest", "--markdown", "--log", "ci.log"],
+            input=(RECORDED / "vitest.txt").read_text(), capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.startswith("**Tests (vitest): FAILED** — 2 failed, 8 passed, 3 skipped")
+        assert "Full log: ci.log" in result.stdout
+
+    def test_run_exits_with_the_runners_code(self, tmp_path):
+        result = subprocess.run(
+            [sys.executable, str(DIGEST_SCRIPT), "run", "--markdown", "--", sys.executable, "-c", "import sys; print('boom'); sys.exit(3)"],
+            cwd=tmp_path, capture_output=True, text=True,
+        )
+        assert result.returncode == 3, result.stderr
+        assert result.stdout.startswith("**Tests (pytest): FAILED** — nothing ran (exit 3)")
+        assert "boom" in result.stdout
+
+    def test_missing_command_is_an_error(self):
+        result = subprocess.run([sys.executable, str(DIGEST_SCRIPT), "run"], capture_output=True, text=True)
+        assert result.returncode == 1
+
+
+BASE_TESTS = """
+def test_ok():
+    pass
+
+def test_known():
+    assert 1 == 2
+
+def test_changed():
+    assert {}["key"]
+
+def test_fixed():
+    assert 3 == 4
+"""
+PYTEST = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider"]
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def _commit(repo: Path, tests: str) -> None:
+    (repo / "test_sample.py").write_text(tests)
+    _git(repo, "add", "-A")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "change")
+
+
+class TestBaseline:
+    @pytest.fixture
+    def repo(self, tmp_path) -> Path:
+        repo = tmp_path / "repo"
+        _git(tmp_path, "init", "-q", str(repo))
+        _commit(repo, BASE_TESTS)
+        saved = output_digest.run(PYTEST, cwd=repo, baseline="save")
+        assert saved["baseline"]["failures"] == 3
+        return repo
+
+    def _change(self, repo: Path) -> None:
+        tests = BASE_TESTS.replace('{}["key"]', "None.key").replace("3 == 4", "3 == 3")
+        _commit(repo, tests + "\ndef test_new():\n    raise ValueError(\"new\")\n")
+
+    def test_later_runs_split_new_fixed_and_known(self, repo):
+        self._change(repo)
+        baseline = output_digest.run(PYTEST, cwd=repo)["baseline"]
+        assert baseline["known"] == ["test_sample.py::test_known"]
+        assert baseline["fixed"] == ["test_sample.py::test_fixed"]
+        new = {item["test"]: item for item in baseline["new"]}
+        assert set(new) == {"test_sample.py::test_changed", "test_sample.py::test_new"}
+        assert new["test_sample.py::test_changed"]["baseline_signature"].startswith("KeyError")
+        assert "baseline_signature" not in new["test_sample.py::test_new"]
+
+    def test_partial_run_does_not_claim_fixes(self, repo):
+        self._change(repo)
+        baseline = output_digest.run([*PYTEST, "test_sample.py::test_new"], cwd=repo)["baseline"]
+        assert (baseline["fixed"], baseline["not_run"], len(baseline["new"])) == ([], 3, 1)
+
+    def test_worktrees_share_the_base_commit_snapshot(self, repo, tmp_path):
+        worktree = tmp_path / "wt"
+        _git(repo, "worktree", "add", "-q", "-b", "feature", str(worktree))
+        self._change(worktree)
+        result = subprocess.run([sys.executable, str(DIGEST_SCRIPT), "run", "--markdown", "--", *PYTEST],
+                                cwd=worktree, capture_output=True, text=True)
+        assert result.returncode == 1, result.stderr  # pytest's code: known failures still fail
+        head = subprocess.run(["git", "-C", str(repo), "rev-parse", "--short=12", "HEAD"],
+                              capture_output=True, text=True).stdout.strip()
+        assert f"Baseline {head}: 2 new, 1 fixed, 1 known failure(s)" in result.stdout
+        assert "New failures (not failing at baseline" in result.stdout
+        assert "known at baseline" in result.stdout  # the known group collapses to one line
+        shown = subprocess.run([sys.executable, str(DIGEST_SCRIPT), "baseline"], cwd=worktree,
+                               capture_output=True, text=True)
+        assert json.loads(shown.stdout)["failures"]["test_sample.py::test_known"].startswith("assert")
+
+    def test_no_snapshot_means_no_comparison(self, tmp_path):
+        repo = tmp_path / "repo"
+        _git(tmp_path, "init", "-q", str(repo))
+        _commit(repo, BASE_TESTS)
+        assert "baseline" not in output_digest.run(PYTEST, cwd=repo)
+        missing = subprocess.run([sys.executable, str(DIGEST_SCRIPT), "baseline"], cwd=repo, capture_output=True, text=True)
+        assert missing.returncode == 1 and missing.stderr.startswith("Error:")
+
+    def test_failed_save_keeps_the_digest(self, tmp_path):
+        result = output_digest.with_baseline(_digest("pytest.txt"), (RECORDED / "pytest.txt").read_text(), tmp_path, "save")
+        assert result["failed"] == 36 and "unsaved" in result["baseline"]
+
+
+@pytest.mark.parametrize("recipe", ["git-worktree-setup.yaml", "superpowers-full-development-cycle.yaml"])
+def test_baseline_runs_save_the_snapshot(recipe):
+    text = (REPO_ROOT / "recipes" / recipe).read_text()
+    assert '"{{tools.output_digest}}" run --save-baseline --markdown --' in text
+    tools = next(
+        step for stage in yaml.safe_load(text)["stages"] for step in stage["steps"] if step["id"] == "locate-tools"
+    )
+    assert "recipe-tools/output_digest.py" in tools["command"]
+
+
+@pytest.mark.parametrize(
+    "recipe", ["subagent-driven-development.yaml", "executing-plans.yaml", "finish-branch.yaml"]
+)
+def test_recipes_run_tests_through_the_digest(recipe):
+    text = (REPO_ROOT / "recipes" / recipe).read_text()
+    assert '"{{tools.output_digest}}" run --markdown --' in text
+    tools = next(
+        step for stage in yaml.safe_load(text)["stages"] for step in stage["steps"] if step["id"] == "locate-tools"
+    )
+    assert "recipe-tools/output_digest.py" in tools["command"]
@@ -0,0 +1,153 @@
+"""Tests and speedup benchmark for k-ary parallel bisection
+(skills/systematic-debugging/parallel_bisect.py)."""
+
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+BISECT_SCRIPT = REPO_ROOT / "skills" / "systematic-debugging" / "parallel_bisect.py"
+
+_spec = importlib.util.spec_from_file_location("parallel_bisect", BISECT_SCRIPT)
+parallel_bisect = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(parallel_bisect)
+
+# Commit N writes N to version.txt; the regression lands at REGRESSION.
+REGRESSION = 27
+CHECK = f"test $(cat version.txt) -lt {REGRESSION}"
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def _make_history(path: Path, commits: int) -> list[str]:
+    _git(path, "init", "-q")
+    _git(path, "config", "user.email", "dev@example.com")
+    _git(path, "config", "user.name", "Dev")
+    shas = []
+    for number in range(commits):
+        (path / "version.txt").write_text(f"{number}\n")
+        _git(path, "add", "version.txt")
+        _git(path, "commit", "-q", "-m", f"change {number}")
+        shas.append(_git(path, "rev-parse", "HEAD").strip())
+    return shas
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> tuple[Path, list[str]]:
+    return tmp_path, _make_history(tmp_path, 40)
+
+
+def _bisect(repo: Path, shas: list[str], check: str = CHECK, **kwargs) -> dict:
+    return parallel_bisect.bisect(repo, shas[0], shas[-1], ["sh", "-c", check], **kwargs)
+
+
+class TestProbePoints:
+    def test_splits_range_into_k_plus_one_segments(self):
+        assert parallel_bisect.probe_points(-1, 39, 4) == [7, 15, 23, 31]
+
+    def test_small_range_tests_everything(self):
+        assert parallel_bisect.probe_points(10, 13, 4) == [11, 12]
+
+
+class TestBisect:
+    def test_finds_first_bad_commit(self, repo):
+        path, shas = repo
+        result = _bisect(path, shas, jobs=4)
+        assert result["first_bad_commit"] == shas[REGRESSION]
+        assert result["subject"] == f"change {REGRESSION}"
+        assert result["rounds"] < (len(shas) - 1).bit_length()
+
+    def test_binary_when_single_job(self, repo):
+        path, shas = repo
+        assert _bisect(path, shas, jobs=1)["first_bad_commit"] == shas[REGRESSION]
+
+    def test_untestable_commits_widen_the_answer(self, repo):
+        path, shas = repo
+        check = f"v=$(cat version.txt); [ $v -ge 25 ] && [ $v -le 26 ] && exit 125; {CHECK}"
+        result = _bisect(path, shas, check, jobs=3)
+        assert result["possible_first_bad"] == [shas[25], shas[26], shas[27]]
+
+    def test_outcomes_are_reused_only_on_request(self, repo):
+        path, shas = repo
+        first = _bisect(path, shas, jobs=4, cache="reuse")
+        assert _bisect(path, shas, jobs=4)["cached"] == 0
+        second = _bisect(path, shas, jobs=4, cache="reuse")
+        assert second["first_bad_commit"] == first["first_bad_commit"]
+        assert (second["tested"], second["cached"]) == (0, first["tested"])
+        assert _bisect(path, shas, jobs=4, cache="off")["cached"] == 0
+
+    def test_editing_a_repro_script_invalidates_reused_outcomes(self, repo, tmp_path_factory):
+        path, shas = repo
+        script = tmp_path_factory.mktemp("repro") / "repro.sh"
+        script.write_text(f"{CHECK}\n")
+        command = ["sh", str(script)]
+        assert parallel_bisect.bisect(path, shas[0], shas[-1], command, jobs=4, cache="reuse")["first_bad_commit"] == shas[27]
+        script.write_text("test $(cat version.txt) -lt 12\n")
+        again = parallel_bisect.bisect(path, shas[0], shas[-1], command, jobs=4, cache="reuse")
+        assert (again["first_bad_commit"], again["cached"]) == (shas[12], 0)
+
+    def test_timeouts_count_as_bad_but_are_not_cached(self, repo):
+        path, shas = repo
+        check = f"[ $(cat version.txt) -eq 31 ] && sleep 5; {CHECK}"  # 31 is a first-round probe
+        first = _bisect(path, shas, check, jobs=4, timeout=1, cache="reuse")
+        assert first["first_bad_commit"] == shas[REGRESSION] and first["timeouts"] >= 1
+        second = _bisect(path, shas, check, jobs=4, timeout=1, cache="reuse")
+        assert second["tested"] == second["timeouts"] >= 1
+
+    def test_worktrees_are_cleaned_up(self, repo):
+        path, shas = repo
+        _bisect(path, shas, jobs=4)
+        assert _git(path, "worktree", "list").count("\n") == 1
+        assert not list(parallel_bisect.bisect_dir(path).glob("run-*"))
+
+    def test_shared_dependencies_and_keyed_setup(self, repo):
+        path, shas = repo
+        (path / ".git" / "info" / "exclude").write_text("deps/\n")
+        (path / "deps").mkdir()
+        (path / "deps" / "installed").write_text("yes")
+        check = f"test -f deps/installed && {CHECK}"
+        result = _bisect(path, shas, check, jobs=3, shared=["deps"], setup="true", setup_key="LOCKFILE")
+        assert result["first_bad_commit"] == shas[REGRESSION]
+        # No lockfile in this history: setup keys on the commit, so it runs per probe.
+        assert result["setups"] == result["tested"]
+
+    def test_empty_range_is_an_error(self, repo):
+        path, shas = repo
+        with pytest.raises(ValueError):
+            parallel_bisect.bisect(path, shas[-1], shas[-1], ["true"])
+
+
+def test_cli_reports_first_bad_commit(repo):
+    path, shas = repo
+    result = subprocess.run(
+        [sys.executable, str(BISECT_SCRIPT), "--repo", str(path), "--good", shas[0], "--bad", shas[-1],
+         "--", "sh", "-c", CHECK],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert f"First bad commit: {shas[REGRESSION][:12]} change {REGRESSION}" in result.stdout
+
+
+def test_benchmark_kary_vs_serial_bisection(tmp_path, capsys):
+    """4-way bisection over 64 commits must beat binary bisection wall-clock."""
+    shas = _make_history(tmp_path, 64)
+    slow = f"sleep 0.15; {CHECK}"
+    serial = parallel_bisect.bisect(tmp_path, shas[0], shas[-1], ["sh", "-c", slow], jobs=1)
+    parallel = parallel_bisect.bisect(tmp_path, shas[0], shas[-1], ["sh", "-c", slow], jobs=4)
+    with capsys.disabled():
+        print(
+            f"\n[parallel-bisect benchmark] 63 candidates: serial {serial['rounds']} rounds "
+            f"{serial['seconds']:.2f}s, 4-way {parallel['rounds']} rounds {parallel['seconds']:.2f}s "
+            f"({serial['seconds'] / parallel['seconds']:.1f}x)"
+        )
+    assert serial["first_bad_commit"] == parallel["first_bad_commit"] == shas[REGRESSION]
+    assert parallel["rounds"] < serial["rounds"]
+    assert parallel["seconds"] < serial["seconds"]
@@ -0,0 +1,168 @@
+"""Tests for the performance regression gate (skills/verification-before-completion/perf_gate.py)."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+GATE_SCRIPT = REPO_ROOT / "skills" / "verification-before-completion" / "perf_gate.py"
+
+_spec = importlib.util.spec_from_file_location("perf_gate", GATE_SCRIPT)
+perf_gate = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(perf_gate)
+
+BENCH = """\
+import json, sys, time
+from pathlib import Path
+
+runs = Path(sys.argv[1])
+runs.write_text(runs.read_text() + "x" if runs.exists() else "x")
+start = time.perf_counter()
+time.sleep({delay})
+hot = time.perf_counter() - start
+start = time.perf_counter()
+time.sleep(0.01)
+print(json.dumps({{"hot_path": hot, "cold_path": time.perf_counter() - start}}))
+"""
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True, check=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path) -> Path:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+    (repo / "bench.py").write_text(BENCH.format(delay=0.01))
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "base")
+    _git(repo, "checkout", "-qb", "feature")
+    return repo
+
+
+def _command(tmp_path: Path) -> str:
+    return f"{sys.executable} bench.py {tmp_path / 'runs'}"
+
+
+def _slow_down_hot_path(repo: Path) -> None:
+    (repo / "bench.py").write_text(BENCH.format(delay=0.04))
+    _git(repo, "commit", "-qam", "slow")
+
+
+class TestStatistics:
+    def test_separated_samples_are_significant(self):
+        assert perf_gate.mann_whitney_greater([5, 6, 7, 8, 9], [1, 2, 3, 4, 4.5]) < 0.01
+
+    def test_overlapping_samples_are_not(self):
+        assert perf_gate.mann_whitney_greater([1, 3, 5, 7, 9], [2, 4, 6, 8, 10]) > 0.3
+
+    def test_identical_samples_are_not(self):
+        assert perf_gate.mann_whitney_greater([1.0] * 5, [1.0] * 5) == 1.0
+
+    def test_large_but_noisy_change_is_unchanged(self):
+        rows = perf_gate.compare({"a": [1.0, 1.0, 9.0]}, {"a": [1.0, 9.0, 9.0]}, threshold=0.1, alpha=0.05)
+        assert rows[0]["verdict"] == "unchanged"
+
+    def test_small_consistent_change_is_below_threshold(self):
+        rows = perf_gate.compare({"a": [1.0] * 5}, {"a": [1.05] * 5}, threshold=0.1, alpha=0.05)
+        assert rows[0]["verdict"] == "unchanged"
+
+
+class TestGate:
+    def test_slower_branch_fails(self, repo, tmp_path):
+        _slow_down_hot_path(repo)
+        result = perf_gate.gate(repo, command=_command(tmp_path))
+        verdicts = {row["benchmark"]: row["verdict"] for row in result["rows"]}
+        assert result["status"] == "failed"
+        assert verdicts == {"cold_path": "unchanged", "hot_path": "regression"}
+        assert result["regressions"] == ["hot_path"]
+
+    def test_unchanged_branch_passes(self, repo, tmp_path):
+        (repo / "README.md").write_text("docs only\n")
+        _git(repo, "add", ".")
+        _git(repo, "commit", "-qm", "docs")
+        result = perf_gate.gate(repo, command=_command(tmp_path))
+        assert result["status"] == "passed"
+        assert {row["verdict"] for row in result["rows"]} == {"unchanged"}
+
+    def test_baseline_is_cached_but_partly_remeasured(self, repo, tmp_path):
+        _slow_down_hot_path(repo)
+        first = perf_gate.gate(repo, command=_command(tmp_path), rounds=4)
+        assert first["measured_runs"] == {"base": 4, "branch": 4}
+        (repo / "bench.py").write_text(BENCH.format(delay=0.05))  # uncommitted edit: new branch key
+        second = perf_gate.gate(repo, command=_command(tmp_path), rounds=4)
+        assert second["measured_runs"] == {"base": 2, "branch": 4}
+        assert len((tmp_path / "runs").read_text()) == 14
+        assert second["status"] == "failed"
+        assert {tuple(row["samples"]) for row in second["rows"]} == {(4, 4)}  # the newest rounds only
+
+    def test_unchanged_tree_still_measures_both_sides(self, repo, tmp_path):
+        _slow_down_hot_path(repo)
+        perf_gate.gate(repo, command=_command(tmp_path), rounds=3)
+        again = perf_gate.gate(repo, command=_command(tmp_path), rounds=3, fresh=1)
+        assert again["measured_runs"] == {"base": 1, "branch": 1}
+
+    def test_untracked_files_change_the_branch_key(self, repo):
+        clean = perf_gate.branch_key(repo)
+        (repo / "fast_path.py").write_text("CACHE = True\n")
+        dirty = perf_gate.branch_key(repo)
+        (repo / "fast_path.py").write_text("CACHE = False\n")
+        assert len({clean, dirty, perf_gate.branch_key(repo)}) == 3
+
+    def test_base_worktree_is_removed(self, repo, tmp_path):
+        _slow_down_hot_path(repo)
+        perf_gate.gate(repo, command=_command(tmp_path), rounds=2)
+        assert _git(repo, "worktree", "list").count("\n") == 0
+
+    def test_configured_command_from_git_config(self, repo, tmp_path):
+        _git(repo, "config", "superpowers.perfCommand", _command(tmp_path))
+        assert perf_gate.discover(repo)["command"][-2:] == ["bench.py", str(tmp_path / "runs")]
+
+    def test_no_benchmarks(self, repo):
+        assert perf_gate.gate(repo)["status"] == "no benchmarks"
+
+
+class TestDiscovery:
+    def test_pytest_benchmark_fixture(self, tmp_path):
+        (tmp_path / "tests").mkdir()
+        (tmp_path / "tests" / "test_speed.py").write_text("def test_parse(benchmark):\n    benchmark(int, '1')\n")
+        assert perf_gate.discover(tmp_path)["kind"] == "pytest-benchmark"
+
+    def test_asv(self, tmp_path):
+        (tmp_path / "asv.conf.json").write_text("{}")
+        assert perf_gate.discover(tmp_path)["kind"] == "asv"
+
+    def test_package_json_bench_script(self, tmp_path):
+        (tmp_path / "package.json").write_text(json.dumps({"scripts": {"bench": "node bench.js"}}))
+        assert perf_gate.discover(tmp_path)["command"] == ["npm", "run", "--silent", "bench"]
+
+    def test_pytest_benchmark_report(self):
+        report = {"benchmarks": [{"fullname": "tests/test_speed.py::test_parse", "stats": {"median": 0.002}}]}
+        assert perf_gate.parse_pytest_benchmark(report) == {"tests/test_speed.py::test_parse": 0.002}
+
+
+def test_cli_markdown_evidence(repo, tmp_path, capsys):
+    _slow_down_hot_path(repo)
+    proc = subprocess.run(
+        [sys.executable, str(GATE_SCRIPT), "--repo", str(repo), "--command", _command(tmp_path), "--markdown"],
+        capture_output=True, text=True,
+    )
+    assert proc.returncode == 1, proc.stderr
+    assert proc.stdout.startswith("### Performance")
+    assert "| hot_path |" in proc.stdout and "❌ regression" in proc.stdout
+    assert "- Result: FAILED — hot_path" in proc.stdout
+    with capsys.disabled():
+        print("\n" + proc.stdout)
+
+
+def test_verify_mode_and_skill_reference_the_gate():
+    assert "perf_gate.py" in (REPO_ROOT / "modes" / "verify.md").read_text()
+    assert "perf_gate.py" in (REPO_ROOT / "skills" / "verification-before-completion" / "SKILL.md").read_text()
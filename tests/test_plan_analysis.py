@@ -0,0 +1,222 @@
+"""Tests for the plan conflict-graph analysis (skills/recipe-tools/plan_analysis.py)
+and its wiring into writing-plans.yaml."""
+
+import importlib.util
+import json
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+ANALYSIS_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "plan_analysis.py"
+WRITING_PLANS_RECIPE = REPO_ROOT / "recipes" / "writing-plans.yaml"
+
+_spec = importlib.util.spec_from_file_location("plan_analysis", ANALYSIS_SCRIPT)
+plan_analysis = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(plan_analysis)
+
+MARKDOWN_PLAN = """\
+# Implementation Plan: Auth
+
+## Tasks
+
+### Task 1: User model
+
+**Objective**: Add the model
+**Time**: 3 minutes
+**Files**:
+- `src/models/user.py` (create)
+- `tests/test_user.py` (create)
+**Depends on**: None
+
+### Task 2: Password hashing
+
+**Time**: 2-4 minutes
+**Files:**
+- Create: `src/auth/hashing.py`
+- Test: `tests/test_hashing.py`
+
+**Depends on:** None
+
+### Task 3: Registration
+
+**Files**: `src/auth/register.py` (create), `src/models/user.py:10-20` (modify)
+**Depends on**: Task 1, Task 2
+
+### Task 4: Login
+
+**Files**:
+- `src/auth/login.py` (create)
+- `src/models/user.py` (modify)
+**Depends on**: Task 1
+"""
+
+
+def _synthetic_plan(n_tasks: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    files = [f"src/module_{i}.py" for i in range(n_tasks // 2)]
+    tasks = []
+    for i in range(n_tasks):
+        deps = sorted({f"t{rng.randrange(i)}" for _ in range(rng.randint(0, 3))}) if i else []
+        tasks.append(
+            {
+                "task_id": f"t{i}",
+                "files": rng.sample(files, rng.randint(1, 4)),
+                "dependencies": deps,
+            }
+        )
+    return tasks
+
+
+def _assert_groups_are_safe(tasks: list[dict], result: dict) -> None:
+    files = {t["task_id"]: set(t["files"]) for t in tasks}
+    deps = {t["task_id"]: set(t["dependencies"]) for t in tasks}
+    seen = set()
+    for wave in result["parallel_groups"]:
+        wave_ids = {tid for group in wave for tid in group}
+        for tid in wave_ids:
+            assert deps[tid] <= seen, f"{tid} scheduled before its dependencies"
+        for group in wave:
+            for i, a in enumerate(group):
+                for b in group[i + 1 :]:
+                    assert not files[a] & files[b], f"{a} and {b} share files"
+        seen |= wave_ids
+    assert seen == set(files)
+
+
+class TestMarkdownParsing:
+    @pytest.fixture(autouse=True)
+    def parse(self):
+        self.tasks = {t["task_id"]: t for t in plan_analysis.parse_markdown(MARKDOWN_PLAN)}
+
+    def test_finds_all_tasks(self):
+        assert list(self.tasks) == ["task-1", "task-2", "task-3", "task-4"]
+
+    def test_bullet_and_inline_file_lists(self):
+        assert self.tasks["task-1"]["files"] == ["src/models/user.py", "tests/test_user.py"]
+        assert self.tasks["task-3"]["files"] == ["src/auth/register.py", "src/models/user.py"]
+
+    def test_plan_writer_style_files_block(self):
+        assert self.tasks["task-2"]["files"] == ["src/auth/hashing.py", "tests/test_hashing.py"]
+
+    def test_dependencies(self):
+        assert self.tasks["task-1"]["dependencies"] == []
+        assert self.tasks["task-3"]["dependencies"] == ["task-1", "task-2"]
+
+    def test_time_estimate_uses_upper_bound(self):
+        assert self.tasks["task-1"]["minutes"] == 3
+        assert self.tasks["task-2"]["minutes"] == 4
+
+
+class TestAnalysis:
+    def test_markdown_plan_groups(self):
+        result = plan_analysis.analyze(plan_analysis.parse_markdown(MARKDOWN_PLAN))
+        assert result["waves"] == [["task-1", "task-2"], ["task-3", "task-4"]]
+        # Task 3 and Task 4 both modify user.py, so they cannot share a group
+        assert result["parallel_groups"][1] == [["task-3"], ["task-4"]]
+        assert {"file": "src/models/user.py", "tasks": ["task-1", "task-3", "task-4"]} in result[
+            "conflicts"
+        ]
+
+    def test_critical_path(self):
+        result = plan_analysis.analyze(plan_analysis.parse_markdown(MARKDOWN_PLAN))
+        assert result["critical_path"] == ["task-2", "task-3"]
+        assert result["critical_path_length"] == 2
+        assert result["critical_path_minutes"] == 5
+
+    def test_independent_tasks_share_one_group(self):
+        tasks = [{"task_id": f"t{i}", "files": [f"f{i}.py"]} for i in range(5)]
+        result = plan_analysis.analyze(tasks)
+        assert result["parallel_groups"] == [[["t0", "t1", "t2", "t3", "t4"]]]
+        assert result["max_parallelism"] == 5
+
+    def test_cycle_falls_back_to_sequential_waves(self):
+        result = plan_analysis.analyze(
+            [
+                {"task_id": "a", "dependencies": ["b"]},
+                {"task_id": "b", "dependencies": ["a"]},
+                {"task_id": "c"},
+            ]
+        )
+        assert result["dependency_errors"] == ["Dependency cycle among: a, b"]
+        assert result["waves"] == [["a"], ["b"], ["c"]]
+        assert result["max_parallelism"] == 1
+        assert result["critical_path"] == ["a", "b", "c"]
+
+    def test_unknown_dependency_is_reported(self):
+        result = plan_analysis.analyze(
+            [{"task_id": "a", "dependencies": ["ghost"]}, {"task_id": "b", "minutes": 4}]
+        )
+        assert result["dependency_errors"] == ["a depends on unknown task(s): ghost"]
+        assert result["waves"] == [["a"], ["b"]]
+        assert result["critical_path_minutes"] == 5
+
+    def test_valid_plan_has_no_dependency_errors(self):
+        result = plan_analysis.analyze(plan_analysis.parse_markdown(MARKDOWN_PLAN))
+        assert result["dependency_errors"] == []
+
+    def test_synthetic_plan_groups_are_safe(self):
+        tasks = _synthetic_plan(100)
+        _assert_groups_are_safe(tasks, plan_analysis.analyze(tasks))
+
+
+class TestPerformance:
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_100_task_plan_well_under_a_second(self, seed):
+        tasks = _synthetic_plan(100, seed)
+        started = time.perf_counter()
+        plan_analysis.analyze(tasks)
+        elapsed = time.perf_counter() - started
+        assert elapsed < 0.25, f"analysis took {elapsed:.3f}s"
+
+
+class TestCli:
+    def test_feature_name_is_added_to_metadata(self):
+        result = subprocess.run(
+            [sys.executable, str(ANALYSIS_SCRIPT), "--feature-name", "auth"],
+            input=MARKDOWN_PLAN,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        metadata = json.loads(result.stdout)
+        assert metadata["feature_name"] == "auth"
+        assert metadata["critical_path_length"] == 2
+
+    def test_cycle_is_reported_and_exits_zero(self):
+        payload = {"tasks": [{"task_id": "a", "dependencies": ["a"]}]}
+        result = subprocess.run(
+            [sys.executable, str(ANALYSIS_SCRIPT), "--feature-name", "auth"],
+            input=json.dumps(payload),
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "cycle" in result.stderr
+        metadata = json.loads(result.stdout)
+        assert metadata["dependency_errors"] == ["Dependency cycle among: a"]
+        assert metadata["critical_path_length"] == 1
+
+
+class TestWritingPlansWiring:
+    @pytest.fixture(autouse=True)
+    def load_recipe(self):
+        recipe = yaml.safe_load(WRITING_PLANS_RECIPE.read_text())
+        self.steps = {step["id"]: step for stage in recipe["stages"] for step in stage["steps"]}
+        self.order = [step["id"] for stage in recipe["stages"] for step in stage["steps"]]
+
+    def test_analysis_runs_after_create_plan(self):
+        assert self.order.index("analyze-plan") == self.order.index("create-plan") + 1
+        assert self.steps["analyze-plan"]["type"] == "bash"
+
+    def test_plan_metadata_follows_extract_metadata(self):
+        assert self.order.index("plan-metadata") == self.order.index("extract-metadata") + 1
+        assert "--feature-name" in self.steps["plan-metadata"]["command"]
+
+    def test_plan_format_declares_dependencies(self):
+        assert "**Depends on**" in self.steps["create-plan"]["prompt"]
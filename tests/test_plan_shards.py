@@ -0,0 +1,285 @@
+"""Tests for sharded plans (skills/recipe-tools/plan_shards.py) on a synthetic 500-task plan,
+and their wiring into writing-plans, subagent-driven-development and executing-plans."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+TOOLS = REPO_ROOT / "skills" / "recipe-tools"
+SHARDS_SCRIPT = TOOLS / "plan_shards.py"
+
+
+def _load(name: str):
+    spec = importlib.util.spec_from_file_location(name, TOOLS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+plan_shards = _load("plan_shards")
+plan_analysis = _load("plan_analysis")
+
+PHASES = 10
+PER_PHASE = 50
+TASK = """### Task {n}: Migrate table {n}
+
+**Objective**: Move table_{n} to the new schema
+**Time**: 3 minutes
+**Files**:
+- `migrations/{n:04d}_table_{n}.py` (create)
+- `tests/migrations/test_{n:04d}.py` (create)
+**Depends on**: {deps}
+
+**Steps**:
+
+**Step {n}.1: Write test**
+```python
+def test_table_{n}_migrated(db):
+    migrate_{n}(db)
+    assert db.columns("table_{n}") == ["id", "payload", "created_at"]
+```
+
+**Step {n}.2: Verify test fails**
+```bash
+pytest tests/migrations/test_{n:04d}.py -v
+```
+Expected: FAIL with NameError: migrate_{n}
+
+**Step {n}.3: Implement**
+```python
+def migrate_{n}(db):
+    db.execute("ALTER TABLE table_{n} ADD COLUMN created_at TIMESTAMP")
+```
+
+**Step {n}.4: Verify test passes**
+```bash
+pytest tests/migrations/test_{n:04d}.py -v
+```
+Expected: PASS
+
+**Step {n}.5: Commit**
+```bash
+git add migrations/{n:04d}_table_{n}.py tests/migrations/test_{n:04d}.py
+git commit -m "feat: migrate table_{n}"
+```
+"""
+
+
+def synthetic_plan(phases: int = PHASES, per_phase: int = PER_PHASE) -> str:
+    parts = [
+        "# Implementation Plan: Schema Migration\n\n**Date**: 2025-01-15\n\n## Overview\n\n"
+        "### Goal\nMove every table to the new schema.\n\n---\n\n## Tasks\n"
+    ]
+    for phase in range(phases):
+        parts.append(f"\n## Phase {phase + 1}: Tables {phase * per_phase + 1}-{(phase + 1) * per_phase}\n")
+        for offset in range(per_phase):
+            n = phase * per_phase + offset + 1
+            deps = "None" if offset == 0 else f"Task {n - 1}"
+            parts.append(TASK.format(n=n, deps=deps) + "\n---\n")
+    parts.append("\n## Summary\n\n- **Total Tasks**: 500\n")
+    return "\n".join(parts)
+
+
+@pytest.fixture
+def monolithic(tmp_path) -> Path:
+    plan = tmp_path / "docs" / "plans" / "2025-01-15-migration-plan.md"
+    plan.parent.mkdir(parents=True)
+    plan.write_text(synthetic_plan())
+    return plan
+
+
+@pytest.fixture
+def sharded(monolithic) -> Path:
+    plan_shards.split(monolithic, max_tasks=40)
+    return monolithic
+
+
+@pytest.fixture
+def shard_reads(monkeypatch) -> list[str]:
+    reads: list[str] = []
+    original = plan_shards.read_shard
+
+    def counting(path):
+        reads.append(Path(path).name)
+        return original(path)
+
+    monkeypatch.setattr(plan_shards, "read_shard", counting)
+    return reads
+
+
+class TestSplit:
+    def test_phases_become_bounded_shards(self, sharded):
+        info = plan_shards.info(sharded)
+        assert info["complete"] is True, info["problems"]
+        assert (info["shards"], info["total_tasks"], info["largest_shard"]) == (20, 500, 40)
+
+    def test_index_keeps_overview_and_summary_but_no_tasks(self, sharded):
+        text = sharded.read_text()
+        assert "Move every table to the new schema." in text
+        assert "## Summary" in text
+        assert "### Task" not in text
+        assert "| 2. Tables 1-50 (part 2 of 2) | `2025-01-15-migration-plan/phase-02.md` | 10 | task-41 – task-50 |" in text
+
+    def test_nothing_is_lost(self, monolithic):
+        before = plan_analysis.parse_markdown(monolithic.read_text())
+        plan_shards.split(monolithic, max_tasks=40)
+        after = plan_shards.refs(monolithic)["tasks"]
+        assert [{k: t[k] for k in ("task_id", "files", "dependencies")} for t in after] == [
+            {k: t[k] for k in ("task_id", "files", "dependencies")} for t in before
+        ]
+
+    def test_phase_boundaries_are_respected(self, sharded):
+        first = (plan_shards.shard_dir(sharded) / "phase-03.md").read_text()
+        assert first.startswith("# Phase 3: Tables 51-100 (part 1 of 2)")
+        assert "### Task 51:" in first and "### Task 50:" not in first
+
+
+class TestRefsAndExpand:
+    def test_refs_are_compact(self, sharded, capsys):
+        payload = json.dumps(plan_shards.refs(sharded))
+        full = json.dumps({"tasks": list(plan_shards.iter_tasks(sharded))})
+        one = json.dumps(plan_shards.expand(plan_shards.refs(sharded)["tasks"][0], sharded))
+        with capsys.disabled():
+            print(
+                f"\n[plan-shards] 500 tasks: full plan_data {len(full)} bytes, refs {len(payload)} bytes, "
+                f"one expanded task {len(one)} bytes"
+            )
+        assert len(payload) < len(full) / 4
+        assert "spec" not in json.loads(payload)["tasks"][0]
+
+    def test_expand_reads_only_the_shards_it_needs(self, sharded, shard_reads):
+        tasks = plan_shards.refs(sharded)["tasks"]
+        shard_reads.clear()
+        batch = plan_shards.expand({"tasks": [tasks[0], tasks[1], tasks[45]], "all_tasks_complete": False}, sharded)
+        assert sorted(shard_reads) == ["phase-01.md", "phase-02.md"]
+        assert batch["all_tasks_complete"] is False
+        task = batch["tasks"][2]
+        assert task["task_id"] == "task-46"
+        assert task["description"] == "Move table_46 to the new schema"
+        assert "def migrate_46(db):" in task["spec"]
+        assert task["acceptance_criteria"] == "FAIL with NameError: migrate_46\nPASS"
+
+    def test_window_is_the_task_and_its_successor(self, sharded, shard_reads):
+        tasks = plan_shards.refs(sharded)["tasks"]
+        shard_reads.clear()
+        window = plan_shards.expand({"tasks": tasks}, sharded, window="task-40")["tasks"]
+        assert [t["task_id"] for t in window] == ["task-40", "task-41"]
+        assert all("spec" in t for t in window)
+        assert sorted(shard_reads) == ["phase-01.md", "phase-02.md"]
+
+    def test_tasks_without_a_shard_pass_through(self, sharded):
+        task = {"task_id": "task-1", "spec": "agent-parsed"}
+        assert plan_shards.expand(task, sharded) == task
+
+    def test_plain_plan_is_one_page(self, monolithic):
+        assert plan_shards.info(monolithic) == {"sharded": False, "plan": str(monolithic), "total_tasks": 500}
+        assert plan_shards.refs(monolithic)["sharded"] is False
+
+    def test_refs_drive_the_conflict_analysis(self, sharded):
+        analysis = plan_analysis.analyze(plan_shards.refs(sharded)["tasks"])
+        assert analysis["critical_path_length"] == PER_PHASE
+        assert len(analysis["waves"]) == PER_PHASE
+
+
+class TestInit:
+    @pytest.fixture
+    def outline(self) -> dict:
+        return {
+            "title": "Schema Migration",
+            "overview": "## Overview\n\nMove every table to the new schema.",
+            "phases": [
+                {
+                    "name": f"Tables {p * 50 + 1}-{(p + 1) * 50}",
+                    "goal": "Migrate the tables",
+                    "tasks": [
+                        {"task_id": p * 50 + i + 1, "title": f"Migrate table {p * 50 + i + 1}", "files": [], "dependencies": []}
+                        for i in range(50)
+                    ],
+                }
+                for p in range(10)
+            ],
+        }
+
+    def test_writes_index_and_stubs(self, tmp_path, outline):
+        index = tmp_path / "2025-01-15-migration-plan.md"
+        result = plan_shards.init(index, outline, max_tasks=25)
+        assert len(result["shards"]) == 20 and result["total_tasks"] == 500
+        shard = result["shards"][1]
+        assert shard["name"] == "Tables 1-50 (part 2 of 2)"
+        assert [t["task_id"] for t in shard["tasks"]][:2] == ["task-26", "task-27"]
+        assert Path(shard["path"]).read_text() == shard["header"]
+
+    def test_info_reports_unwritten_shards_until_writers_finish(self, tmp_path, outline):
+        index = tmp_path / "2025-01-15-migration-plan.md"
+        result = plan_shards.init(index, outline)
+        assert plan_shards.info(index)["complete"] is False
+        for shard in result["shards"]:  # what each parallel shard writer does
+            body = "\n---\n".join(
+                TASK.format(n=int(t["task_id"].split("-")[1]), deps="None") for t in shard["tasks"]
+            )
+            Path(shard["path"]).write_text(shard["header"] + "\n" + body)
+        info = plan_shards.info(index)
+        assert info["complete"] is True, info["problems"]
+        assert info["total_tasks"] == 500
+
+
+def test_cli_refs_and_expand(sharded):
+    refs = subprocess.run(
+        [sys.executable, str(SHARDS_SCRIPT), "refs", "--plan", str(sharded)], capture_output=True, text=True, check=True
+    ).stdout
+    assert json.loads(refs)["total_tasks"] == 500
+    first = json.dumps(json.loads(refs)["tasks"][0])
+    expanded = subprocess.run(
+        [sys.executable, str(SHARDS_SCRIPT), "expand", "--plan", str(sharded)], input=first, capture_output=True, text=True
+    )
+    assert expanded.returncode == 0, expanded.stderr
+    assert "def migrate_1(db):" in json.loads(expanded.stdout)["spec"]
+
+
+def _steps(recipe: str) -> dict:
+    data = yaml.safe_load((REPO_ROOT / "recipes" / recipe).read_text())
+    found = {}
+
+    def walk(steps):
+        for step in steps:
+            found[step["id"]] = step
+            walk(step.get("steps", []))
+
+    for stage in data["stages"]:
+        walk(stage["steps"])
+    return found
+
+
+class TestRecipes:
+    def test_writing_plans_writes_shards_in_parallel(self):
+        steps = _steps("writing-plans.yaml")
+        assert "plan_shards.py" in steps["locate-tools"]["command"]
+        assert steps["outline-plan"]["parse_json"] is True
+        assert '"{{tools.plan_shards}}" init' in steps["init-shards"]["command"]
+        write = steps["write-shards"]
+        assert (write["foreach"], write["parallel"]) == ("{{plan_shards.shards}}", True)
+        assert steps["create-plan"]["condition"] == "{{sharded}} != 'true'"
+        assert steps["save-plan"]["condition"] == "{{sharded}} != 'true'"
+
+    @pytest.mark.parametrize("recipe", ["subagent-driven-development.yaml", "executing-plans.yaml"])
+    def test_executors_load_sharded_plans_without_an_agent(self, recipe):
+        steps = _steps(recipe)
+        assert steps["load-plan"]["condition"] == "{{plan_index.sharded}} == false"
+        assert steps["load-plan-refs"]["condition"] == "{{plan_index.sharded}} == true"
+        assert steps["load-plan-refs"]["output"] == "plan_data"
+
+    def test_sdd_expands_each_task_from_its_shard(self):
+        steps = _steps("subagent-driven-development.yaml")
+        pipeline = steps["per-task-pipeline"]["steps"]
+        assert pipeline[0]["id"] == "load-task"
+        assert '"{{tools.plan_shards}}" expand' in pipeline[0]["command"]
+        assert "--window" in steps["speculate-next"]["command"]
+
+    def test_executing_plans_expands_each_batch(self):
+        assert '"{{tools.plan_shards}}" expand' in _steps("executing-plans.yaml")["identify-batch"]["command"]
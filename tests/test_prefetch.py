@@ -0,0 +1,220 @@
+"""Tests for approval-gate prefetch (skills/recipe-tools/prefetch.py) and its recipe wiring."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+PREFETCH_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "prefetch.py"
+RECIPES = REPO_ROOT / "recipes"
+
+_spec = importlib.util.spec_from_file_location("prefetch", PREFETCH_SCRIPT)
+prefetch = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(prefetch)
+
+# A read-only "suite": reads the tree, takes a while, reports what it saw.
+SUITE = [sys.executable, "-c", "import pathlib, time; time.sleep(0.3); print('app says', pathlib.Path('app.py').read_text().strip())"]
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True, check=True).stdout
+
+
+def _cli(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, str(PREFETCH_SCRIPT), *args], capture_output=True, text=True)
+
+
+@pytest.fixture
+def repo(tmp_path) -> Path:
+    repo = tmp_path / "repo"
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "Dev")
+    (repo / ".gitignore").write_text("__pycache__/\n")
+    (repo / "app.py").write_text("v1\n")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "init")
+    return repo
+
+
+class TestTake:
+    def test_unchanged_tree_reuses_the_prefetch(self, repo):
+        assert prefetch.start(repo, "suite", SUITE)["started"] is True
+        time.sleep(0.6)  # the human reviews
+        result = prefetch.take(repo, "suite", SUITE)
+        assert (result["status"], result["exit_code"], result["output"]) == ("reused", 0, "app says v1\n")
+        assert result["seconds_saved"] > 0.2
+
+    def test_running_prefetch_is_awaited(self, repo):
+        prefetch.start(repo, "suite", SUITE)
+        assert prefetch.take(repo, "suite")["status"] == "reused"
+
+    def test_failing_result_is_reused_too(self, repo):
+        prefetch.start(repo, "suite", [sys.executable, "-c", "raise SystemExit(3)"])
+        assert (prefetch.take(repo, "suite")["status"], prefetch.report(repo)["reused"]) == ("reused", 1)
+
+    @pytest.mark.parametrize("change, part", [
+        (lambda repo: (repo / "app.py").write_text("v2\n"), "tracked"),
+        (lambda repo: (repo / "new_module.py").write_text("x = 1\n"), "untracked"),
+        (lambda repo: (_git(repo, "commit", "-q", "--allow-empty", "-m", "fixup"), None)[1], "head"),
+    ])
+    def test_relevant_change_discards_and_reruns(self, repo, change, part):
+        prefetch.start(repo, "suite", SUITE)
+        change(repo)
+        result = prefetch.take(repo, "suite")
+        assert (result["status"], result["changed"]) == ("ran", [part])
+        assert result["output"] == f"app says {(repo / 'app.py').read_text().strip()}\n"
+
+    def test_excluded_and_ignored_paths_are_irrelevant(self, repo):
+        prefetch.start(repo, "suite", SUITE, exclude=["docs/plans"])
+        (repo / "docs" / "plans").mkdir(parents=True)
+        (repo / "docs" / "plans" / "feature-plan.md").write_text("# Plan\n")
+        (repo / "__pycache__").mkdir()
+        (repo / "__pycache__" / "app.pyc").write_bytes(b"\0")
+        assert prefetch.take(repo, "suite")["status"] == "reused"
+
+    def test_watched_file_outside_the_tree(self, repo, tmp_path):
+        settings = tmp_path / "settings.toml"
+        settings.write_text("debug = false\n")
+        prefetch.start(repo, "suite", SUITE, watch=[str(settings)])
+        settings.write_text("debug = true\n")
+        assert prefetch.take(repo, "suite")["changed"] == ["watched"]
+
+    def test_command_that_edits_the_tree_is_not_reused(self, repo):
+        prefetch.start(repo, "suite", [sys.executable, "-c", "open('app.py', 'w').write('v3')"])
+        assert prefetch.take(repo, "suite", SUITE)["status"] == "ran"
+
+    def test_fresh_worktree_of_the_same_commit_reuses_it(self, repo, tmp_path):
+        prefetch.start(repo, "baseline", SUITE)
+        worktree = tmp_path / "feature"
+        _git(repo, "worktree", "add", "-q", "-b", "feature", str(worktree))
+        assert prefetch.take(worktree, "baseline")["status"] == "reused"
+
+    def test_worktree_without_the_main_checkouts_edits_reruns(self, repo, tmp_path):
+        (repo / "app.py").write_text("uncommitted\n")
+        prefetch.start(repo, "baseline", SUITE)
+        worktree = tmp_path / "feature"
+        _git(repo, "worktree", "add", "-q", "-b", "feature", str(worktree))
+        result = prefetch.take(worktree, "baseline")
+        assert (result["status"], result["output"]) == ("ran", "app says v1\n")
+
+    def test_nothing_prefetched(self, repo):
+        assert prefetch.take(repo, "suite")["status"] == "missing"
+        assert prefetch.take(repo, "suite", SUITE)["status"] == "ran"
+
+    def test_each_prefetch_is_taken_once(self, repo):
+        prefetch.start(repo, "suite", SUITE)
+        prefetch.take(repo, "suite")
+        assert prefetch.take(repo, "suite", SUITE)["status"] == "ran"
+
+
+class TestStart:
+    def test_same_tree_is_a_no_op(self, repo):
+        first = prefetch.start(repo, "suite", SUITE)
+        again = prefetch.start(repo, "suite", SUITE)
+        assert (first["started"], again["started"]) == (True, False)
+
+    def test_changed_tree_restarts(self, repo):
+        prefetch.start(repo, "suite", SUITE)
+        (repo / "app.py").write_text("v2\n")
+        assert prefetch.start(repo, "suite", SUITE)["started"] is True
+        assert prefetch.take(repo, "suite")["output"] == "app says v2\n"
+
+    def test_state_stays_out_of_the_tree(self, repo):
+        prefetch.start(repo, "suite", SUITE)
+        prefetch.take(repo, "suite")
+        assert _git(repo, "status", "--porcelain") == ""
+        assert (repo / ".git" / "superpowers" / "prefetch" / "prefetch.json").exists()
+
+    def test_drop_stops_the_run(self, repo):
+        prefetch.start(repo, "suite", [sys.executable, "-c", "import time; time.sleep(30)"])
+        assert prefetch.drop(repo, "suite")["dropped"] is True
+        assert prefetch.report(repo)["pending"] == []
+
+
+class TestCli:
+    def test_disabled_runs_inline(self, repo):
+        started = json.loads(_cli("--repo", str(repo), "start", "--name", "suite", "--enabled", "false", "--", *SUITE).stdout)
+        assert started == {"started": False, "name": "suite", "reason": "disabled"}
+        taken = json.loads(_cli("--repo", str(repo), "take", "--name", "suite", "--enabled", "false", "--", *SUITE).stdout)
+        assert taken["status"] == "ran"
+
+    def test_markdown_take_and_report(self, repo):
+        assert _cli("--repo", str(repo), "start", "--name", "suite", "--", *SUITE).returncode == 0
+        taken = _cli("--repo", str(repo), "take", "--name", "suite", "--markdown")
+        assert taken.stdout.startswith("_Prefetched during the approval gate; tree unchanged")
+        assert taken.stdout.rstrip().endswith("app says v1")
+        report = _cli("--repo", str(repo), "report", "--markdown").stdout
+        assert "Prefetched steps taken: 1 (reused 1, discarded 0)" in report
+
+    def test_start_needs_a_command(self, repo):
+        result = _cli("--repo", str(repo), "start", "--name", "suite")
+        assert result.returncode == 1 and result.stderr.startswith("Error:")
+
+    @pytest.mark.parametrize("files, expected", [
+        ({"Makefile": "build:\n\tcc x.c\ntest:\n\t./run\n"}, "make test"),
+        ({"package.json": '{"scripts": {"test": "vitest run"}}'}, "npm test"),
+        ({"pyproject.toml": "[tool.pytest.ini_options]\n"}, "python3 -m pytest"),
+        ({"tests/test_app.py": ""}, "python3 -m pytest"),
+        ({"Cargo.toml": "[package]\n"}, "cargo test"),
+        ({"go.mod": "module x\n"}, "go test ./..."),
+    ])
+    def test_test_command_detection(self, repo, files, expected):
+        for name, text in files.items():
+            (repo / name).parent.mkdir(parents=True, exist_ok=True)
+            (repo / name).write_text(text)
+        assert _cli("--repo", str(repo), "test-command").stdout.strip() == expected
+
+    def test_no_test_command(self, repo):
+        (repo / "package.json").write_text('{"scripts": {"test": "echo \\"Error: no test specified\\" && exit 1"}}')
+        assert _cli("--repo", str(repo), "test-command").returncode == 1
+
+
+def test_post_approval_latency(repo, capsys):
+    """The step after the gate costs a take instead of a suite run."""
+    suite = [sys.executable, "-c", "import time; time.sleep(1.5); print('42 passed')"]
+    began = time.perf_counter()
+    prefetch.take(repo, "cold", suite)
+    cold = time.perf_counter() - began
+
+    prefetch.start(repo, "warm", suite)
+    time.sleep(2.0)  # the review outlasts the suite
+    began = time.perf_counter()
+    result = prefetch.take(repo, "warm", suite)
+    warm = time.perf_counter() - began
+    with capsys.disabled():
+        print(f"\n[prefetch] post-approval step: inline suite {cold:.2f}s, prefetched {warm * 1000:.0f}ms")
+    assert result["status"] == "reused"
+    assert warm < cold / 5
+
+
+GATES = [
+    # (recipe, gated stages, stage that takes the result)
+    ("subagent-driven-development.yaml", ["final-review"], "finish"),
+    ("executing-plans.yaml", ["batch-report"], "finish"),
+    ("superpowers-full-development-cycle.yaml", ["design", "planning"], "implementation"),
+]
+
+
+@pytest.mark.parametrize("recipe_name, gated, consumer", GATES)
+def test_recipes_prefetch_across_their_gates(recipe_name, gated, consumer):
+    recipe = yaml.safe_load((RECIPES / recipe_name).read_text())
+    stages = {stage["name"]: stage for stage in recipe["stages"]}
+    assert recipe["context"]["prefetch"] == "true" and "test_command" in recipe["context"]
+    names = set()
+    for name in gated:
+        stage = stages[name]
+        assert "approval" in stage
+        last = stage["steps"][-1]
+        assert " start --name " in last["command"] and '--enabled "{{prefetch}}"' in last["command"]
+        names.add(last["command"].split(" start --name ")[1].split()[0])
+    (take,) = [step for step in stages[consumer]["steps"] if " take --name " in step.get("command", "")]
+    assert {take["command"].split(" take --name ")[1].split()[0]} == names
+    text = (RECIPES / recipe_name).read_text()
+    assert "prefetch.py" in text and "{{" + take["output"] + "}}" in text
@@ -4,9 +4,14 @@ The recipe MUST implement: for each task → implement → spec-review loop →
 It must NOT use the batch-all-then-review-all anti-pattern (three separate foreach loops).
 """
 
-import yaml
+import json
+import os
+import subprocess
 from pathlib import Path
 
+import pytest
+import yaml
+
 RECIPES_DIR = Path(__file__).parent.parent / "recipes"
 SUBAGENT_RECIPE = RECIPES_DIR / "subagent-driven-development.yaml"
 FULL_CYCLE_RECIPE = RECIPES_DIR / "superpowers-full-development-cycle.yaml"
@@ -299,3 +304,32 @@ class TestExecutingPlansRecipeReview:
             "executing-plans.yaml must include a 'PER-TASK REVIEW' section "
             "with spec check, quality check, and test verification requirements"
         )
+
+
+class TestLocateTools:
+    """Every recipe resolves skills/recipe-tools/ the same way and stops when it can't."""
+
+    RECIPES = sorted(RECIPES_DIR.glob("*.yaml"))
+
+    @staticmethod
+    def _run(recipe: Path, skills: str, home: Path) -> subprocess.CompletedProcess:
+        steps = [step for stage in load_recipe(recipe)["stages"] for step in stage["steps"]]
+        (locate,) = [step for step in steps if step["id"] == "locate-tools"]
+        script = locate["command"].replace("{{superpowers_skills}}", skills)
+        return subprocess.run(["bash", "-c", script], capture_output=True, text=True, env={**os.environ, "HOME": str(home)})
+
+    @pytest.mark.parametrize("recipe", RECIPES, ids=lambda path: path.stem)
+    def test_override_is_used(self, recipe, tmp_path):
+        result = self._run(recipe, str(RECIPES_DIR.parent / "skills") + "/", tmp_path)
+        assert result.returncode == 0, result.stderr
+        tools = json.loads(result.stdout)
+        assert tools["skills_dir"] == str(RECIPES_DIR.parent / "skills")
+        assert all(Path(path).exists() for path in tools.values())
+
+    @pytest.mark.parametrize("recipe", RECIPES, ids=lambda path: path.stem)
+    def test_missing_skills_directory_fails(self, recipe, tmp_path):
+        searched = self._run(recipe, "", tmp_path)
+        assert searched.returncode == 1 and searched.stdout == ""
+        assert "found in $HOME/.amplifier. Set superpowers_skills" in searched.stderr
+        wrong = self._run(recipe, str(tmp_path), tmp_path)
+        assert wrong.returncode == 1 and f"found in {tmp_path}." in wrong.stderr
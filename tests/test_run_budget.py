@@ -0,0 +1,230 @@
+"""Tests and timeout simulation for adaptive step timeouts and the run budget
+(skills/recipe-tools/run_budget.py), plus its wiring into subagent-driven-development.yaml."""
+
+import importlib.util
+import json
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+BUDGET_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "run_budget.py"
+SUBAGENT_RECIPE = REPO_ROOT / "recipes" / "subagent-driven-development.yaml"
+
+_spec = importlib.util.spec_from_file_location("run_budget", BUDGET_SCRIPT)
+run_budget = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(run_budget)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    return tmp_path
+
+
+class TestAdaptiveTimeout:
+    def test_default_until_enough_samples(self):
+        samples = [{"seconds": 100, "size": 1}] * (run_budget.MIN_SAMPLES - 1)
+        assert run_budget.adaptive_timeout(samples, 1, 900) == {"timeout": 900, "source": "default", "samples": 4}
+
+    def test_scales_with_task_size(self):
+        samples = [{"seconds": 100 * size, "size": size} for size in (1, 2, 3, 4, 5)]
+        small = run_budget.adaptive_timeout(samples, 1, 900)["timeout"]
+        large = run_budget.adaptive_timeout(samples, 8, 900)["timeout"]
+        assert (small, large) == (150, 1200)
+
+    def test_clamped_to_floor_and_ceiling(self):
+        fast = [{"seconds": 1, "size": 1}] * 5
+        slow = [{"seconds": 5000, "size": 1}] * 5
+        assert run_budget.adaptive_timeout(fast, 1, 900)["timeout"] == run_budget.MIN_TIMEOUT
+        assert run_budget.adaptive_timeout(slow, 1, 900)["timeout"] == 900 * run_budget.MAX_FACTOR
+
+    def test_remaining_budget_caps_timeout(self):
+        result = run_budget.adaptive_timeout([], 1, 900, remaining=300)
+        assert result == {"timeout": 300, "source": "budget", "samples": 0}
+
+    def test_task_size(self):
+        assert run_budget.task_size({}) == 1
+        assert run_budget.task_size({"files": ["a.py", "b.py"], "spec": "x" * 3000}) == 4
+
+    def test_history_is_shared_and_bounded(self, repo, monkeypatch):
+        monkeypatch.setattr(run_budget, "MAX_SAMPLES", 3)
+        for seconds in (10, 20, 30, 40):
+            run_budget.record(repo, "implement", seconds)
+        assert [s["seconds"] for s in run_budget.samples_for(repo, "implement")] == [20, 30, 40]
+        assert run_budget.history_path(repo) == repo / ".git" / "superpowers" / "step-history.json"
+
+
+class TestRunBudget:
+    def test_unlimited_budget_is_normal(self, repo):
+        status = run_budget.start(repo, "docs/plans/auth-plan.md")
+        assert (status["mode"], status["max_review_iterations"]) == ("normal", 3)
+
+    def test_wall_clock_degrades_modes(self, repo):
+        run_budget.start(repo, "auth-plan", wall_clock_minutes=100)
+        started = json.loads(run_budget.run_path(repo, "auth-plan").read_text())["started_at"]
+        modes = [
+            run_budget.status(repo, "auth-plan", now=started + minutes * 60)["mode"]
+            for minutes in (10, 70, 90, 120)
+        ]
+        assert modes == ["normal", "constrained", "critical", "critical"]
+
+    def test_tokens_are_charged_from_output(self, repo):
+        run_budget.start(repo, "auth-plan", tokens=1000)
+        run_budget.charge(repo, "auth-plan", "x" * 3600)
+        status = run_budget.status(repo, "auth-plan")
+        assert status["tokens_used"] == 900
+        assert status["mode"] == "critical"
+
+    def test_start_opens_a_new_session(self, repo):
+        run_budget.start(repo, "auth-plan", wall_clock_minutes=10, tokens=1000)
+        run_budget.charge(repo, "auth-plan", "x" * 4000)
+        path = run_budget.run_path(repo, "auth-plan")
+        budget = json.loads(path.read_text())
+        budget["started_at"] -= 3600
+        path.write_text(json.dumps(budget))
+        assert run_budget.status(repo, "auth-plan")["mode"] == "critical"
+
+        status = run_budget.start(repo, "auth-plan", wall_clock_minutes=10, tokens=1000)
+        assert (status["mode"], status["tokens_used"], status["max_review_iterations"]) == ("normal", 0, 3)
+        assert status["remaining_seconds"] >= 590
+
+    def test_plans_with_the_same_name_do_not_share_a_budget(self, repo):
+        run_budget.start(repo, "docs/plans/x-plan.md", tokens=1000)
+        run_budget.charge(repo, "docs/plans/x-plan.md", "x" * 4000)
+        run_budget.start(repo, "other/dir/x-plan.md", tokens=1000)
+        assert run_budget.status(repo, "other/dir/x-plan.md")["tokens_used"] == 0
+        assert run_budget.status(repo, "docs/plans/x-plan.md")["tokens_used"] == 1000
+        assert run_budget.run_path(repo, str(repo / "docs/plans/x-plan.md")).name == "docs-plans-x-plan.json"
+
+    def test_gate_caps_review_iterations(self, repo):
+        run_budget.start(repo, "auth-plan", tokens=1000)
+        assert run_budget.gate(repo, "auth-plan", 1, approved=False) is False
+        run_budget.charge(repo, "auth-plan", "x" * 2800)  # 70% spent -> constrained
+        assert run_budget.gate(repo, "auth-plan", 1, approved=False) is False
+        assert run_budget.gate(repo, "auth-plan", 2, approved=False) is True
+        assert run_budget.gate(repo, "auth-plan", 1, approved=True) is True
+
+
+class TestCli:
+    def test_plan_and_gate(self, repo):
+        def run(*args, stdin=""):
+            return subprocess.run(
+                [sys.executable, str(BUDGET_SCRIPT), "--repo", str(repo), *args],
+                input=stdin, capture_output=True, text=True,
+            )
+
+        assert run("start", "--run", "auth-plan").returncode == 0
+        planned = run("plan", "--run", "auth-plan", "--step", "implement=900", stdin='{"files": ["a.py"]}')
+        assert planned.returncode == 0, planned.stderr
+        assert json.loads(planned.stdout)["timeouts"] == {"implement": 900}
+        gate = run("gate", "--run", "auth-plan", "--iterations", "3", "--approved", "false")
+        assert gate.stdout.strip() == "true"
+        record = run("record", "implement", "--started-at", str(time.time() - 5), "--run", "auth-plan", stdin="done")
+        assert json.loads(record.stdout) == {"step": "implement", "samples": 1}
+
+
+class TestSubagentRecipeWiring:
+    @pytest.fixture
+    def steps(self) -> dict:
+        recipe = yaml.safe_load(SUBAGENT_RECIPE.read_text())
+        flat = {}
+
+        def walk(step_list):
+            for step in step_list:
+                flat[step["id"]] = step
+                walk(step.get("steps", []))
+
+        for stage in recipe["stages"]:
+            walk(stage["steps"])
+        return flat
+
+    def test_review_loops_break_on_budget_gate(self, steps):
+        for stage in ("spec", "quality"):
+            assert steps[f"{stage}-review-loop"]["break_when"] == f"{{{{{stage}_done}}}} == 'true'"
+            assert "gate" in steps[f"{stage}-gate"]["command"]
+            # The last round's fix still runs; only the next review is skipped
+            assert steps[f"{stage}-fix"]["condition"] == f"{{{{{stage}_approved}}}} == 'false'"
+            assert f"record {stage}-review" in steps[f"feed-{stage}-review"]["command"]
+
+    def test_implementer_gets_learned_time_budget(self, steps):
+        assert "plan --run" in steps["task-budget"]["command"]
+        assert "{{task_budget.timeouts.implement}}" in steps["implement"]["prompt"]
+        assert "record implement" in steps["feed-implemented"]["command"]
+
+
+# ---------------------------------------------------------------------------
+# Simulation: the engine enforces the recipe's literal timeout. Compare the
+# hand-written literal with the one `recommend` suggests from recorded history.
+# ---------------------------------------------------------------------------
+
+MAX_ATTEMPTS = 2
+
+
+def _literal_timeout(step_id: str) -> int:
+    recipe = yaml.safe_load(SUBAGENT_RECIPE.read_text())
+    found = []
+
+    def walk(step_list):
+        for step in step_list:
+            if step["id"] == step_id:
+                found.append(step["timeout"])
+            walk(step.get("steps", []))
+
+    for stage in recipe["stages"]:
+        walk(stage["steps"])
+    (timeout,) = found
+    assert isinstance(timeout, int)  # the engine needs a literal; templated values are not enforced
+    return timeout
+
+
+class StubProvider:
+    """Implement-step durations: ~110s per size unit with noise; some sessions hang."""
+
+    def __init__(self, seed: int = 7, hang_rate: float = 0.08):
+        self.rng = random.Random(seed)
+        self.hang_rate = hang_rate
+
+    def duration(self, size: int) -> float:
+        if self.rng.random() < self.hang_rate:
+            return float("inf")
+        return 110 * size * self.rng.lognormvariate(0, 0.25)
+
+
+def _simulate(timeout: int, tasks: list[int], repo: Path | None = None) -> dict:
+    """Run tasks against a fixed engine timeout, recording what finished into ``repo``'s history."""
+    provider = StubProvider()
+    killed_completable = wasted_seconds = 0
+    for size in tasks:
+        for _ in range(MAX_ATTEMPTS):
+            needed = provider.duration(size)
+            if needed <= timeout:
+                if repo is not None:
+                    run_budget.record(repo, "implement", needed, size)
+                break
+            # A killed step fails before its record step runs, so it leaves no sample
+            wasted_seconds += timeout
+            killed_completable += needed != float("inf")
+    return {"killed_completable": killed_completable, "wasted_seconds": wasted_seconds}
+
+
+def test_simulation_recommended_literal_kills_fewer_completable_runs(repo, capsys):
+    configured = _literal_timeout("implement")
+    rng = random.Random(3)
+    _simulate(configured, rng.choices(range(1, 11), k=60), repo)  # history from earlier runs
+    (row,) = run_budget.recommend(repo, {"implement": configured})
+    sizes = rng.choices(range(1, 11), k=150)
+    static, retuned = _simulate(configured, sizes), _simulate(row["suggested_timeout"], sizes)
+    with capsys.disabled():
+        print(
+            f"\n[run-budget simulation] {len(sizes)} tasks: literal {configured}s killed {static['killed_completable']} "
+            f"completable runs, wasted {static['wasted_seconds'] / 3600:.1f}h; recommended {row['suggested_timeout']}s "
+            f"killed {retuned['killed_completable']}, wasted {retuned['wasted_seconds'] / 3600:.1f}h"
+        )
+    assert row["configured_timeout"] == configured
+    assert retuned["killed_completable"] < static["killed_completable"]
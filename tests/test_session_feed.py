@@ -0,0 +1,209 @@
+"""Tests for the live session feed (skills/recipe-tools/session_feed.py)
+and its wiring into subagent-driven-development.yaml."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+FEED_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "session_feed.py"
+SUBAGENT_RECIPE = REPO_ROOT / "recipes" / "subagent-driven-development.yaml"
+
+_spec = importlib.util.spec_from_file_location("session_feed", FEED_SCRIPT)
+session_feed = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(session_feed)
+
+
+@pytest.fixture
+def plan(tmp_path: Path) -> Path:
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    plan_path = tmp_path / "docs" / "plans" / "auth-plan.md"
+    plan_path.parent.mkdir(parents=True)
+    plan_path.write_text("# Auth plan\n")
+    session_feed.init(
+        plan_path,
+        [
+            {"task_id": "task-1", "description": "User model"},
+            {"task_id": "task-2", "description": "Login endpoint"},
+        ],
+    )
+    return plan_path
+
+
+def _run_task(plan: Path, task_id: str, spec_verdicts: list[bool], quality_verdicts: list[bool]) -> None:
+    session_feed.emit(plan, task_id, "started")
+    session_feed.emit(plan, task_id, "implemented", "files_changed: [src/user.py, tests/test_user.py]")
+    for approved in spec_verdicts:
+        session_feed.emit(plan, task_id, "spec_review", "VERDICT: NEEDS CHANGES — missing field", approved)
+    for approved in quality_verdicts:
+        session_feed.emit(plan, task_id, "quality_review", "VERDICT: APPROVED", approved)
+    session_feed.emit(plan, task_id, "completed")
+
+
+class TestFeed:
+    def test_files_live_in_the_git_dir_keyed_by_plan_path(self, plan, tmp_path):
+        session_feed.emit(plan, "task-1", "started")
+        runtime = tmp_path / ".git" / "superpowers" / "session-feed"
+        assert session_feed.feed_path(plan) == runtime / "docs-plans-auth-plan.feed.jsonl"
+        assert session_feed.state_path(plan) == runtime / "docs-plans-auth-plan.state.json"
+        assert session_feed.feed_path(plan).exists()
+        assert sorted(path.name for path in plan.parent.iterdir()) == ["auth-plan.md"]
+        shown = subprocess.run([sys.executable, str(FEED_SCRIPT), "path", "--plan", str(plan)],
+                               capture_output=True, text=True, check=True)
+        assert json.loads(shown.stdout)["feed"] == str(session_feed.feed_path(plan))
+
+    def test_worktrees_share_the_feed(self, plan, tmp_path):
+        subprocess.run(["git", "-C", str(tmp_path), "add", "-A"], check=True)
+        subprocess.run(["git", "-C", str(tmp_path), "-c", "user.name=dev", "-c", "user.email=dev@example.com",
+                        "commit", "-qm", "plan"], check=True)
+        worktree = tmp_path / "wt"
+        subprocess.run(["git", "-C", str(tmp_path), "worktree", "add", "-q", str(worktree)], check=True)
+        assert session_feed.state_path(worktree / "docs" / "plans" / "auth-plan.md") == session_feed.state_path(plan)
+
+    def test_outside_a_repository_files_sit_next_to_plan(self, tmp_path):
+        plan = tmp_path / "loose" / "auth-plan.md"
+        plan.parent.mkdir()
+        if subprocess.run(["git", "-C", str(plan.parent), "rev-parse"], capture_output=True).returncode == 0:
+            pytest.skip("temporary directory is inside a git repository")
+        assert session_feed.feed_path(plan) == plan.with_name("auth-plan.feed.jsonl")
+
+    def test_init_seeds_pending_tasks(self, plan):
+        state = session_feed.load_state(plan)
+        assert state["order"] == ["task-1", "task-2"]
+        assert {task["state"] for task in state["tasks"].values()} == {"pending"}
+
+    def test_status_reflects_mid_run_progress(self, plan):
+        session_feed.emit(plan, "task-1", "started")
+        session_feed.emit(plan, "task-1", "implemented", "files_changed: [src/user.py]")
+        table = session_feed.status_table(session_feed.load_state(plan))
+        assert "| task-1 | spec-review |" in table
+        assert "| task-2 | pending |" in table
+
+    def test_review_iterations_are_counted(self, plan):
+        _run_task(plan, "task-1", [False, True], [True])
+        task = session_feed.load_state(plan)["tasks"]["task-1"]
+        assert task["state"] == "completed"
+        assert (task["spec_iterations"], task["spec_approved"]) == (2, True)
+        assert (task["quality_iterations"], task["quality_approved"]) == (1, True)
+        assert task["files"] == ["src/user.py", "tests/test_user.py"]
+
+    def test_a_new_run_starts_review_counts_from_zero(self, plan):
+        """The spec gate compares spec_iterations; a second run must not inherit the first run's rounds."""
+        _run_task(plan, "task-1", [False, False, True], [True])
+        session_feed.emit(plan, "task-1", "started")
+        task = session_feed.emit(plan, "task-1", "spec_review", "missing validation", approved=False)
+        assert (task["spec_iterations"], task["spec_approved"], task["attempts"]) == (1, False, 2)
+        assert task["quality_iterations"] == 0 and "finished_at" not in task
+
+    def test_rerun_starts_a_new_session(self, plan):
+        _run_task(plan, "task-1", [True], [True])
+        _run_task(plan, "task-2", [True], [True])
+        session_feed.init(plan, [{"task_id": "task-1"}, {"task_id": "task-2"}, {"task_id": "task-3"}])
+        session_feed.emit(plan, "task-1", "started")
+        state = session_feed.load_state(plan)
+        assert [state["tasks"][t]["state"] for t in state["order"]] == ["implementing", "pending", "pending"]
+        assert "- Successfully completed: 0" in session_feed.summary(state)
+        assert [event["event"] for event in session_feed.tail(plan)] == ["started"]
+
+    def test_state_can_be_replayed_from_feed(self, plan):
+        _run_task(plan, "task-1", [True], [False, False, False])
+        replayed = {"order": ["task-1", "task-2"], "tasks": {}}
+        replayed["tasks"] = {
+            "task-1": session_feed._new_task("task-1", "User model"),
+            "task-2": session_feed._new_task("task-2", "Login endpoint"),
+        }
+        for event in session_feed.tail(plan):
+            session_feed.fold(replayed, event)
+        assert replayed == session_feed.load_state(plan)
+
+    def test_unknown_event_is_rejected(self, plan):
+        with pytest.raises(ValueError):
+            session_feed.emit(plan, "task-1", "merged")
+
+    def test_concurrent_emits_lose_nothing(self, plan):
+        threads = [
+            threading.Thread(target=session_feed.emit, args=(plan, f"task-{i % 2 + 1}", "spec_review", "", False))
+            for i in range(40)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        tasks = session_feed.load_state(plan)["tasks"]
+        assert tasks["task-1"]["spec_iterations"] + tasks["task-2"]["spec_iterations"] == 40
+        assert len(list(session_feed.tail(plan))) == 40
+
+
+class TestSummary:
+    def test_summary_is_ready_when_last_task_completes(self, plan):
+        _run_task(plan, "task-1", [False, True], [True])
+        _run_task(plan, "task-2", [True], [True])
+        text = session_feed.summary(session_feed.load_state(plan))
+        assert "- Total tasks: 2" in text
+        assert "- Successfully completed: 2" in text
+        assert "### task-1 — User model" in text
+        assert "- Spec compliance: approved (2 iterations)" in text
+        assert "- task-1: 2 spec / 1 quality review rounds" in text
+        assert "WARNING" not in text
+
+    def test_unresolved_reviews_are_flagged(self, plan):
+        _run_task(plan, "task-1", [True], [False, False, False])
+        text = session_feed.summary(session_feed.load_state(plan))
+        assert "- WARNING: task-1: unresolved quality issues after 3 iterations" in text
+        assert "- Successfully completed: 0" in text
+        assert "- Not finished: task-2" in text
+
+
+class TestCli:
+    def _run(self, *args: str, stdin: str = "") -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(FEED_SCRIPT), *args], input=stdin, capture_output=True, text=True
+        )
+
+    def test_emit_and_status(self, plan):
+        result = self._run(
+            "emit", "--plan", str(plan), "--task", "task-1", "--event", "spec_review", "--approved", "false",
+            stdin="VERDICT: NEEDS CHANGES — missing validation\n",
+        )
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout)["spec_approved"] is False
+        status = self._run("status", "--plan", str(plan))
+        assert "| task-1 | spec-review | needs changes (1) |" in status.stdout
+
+
+class TestSubagentRecipeWiring:
+    @pytest.fixture
+    def steps(self) -> dict:
+        recipe = yaml.safe_load(SUBAGENT_RECIPE.read_text())
+        task_stage = next(stage for stage in recipe["stages"] if stage["name"] == "task-execution")
+        flat = {}
+
+        def walk(step_list):
+            for step in step_list:
+                flat[step["id"]] = step
+                walk(step.get("steps", []))
+
+        walk(task_stage["steps"])
+        return flat
+
+    def test_every_pipeline_stage_emits(self, steps):
+        for step_id, event in [
+            ("feed-started", "started"),
+            ("feed-implemented", "implemented"),
+            ("feed-spec-review", "spec_review"),
+            ("feed-quality-review", "quality_review"),
+            ("feed-completed", "completed"),
+        ]:
+            assert f"--event {event}" in steps[step_id]["command"]
+
+    def test_summary_is_rendered_not_summarized(self, steps):
+        summary = steps["task-summary"]
+        assert summary["type"] == "bash"
+        assert "summary" in summary["command"]
+        assert summary["output"] == "execution_summary"
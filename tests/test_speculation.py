@@ -0,0 +1,186 @@
+"""Tests for pipelined (speculative next-task) execution (skills/recipe-tools/speculation.py)
+and its wiring into subagent-driven-development.yaml."""
+
+import importlib.util
+import json
+import stat
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+SPECULATION_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "speculation.py"
+SUBAGENT_RECIPE = REPO_ROOT / "recipes" / "subagent-driven-development.yaml"
+
+_spec = importlib.util.spec_from_file_location("speculation", SPECULATION_SCRIPT)
+speculation = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(speculation)
+
+PLAN = "docs/plans/auth-plan.md"
+PLAN_DATA = {
+    "tasks": [
+        {"task_id": "task-1", "description": "User model", "files": ["user.py"]},
+        {"task_id": "task-2", "description": "Login", "files": ["login.py"]},
+    ]
+}
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def _commit(repo: Path, path: str, content: str) -> None:
+    (repo / path).write_text(content)
+    _git(repo, "add", path)
+    _git(repo, "commit", "-q", "-m", f"update {path}")
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(speculation, "POLL_SECONDS", 0.05)
+    project = tmp_path / "project"
+    project.mkdir()
+    _git(project, "init", "-q")
+    _git(project, "config", "user.email", "dev@example.com")
+    _git(project, "config", "user.name", "Dev")
+    _commit(project, "user.py", "class User: ...\n")  # task-1's implementation commit
+    return project
+
+
+@pytest.fixture
+def implementer(tmp_path: Path) -> str:
+    """Stub speculative session: implements task-2 by committing login.py."""
+    script = tmp_path / "fake-implementer"
+    script.write_text(
+        "#!/bin/sh\n"
+        "echo 'def login(): ...' > login.py\n"
+        "git add login.py && git commit -q -m 'task-2: login'\n"
+        "echo 'files_changed: [login.py]'\n"
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+def _launch(repo: Path, command: str) -> dict:
+    return speculation.launch(repo, PLAN, PLAN_DATA, "task-1", command)
+
+
+class TestSpeculation:
+    def test_last_task_has_nothing_to_speculate(self, repo, implementer):
+        assert speculation.launch(repo, PLAN, PLAN_DATA, "task-2", implementer)["launched"] is False
+
+    def test_unchanged_review_reuses_work(self, repo, implementer):
+        assert _launch(repo, implementer)["task_id"] == "task-2"
+        assert speculation.reconcile(repo, PLAN, "task-1", wait=10)["outcome"] == "reused"
+        adopted = speculation.adopt(repo, PLAN, "task-2")
+        assert adopted["reuse"] is True
+        assert "files_changed: [login.py]" in adopted["report"]
+        assert (repo / "login.py").exists()
+
+    def test_fix_to_other_files_is_rebased(self, repo, implementer):
+        _launch(repo, implementer)
+        _commit(repo, "user.py", "class User:\n    name: str\n")  # spec fix for task-1
+        assert speculation.reconcile(repo, PLAN, "task-1", wait=10)["outcome"] == "rebased"
+        assert speculation.adopt(repo, PLAN, "task-2")["reuse"] is True
+        assert "task-2: login" in _git(repo, "log", "-1", "--format=%s")
+        assert "name: str" in (repo / "user.py").read_text()
+
+    def test_fix_to_same_files_discards_work(self, repo, implementer):
+        _launch(repo, implementer)
+        _commit(repo, "login.py", "# reviewer asked task-1 to stub login\n")
+        result = speculation.reconcile(repo, PLAN, "task-1", wait=10)
+        assert (result["outcome"], result["overlap"]) == ("discarded", ["login.py"])
+        assert speculation.adopt(repo, PLAN, "task-2") == {"reuse": False, "report": ""}
+        assert "speculative/" not in _git(repo, "branch", "--list")
+
+    def test_slow_session_is_killed(self, repo):
+        _launch(repo, "sh -c 'sleep 30'")
+        assert speculation.reconcile(repo, PLAN, "task-1", wait=0.3)["outcome"] == "not_finished"
+
+    def test_no_speculation_to_reconcile(self, repo):
+        assert speculation.reconcile(repo, PLAN, "task-1") == {"speculated": False}
+
+    def test_report_counts_waste_and_saving(self, repo, implementer):
+        _launch(repo, implementer)
+        speculation.reconcile(repo, PLAN, "task-1", wait=10)
+        speculation.adopt(repo, PLAN, "task-2")
+        result = speculation.report(repo, PLAN)
+        assert (result["speculations"], result["adopted"], result["waste_rate"]) == (1, 1, 0.0)
+        assert result["outcomes"] == {"reused": 1}
+        assert "## Pipelined Execution" in speculation._markdown(result)
+
+    def test_start_clears_an_earlier_run(self, repo, implementer):
+        _launch(repo, implementer)
+        speculation.reconcile(repo, PLAN, "task-1", wait=10)
+        speculation.adopt(repo, PLAN, "task-2")
+        _launch(repo, "sh -c 'sleep 30'")
+        assert speculation.start(repo, PLAN) == {"cleared": 1}
+        assert speculation.report(repo, PLAN)["speculations"] == 0
+        assert "speculative/" not in _git(repo, "branch", "--list")
+        assert len(_git(repo, "worktree", "list").splitlines()) == 1
+
+    def test_plans_with_the_same_name_are_kept_apart(self, repo, implementer):
+        other = "other/dir/auth-plan.md"
+        assert speculation.state_path(repo, PLAN) != speculation.state_path(repo, other)
+        assert _launch(repo, implementer)["branch"] == "speculative/docs-plans-auth-plan/task-2"
+        speculation.reconcile(repo, PLAN, "task-1", wait=10)
+        assert speculation.report(repo, other)["speculations"] == 0
+
+    def test_state_stays_out_of_the_tree(self, repo, implementer):
+        _launch(repo, implementer)
+        speculation.reconcile(repo, PLAN, "task-1", wait=10)
+        assert speculation.state_path(repo, PLAN).is_relative_to(repo / ".git")
+        assert _git(repo, "status", "--porcelain") == ""
+
+
+class TestCli:
+    def test_disabled_is_a_no_op(self, repo):
+        result = subprocess.run(
+            [sys.executable, str(SPECULATION_SCRIPT), "--repo", str(repo),
+             "adopt", "--plan", PLAN, "--task", "task-2", "--enabled", "false"],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout) == {"reuse": False, "report": ""}
+
+
+class TestSubagentRecipeWiring:
+    @pytest.fixture
+    def recipe(self) -> dict:
+        return yaml.safe_load(SUBAGENT_RECIPE.read_text())
+
+    @pytest.fixture
+    def steps(self, recipe) -> dict:
+        flat = {}
+
+        def walk(step_list):
+            for step in step_list:
+                flat[step["id"]] = step
+                walk(step.get("steps", []))
+
+        for stage in recipe["stages"]:
+            walk(stage["steps"])
+        return flat
+
+    def test_pipelining_is_opt_in(self, recipe):
+        assert recipe["context"]["pipelined"] == "false"
+
+    def test_speculation_brackets_the_review_loops(self, recipe):
+        pipeline = next(
+            step for stage in recipe["stages"] for step in stage["steps"] if step["id"] == "per-task-pipeline"
+        )
+        order = [step["id"] for step in pipeline["steps"]]
+        assert order.index("adopt-speculation") < order.index("implement")
+        assert order.index("implement") < order.index("speculate-next") < order.index("spec-review-loop")
+        assert order.index("quality-review-loop") < order.index("reconcile-speculation")
+
+    def test_adopted_work_skips_the_implementer(self, steps):
+        assert steps["implement"]["condition"] == "{{speculation.reuse}} == false"
+        assert steps["use-speculative-report"]["output"] == "task_implementation"
+        for step_id in ("start-speculation", "adopt-speculation", "speculate-next", "reconcile-speculation"):
+            assert '--enabled "{{pipelined}}"' in steps[step_id]["command"]
@@ -0,0 +1,239 @@
+"""Tests and benchmark for the worktree symbol index (skills/recipe-tools/symbol_index.py)."""
+
+import importlib.util
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+INDEX_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "symbol_index.py"
+WORKTREE_RECIPE = REPO_ROOT / "recipes" / "git-worktree-setup.yaml"
+
+_spec = importlib.util.spec_from_file_location("symbol_index", INDEX_SCRIPT)
+symbol_index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(symbol_index)
+
+PY_MODULE = '''\
+import os
+from app.models import User as Account
+
+LIMIT = 10
+
+
+class Service:
+    def handle(self, request):
+        return validate(request)
+
+
+def validate(request):
+    return os.path.exists(request)
+'''
+
+TS_MODULE = '''\
+import { validate, format } from "./validators";
+
+export class Widget {}
+
+export function render(x: number) {
+  return format(validate(x));
+}
+
+export const toLabel = (x: number) => render(x);
+'''
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def _init_repo(path: Path) -> Path:
+    _git(path, "init", "-q")
+    _git(path, "config", "user.email", "dev@example.com")
+    _git(path, "config", "user.name", "Dev")
+    return path
+
+
+def _commit_all(repo: Path, message: str = "update") -> None:
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    _init_repo(tmp_path)
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "service.py").write_text(PY_MODULE)
+    (tmp_path / "web").mkdir()
+    (tmp_path / "web" / "widget.ts").write_text(TS_MODULE)
+    _commit_all(tmp_path, "initial")
+    symbol_index.build(tmp_path)
+    return tmp_path
+
+
+def _names(rows: list[dict]) -> list[tuple[str, int, str]]:
+    return [(row["path"], row["line"], row["kind"]) for row in rows]
+
+
+class TestExtraction:
+    def test_python_definitions(self, repo):
+        conn = symbol_index.connect(repo)
+        assert _names(symbol_index.find_defs(conn, "Service")) == [("app/service.py", 7, "class")]
+        assert _names(symbol_index.find_defs(conn, "handle")) == [("app/service.py", 8, "method")]
+        assert _names(symbol_index.find_defs(conn, "validate")) == [("app/service.py", 12, "function")]
+        assert _names(symbol_index.find_defs(conn, "LIMIT")) == [("app/service.py", 4, "variable")]
+
+    def test_python_imports_and_calls(self, repo):
+        conn = symbol_index.connect(repo)
+        importers = symbol_index.find_importers(conn, "app.models")
+        assert [(row["path"], row["name"]) for row in importers] == [("app/service.py", "Account")]
+        assert ("app/service.py", 9, "call") in _names(symbol_index.find_refs(conn, "validate"))
+
+    def test_typescript_patterns(self, repo):
+        conn = symbol_index.connect(repo)
+        assert _names(symbol_index.find_defs(conn, "Widget")) == [("web/widget.ts", 3, "class")]
+        assert _names(symbol_index.find_defs(conn, "toLabel")) == [("web/widget.ts", 9, "function")]
+        importers = symbol_index.find_importers(conn, "format")
+        assert [(row["path"], row["line"]) for row in importers] == [("web/widget.ts", 1)]
+        assert ("web/widget.ts", 6, "call") in _names(symbol_index.find_refs(conn, "validate"))
+
+    def test_syntax_error_does_not_break_indexing(self, tmp_path):
+        assert symbol_index.extract("broken.py", "def oops(:\n") == ([], [], [])
+
+    def test_unsupported_files_are_skipped(self):
+        assert symbol_index.extract("notes.md", "# hi") is None
+
+
+class TestIncrementalUpdate:
+    def test_committed_change_is_picked_up(self, repo):
+        (repo / "app" / "extra.py").write_text("def brand_new():\n    pass\n")
+        _commit_all(repo)
+        result = symbol_index.update(repo)
+        assert result["reindexed_paths"] == 1
+        conn = symbol_index.connect(repo)
+        assert _names(symbol_index.find_defs(conn, "brand_new")) == [("app/extra.py", 1, "function")]
+
+    def test_uncommitted_change_is_visible(self, repo):
+        (repo / "app" / "service.py").write_text(PY_MODULE.replace("def validate", "def check"))
+        symbol_index.update(repo)
+        conn = symbol_index.connect(repo)
+        assert symbol_index.find_defs(conn, "validate") == []
+        assert symbol_index.find_defs(conn, "check")
+
+    def test_reverted_dirty_change_is_reindexed(self, repo):
+        (repo / "app" / "service.py").write_text("X = 1\n")
+        symbol_index.update(repo)
+        _git(repo, "checkout", "--", "app/service.py")
+        symbol_index.update(repo)
+        assert symbol_index.find_defs(symbol_index.connect(repo), "Service")
+
+    def test_deleted_file_is_removed(self, repo):
+        _git(repo, "rm", "-q", "web/widget.ts")
+        _commit_all(repo)
+        symbol_index.update(repo)
+        assert symbol_index.find_defs(symbol_index.connect(repo), "Widget") == []
+
+    def test_noop_update_touches_nothing(self, repo):
+        assert symbol_index.update(repo) == {"mode": "update", "indexed_files": 0}
+
+    def test_index_lives_in_git_dir(self, repo):
+        assert symbol_index.index_path(repo) == repo / ".git" / "superpowers" / "symbols.sqlite"
+
+
+class TestCli:
+    def test_grep_style_output_and_exit_codes(self, repo):
+        found = subprocess.run(
+            [sys.executable, str(INDEX_SCRIPT), "def", "Service", "--repo", str(repo)],
+            capture_output=True,
+            text=True,
+        )
+        assert found.returncode == 0, found.stderr
+        assert found.stdout.strip() == "app/service.py:7: class Service"
+        missing = subprocess.run(
+            [sys.executable, str(INDEX_SCRIPT), "def", "Nope", "--repo", str(repo)],
+            capture_output=True,
+            text=True,
+        )
+        assert missing.returncode == 1
+
+
+class TestWorktreeSetupWiring:
+    def test_worktree_setup_builds_index(self):
+        recipe = yaml.safe_load(WORKTREE_RECIPE.read_text())
+        steps = {step["id"]: step for stage in recipe["stages"] for step in stage["steps"]}
+        step = steps["build-symbol-index"]
+        assert step["type"] == "bash"
+        assert "build" in step["command"]
+        assert step["on_error"] == "continue"
+
+    @pytest.mark.parametrize("agent", ["implementer.md", "spec-reviewer.md", "code-quality-reviewer.md"])
+    def test_agents_are_told_to_use_index(self, agent):
+        assert "symbol_index.py def" in (REPO_ROOT / "agents" / agent).read_text()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: index lookups vs repeated repository scans
+# ---------------------------------------------------------------------------
+
+N_PACKAGES = 40
+MODULES_PER_PACKAGE = 30
+
+
+def _make_large_fixture(root: Path) -> list[str]:
+    names = []
+    for pkg in range(N_PACKAGES):
+        pkg_dir = root / f"pkg{pkg}"
+        pkg_dir.mkdir()
+        for mod in range(MODULES_PER_PACKAGE):
+            name = f"handler_{pkg}_{mod}"
+            names.append(name)
+            body = [f"from pkg{(pkg + 1) % N_PACKAGES}.mod0 import handler_{(pkg + 1) % N_PACKAGES}_0", ""]
+            for fn in range(15):
+                body += [f"def helper_{mod}_{fn}(value):", f"    return value * {fn}", ""]
+            body += [f"def {name}(request):", f"    return helper_{mod}_0(request)", ""]
+            (pkg_dir / f"mod{mod}.py").write_text("\n".join(body))
+    return names
+
+
+def _scan_command(name: str, root: Path) -> list[str]:
+    if shutil.which("rg"):
+        return ["rg", "-n", rf"def {name}\b", str(root)]
+    return ["grep", "-rnE", rf"def {name}\b", str(root)]
+
+
+def test_benchmark_index_vs_repeated_scans(tmp_path, capsys):
+    """Per-task lookups: indexed queries must beat re-scanning the tree every time."""
+    root = _init_repo(tmp_path)
+    names = _make_large_fixture(root)
+    _commit_all(root, "fixture")
+
+    started = time.perf_counter()
+    symbol_index.build(root)
+    build_seconds = time.perf_counter() - started
+
+    queries = names[:: len(names) // 25][:25]
+
+    started = time.perf_counter()
+    for name in queries:
+        subprocess.run(_scan_command(name, root), capture_output=True, check=True)
+    scan_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    symbol_index.update(root)  # one refresh per task, as the CLI does per invocation
+    conn = symbol_index.connect(root)
+    for name in queries:
+        assert symbol_index.find_defs(conn, name)
+        symbol_index.find_refs(conn, name)
+    index_seconds = time.perf_counter() - started
+
+    with capsys.disabled():
+        print(
+            f"\n[symbol-index benchmark] {len(names)} files, {len(queries)} lookups: "
+            f"build {build_seconds:.2f}s, scans {scan_seconds * 1000:.0f}ms, "
+            f"index {index_seconds * 1000:.0f}ms ({scan_seconds / index_seconds:.0f}x)"
+        )
+    assert index_seconds < scan_seconds
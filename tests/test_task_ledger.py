@@ -0,0 +1,248 @@
+"""Tests for the task-state ledger (skills/recipe-tools/task_ledger.py) and its
+wiring into executing-plans.yaml."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+LEDGER_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "task_ledger.py"
+EXECUTING_PLANS_RECIPE = REPO_ROOT / "recipes" / "executing-plans.yaml"
+
+_spec = importlib.util.spec_from_file_location("task_ledger", LEDGER_SCRIPT)
+task_ledger = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(task_ledger)
+
+TASKS = [
+    {"task_id": "t1", "title": "Models", "dependencies": []},
+    {"task_id": "t2", "title": "Repo", "dependencies": ["t1"]},
+    {"task_id": "t3", "title": "Config", "dependencies": []},
+    {"task_id": "t4", "title": "API", "dependencies": ["t2", "t3"]},
+]
+
+
+@pytest.fixture
+def plan(tmp_path: Path) -> Path:
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    plan_path = tmp_path / "docs" / "plans" / "2025-01-01-feature-plan.md"
+    plan_path.parent.mkdir(parents=True)
+    plan_path.write_text("# Plan\n")
+    task_ledger.init(plan_path, TASKS)
+    return plan_path
+
+
+def _ready_ids(plan_path: Path, limit=None) -> list[str]:
+    return [t["task_id"] for t in task_ledger.ready(task_ledger.load(plan_path), limit)]
+
+
+class TestLedgerFile:
+    def test_ledger_lives_in_the_git_dir_keyed_by_plan_path(self, plan, tmp_path):
+        expected = tmp_path / ".git" / "superpowers" / "task-ledger" / "docs-plans-2025-01-01-feature-plan.json"
+        assert task_ledger.ledger_path(plan) == expected
+        assert expected.exists()
+        assert sorted(path.name for path in plan.parent.iterdir()) == [plan.name]  # nothing beside the plan
+
+    def test_outside_a_repository_the_ledger_sits_next_to_plan(self, tmp_path):
+        plan = tmp_path / "loose" / "plan.md"
+        plan.parent.mkdir()
+        if subprocess.run(["git", "-C", str(plan.parent), "rev-parse"], capture_output=True).returncode == 0:
+            pytest.skip("temporary directory is inside a git repository")
+        assert task_ledger.ledger_path(plan) == plan.with_name("plan.ledger.json")
+
+    def test_reinit_preserves_progress(self, plan):
+        task_ledger.complete(plan, "t1", commit="abc123")
+        task_ledger.init(plan, TASKS)
+        task = task_ledger.load(plan)["tasks"]["t1"]
+        assert task["status"] == "completed"
+        assert task["commit"] == "abc123"
+
+    def test_reinit_requeues_interrupted_tasks(self, plan):
+        task_ledger.start(plan, "t1")
+        ledger = task_ledger.init(plan, TASKS)
+        assert ledger["last_init"]["requeued"] == ["t1"]
+        assert _ready_ids(plan) == ["t1", "t3"]
+
+    def test_reinit_drops_tasks_removed_from_the_plan(self, plan):
+        task_ledger.complete(plan, "t1")
+        ledger = task_ledger.init(plan, TASKS[:1])
+        assert ledger["last_init"]["dropped"] == ["t2", "t3", "t4"]
+        status = task_ledger.status(task_ledger.load(plan))
+        assert (status["total_tasks"], status["remaining_task_count"], status["plan_complete"]) == (1, 0, True)
+
+    def test_records_times_and_commit(self, plan):
+        task_ledger.start(plan, "t1")
+        task_ledger.complete(plan, "t1", commit="deadbeef")
+        task = task_ledger.load(plan)["tasks"]["t1"]
+        assert task["started_at"] and task["finished_at"]
+        assert task["commit"] == "deadbeef"
+
+    def test_unknown_task_raises(self, plan):
+        with pytest.raises(KeyError):
+            task_ledger.start(plan, "nope")
+
+    def test_no_temp_files_left_behind(self, plan):
+        task_ledger.start(plan, "t1")
+        assert not list(plan.parent.glob("*.tmp"))
+
+
+class TestReadySet:
+    def test_initial_ready_set_is_roots_in_plan_order(self, plan):
+        assert _ready_ids(plan) == ["t1", "t3"]
+
+    def test_limit_caps_batch(self, plan):
+        assert _ready_ids(plan, limit=1) == ["t1"]
+
+    def test_in_progress_tasks_are_not_ready(self, plan):
+        task_ledger.start(plan, "t1")
+        assert _ready_ids(plan) == ["t3"]
+
+    def test_dependents_unlock_on_completion(self, plan):
+        task_ledger.complete(plan, "t1")
+        assert _ready_ids(plan) == ["t2", "t3"]
+        task_ledger.complete(plan, "t2")
+        task_ledger.complete(plan, "t3")
+        assert _ready_ids(plan) == ["t4"]
+
+    def test_unknown_dependency_is_never_ready(self, tmp_path):
+        plan_path = tmp_path / "plan.md"
+        task_ledger.init(plan_path, [{"task_id": "a", "dependencies": ["missing"]}])
+        ledger = task_ledger.load(plan_path)
+        assert task_ledger.ready(ledger) == []
+        assert task_ledger.status(ledger)["next_action"] == "resolve_blockers"
+
+    def test_cycle_is_reported_unreachable(self, tmp_path):
+        plan_path = tmp_path / "plan.md"
+        task_ledger.init(
+            plan_path,
+            [
+                {"task_id": "a", "dependencies": ["b"]},
+                {"task_id": "b", "dependencies": ["a"]},
+            ],
+        )
+        assert task_ledger.status(task_ledger.load(plan_path))["unreachable_tasks"] == ["a", "b"]
+
+
+class TestStatus:
+    def test_continue_while_work_remains(self, plan):
+        status = task_ledger.status(task_ledger.load(plan))
+        assert status["remaining_task_count"] == 4
+        assert status["next_action"] == "continue_batches"
+        assert status["plan_complete"] is False
+
+    def test_blocked_task_needs_resolution(self, plan):
+        task_ledger.block(plan, "t1", reason="missing API key")
+        status = task_ledger.status(task_ledger.load(plan))
+        assert status["blocked_tasks"] == ["t1"]
+        assert status["next_action"] == "resolve_blockers"
+
+    def test_requeue_after_a_batch_unsticks_the_loop(self, plan):
+        task_ledger.complete(plan, "t3")
+        task_ledger.start(plan, "t1")  # the batch ended without finishing t1
+        assert _ready_ids(plan) == []
+        assert task_ledger.requeue(plan) == ["t1"]
+        assert _ready_ids(plan) == ["t1"]
+
+    def test_reset_unblocks_tasks(self, plan):
+        task_ledger.block(plan, "t1", reason="missing API key")
+        task_ledger.complete(plan, "t3", commit="abc")
+        assert task_ledger.reset(plan, ["t3"], blocked=True) == ["t3", "t1"]
+        task = task_ledger.load(plan)["tasks"]["t1"]
+        assert task["status"] == "pending" and "reason" not in task
+        assert task_ledger.status(task_ledger.load(plan))["next_action"] == "continue_batches"
+
+    def test_all_complete_proceeds_to_finish(self, plan):
+        for task in TASKS:
+            task_ledger.complete(plan, task["task_id"])
+        status = task_ledger.status(task_ledger.load(plan))
+        assert status["plan_complete"] is True
+        assert status["next_action"] == "proceed_to_finish"
+
+    def test_counts_are_stored_for_cheap_resume(self, plan):
+        task_ledger.complete(plan, "t1")
+        counts = json.loads(task_ledger.ledger_path(plan).read_text())["counts"]
+        assert counts == {"pending": 3, "in_progress": 0, "completed": 1, "blocked": 0}
+
+
+class TestConcurrency:
+    def test_concurrent_updates_are_not_lost(self, tmp_path):
+        plan_path = tmp_path / "plan.md"
+        tasks = [{"task_id": f"t{i}"} for i in range(40)]
+        task_ledger.init(plan_path, tasks)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda t: task_ledger.complete(plan_path, t["task_id"]), tasks))
+        status = task_ledger.status(task_ledger.load(plan_path))
+        assert status["counts"]["completed"] == 40
+
+
+class TestCli:
+    def _run(self, *args, stdin=None):
+        result = subprocess.run(
+            [sys.executable, str(LEDGER_SCRIPT), *args],
+            input=stdin,
+            capture_output=True,
+            text=True,
+        )
+        return result
+
+    def test_init_ready_complete_roundtrip(self, tmp_path):
+        plan_path = str(tmp_path / "plan.md")
+        init = self._run("init", "--plan", plan_path, stdin=json.dumps({"tasks": TASKS}))
+        assert init.returncode == 0, init.stderr
+        batch = json.loads(self._run("ready", "--plan", plan_path, "--limit", "3").stdout)
+        assert batch["task_ids"] == ["t1", "t3"]
+        assert batch["tasks"][0]["title"] == "Models"
+        done = self._run("complete", "--plan", plan_path, "t1", "--commit", "abc")
+        assert done.returncode == 0, done.stderr
+        status = json.loads(self._run("status", "--plan", plan_path).stdout)
+        assert status["counts"]["completed"] == 1
+
+    def test_reset_and_status_requeue(self, tmp_path):
+        plan_path = str(tmp_path / "plan.md")
+        self._run("init", "--plan", plan_path, stdin=json.dumps({"tasks": TASKS}))
+        self._run("start", "--plan", plan_path, "t1")
+        self._run("block", "--plan", plan_path, "t3", "--reason", "flaky CI")
+        status = json.loads(self._run("status", "--plan", plan_path, "--requeue").stdout)
+        assert status["requeued"] == ["t1"] and status["counts"]["in_progress"] == 0
+        reset = json.loads(self._run("reset", "--plan", plan_path, "--blocked").stdout)
+        assert reset["reset"] == ["t3"] and reset["blocked_tasks"] == []
+        assert self._run("reset", "--plan", plan_path).returncode == 1
+
+    def test_unknown_task_exits_nonzero(self, tmp_path):
+        plan_path = str(tmp_path / "plan.md")
+        self._run("init", "--plan", plan_path, stdin=json.dumps({"tasks": TASKS}))
+        result = self._run("start", "--plan", plan_path, "ghost")
+        assert result.returncode == 1
+        assert "ghost" in result.stderr
+
+
+class TestExecutingPlansWiring:
+    @pytest.fixture(autouse=True)
+    def load_recipe(self):
+        self.recipe = yaml.safe_load(EXECUTING_PLANS_RECIPE.read_text())
+        self.steps = {
+            step["id"]: step for stage in self.recipe["stages"] for step in stage["steps"]
+        }
+
+    def test_batch_selection_is_deterministic(self):
+        step = self.steps["identify-batch"]
+        assert step.get("type") == "bash"
+        assert "ready" in step["command"]
+
+    def test_remaining_check_is_deterministic(self):
+        step = self.steps["check-remaining"]
+        assert step.get("type") == "bash"
+        assert "status" in step["command"] and "--requeue" in step["command"]
+
+    def test_ledger_seeded_after_load(self):
+        assert "init" in self.steps["init-ledger"]["command"]
+
+    def test_execute_tasks_no_longer_edits_plan_for_status(self):
+        prompt = self.steps["execute-tasks"]["prompt"]
+        assert "update the plan file" not in prompt
+        assert "complete --plan" in prompt
@@ -0,0 +1,211 @@
+"""Tests and benchmark for the warm test daemon (skills/recipe-tools/test_daemon.py)."""
+
+import importlib.util
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+DAEMON_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "test_daemon.py"
+
+_spec = importlib.util.spec_from_file_location("test_daemon", DAEMON_SCRIPT)
+test_daemon = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(test_daemon)
+
+CALC = "import heavy_dep\n\n\ndef base():\n    return heavy_dep.VALUE\n"
+TEST_CALC = "from app import calc\n\n\ndef test_base():\n    assert calc.base() == 1\n"
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _append(path: Path, text: str) -> None:
+    path.write_text(path.read_text() + text)
+
+
+def _project(tmp_path: Path, monkeypatch, import_seconds: float) -> Path:
+    """A git repo whose tests import an installed dependency that is slow to import."""
+    site = tmp_path / "site"
+    _write(site / "heavy_dep.py", f"import time\n\ntime.sleep({import_seconds})\nVALUE = 1\n")
+    monkeypatch.setenv("PYTHONPATH", str(site))
+    repo = tmp_path / "repo"
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    _write(repo / "pytest.ini", "[pytest]\n")
+    _write(repo / "app" / "__init__.py", "")
+    _write(repo / "app" / "calc.py", CALC)
+    _write(repo / "app" / "other.py", "def other():\n    return 'other'\n")
+    _write(repo / "tests" / "test_calc.py", TEST_CALC)
+    _write(repo / "tests" / "test_other.py", "from app.other import other\n\n\ndef test_other():\n    assert other() == 'other'\n")
+    return repo
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    repo = _project(tmp_path, monkeypatch, import_seconds=0.3)
+    yield repo
+    test_daemon.stop(repo)
+
+
+def _run(repo: Path, *args: str, cold: bool = False) -> dict:
+    return test_daemon.run(repo, ["-q", "-p", "no:cacheprovider", *args], cold=cold)
+
+
+class TestImportGraph:
+    def test_imports_resolve_relative_and_parent_modules(self, tmp_path):
+        source = tmp_path / "views.py"
+        source.write_text("import os.path\nfrom . import models\nfrom ..core.db import session\n")
+        imports = test_daemon.module_imports("shop.web.views", source, is_package=False)
+        assert {"os", "os.path", "shop.web", "shop.web.models", "shop.core.db", "shop.core.db.session"} <= imports
+
+    def test_dependents_are_transitive(self):
+        graph = {"app.calc": set(), "app.api": {"app.calc"}, "test_api": {"app.api"}, "test_other": {"app.other"}}
+        assert test_daemon.dependents({"app.calc"}, graph) == {"app.calc", "app.api", "test_api"}
+
+
+class TestWarmRuns:
+    def test_red_green_reloads_only_what_changed(self, project):
+        assert test_daemon.start(project)["started"] is True
+        assert _run(project)["mode"] == "warm"
+
+        _append(project / "tests" / "test_calc.py", "\n\ndef test_new():\n    assert calc.new() == 2\n")
+        red = _run(project, "tests/test_calc.py::test_new")
+        assert (red["mode"], red["exit_code"], red["reloaded"]) == ("warm", 1, ["test_calc"])
+        assert "has no attribute 'new'" in red["output"]
+
+        _append(project / "app" / "calc.py", "\n\ndef new():\n    return 2\n")
+        green = _run(project, "tests/test_calc.py::test_new")
+        assert (green["mode"], green["exit_code"]) == ("warm", 0), green["output"]
+        assert green["reloaded"] == ["app.calc", "test_calc"]  # test_other and app.other stay warm
+
+    def test_runs_do_not_leak_into_each_other(self, project):
+        _write(project / "tests" / "test_state.py",
+               "from app import calc\n\n\ndef test_mutates():\n    assert not hasattr(calc, 'seen')\n    calc.seen = True\n")
+        test_daemon.start(project)
+        first, second = _run(project, "tests/test_state.py"), _run(project, "tests/test_state.py")
+        assert (first["exit_code"], second["exit_code"]) == (0, 0)
+
+    @pytest.mark.parametrize("edit, reason", [
+        (lambda repo: _write(repo / "conftest.py", "X = 1\n"), "conftest.py changed"),
+        (lambda repo: _append(repo / "pytest.ini", "addopts = -ra\n"), "pytest.ini changed"),
+        (lambda repo: _append(repo.parent / "site" / "heavy_dep.py", "EXTRA = 2\n"), "non-project module changed"),
+    ])
+    def test_unsafe_changes_fall_back_to_a_cold_run_and_rewarm(self, project, edit, reason):
+        _write(project / "conftest.py", "")
+        test_daemon.start(project)
+        edit(project)
+        cold = _run(project)
+        assert (cold["mode"], cold["exit_code"]) == ("cold", 0), cold["output"]
+        assert cold["reason"].startswith(reason)
+        assert _run(project)["mode"] == "warm"
+
+    def test_cold_on_request(self, project):
+        result = _run(project, cold=True)
+        assert (result["mode"], result["reason"], result["exit_code"]) == ("cold", "--cold requested", 0)
+
+    def test_not_a_pytest_project(self, tmp_path):
+        repo = tmp_path / "js"
+        subprocess.run(["git", "init", "-q", str(repo)], check=True)
+        _write(repo / "package.json", "{}")
+        assert test_daemon.start(repo) == {"started": False, "reason": "not a pytest project"}
+        with pytest.raises(RuntimeError, match="not a pytest project"):
+            test_daemon.run(repo, [])
+
+
+class TestInterpreter:
+    def _venv_python(self, repo: Path, body: str) -> Path:
+        python = repo / ".venv" / "bin" / "python"
+        _write(python, f"#!/bin/sh\n{body}\nVENV_MARK=1 exec {sys.executable} \"$@\"\n")
+        python.chmod(0o755)
+        _write(repo / "tests" / "test_venv.py", "import os\n\n\ndef test_venv():\n    assert os.environ['VENV_MARK'] == '1'\n")
+        return python
+
+    def test_daemon_runs_under_the_worktree_venv(self, project):
+        self._venv_python(project, "")
+        result = _run(project, "tests/test_venv.py")
+        assert (result["mode"], result["exit_code"]) == ("warm", 0), result["output"]
+        _append(project / "pytest.ini", "addopts = -ra\n")
+        rewarmed = [_run(project, "tests/test_venv.py") for _ in range(2)]
+        assert [(r["mode"], r["exit_code"]) for r in rewarmed] == [("cold", 0), ("warm", 0)]
+
+    def test_cold_run_uses_the_venv_when_no_daemon_warms_up(self, project):
+        self._venv_python(project, 'case "$*" in *serve*) echo "No module named pytest" >&2; exit 1;; esac')
+        result = _run(project, "tests/test_venv.py")
+        assert (result["mode"], result["exit_code"]) == ("cold", 0), result["output"]
+        assert result["reason"].startswith("no warm daemon")
+        assert "No module named pytest" in (test_daemon.state_dir(project) / "daemon.log").read_text()
+
+
+class TestCli:
+    def _cli(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, str(DAEMON_SCRIPT), *args], capture_output=True, text=True)
+
+    def test_run_status_stop(self, project):
+        _append(project / "tests" / "test_calc.py", "\n\ndef test_fails():\n    assert calc.base() == 2\n")
+        failed = self._cli("--repo", str(project), "run", "--", "-q", "tests/test_calc.py")
+        assert failed.returncode == 1
+        assert "1 failed, 1 passed" in failed.stdout
+        assert failed.stdout.rstrip().splitlines()[-1].startswith("[test-daemon] warm run in ")
+        as_json = json.loads(self._cli("--repo", str(project), "run", "--json", "--", "-q", "tests/test_other.py").stdout)
+        assert (as_json["exit_code"], as_json["mode"]) == (0, "warm")
+
+        status = json.loads(self._cli("--repo", str(project), "status").stdout)
+        assert status["runs"] == {"warm": 2, "cold": 0} and status["project_modules"] >= 4
+        assert json.loads(self._cli("--repo", str(project), "stop").stdout) == {"stopped": True}
+        assert json.loads(self._cli("--repo", str(project), "status").stdout)["running"] is False
+
+    def test_outside_a_repository(self, tmp_path):
+        result = self._cli("--repo", str(tmp_path), "status")
+        assert result.returncode == 1 and result.stderr.startswith("Error:")
+
+
+def test_red_green_iteration_latency(tmp_path, monkeypatch, capsys):
+    """Per-iteration latency of a RED→GREEN loop: cold pytest runs vs the warm daemon."""
+    repo = _project(tmp_path, monkeypatch, import_seconds=1.0)
+    test_file, source = repo / "tests" / "test_calc.py", repo / "app" / "calc.py"
+
+    def cycle(n: int, run) -> float:
+        began = time.perf_counter()
+        _append(test_file, f"\n\ndef test_feature_{n}():\n    assert calc.feature_{n}() == {n}\n")
+        assert run(f"tests/test_calc.py::test_feature_{n}") == 1  # RED
+        _append(source, f"\n\ndef feature_{n}():\n    return {n}\n")
+        assert run(f"tests/test_calc.py::test_feature_{n}") == 0  # GREEN
+        return time.perf_counter() - began
+
+    def cold(node: str) -> int:
+        return subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", node], cwd=repo,
+                              capture_output=True).returncode
+
+    def warm(node: str) -> int:
+        return _run(repo, node)["exit_code"]
+
+    try:
+        cold_times = [cycle(n, cold) for n in range(3)]
+        test_daemon.start(repo)
+        warm_times = [cycle(n, warm) for n in range(3, 6)]
+    finally:
+        test_daemon.stop(repo)
+    cold_avg, warm_avg = sum(cold_times) / 3, sum(warm_times) / 3
+    with capsys.disabled():
+        print(f"\n[test-daemon] RED→GREEN iteration (2 runs): cold {cold_avg:.2f}s, warm {warm_avg:.2f}s "
+              f"({cold_avg / warm_avg:.0f}x)")
+    assert warm_avg < cold_avg / 3
+
+
+def test_implementer_uses_the_daemon_for_single_tests():
+    text = (REPO_ROOT / "agents" / "implementer.md").read_text()
+    assert "test_daemon.py run --" in text and "--cold" in text
+
+
+def test_worktree_setup_starts_the_daemon():
+    stages = yaml.safe_load((REPO_ROOT / "recipes" / "git-worktree-setup.yaml").read_text())["stages"]
+    steps = {step["id"]: step for stage in stages for step in stage["steps"]}
+    assert "recipe-tools/test_daemon.py" in steps["locate-tools"]["command"]
+    assert '"{{tools.test_daemon}}" start' in steps["start-test-daemon"]["command"]
+    assert steps["start-test-daemon"]["on_error"] == "continue"
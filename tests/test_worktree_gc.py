@@ -0,0 +1,234 @@
+"""Tests for the worktree garbage collector (skills/recipe-tools/worktree_gc.py)."""
+
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).parent.parent
+GC_SCRIPT = REPO_ROOT / "skills" / "recipe-tools" / "worktree_gc.py"
+
+_spec = importlib.util.spec_from_file_location("worktree_gc", GC_SCRIPT)
+worktree_gc = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(worktree_gc)
+
+DAY = 86400
+
+
+def _git(repo: Path, *args: str, env: dict | None = None) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, text=True, check=True,
+        env={**os.environ, **(env or {})},
+    ).stdout.strip()
+
+
+def _age(path: Path, days: float) -> None:
+    """Backdate a worktree's HEAD, index and reflog (or a plain directory tree) by ``days``."""
+    stamp = time.time() - days * DAY
+    probe = subprocess.run(["git", "-C", str(path), "rev-parse", "--absolute-git-dir"], capture_output=True, text=True)
+    git_dir = Path(probe.stdout.strip()) if (path / ".git").exists() and probe.returncode == 0 else None
+    targets = [git_dir / name for name in ("HEAD", "index", "logs/HEAD")] if git_dir else [
+        Path(root) / name for root, dirs, files in os.walk(path) for name in dirs + files
+    ] + [path]
+    for target in targets:
+        if target.exists():
+            os.utime(target, (stamp, stamp))
+
+
+def _worktree(repo: Path, name: str, days: float = 0, merged: bool = False, cache_kb: int = 64) -> Path:
+    path = repo / ".worktrees" / name
+    _git(repo, "worktree", "add", "-q", "-b", name, str(path))
+    (path / f"{name}.txt").write_text(name)
+    stamp = f"@{int(time.time() - days * DAY)} +0000"
+    _git(path, "add", ".")
+    _git(path, "commit", "-qm", name, env={"GIT_COMMITTER_DATE": stamp, "GIT_AUTHOR_DATE": stamp})
+    if merged:
+        _git(repo, "merge", "-q", "--ff-only", name)
+    (path / "node_modules").mkdir()
+    (path / "node_modules" / "blob.bin").write_bytes(os.urandom(cache_kb * 1024))
+    _age(path, days)
+    return path
+
+
+@pytest.fixture
+def repo(tmp_path) -> Path:
+    repo = tmp_path / "project"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+    (repo / ".gitignore").write_text(".worktrees/\nnode_modules/\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "init")
+    return repo
+
+
+@pytest.fixture
+def estate(repo) -> dict[str, Path]:
+    """A repository after a few weeks of runs: every worktree state at once."""
+    paths = {
+        "merged": _worktree(repo, "merged", days=20, merged=True),
+        "active": _worktree(repo, "active", days=1),
+        "abandoned-old": _worktree(repo, "abandoned-old", days=40, cache_kb=128),
+        "abandoned-older": _worktree(repo, "abandoned-older", days=60, cache_kb=128),
+        "dirty": _worktree(repo, "dirty", days=60, merged=True),
+        "locked": _worktree(repo, "locked", days=60),
+        "gone": _worktree(repo, "gone", days=60),
+    }
+    (paths["dirty"] / "merged.txt").write_text("edited, not committed")
+    _git(repo, "worktree", "lock", str(paths["locked"]))
+    shutil.rmtree(paths["gone"])
+    leftover = repo / ".worktrees" / "leftover"
+    (leftover / "node_modules").mkdir(parents=True)
+    (leftover / "node_modules" / "blob.bin").write_bytes(os.urandom(64 * 1024))
+    (leftover / ".git").write_text("gitdir: /nowhere/.git/worktrees/leftover\n")
+    _age(leftover, 30)
+    scratch = repo / ".git" / "superpowers" / "bisect" / "w0"
+    _git(repo, "worktree", "add", "-q", "--detach", str(scratch), "HEAD~1")
+    _age(scratch, 1)
+    paths.update(leftover=leftover, scratch=scratch)
+    return paths
+
+
+def _states(result: dict) -> dict[str, tuple[str, str]]:
+    return {Path(entry["path"]).name: (entry["state"], entry["action"]) for entry in result["worktrees"]}
+
+
+class TestInventory:
+    def test_every_state_is_classified(self, repo, estate):
+        states = _states(worktree_gc.collect(repo, dry_run=True))
+        assert states == {
+            "project": ("protected", "keep"),
+            "merged": ("merged", "remove"),
+            "active": ("active", "keep"),
+            "abandoned-old": ("abandoned", "keep"),
+            "abandoned-older": ("abandoned", "keep"),
+            "dirty": ("protected", "keep"),
+            "locked": ("protected", "keep"),
+            "gone": ("orphaned", "remove"),
+            "leftover": ("leftover", "keep"),
+            "w0": ("scratch", "remove"),
+        }
+
+    def test_fresh_worktree_is_not_merged(self, repo):
+        """A just-created clean worktree's HEAD is in main, but it is another session's live work."""
+        stamp = f"@{int(time.time() - 30 * DAY)} +0000"
+        _git(repo, "commit", "-q", "--allow-empty", "-m", "old", env={"GIT_COMMITTER_DATE": stamp, "GIT_AUTHOR_DATE": stamp})
+        fresh = repo / ".worktrees" / "feature-new"
+        _git(repo, "worktree", "add", "-q", "-b", "feature-new", str(fresh))
+        assert _states(worktree_gc.collect(repo, dry_run=True))["feature-new"] == ("active", "keep")
+        _age(fresh, 30)  # idle, but it never made a commit: abandoned, collected only over budget
+        assert _states(worktree_gc.collect(repo, dry_run=True))["feature-new"] == ("abandoned", "keep")
+
+    def test_recently_merged_worktree_is_kept(self, repo):
+        _worktree(repo, "just-merged", days=1, merged=True)
+        assert _states(worktree_gc.collect(repo, dry_run=True))["just-merged"] == ("active", "keep")
+
+    def test_project_directories_are_never_leftovers(self, repo):
+        """A ``worktrees/`` directory, one without a ``.git`` file, or tracked content is not a leftover."""
+        for path in (repo / "worktrees" / "lib", repo / ".worktrees" / "notes", repo / ".worktrees" / "tracked"):
+            path.mkdir(parents=True)
+            (path / "code.py").write_text("x = 1\n")
+        _git(repo, "add", "-f", "worktrees", ".worktrees")
+        _git(repo, "commit", "-qm", "vendored")
+        (repo / ".worktrees" / "tracked" / ".git").write_text("gitdir: /nowhere\n")
+        for path in (repo / "worktrees", repo / ".worktrees"):
+            _age(path, 30)
+        result = worktree_gc.collect(repo)
+        assert _states(result)["tracked"] == ("protected", "keep")
+        assert "lib" not in _states(result) and "notes" not in _states(result)
+        assert all((path / "code.py").exists() for path in (repo / "worktrees" / "lib", repo / ".worktrees" / "tracked"))
+
+    def test_disk_usage_counts_caches(self, repo, estate):
+        entry = next(e for e in worktree_gc.inventory(repo) if e["branch"] == "abandoned-old")
+        assert entry["caches"]["node_modules"] >= 128 * 1024
+        assert entry["size"] > entry["caches"]["node_modules"]
+
+
+class TestCollect:
+    def test_dry_run_removes_nothing(self, repo, estate):
+        result = worktree_gc.collect(repo, dry_run=True)
+        assert all(path.exists() for name, path in estate.items() if name != "gone")
+        assert result["reclaimed"] > 0 and result["after"] == result["before"] - result["reclaimed"]
+
+    def test_collects_finished_worktrees_and_keeps_branches(self, repo, estate):
+        result = worktree_gc.collect(repo)
+        for name in ("merged", "scratch"):
+            assert not estate[name].exists()
+        for name in ("active", "abandoned-old", "abandoned-older", "dirty", "locked", "leftover"):
+            assert estate[name].exists()
+        assert "gone" not in _git(repo, "worktree", "list")
+        assert "merged" in _git(repo, "branch", "--list", "merged")
+        assert result["reclaimed"] >= 64 * 1024
+
+    def test_leftovers_are_deleted_only_when_forced(self, repo, estate):
+        (estate["leftover"] / "notes.txt").write_text("uncommitted work git cannot see")
+        _age(estate["leftover"], 30)
+        assert "--force-orphans" in worktree_gc.render(worktree_gc.collect(repo))
+        assert (estate["leftover"] / "notes.txt").exists()
+        result = worktree_gc.collect(repo, force_orphans=True)
+        assert not estate["leftover"].exists()
+        assert _states(result)["leftover"] == ("leftover", "remove")
+
+    def test_budget_removes_least_recently_used_abandoned_first(self, repo, estate):
+        sizes = {Path(e["path"]).name: e["size"] for e in worktree_gc.collect(repo, dry_run=True)["worktrees"]}
+        kept = sum(size for name, size in sizes.items() if name not in ("merged", "gone", "w0"))
+        result = worktree_gc.collect(repo, budget=kept - sizes["abandoned-older"])
+        assert not estate["abandoned-older"].exists()
+        assert estate["abandoned-old"].exists()
+        assert result["over_budget"] is False
+        assert "abandoned-older" in _git(repo, "branch", "--list", "abandoned-older")
+
+    def test_unreachable_budget_never_touches_protected_or_active(self, repo, estate):
+        result = worktree_gc.collect(repo, budget=0)
+        for name in ("active", "dirty", "locked"):
+            assert estate[name].exists()
+        assert result["over_budget"] is True
+
+    def test_old_test_logs_are_pruned(self, repo, estate):
+        logs = Path(_git(estate["active"], "rev-parse", "--absolute-git-dir")) / "superpowers" / "test-logs"
+        logs.mkdir(parents=True)
+        (logs / "old.log").write_text("x" * 100)
+        (logs / "new.log").write_text("y")
+        os.utime(logs / "old.log", (time.time() - 30 * DAY,) * 2)
+        result = worktree_gc.collect(repo)
+        assert not (logs / "old.log").exists() and (logs / "new.log").exists()
+        assert result["logs_freed"] == 100
+
+
+@pytest.mark.parametrize("text, size", [("500M", 500 << 20), ("20G", 20 << 30), ("1.5GiB", 3 << 29), ("4096", 4096)])
+def test_parse_size(text, size):
+    assert worktree_gc.parse_size(text) == size
+
+
+def test_cli_markdown_uses_configured_budget(repo, estate):
+    _git(repo, "config", "superpowers.worktreeBudget", "1K")
+    proc = subprocess.run(
+        [sys.executable, str(GC_SCRIPT), "--repo", str(repo), "--dry-run", "--markdown"], capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.startswith("### Worktree GC (dry run)")
+    assert "budget 1.0K" in proc.stdout
+    assert "| abandoned (unmerged, unused for 60 days) |" in proc.stdout
+    assert "WARNING: still" in proc.stdout
+
+
+def test_cli_json(repo, estate):
+    proc = subprocess.run([sys.executable, str(GC_SCRIPT), "--repo", str(repo), "--dry-run"], capture_output=True, text=True)
+    assert json.loads(proc.stdout)["dry_run"] is True
+
+
+def test_finish_branch_runs_the_collector():
+    recipe = yaml.safe_load((REPO_ROOT / "recipes" / "finish-branch.yaml").read_text())
+    steps = {step["id"]: step for stage in recipe["stages"] for step in stage["steps"]}
+    assert "recipe-tools/worktree_gc.py" in steps["locate-tools"]["command"]
+    assert '"{{tools.worktree_gc}}"' in steps["worktree-gc"]["command"]
+    assert steps["worktree-gc"]["on_error"] == "continue"
+    assert recipe["context"]["worktree_gc"] == "collect"